@@ -262,9 +262,10 @@ class RunTests(ExtendedTestCommand):
     def run_tests(self):
         print("Running tests")
         ret = 0
-        tests = ['interface', 'model', 'multipython', 'protocol',
+        tests = ['interface', 'model', 'multipython', 'protocol', 'perf',
                           'test_null_server.py', 'test_service.py',
                           'test_soft_validation.py', 'test_util.py',
+                          'test_import.py',
                           'test_sqlalchemy.py',
                           'test_sqlalchemy_deprecated.py',
                           'interop/test_pyramid.py']
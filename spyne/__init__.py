@@ -19,40 +19,58 @@
 
 __version__ = '2.12.0'
 
-from pytz import utc as LOCAL_TZ
-
-from spyne._base import BODY_STYLE_WRAPPED
-from spyne._base import BODY_STYLE_BARE
-from spyne._base import BODY_STYLE_EMPTY
-from spyne._base import AuxMethodContext
-from spyne._base import TransportContext
-from spyne._base import EventContext
-from spyne._base import MethodContext
-from spyne._base import MethodDescriptor
-from spyne._base import EventManager
-
-from spyne.decorator import rpc
-from spyne.decorator import srpc
-from spyne.decorator import mrpc
-
-from spyne.service import ServiceBase
-from spyne.application import Application
-
-from spyne.model import *
-
-from spyne.error import InvalidCredentialsError
-from spyne.error import RequestTooLongError
-from spyne.error import RequestNotAllowed
-from spyne.error import ArgumentError
-from spyne.error import InvalidInputError
-from spyne.error import ValidationError
-from spyne.error import InternalError
-from spyne.error import ResourceNotFoundError
-from spyne.error import RespawnError
-from spyne.error import ResourceAlreadyExistsError
-
-from spyne.client import ClientBase, RemoteProcedureBase, RemoteService
-from spyne.server import ServerBase, NullServer
+from spyne._lazy import lazy_module
+
+import spyne.model
+
+
+# The names below are only imported when they're first accessed, so that
+# short-lived processes don't have to pay for the parts of Spyne they don't use.
+_lazy_attrs = {
+    'LOCAL_TZ':                   'pytz:utc',
+
+    'BODY_STYLE_WRAPPED':         'spyne._base',
+    'BODY_STYLE_BARE':            'spyne._base',
+    'BODY_STYLE_EMPTY':           'spyne._base',
+    'AuxMethodContext':           'spyne._base',
+    'TransportContext':           'spyne._base',
+    'EventContext':               'spyne._base',
+    'MethodContext':              'spyne._base',
+    'MethodDescriptor':           'spyne._base',
+    'EventManager':               'spyne._base',
+
+    'rpc':                        'spyne.decorator',
+    'srpc':                       'spyne.decorator',
+    'mrpc':                       'spyne.decorator',
+
+    'ServiceBase':                'spyne.service',
+    'Application':                'spyne.application',
+
+    'InvalidCredentialsError':    'spyne.error',
+    'RequestTooLongError':        'spyne.error',
+    'UnsupportedContentEncodingError': 'spyne.error',
+    'RequestNotAllowed':          'spyne.error',
+    'ArgumentError':              'spyne.error',
+    'InvalidInputError':          'spyne.error',
+    'ValidationError':            'spyne.error',
+    'InternalError':              'spyne.error',
+    'ResourceNotFoundError':      'spyne.error',
+    'RespawnError':               'spyne.error',
+    'ResourceAlreadyExistsError': 'spyne.error',
+
+    'ClientBase':                 'spyne.client',
+    'RemoteProcedureBase':        'spyne.client',
+    'RemoteService':              'spyne.client',
+
+    'ServerBase':                 'spyne.server',
+    'NullServer':                 'spyne.server',
+}
+
+for _k in spyne.model.__all__:
+    _lazy_attrs[_k] = 'spyne.model'
+del _k
+
+__all__ = sorted(_lazy_attrs)
 
 
 def _vercheck():
@@ -60,3 +78,8 @@ def _vercheck():
     if not hasattr(sys, "version_info") or sys.version_info < (2, 6):
         raise RuntimeError("Spyne requires Python 2.6 or later. Trust us.")
 _vercheck()
+
+
+lazy_module(__name__, _lazy_attrs, submodules=('_base', 'decorator', 'service',
+                 'application', 'error', 'client', 'server', 'const', 'util',
+                                                  'interface', 'protocol'))
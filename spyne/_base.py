@@ -20,8 +20,9 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import threading
+
 from time import time
-from copy import copy
 from collections import deque
 
 from spyne.const.xml_ns import DEFAULT_NS
@@ -84,21 +85,49 @@ class EventContext(object):
 class MethodContext(object):
     """The base class for all RPC Contexts. Holds all information about the
     current state of execution of a remote procedure call.
+
+    The ``transport``, ``protocol`` and ``event`` sub-contexts are created on
+    first access.
     """
 
-    frozen = False
+    # Attributes are stored in slots to make creating contexts cheaper.
+    # Subclasses that don't define __slots__ can still add their own
+    # attributes in their constructors.
+    __slots__ = ('call_start', 'call_end', 'app', 'udc', '_server',
+                 '_transport', '_protocol', '_event', 'aux',
+                 'method_request_string', '__descriptor',
+                 'in_string', 'in_document', 'in_header_doc', 'in_body_doc',
+                 'in_error', 'in_header', 'in_object',
+                 'out_object', 'out_header', 'out_error', 'out_body_doc',
+                 'out_header_doc', 'out_document', 'out_string', 'out_stream',
+                 'function', 'locale', 'in_protocol', '_out_protocol',
+                 'timings', 'profiler', 'cache_key', 'flight',
+                 'frozen', '__weakref__')
 
     def copy(self):
-        retval = copy(self)
-
-        if retval.transport is not None:
-            retval.transport.parent = retval
-        if retval.protocol is not None:
-            retval.protocol.parent = retval
-        if retval.event is not None:
-            retval.event.parent = retval
+        cls = self.__class__
+        retval = cls.__new__(cls)
+
+        for k in _method_context_slots:
+            try:
+                object.__setattr__(retval, k, object.__getattribute__(self, k))
+            except AttributeError: # deleted by close()
+                pass
+
+        d = getattr(self, '__dict__', None)
+        if d is not None:
+            retval.__dict__.update(d)
+
+        if retval._transport is not None:
+            retval._transport.parent = retval
+        if retval._protocol is not None:
+            retval._protocol.parent = retval
+        if retval._event is not None:
+            retval._event.parent = retval
         if retval.aux is not None:
             retval.aux.parent = retval
+        if retval.timings is not None:
+            retval.timings = dict(retval.timings)
 
         return retval
 
@@ -133,18 +162,10 @@ class MethodContext(object):
         self.udc = None
         """The user defined context. Use it to your liking."""
 
-        self.transport = TransportContext(self, transport)
-        """The transport-specific context. Transport implementors can use this
-        to their liking."""
-
-        self.protocol = ProtocolContext(self, transport)
-        """The protocol-specific context. Protocol implementors can use this
-        to their liking."""
-
-        self.event = EventContext(self)
-        """Event-specific context. Use this as you want, preferably only in
-        events, as you'd probably want to separate the event data from the
-        method data."""
+        self._server = transport
+        self._transport = None
+        self._protocol = None
+        self._event = None
 
         self.aux = None
         """Auxiliary-method specific context. You can use this to share data
@@ -261,6 +282,27 @@ class MethodContext(object):
         self.out_protocol = transport.app.out_protocol
         """The protocol that will be used to (de)serialize outgoing input"""
 
+        self.timings = None
+        """A dict of processing phase names to their durations in seconds.
+        Only set when a :class:`spyne.util.timing.PhaseTimings` instance is
+        attached to the application, ``None`` otherwise."""
+        if getattr(self.app, 'phase_timings', None) is not None:
+            self.timings = {}
+
+        self.profiler = None
+        """The :class:`spyne.util.profiler.SamplingProfiler` instance that
+        profiles this request, if it was picked to be profiled."""
+
+        self.cache_key = None
+        """The key of the response in the cache of the method, when the
+        method has a :class:`spyne.util.cache.ResponseCache`. Set to ``None``
+        when the response can't be cached."""
+
+        self.flight = None
+        """The :class:`spyne.util.coalesce.Flight` instance this call shares
+        with concurrent identical calls, when the method has a
+        :class:`spyne.util.coalesce.SingleFlight`."""
+
         self.frozen = True
         """When this is set, no new attribute can be added to this class
         instance. This is mostly for internal use.
@@ -268,6 +310,55 @@ class MethodContext(object):
 
         self.app.event_manager.fire_event("method_context_created", self)
 
+    def get_transport(self):
+        retval = self._transport
+        if retval is None:
+            retval = self._transport = TransportContext(self, self._server)
+        return retval
+
+    def set_transport(self, value):
+        self._transport = value
+
+    def del_transport(self):
+        del self._transport
+
+    transport = property(get_transport, set_transport, del_transport)
+    """The transport-specific context. Transport implementors can use this
+    to their liking."""
+
+    def get_protocol(self):
+        retval = self._protocol
+        if retval is None:
+            retval = self._protocol = ProtocolContext(self, self._server)
+        return retval
+
+    def set_protocol(self, value):
+        self._protocol = value
+
+    def del_protocol(self):
+        del self._protocol
+
+    protocol = property(get_protocol, set_protocol, del_protocol)
+    """The protocol-specific context. Protocol implementors can use this
+    to their liking."""
+
+    def get_event(self):
+        retval = self._event
+        if retval is None:
+            retval = self._event = EventContext(self)
+        return retval
+
+    def set_event(self, value):
+        self._event = value
+
+    def del_event(self):
+        del self._event
+
+    event = property(get_event, set_event, del_event)
+    """Event-specific context. Use this as you want, preferably only in
+    events, as you'd probably want to separate the event data from the
+    method data."""
+
     def get_descriptor(self):
         return self.__descriptor
 
@@ -289,16 +380,26 @@ class MethodContext(object):
             return self.descriptor.service_class
 
     def __setattr__(self, k, v):
-        if not self.frozen or k in self.__dict__ or k in \
-                                                 ('descriptor', 'out_protocol'):
+        if k in _method_context_attrs or not getattr(self, 'frozen', False) \
+                                       or k in getattr(self, '__dict__', ()):
             object.__setattr__(self, k, v)
         else:
             raise ValueError("use the udc member for storing arbitrary data "
                              "in the method context")
 
     def __repr__(self):
+        items = []
+        for k in _method_context_slots:
+            if k.startswith('_'):
+                continue
+            try:
+                items.append((k, object.__getattribute__(self, k)))
+            except AttributeError:
+                pass
+        items.extend(getattr(self, '__dict__', {}).items())
+
         retval = deque()
-        for k, v in self.__dict__.items():
+        for k, v in items:
             if isinstance(v, dict):
                 ret = deque(['{'])
                 items = sorted(v.items())
@@ -334,6 +435,16 @@ class MethodContext(object):
     out_protocol = property(get_out_protocol, set_out_protocol)
 
 
+_method_context_slots = tuple([k if not k.startswith('__') else
+                                                     '_MethodContext' + k
+                    for k in MethodContext.__slots__ if k != '__weakref__'])
+
+# attributes that can be set even after the context is frozen.
+_method_context_attrs = frozenset(_method_context_slots +
+                   ('descriptor', 'out_protocol', 'transport', 'protocol',
+                                                                     'event'))
+
+
 class MethodDescriptor(object):
     """This class represents the method signature of an exposed service. It is
     produced by the :func:`spyne.decorator.srpc` decorator.
@@ -346,7 +457,8 @@ class MethodDescriptor(object):
                  aux=None, patterns=None, body_style=None, args=None,
                  operation_name=None, no_self=None, translations=None, when=None,
                  in_message_name_override=True, out_message_name_override=True,
-                 service_class=None, href=None):
+                 service_class=None, href=None, compress=True, cache=None,
+                 coalesce=None):
 
         self.__real_function = function
         """The original callable for the user code."""
@@ -472,6 +584,19 @@ class MethodDescriptor(object):
         later stages of the interface generation. Naturally, it will be up to
         you to resolve name clashes."""
 
+        self.compress = compress
+        """When False, http transports don't compress the responses of this
+        method."""
+
+        self.cache = cache
+        """A :class:`spyne.util.cache.ResponseCache` instance that caches the
+        responses of this method, or ``None``."""
+
+        self.coalesce = coalesce
+        """A :class:`spyne.util.coalesce.SingleFlight` instance that makes
+        concurrent identical calls to this method share one execution, or
+        ``None``."""
+
     def translate(self, locale, default):
         """
         :param cls: class
@@ -501,6 +626,47 @@ class MethodDescriptor(object):
         self.function = self.__real_function
 
 
+class _ListenerRunner(object):
+    """The default executor of asynchronous event listeners. It runs them one
+    at a time, in the order they were fired, in a daemon thread that's started
+    when it's first needed."""
+
+    def __init__(self):
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        if self._queue is None:
+            self._start()
+        self._queue.put((func, args))
+
+    def _start(self):
+        from spyne.util.six.moves.queue import Queue
+
+        with self._lock:
+            if self._queue is not None:
+                return
+
+            queue = Queue()
+            thread = threading.Thread(target=self._run, args=(queue,),
+                                                  name='spyne-event-listeners')
+            thread.daemon = True
+            thread.start()
+
+            self._queue = queue
+
+    def _run(self, queue):
+        while True:
+            func, args = queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                logger.exception(e)
+
+
+_listener_runner = _ListenerRunner()
+
+
 class EventManager(object):
     """Spyne supports a simple event system that can be used to have repetitive
     boilerplate code that has to run for every method call nicely tucked away
@@ -518,26 +684,130 @@ class EventManager(object):
 
     The events are stored in an ordered set. This means that the events are ran
     in the order they were added and adding a handler twice does not cause it to
-    run twice.
+    run twice. Handlers with a higher priority run before the ones with a lower
+    priority, regardless of the order they were added.
+
+    The handlers of every event are kept in a tuple that's rebuilt when
+    handlers are added or removed, so firing an event nobody listens to
+    costs a single dict lookup. Use :meth:`add_listener` and
+    :meth:`del_listener` instead of changing the ``handlers`` dict directly.
     """
 
+    executor = None
+    """The object that runs asynchronous handlers. It must have a
+    ``submit(func, *args)`` method, like the executors in
+    :mod:`concurrent.futures`. When ``None``, they are run one after the
+    other in a shared background thread."""
+
     def __init__(self, parent, handlers={}):
         self.parent = parent
-        self.handlers = dict(handlers)
+        self.handlers = {}
+        self._priorities = {}
+        self._async = set()
+        self._handler_tuples = {}
 
-    def add_listener(self, event_name, handler):
+        for event_name, event_handlers in handlers.items():
+            for handler in event_handlers:
+                self.add_listener(event_name, handler)
+
+    def add_listener(self, event_name, handler, priority=0, is_async=False):
         """Register a handler for the given event name.
 
         :param event_name: The event identifier, indicated by the documentation.
                            Usually, this is a string.
         :param handler: A static python function that receives a single
                         MethodContext argument.
+        :param priority: Handlers with higher priorities run first. Handlers
+                        with the same priority run in the order they were
+                        added.
+        :param is_async: When True, the handler is passed to
+                        ``self.executor`` instead of being called right away,
+                        so it does not delay the request. As the context is
+                        likely to have moved on by the time the handler runs,
+                        it should only read what it needs from it and should
+                        not expect anything that's deleted by
+                        :meth:`MethodContext.close` to be there.
         """
 
         handlers = self.handlers.get(event_name, oset())
         handlers.add(handler)
         self.handlers[event_name] = handlers
 
+        key = (event_name, handler)
+        if priority:
+            self._priorities[key] = priority
+        else:
+            self._priorities.pop(key, None)
+
+        if is_async:
+            self._async.add(key)
+        else:
+            self._async.discard(key)
+
+        self._rebuild(event_name)
+
+    def del_listener(self, event_name, handler=None):
+        """Unregister the given handler from the given event name. When
+        ``handler`` is ``None``, all handlers of the event are removed."""
+
+        handlers = self.handlers.get(event_name, None)
+        if handlers is None:
+            return
+
+        if handler is None:
+            to_remove = list(handlers)
+        else:
+            to_remove = [handler]
+
+        for h in to_remove:
+            if h in handlers:
+                handlers.remove(h)
+            self._priorities.pop((event_name, h), None)
+            self._async.discard((event_name, h))
+
+        if len(handlers) == 0:
+            del self.handlers[event_name]
+
+        self._rebuild(event_name)
+
+    def update(self, other):
+        """Adds the handlers of the given event manager to this one, along
+        with their priorities."""
+
+        for event_name, handlers in other.handlers.items():
+            for handler in handlers:
+                key = (event_name, handler)
+                self.add_listener(event_name, handler,
+                                      priority=other._priorities.get(key, 0),
+                                      is_async=key in other._async)
+
+    def _rebuild(self, event_name):
+        handlers = self.handlers.get(event_name, None)
+        if not handlers:
+            self._handler_tuples.pop(event_name, None)
+            return
+
+        priorities = self._priorities
+        ordered = sorted(enumerate(handlers), key=lambda x:
+                                (-priorities.get((event_name, x[1]), 0), x[0]))
+
+        retval = []
+        for _, handler in ordered:
+            if (event_name, handler) in self._async:
+                handler = self._wrap_async(handler)
+            retval.append(handler)
+
+        self._handler_tuples[event_name] = tuple(retval)
+
+    def _wrap_async(self, handler):
+        def _submit(ctx):
+            executor = self.executor
+            if executor is None:
+                executor = _listener_runner
+            executor.submit(handler, ctx)
+
+        return _submit
+
     def fire_event(self, event_name, ctx):
         """Run all the handlers for a given event name.
 
@@ -547,8 +817,7 @@ class EventManager(object):
                         stored in ctx.event attribute.
         """
 
-        handlers = self.handlers.get(event_name, oset())
-        for handler in handlers:
+        for handler in self._handler_tuples.get(event_name, ()):
             handler(ctx)
 
 
@@ -0,0 +1,129 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne._lazy`` module contains helpers that postpone work that would
+otherwise be done at import time.
+
+It must not import anything from Spyne as it's used by the top-level package
+itself. For the same reason, it avoids importing anything that the interpreter
+doesn't load on its own at startup.
+"""
+
+from __future__ import absolute_import
+
+import sys
+
+ModuleType = type(sys)
+
+
+# Python 2 can't change the class of an existing module so the module is
+# replaced in sys.modules instead. The original module objects are kept here
+# because Python 2 clears the globals of modules that are garbage collected.
+_replaced_modules = []
+
+
+class LazyModule(ModuleType):
+    """A module that imports the attributes listed in its ``_lazy_attrs`` dict
+    on first access. Use :func:`lazy_module` instead of instantiating this
+    class directly."""
+
+    def __getattr__(self, key):
+        # This is only called when the attribute was not found the usual way,
+        # so every lazy attribute goes through here exactly once.
+        try:
+            module_name, attr_name = self.__dict__['_lazy_attrs'][key]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r" %
+                                                          (self.__name__, key))
+
+        __import__(module_name)
+        retval = sys.modules[module_name]
+        if attr_name is not None:
+            retval = getattr(retval, attr_name)
+
+        setattr(self, key, retval)
+
+        return retval
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__dict__['_lazy_attrs']))
+
+
+def lazy_module(name, attrs, submodules=()):
+    """Makes the public names of the module ``name`` load on first access.
+
+    :param name: The name of the module to patch, usually ``__name__``.
+    :param attrs: A dict of attribute names to the names of the modules that
+        define them. ``'module:attr'`` can be used when the attribute has
+        a different name in its module of origin.
+    :param submodules: Names of submodules that are to be imported on first
+        access as well.
+    :return: The patched module.
+    """
+
+    lazy_attrs = {}
+    for k, v in attrs.items():
+        module_name, _, attr_name = v.partition(':')
+        lazy_attrs[k] = (module_name, attr_name or k)
+
+    for k in submodules:
+        lazy_attrs[k] = ('%s.%s' % (name, k), None)
+
+    module = sys.modules[name]
+    try:
+        module.__class__ = LazyModule
+
+    except TypeError:
+        retval = LazyModule(name, module.__doc__)
+        retval.__dict__.update(module.__dict__)
+
+        _replaced_modules.append(module)
+        sys.modules[name] = module = retval
+
+    module._lazy_attrs = lazy_attrs
+
+    return module
+
+
+class LazyRegex(object):
+    """A regular expression that's only compiled when it's first used. It can
+    be used anywhere a compiled regular expression is expected."""
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, key):
+        if key.startswith('__'):
+            raise AttributeError(key)
+
+        compiled = self.__dict__.get('_compiled', None)
+        if compiled is None:
+            import re
+            compiled = self._compiled = re.compile(self.pattern, self.flags)
+
+        # Bound methods like ``match`` are cached on the instance so that
+        # subsequent calls don't go through here again.
+        retval = getattr(compiled, key)
+        setattr(self, key, retval)
+
+        return retval
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.pattern)
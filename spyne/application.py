@@ -21,6 +21,8 @@ import logging
 logger = logging.getLogger(__name__)
 logger_client = logging.getLogger('.'.join([__name__, 'client']))
 
+from spyne.util.timing import run_phase
+
 from spyne import BODY_STYLE_EMPTY
 from spyne import BODY_STYLE_BARE
 from spyne import BODY_STYLE_WRAPPED
@@ -89,6 +91,11 @@ class Application(object):
 
     transport = None
 
+    phase_timings = None
+    """A :class:`spyne.util.timing.PhaseTimings` instance that aggregates the
+    durations of the processing phases of every request. Timings are not
+    recorded when this is ``None``."""
+
     def __init__(self, services, tns, name=None,
                           in_protocol=None, out_protocol=None, interface=None):
         self.services = tuple(services)
@@ -138,15 +145,27 @@ class Application(object):
             if ctx.service_class is not None:
                 ctx.service_class.event_manager.fire_event('method_call', ctx)
 
-            # call the method
-            ctx.out_object = self.call_wrapper(ctx)
+            cache = ctx.descriptor.cache
+            if cache is None or not cache.get_response(ctx):
+                # call the method
+                coalesce = ctx.descriptor.coalesce
+                if coalesce is None:
+                    call, args = self.call_wrapper, (ctx,)
+                else:
+                    call, args = coalesce.call, (ctx, self.call_wrapper)
 
-            # out object is always an iterable of return values. see
-            # MethodContext docstrings for more info
-            if ctx.descriptor.body_style is not BODY_STYLE_WRAPPED or \
+                ctx.out_object = run_phase(ctx, 'call', call, *args)
+
+                # out object is always an iterable of return values. see
+                # MethodContext docstrings for more info
+                if ctx.descriptor.body_style is not BODY_STYLE_WRAPPED or \
                                 len(ctx.descriptor.out_message._type_info) <= 1:
-                # the return value should already be wrapped by a sequence.
-                ctx.out_object = [ctx.out_object]
+                    # the return value should already be wrapped by a
+                    # sequence.
+                    ctx.out_object = [ctx.out_object]
+
+                if cache is not None:
+                    cache.set_response(ctx)
 
             # fire events
             self.event_manager.fire_event('method_return_object', ctx)
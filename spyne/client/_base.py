@@ -35,14 +35,32 @@ class RemoteService(object):
     def __init__(self, rpc_class, url, app, *args, **kwargs):
         self.__app = app
         self.__url = url
-        self.out_header = None
+        self.__out_header = None
+        self.__procedures = {}
         self.rpc_class = rpc_class
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def out_header(self):
+        return self.__out_header
+
+    @out_header.setter
+    def out_header(self, value):
+        self.__out_header = value
+        for rp in self.__procedures.values():
+            rp.out_header = value
+
     def __getattr__(self, key):
-        return self.rpc_class(self.__url, self.__app, key, self.out_header,
-                                                    *self.args, **self.kwargs)
+        # Resolving the method descriptors is not cheap, so the remote
+        # procedure instances are cached per method name.
+        retval = self.__procedures.get(key, None)
+        if retval is None:
+            retval = self.rpc_class(self.__url, self.__app, key,
+                                  self.__out_header, *self.args, **self.kwargs)
+            self.__procedures[key] = retval
+
+        return retval
 
 
 class RemoteProcedureBase(object):
@@ -57,17 +75,43 @@ class RemoteProcedureBase(object):
     :param app:  The application instance the client belongs to.
     :param name: The string identifier for the remote method.
     :param out_header: The header that's going to be sent with the remote call.
+
+    Instances are reused for every call to the same remote method, so
+    per-call state should be kept in the contexts returned by the
+    ``contexts`` property, which are fresh for every access.
     """
 
     def __init__(self, url, app, name, out_header=None):
         self.url = url
         self.app = app
+        self.name = name
+        self.out_header = out_header
+
+        self.ctx = None
+        """The primary context of the last call. Only meaningful when
+        calls are not made concurrently."""
 
         initial_ctx = MethodContext(self)
         initial_ctx.method_request_string = name
-        initial_ctx.out_header = out_header
 
-        self.contexts = initial_ctx.out_protocol.generate_method_contexts(initial_ctx)
+        contexts = initial_ctx.out_protocol.generate_method_contexts(initial_ctx)
+        self.descriptors = [ctx.descriptor for ctx in contexts]
+
+    @property
+    def contexts(self):
+        """A list of new contexts for the resolved method descriptors, with
+        the primary context as the first element."""
+
+        retval = []
+        for descriptor in self.descriptors:
+            ctx = MethodContext(self)
+            ctx.method_request_string = self.name
+            ctx.out_header = self.out_header
+            ctx.descriptor = descriptor
+
+            retval.append(ctx)
+
+        return retval
 
     def __call__(self, *args, **kwargs):
         """Serializes its arguments, sends them, receives and deserializes the
@@ -135,9 +179,12 @@ class RemoteProcedureBase(object):
         """
 
         assert ctx.in_string is not None
-        assert ctx.in_document is None
 
-        self.app.in_protocol.create_in_document(ctx)
+        # transports that parse the response as it arrives set in_document
+        # themselves.
+        if ctx.in_document is None:
+            self.app.in_protocol.create_in_document(ctx)
+
         if ctx.service_class != None:
             ctx.service_class.event_manager.fire_event(
                                             'method_accept_document', ctx)
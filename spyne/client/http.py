@@ -17,54 +17,298 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The HTTP (urllib2) client transport."""
+"""The HTTP client transport.
+
+Connections are kept alive and pooled per host, so consecutive calls to the
+same server don't pay the connection setup cost. A pool can be shared by
+more than one client: ::
+
+    pool = HttpConnectionPool(pool_size=8, timeout=10)
+
+    client_a = HttpClient('http://a.example.com/', app_a, pool=pool)
+    client_b = HttpClient('http://b.example.com/', app_b, pool=pool)
+
+Clients are thread-safe, so a single client instance can be used to make
+concurrent calls from multiple threads.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import socket
+import threading
+
+from time import time
 
 from spyne import RemoteService, ClientBase, RemoteProcedureBase
+from spyne.model.fault import Fault
+
+from spyne.util.six.moves import http_client
+from spyne.util.six.moves.urllib.parse import urlsplit
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection to a host becomes available within the
+    timeout period."""
+
+
+class HttpConnectionPool(object):
+    """A pool of persistent HTTP connections, keyed by host.
+
+    :param pool_size: Maximum number of connections per host. When all of
+        them are in use, callers wait for one to be released.
+    :param timeout: Timeout in seconds for connecting, sending the request,
+        receiving the response and waiting for a free connection. ``None``
+        means no timeout.
+    :param ssl_context: An :class:`ssl.SSLContext` instance for https
+        connections.
+    """
+
+    def __init__(self, pool_size=4, timeout=None, ssl_context=None):
+        assert pool_size > 0
+
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = {}
+        self._busy = {}
+
+    def _new_connection(self, scheme, host):
+        if scheme == 'https':
+            kwargs = {}
+            if self.ssl_context is not None:
+                kwargs['context'] = self.ssl_context
+
+            return http_client.HTTPSConnection(host, timeout=self.timeout,
+                                                                       **kwargs)
+
+        return http_client.HTTPConnection(host, timeout=self.timeout)
+
+    def get(self, scheme, host):
+        """Returns a ``(connection, reused)`` tuple. ``reused`` is True when
+        the connection was used before, which means the server may have
+        closed it in the meantime."""
+
+        key = (scheme, host)
+        deadline = None
+        if self.timeout is not None:
+            deadline = time() + self.timeout
+
+        with self._lock:
+            while True:
+                idle = self._idle.get(key, None)
+                if idle:
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    return idle.pop(), True
+
+                if self._busy.get(key, 0) < self.pool_size:
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    break
+
+                if deadline is None:
+                    self._lock.wait()
+                else:
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        raise PoolTimeoutError("No free connection to %r "
+                                               "within %r seconds" %
+                                                         (host, self.timeout))
+                    self._lock.wait(remaining)
+
+        try:
+            return self._new_connection(scheme, host), False
+
+        except:
+            self.release(scheme, host, None)
+            raise
+
+    def release(self, scheme, host, conn):
+        """Returns the given connection to the pool. Pass ``None`` as
+        ``conn`` for connections that were closed."""
+
+        key = (scheme, host)
+        with self._lock:
+            self._busy[key] -= 1
+            if conn is not None:
+                self._idle.setdefault(key, []).append(conn)
+            self._lock.notify()
+
+    def close(self):
+        """Closes all idle connections."""
+
+        with self._lock:
+            idle, self._idle = self._idle, {}
 
-from spyne.util.six.moves.urllib.request import Request, urlopen
-from spyne.util.six.moves.urllib.error import HTTPError
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+def _send_body(conn, body):
+    if isinstance(body, (list, tuple)):
+        for chunk in body:
+            conn.send(chunk)
+        return
+
+    # generators are sent using the chunked transfer encoding.
+    for chunk in body:
+        if len(chunk) > 0:
+            conn.send(b''.join((('%x\r\n' % len(chunk)).encode('ascii'), chunk,
+                                                                   b'\r\n')))
+    conn.send(b'0\r\n\r\n')
+
+
+def _is_disconnect(e):
+    """Returns True when the given exception was raised because the server
+    closed the connection without sending a single byte of the response."""
+
+    remote_disconnected = getattr(http_client, 'RemoteDisconnected', None)
+    if remote_disconnected is not None:
+        return isinstance(e, remote_disconnected)
+
+    # Python 2 raises BadStatusLine for empty status lines as well, with the
+    # following values for its line attribute depending on the version.
+    return isinstance(e, http_client.BadStatusLine) and e.line in ("''",
+           "No status line received - the server has closed the connection")
 
 
 class _RemoteProcedure(RemoteProcedureBase):
+    def __init__(self, url, app, name, out_header=None, pool=None,
+                                                  headers=None, chunked=False):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.pool = pool
+        self.headers = headers or {}
+        self.chunked = chunked
+
+        parsed = urlsplit(url)
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.path = parsed.path or '/'
+        if parsed.query:
+            self.path = '%s?%s' % (self.path, parsed.query)
+
     def __call__(self, *args, **kwargs):
         # there's no point in having a client making the same request more than
         # once, so if there's more than just one context, it is a bug.
         # the comma-in-assignment trick is a general way of getting the first
         # and the only variable from an iterable. so if there's more than one
         # element in the iterable, it'll fail miserably.
-        self.ctx, = self.contexts
+        ctx, = self.contexts
+        self.ctx = ctx
 
         # sets ctx.out_object
-        self.get_out_object(self.ctx, args, kwargs)
+        self.get_out_object(ctx, args, kwargs)
 
         # sets ctx.out_string
-        self.get_out_string(self.ctx)
-
-        out_string = ''.join(self.ctx.out_string) # FIXME: just send the iterable to the http stream.
-        request = Request(self.url, out_string)
-        code = 200
-        try:
-            response = urlopen(request)
-            self.ctx.in_string = [response.read()]
+        self.get_out_string(ctx)
 
-        except HTTPError as e:
-            code = e.code
-            self.ctx.in_string = [e.read()]
+        code, ctx.in_string = self.send(ctx.out_string)
 
         # this sets ctx.in_error if there's an error, and ctx.in_object if
         # there's none.
-        self.get_in_object(self.ctx)
+        self.get_in_object(ctx)
 
-        if not (self.ctx.in_error is None):
-            raise self.ctx.in_error
+        if ctx.in_error is not None:
+            raise ctx.in_error
         elif code >= 400:
-            raise self.ctx.in_error
+            raise Fault('Server', "Http error %d" % code)
+        else:
+            return ctx.in_object
+
+    def send(self, body):
+        """Sends the given iterable of byte strings as the request body using a
+        pooled connection. Returns the status code and the response body as a
+        list of strings."""
+
+        if not (self.chunked or isinstance(body, (list, tuple))):
+            body = list(body)
+
+        if isinstance(body, (list, tuple)):
+            headers = {'Content-Length': str(sum(len(b) for b in body))}
+            retry = True
         else:
-            return self.ctx.in_object
+            headers = {'Transfer-Encoding': 'chunked'}
+            retry = False  # the body can only be iterated once.
+
+        headers.update(self.headers)
+
+        while True:
+            conn, reused = self.pool.get(self.scheme, self.host)
+            sent = False
+            try:
+                conn.putrequest('POST', self.path, skip_accept_encoding=True)
+                for k, v in headers.items():
+                    conn.putheader(k, v)
+                conn.endheaders()
+
+                _send_body(conn, body)
+                sent = True
+
+                response = conn.getresponse()
+                data = response.read()
+
+            except (http_client.HTTPException, socket.error) as e:
+                conn.close()
+                self.pool.release(self.scheme, self.host, None)
+
+                # The server may close idle keep-alive connections at any
+                # time. Retry once on a fresh connection when that happens,
+                # but not when the server may have processed the request.
+                if reused and retry and not isinstance(e, socket.timeout) \
+                                        and (not sent or _is_disconnect(e)):
+                    logger.debug("Retrying on a new connection after %r", e)
+                    retry = False
+                    continue
+
+                raise
+
+            except:
+                conn.close()
+                self.pool.release(self.scheme, self.host, None)
+                raise
+
+            if response.will_close:
+                conn.close()
+                conn = None
+            self.pool.release(self.scheme, self.host, conn)
+
+            return response.status, [data]
 
 
 class HttpClient(ClientBase):
-    def __init__(self, url, app):
+    """An http client that keeps connections alive.
+
+    :param url: The url of the server endpoint.
+    :param app: The application instance the client belongs to.
+    :param pool: An :class:`HttpConnectionPool` instance. A new one is
+        created when ``None``.
+    :param pool_size: Maximum number of connections per host for the pool
+        that is created when ``pool`` is ``None``.
+    :param timeout: Timeout in seconds for the pool that is created when
+        ``pool`` is ``None``.
+    :param headers: A dict of additional http headers sent with every
+        request.
+    :param chunked: When True, request bodies of unknown length are sent
+        using the chunked transfer encoding as they are serialized. Otherwise
+        they are collected first to determine their length, which is what
+        most servers expect.
+    """
+
+    def __init__(self, url, app, pool=None, pool_size=4, timeout=None,
+                                                  headers=None, chunked=False):
         super(HttpClient, self).__init__(url, app)
 
-        self.service = RemoteService(_RemoteProcedure, url, app)
+        if pool is None:
+            pool = HttpConnectionPool(pool_size=pool_size, timeout=timeout)
+
+        self.pool = pool
+        self.service = RemoteService(_RemoteProcedure, url, app, pool=pool,
+                                               headers=headers, chunked=chunked)
+
+    def close(self):
+        """Closes the idle connections in the pool."""
+
+        self.pool.close()
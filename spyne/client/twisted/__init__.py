@@ -17,7 +17,14 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The Twisted Http Client transport."""
+"""The Twisted Http Client transport.
+
+All calls made by a :class:`TwistedHttpClient` go through a single
+:class:`twisted.web.client.Agent` that keeps connections alive in an
+:class:`twisted.web.client.HTTPConnectionPool`. The response is fed to the
+parser of the input protocol as it arrives, instead of being parsed after the
+connection is closed.
+"""
 
 from spyne import __version__ as VERSION
 
@@ -25,23 +32,26 @@ from spyne.client import RemoteService
 from spyne.client import RemoteProcedureBase
 from spyne.client import ClientBase
 
-from zope.interface import implements
+from zope.interface import implementer
 
-from twisted.internet import reactor
 from twisted.internet.defer import Deferred
+from twisted.internet.defer import DeferredSemaphore
+from twisted.internet.defer import succeed
+from twisted.internet.error import ConnectionDone
 from twisted.internet.protocol import Protocol
 
 from twisted.web import error as werror
 from twisted.web.client import Agent
+from twisted.web.client import HTTPConnectionPool
 from twisted.web.client import ResponseDone
+from twisted.web.client import ResponseNeverReceived
+from twisted.web.http import PotentialDataLoss
 from twisted.web.iweb import IBodyProducer
-from twisted.web.iweb import UNKNOWN_LENGTH
 from twisted.web.http_headers import Headers
 
 
+@implementer(IBodyProducer)
 class _Producer(object):
-    implements(IBodyProducer)
-
     _deferred = None
 
     def __init__(self, body):
@@ -49,14 +59,13 @@ class _Producer(object):
 
         self.__paused = False
 
-        # check to see if we can determine the length
-        try:
-            len(body) # iterator?
-            self.length = sum([len(fragment) for fragment in body])
-            self.body = iter(body)
+        # the length needs to be known beforehand, so generators are
+        # consumed here.
+        if not isinstance(body, (list, tuple)):
+            body = list(body)
 
-        except TypeError:
-            self.length = UNKNOWN_LENGTH
+        self.length = sum([len(fragment) for fragment in body])
+        self.body = iter(body)
 
         self._deferred = Deferred()
 
@@ -84,62 +93,158 @@ class _Producer(object):
 
 
 class _Protocol(Protocol):
-    def __init__(self, ctx):
-        self.ctx = ctx
+    def __init__(self, parser):
+        self.parser = parser
+        self.error = None
         self.deferred = Deferred()
 
     def dataReceived(self, bytes):
-        self.ctx.in_string.append(bytes)
+        if self.error is not None:
+            return # discard the rest of a response that can't be parsed
+
+        try:
+            self.parser.feed(bytes)
+        except Exception as e:
+            self.error = e
 
     def connectionLost(self, reason):
-        if reason.check(ResponseDone):
+        if not reason.check(ResponseDone, PotentialDataLoss):
+            self.deferred.errback(reason)
+            return
+
+        if self.error is None:
+            try:
+                self.parser.close()
+            except Exception as e:
+                self.error = e
+
+        if self.error is None:
             self.deferred.callback(None)
         else:
-            self.deferred.errback(reason)
+            self.deferred.errback(self.error)
 
 
 class _RemoteProcedure(RemoteProcedureBase):
+    def __init__(self, url, app, name, out_header=None, client=None):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.client = client
+
     def __call__(self, *args, **kwargs):
         # there's no point in having a client making the same request more than
         # once, so if there's more than just one context, it's rather a bug.
         # The comma-in-assignment trick is a pedantic way of getting the first
         # and the only variable from an iterable. so if there's more than one
         # element in the iterable, it'll fail miserably.
-        self.ctx, = self.contexts
+        ctx, = self.contexts
+        self.ctx = ctx
+
+        self.get_out_object(ctx, args, kwargs)
+        self.get_out_string(ctx)
 
-        self.get_out_object(self.ctx, args, kwargs)
-        self.get_out_string(self.ctx)
+        # the request may need to be sent more than once.
+        ctx.out_string = list(ctx.out_string)
 
-        self.ctx.in_string = []
+        return self.client.run(self._request, ctx)
 
-        agent = Agent(reactor)
-        d = agent.request(
-            'POST', self.url,
+    def _request(self, ctx, retry=True):
+        d = self.client.agent.request(
+            b'POST', self.url,
             Headers({'User-Agent': ['Spyne Twisted Http Client %s' % VERSION]}),
-            _Producer(self.ctx.out_string)
+            _Producer(ctx.out_string)
         )
 
         def _process_response(_, response):
             # this sets ctx.in_error if there's an error, and ctx.in_object if
             # there's none.
-            self.get_in_object(self.ctx)
+            self.get_in_object(ctx)
 
-            if self.ctx.in_error is not None:
-                raise self.ctx.in_error
+            if ctx.in_error is not None:
+                raise ctx.in_error
             elif response.code >= 400:
                 raise werror.Error(response.code)
-            return self.ctx.in_object
+            return ctx.in_object
 
         def _cb_request(response):
-            p = _Protocol(self.ctx)
+            parser = self.app.in_protocol.get_in_document_parser(ctx)
+            p = _Protocol(parser)
             response.deliverBody(p)
             return p.deferred.addCallback(_process_response, response)
 
-        return d.addCallback(_cb_request)
+        def _eb_request(failure):
+            # A pooled connection can be closed by the server right before
+            # it's reused. Twisted only retries idempotent requests in that
+            # case, so we retry once here. Servers that don't support
+            # persistent connections while claiming otherwise (e.g. HTTP/1.0
+            # servers) always trigger this.
+            if retry and failure.check(ResponseNeverReceived) and \
+                    all([r.check(ConnectionDone) for r in failure.value.reasons]):
+                return self._request(ctx, retry=False)
+
+            return failure
+
+        return d.addCallbacks(_cb_request, _eb_request)
 
 
 class TwistedHttpClient(ClientBase):
-    def __init__(self, url, app):
+    """An http client for Twisted that keeps connections alive.
+
+    :param url: The url of the server endpoint.
+    :param app: The application instance the client belongs to.
+    :param reactor: The reactor to use. Defaults to the global one.
+    :param pool: A :class:`twisted.web.client.HTTPConnectionPool` instance.
+        A persistent one is created when ``None``.
+    :param max_persistent_per_host: The maximum number of idle connections
+        to keep alive per host, for the pool that is created when ``pool`` is
+        ``None``.
+    :param max_concurrent: The maximum number of calls that are in flight at
+        the same time. Additional calls wait for earlier ones to complete.
+        ``None`` means no limit.
+    :param connect_timeout: Connection timeout in seconds.
+    """
+
+    def __init__(self, url, app, reactor=None, pool=None,
+                             max_persistent_per_host=2, max_concurrent=None,
+                                                          connect_timeout=None):
         super(TwistedHttpClient, self).__init__(url, app)
 
-        self.service = RemoteService(_RemoteProcedure, url, app)
+        if reactor is None:
+            from twisted.internet import reactor
+
+        if pool is None:
+            pool = HTTPConnectionPool(reactor, persistent=True)
+            pool.maxPersistentPerHost = max_persistent_per_host
+
+        self.pool = pool
+
+        if connect_timeout is None:
+            self.agent = Agent(reactor, pool=pool)
+        else:
+            self.agent = Agent(reactor, pool=pool,
+                                                 connectTimeout=connect_timeout)
+
+        self.semaphore = None
+        if max_concurrent is not None:
+            self.semaphore = DeferredSemaphore(max_concurrent)
+
+        if not isinstance(url, bytes):
+            url = url.encode('ascii')
+
+        self.service = RemoteService(_RemoteProcedure, url, app, client=self)
+
+    def run(self, func, *args, **kwargs):
+        """Calls ``func``, which must return a Deferred, when the concurrency
+        limit allows it."""
+
+        if self.semaphore is None:
+            return func(*args, **kwargs)
+
+        return self.semaphore.run(func, *args, **kwargs)
+
+    def close(self):
+        """Closes the idle connections in the pool. Returns a Deferred."""
+
+        if self.pool is None:
+            return succeed(None)
+
+        return self.pool.closeCachedConnections()
@@ -17,7 +17,30 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The ZeroMQ (zmq.REQ) client transport."""
+"""The ZeroMQ client transport.
+
+Every client keeps a single zmq.DEALER socket connected to its endpoint, which
+is owned by a background i/o thread. Requests are tagged with a request id
+and replies are matched to requests using it, so any number of calls can be
+in flight at the same time, from any number of threads: ::
+
+    client = ZeroMQClient('tcp://localhost:5555', app, timeout=5, retries=2)
+    client.service.some_call(...)
+
+Clients for the same endpoint can share a connection by passing the same
+:class:`ZeroMQConnection` instance via the ``connection`` argument.
+
+Both :class:`spyne.server.zeromq.ZeroMQServer` and
+:class:`spyne.server.zeromq.ZeroMQRouterServer` work with this client.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import threading
+
+from itertools import count
+from time import time
 
 import zmq
 
@@ -25,30 +48,366 @@ from spyne import RemoteService, ClientBase, RemoteProcedureBase
 
 context = zmq.Context()
 
+_STOP = b''
+
+
+class ZeroMQTimeoutError(Exception):
+    """Raised when a reply is not received within the timeout period, after
+    all retries."""
+
+
+class ZeroMQConnectionClosedError(Exception):
+    """Raised for calls that are pending when their connection is closed."""
+
+
+class PendingCall(object):
+    """A request that was sent, but whose reply may not have arrived yet."""
+
+    def __init__(self, body, timeout, retries):
+        self.body = body
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = None
+
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self):
+        """Blocks until the reply arrives and returns it. Raises the error
+        that prevented the reply from arriving, if any."""
+
+        self._event.wait()
+
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def add_done_callback(self, func):
+        """Calls ``func`` with this object as the only argument when the call
+        is done. The callback is called from the i/o thread of the connection
+        so it should return as soon as possible."""
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(func)
+                return
+
+        func(self)
+
+    def _set(self, result, error):
+        with self._lock:
+            if self._event.is_set():
+                return
+
+            self._result = result
+            self._error = error
+            self._event.set()
+
+            callbacks, self._callbacks = self._callbacks, []
+
+        for func in callbacks:
+            try:
+                func(self)
+            except Exception as e:
+                logger.exception(e)
+
+
+class ZeroMQConnection(object):
+    """A persistent, multiplexed connection to a ZeroMQ endpoint.
+
+    :param url: The url of the server endpoint.
+    :param ctx: The zmq context. Defaults to the module-level one.
+    :param timeout: The default number of seconds to wait for a reply,
+        ``None`` waits forever.
+    :param retries: The default number of times a request is resent after a
+        timeout. Replies to previous attempts are ignored.
+    """
+
+    def __init__(self, url, ctx=None, timeout=None, retries=0):
+        if ctx is None:
+            ctx = context
+
+        self.url = url
+        self.ctx = ctx
+        self.timeout = timeout
+        self.retries = retries
+
+        self._ids = count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        self._wakeup_url = 'inproc://spyne-zmq-client-%x' % id(self)
+        self._wakeup = None
+        self._wakeup_lock = threading.Lock()
+
+    def _start(self):
+        # The sockets are created lazily, so the connection can be created
+        # before forking.
+        with self._lock:
+            if self._closed:
+                raise ZeroMQConnectionClosedError(self.url)
+
+            if self._thread is not None:
+                return
+
+            pull = self.ctx.socket(zmq.PULL)
+            pull.bind(self._wakeup_url)
+
+            self._wakeup = self.ctx.socket(zmq.PUSH)
+            self._wakeup.connect(self._wakeup_url)
+
+            dealer = self.ctx.socket(zmq.DEALER)
+            dealer.setsockopt(zmq.LINGER, 0)
+            dealer.connect(self.url)
+
+            self._thread = threading.Thread(target=self._run,
+                                                         args=(dealer, pull))
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _send_wakeup(self, frames):
+        # zmq sockets are not thread-safe. The lock makes sure only one
+        # thread uses the push socket at a time.
+        with self._wakeup_lock:
+            self._wakeup.send_multipart(frames)
+
+    def _next_id(self):
+        return ('%x' % next(self._ids)).encode('ascii')
+
+    def request(self, body, timeout=None, retries=None):
+        """Sends the given iterable of byte strings as a single message.
+        Returns a :class:`PendingCall` instance."""
+
+        if timeout is None:
+            timeout = self.timeout
+        if retries is None:
+            retries = self.retries
+
+        call = PendingCall(b''.join(body), timeout, retries)
+
+        self._start()
+
+        req_id = self._next_id()
+        with self._lock:
+            self._pending[req_id] = call
+
+        self._send_wakeup([req_id, call.body])
+
+        return call
+
+    def close(self):
+        """Stops the i/o thread and closes the sockets. Pending calls fail
+        with :class:`ZeroMQConnectionClosedError`."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._send_wakeup([_STOP])
+            thread.join()
+            self._wakeup.close()
+
+    def _run(self, dealer, pull):
+        poller = zmq.Poller()
+        poller.register(dealer, zmq.POLLIN)
+        poller.register(pull, zmq.POLLIN)
+
+        try:
+            while True:
+                events = dict(poller.poll(self._get_poll_timeout()))
+
+                if events.get(pull, 0) & zmq.POLLIN:
+                    if not self._process_outgoing(dealer, pull):
+                        break
+
+                if events.get(dealer, 0) & zmq.POLLIN:
+                    self._process_incoming(dealer)
+
+                self._process_timeouts(dealer)
+
+        finally:
+            dealer.close()
+            pull.close()
+
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            for call in pending.values():
+                call._set(None, ZeroMQConnectionClosedError(self.url))
+
+    def _get_poll_timeout(self):
+        with self._lock:
+            deadlines = [c.deadline for c in self._pending.values()
+                                                      if c.deadline is not None]
+
+        if len(deadlines) == 0:
+            return None
+
+        return max(0, int((min(deadlines) - time()) * 1000) + 1)
+
+    def _process_outgoing(self, dealer, pull):
+        while True:
+            try:
+                frames = pull.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return True
+
+            if frames == [_STOP]:
+                return False
+
+            req_id, body = frames
+            with self._lock:
+                call = self._pending.get(req_id, None)
+
+            if call is not None:
+                self._send(dealer, req_id, call)
+
+    def _send(self, dealer, req_id, call):
+        if call.timeout is not None:
+            call.deadline = time() + call.timeout
+
+        # The empty delimiter frame makes the request look like it came from a
+        # zmq.REQ socket to zmq.REP sockets.
+        dealer.send_multipart([req_id, b'', call.body])
+
+    def _process_incoming(self, dealer):
+        while True:
+            try:
+                frames = dealer.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+
+            if len(frames) != 3 or frames[1] != b'':
+                logger.error("Ignoring malformed reply with %d frames",
+                                                                   len(frames))
+                continue
+
+            req_id, _, reply = frames
+            with self._lock:
+                call = self._pending.pop(req_id, None)
+
+            if call is None:
+                logger.debug("Ignoring reply to unknown request %r", req_id)
+                continue
+
+            call._set(reply, None)
+
+    def _process_timeouts(self, dealer):
+        now = time()
+
+        with self._lock:
+            expired = [(k, c) for k, c in self._pending.items()
+                                if c.deadline is not None and c.deadline <= now]
+            for k, c in expired:
+                del self._pending[k]
+
+        for req_id, call in expired:
+            if call.retries > 0:
+                call.retries -= 1
+
+                req_id = self._next_id()
+                with self._lock:
+                    self._pending[req_id] = call
+
+                logger.debug("Retrying request %r to %r", req_id, self.url)
+                self._send(dealer, req_id, call)
+
+            else:
+                call._set(None, ZeroMQTimeoutError("No reply from %r in %r "
+                                         "seconds" % (self.url, call.timeout)))
+
 
 class _RemoteProcedure(RemoteProcedureBase):
-    def __call__(self, *args, **kwargs):
-        self.ctx = self.contexts[0]
+    def __init__(self, url, app, name, out_header=None, connection=None):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.connection = connection
 
-        self.get_out_object(self.ctx, args, kwargs)
-        self.get_out_string(self.ctx)
-        out_string = b''.join(self.ctx.out_string)
+    def _send(self, args, kwargs):
+        ctx, = self.contexts
+        self.ctx = ctx
 
-        socket = context.socket(zmq.REQ)
-        socket.connect(self.url)
-        socket.send(out_string)
+        self.get_out_object(ctx, args, kwargs)
+        self.get_out_string(ctx)
 
-        self.ctx.in_string = [socket.recv()]
-        self.get_in_object(self.ctx)
+        return ctx, self.connection.request(ctx.out_string)
 
-        if not (self.ctx.in_error is None):
-            raise self.ctx.in_error
+    def _process_reply(self, ctx, reply):
+        ctx.in_string = [reply]
+        self.get_in_object(ctx)
+
+        if ctx.in_error is not None:
+            raise ctx.in_error
         else:
-            return self.ctx.in_object
+            return ctx.in_object
+
+    def __call__(self, *args, **kwargs):
+        ctx, call = self._send(args, kwargs)
+
+        return self._process_reply(ctx, call.result())
+
+    def call_deferred(self, *args, **kwargs):
+        """Makes the call without blocking and returns a
+        :class:`twisted.internet.defer.Deferred` that fires in the reactor
+        thread."""
+
+        from twisted.internet import reactor
+        from twisted.internet.defer import Deferred, maybeDeferred
+
+        d = Deferred()
+        ctx, call = self._send(args, kwargs)
+
+        def _cb_reactor(call):
+            try:
+                reply = call.result()
+            except Exception as e:
+                d.errback(e)
+            else:
+                maybeDeferred(self._process_reply, ctx, reply).chainDeferred(d)
+
+        call.add_done_callback(lambda c: reactor.callFromThread(_cb_reactor, c))
+
+        return d
 
 
 class ZeroMQClient(ClientBase):
-    def __init__(self, url, app):
+    """A ZeroMQ client that multiplexes calls over a single connection.
+
+    :param url: The url of the server endpoint.
+    :param app: The application instance the client belongs to.
+    :param ctx: The zmq context to use.
+    :param timeout: Number of seconds to wait for a reply before giving up or
+        retrying. ``None`` waits forever.
+    :param retries: Number of times to resend a request after a timeout.
+    :param connection: A :class:`ZeroMQConnection` instance to use instead of
+        creating a new one. The ``ctx``, ``timeout`` and ``retries`` arguments
+        are ignored when this is given.
+    """
+
+    def __init__(self, url, app, ctx=None, timeout=None, retries=0,
+                                                               connection=None):
         super(ZeroMQClient, self).__init__(url, app)
 
-        self.service = RemoteService(_RemoteProcedure, url, app)
+        if connection is None:
+            connection = ZeroMQConnection(url, ctx=ctx, timeout=timeout,
+                                                                retries=retries)
+
+        self.connection = connection
+        self.service = RemoteService(_RemoteProcedure, url, app,
+                                                          connection=connection)
+
+    def close(self):
+        """Closes the connection."""
+
+        self.connection.close()
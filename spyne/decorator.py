@@ -236,6 +236,16 @@ def rpc(*params, **kparams):
     :param _args: the name of the arguments to expose.
     :param _service_class: A :class:`ServiceBase` subclass, if you feel like
         overriding it.
+    :param _compress: When False, http transports don't compress the response
+        of this method. Useful for methods that return data that is already
+        compressed.
+    :param _cache: A :class:`spyne.util.cache.ResponseCache` instance that
+        caches the responses of this method. Only use this for methods whose
+        response depends solely on their arguments.
+    :param _coalesce: When True or a :class:`spyne.util.coalesce.SingleFlight`
+        instance, concurrent calls to this method with equal arguments share
+        one execution of the method and its serialized response. The same
+        caveat as for ``_cache`` applies.
     """
 
     def explain(f):
@@ -259,6 +269,14 @@ def rpc(*params, **kparams):
             _when = kparams.get("_when", None)
             _service_class = kparams.get("_service_class", None)
             _href = kparams.get("_href", None)
+            _compress = kparams.get("_compress", True)
+            _cache = kparams.get("_cache", None)
+            _coalesce = kparams.get("_coalesce", None)
+            if _coalesce is True:
+                from spyne.util.coalesce import SingleFlight
+                _coalesce = SingleFlight()
+            elif _coalesce is False:
+                _coalesce = None
 
             if _no_self:
                 from spyne.model import SelfReference
@@ -326,7 +344,8 @@ def rpc(*params, **kparams):
                 translations=_translations, when=_when,
                 in_message_name_override=_in_message_name_override,
                 out_message_name_override=_out_message_name_override,
-                service_class=_service_class, href=_href,
+                service_class=_service_class, href=_href, compress=_compress,
+                cache=_cache, coalesce=_coalesce,
             )
 
             if _patterns is not None:
@@ -44,6 +44,14 @@ class RequestTooLongError(Fault):
         super(RequestTooLongError, self).__init__('Client.RequestTooLong', faultstring)
 
 
+class UnsupportedContentEncodingError(Fault):
+    """Raised when the request body is encoded in an unknown way."""
+
+    def __init__(self, faultstring="Unsupported content encoding"):
+        super(UnsupportedContentEncodingError, self).__init__(
+                             'Client.UnsupportedContentEncoding', faultstring)
+
+
 class RequestNotAllowed(Fault):
     """Raised when request is incomplete."""
 
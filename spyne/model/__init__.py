@@ -22,109 +22,118 @@ distinguish. These are just type markers, they are not of much use without
 protocols.
 """
 
-from spyne.model._base import ModelBase
-from spyne.model._base import PushBase
-from spyne.model._base import Null
-from spyne.model._base import SimpleModel
-
-# store_as values
-from spyne.model._base import xml
-from spyne.model._base import json
-from spyne.model._base import table
-from spyne.model._base import msgpack
-
-# Boolean
-from spyne.model.primitive import Boolean
-
-# Any* types
-from spyne.model.primitive import AnyXml
-from spyne.model.primitive import AnyDict
-from spyne.model.primitive import AnyHtml
-
-# Unicode children
-from spyne.model.primitive import Unicode
-from spyne.model.primitive import String
-from spyne.model.primitive import AnyUri
-from spyne.model.primitive import ImageUri
-from spyne.model.primitive import Uuid
-from spyne.model.primitive import NormalizedString
-from spyne.model.primitive import Token
-from spyne.model.primitive import Name
-from spyne.model.primitive import NCName
-from spyne.model.primitive import ID
-from spyne.model.primitive import Language
-
-
-from spyne.model.primitive import ID
-
-from spyne.model.primitive import Point
-from spyne.model.primitive import Line
-from spyne.model.primitive import LineString
-from spyne.model.primitive import Polygon
-from spyne.model.primitive import MultiPoint
-from spyne.model.primitive import MultiLine
-from spyne.model.primitive import MultiLineString
-from spyne.model.primitive import MultiPolygon
-
-# Date/Time types
-from spyne.model.primitive import Date
-from spyne.model.primitive import DateTime
-from spyne.model.primitive import Duration
-from spyne.model.primitive import Time
-
-# Numbers
-from spyne.model.primitive import Decimal
-
-from spyne.model.primitive import Double
-from spyne.model.primitive import Float
-
-from spyne.model.primitive import Integer8
-from spyne.model.primitive import Byte
-from spyne.model.primitive import Integer16
-from spyne.model.primitive import Short
-from spyne.model.primitive import Integer32
-from spyne.model.primitive import Int
-from spyne.model.primitive import Integer64
-from spyne.model.primitive import Long
-from spyne.model.primitive import Integer
-
-from spyne.model.primitive import UnsignedInteger8
-from spyne.model.primitive import UnsignedByte
-from spyne.model.primitive import UnsignedInteger16
-from spyne.model.primitive import UnsignedShort
-from spyne.model.primitive import UnsignedInteger32
-from spyne.model.primitive import UnsignedInt
-from spyne.model.primitive import UnsignedInteger64
-from spyne.model.primitive import UnsignedLong
-from spyne.model.primitive import NonNegativeInteger # Xml Schema calls it so
-from spyne.model.primitive import UnsignedInteger
-
-# Classes
-from spyne.model.complex import ComplexModelMeta
-from spyne.model.complex import ComplexModelBase
-from spyne.model.complex import ComplexModel
-from spyne.model.complex import TTableModelBase
-from spyne.model.complex import TTableModel
-
-# Iterables
-from spyne.model.complex import Array
-from spyne.model.complex import Iterable
-from spyne.model.complex import PushBase
-
-# Modifiers
-from spyne.model.complex import Mandatory
-from spyne.model.complex import XmlAttribute
-from spyne.model.complex import XmlData
-
-# Markers
-from spyne.model.complex import SelfReference
-
-# Binary
-from spyne.model.binary import File
-from spyne.model.binary import ByteArray
-
-# Enum
-from spyne.model.enum import Enum
-
-# Fault
-from spyne.model.fault import Fault
+from spyne._lazy import lazy_module
+
+
+# The model modules pull in lxml, pytz and friends, so they're only imported
+# when one of their names is first accessed.
+_lazy_attrs = {
+    'ModelBase':         'spyne.model._base',
+    'PushBase':          'spyne.model._base',
+    'Null':              'spyne.model._base',
+    'SimpleModel':       'spyne.model._base',
+
+    # store_as values
+    'xml':               'spyne.model._base',
+    'json':              'spyne.model._base',
+    'table':             'spyne.model._base',
+    'msgpack':           'spyne.model._base',
+
+    # Boolean
+    'Boolean':           'spyne.model.primitive',
+
+    # Any* types
+    'AnyXml':            'spyne.model.primitive',
+    'AnyDict':           'spyne.model.primitive',
+    'AnyHtml':           'spyne.model.primitive',
+
+    # Unicode children
+    'Unicode':           'spyne.model.primitive',
+    'String':            'spyne.model.primitive',
+    'AnyUri':            'spyne.model.primitive',
+    'ImageUri':          'spyne.model.primitive',
+    'Uuid':              'spyne.model.primitive',
+    'NormalizedString':  'spyne.model.primitive',
+    'Token':             'spyne.model.primitive',
+    'Name':              'spyne.model.primitive',
+    'NCName':            'spyne.model.primitive',
+    'ID':                'spyne.model.primitive',
+    'Language':          'spyne.model.primitive',
+
+    'Point':             'spyne.model.primitive',
+    'Line':              'spyne.model.primitive',
+    'LineString':        'spyne.model.primitive',
+    'Polygon':           'spyne.model.primitive',
+    'MultiPoint':        'spyne.model.primitive',
+    'MultiLine':         'spyne.model.primitive',
+    'MultiLineString':   'spyne.model.primitive',
+    'MultiPolygon':      'spyne.model.primitive',
+
+    # Date/Time types
+    'Date':              'spyne.model.primitive',
+    'DateTime':          'spyne.model.primitive',
+    'Duration':          'spyne.model.primitive',
+    'Time':              'spyne.model.primitive',
+
+    # Numbers
+    'Decimal':           'spyne.model.primitive',
+
+    'Double':            'spyne.model.primitive',
+    'Float':             'spyne.model.primitive',
+
+    'Integer8':          'spyne.model.primitive',
+    'Byte':              'spyne.model.primitive',
+    'Integer16':         'spyne.model.primitive',
+    'Short':             'spyne.model.primitive',
+    'Integer32':         'spyne.model.primitive',
+    'Int':               'spyne.model.primitive',
+    'Integer64':         'spyne.model.primitive',
+    'Long':              'spyne.model.primitive',
+    'Integer':           'spyne.model.primitive',
+
+    'UnsignedInteger8':  'spyne.model.primitive',
+    'UnsignedByte':      'spyne.model.primitive',
+    'UnsignedInteger16': 'spyne.model.primitive',
+    'UnsignedShort':     'spyne.model.primitive',
+    'UnsignedInteger32': 'spyne.model.primitive',
+    'UnsignedInt':       'spyne.model.primitive',
+    'UnsignedInteger64': 'spyne.model.primitive',
+    'UnsignedLong':      'spyne.model.primitive',
+    'NonNegativeInteger': 'spyne.model.primitive',  # Xml Schema calls it so
+    'UnsignedInteger':   'spyne.model.primitive',
+
+    # Classes
+    'ComplexModelMeta':  'spyne.model.complex',
+    'ComplexModelBase':  'spyne.model.complex',
+    'ComplexModel':      'spyne.model.complex',
+    'TTableModelBase':   'spyne.model.complex',
+    'TTableModel':       'spyne.model.complex',
+
+    # Iterables
+    'Array':             'spyne.model.complex',
+    'Iterable':          'spyne.model.complex',
+
+    # Modifiers
+    'Mandatory':         'spyne.model.complex',
+    'XmlAttribute':      'spyne.model.complex',
+    'XmlData':           'spyne.model.complex',
+
+    # Markers
+    'SelfReference':     'spyne.model.complex',
+
+    # Binary
+    'File':              'spyne.model.binary',
+    'ByteArray':         'spyne.model.binary',
+
+    # Enum
+    'Enum':              'spyne.model.enum',
+
+    # Fault
+    'Fault':             'spyne.model.fault',
+}
+
+__all__ = sorted(_lazy_attrs)
+
+lazy_module(__name__, _lazy_attrs, submodules=('_base', 'primitive',
+                                          'complex', 'binary', 'enum', 'fault'))
+
@@ -27,6 +27,7 @@ import spyne.const.xml_ns
 
 from decimal import Decimal
 
+from spyne._lazy import LazyRegex
 from spyne.util import Break
 from spyne.util.cdict import cdict
 from spyne.util.odict import odict
@@ -493,7 +494,9 @@ class SimpleModelAttributesMeta(AttributesMeta):
     def set_pattern(self, pattern):
         self._pattern = pattern
         if pattern is not None:
-            self._pattern_re = re.compile(pattern)
+            # Patterns are compiled when they're first used for validation,
+            # which may never happen.
+            self._pattern_re = LazyRegex(pattern)
 
     pattern = property(get_pattern, set_pattern)
 
@@ -503,7 +506,7 @@ class SimpleModelAttributesMeta(AttributesMeta):
     def set_unicode_pattern(self, pattern):
         self._pattern = pattern
         if pattern is not None:
-            self._pattern_re = re.compile(pattern, re.UNICODE)
+            self._pattern_re = LazyRegex(pattern, re.UNICODE)
 
     unicode_pattern = property(get_unicode_pattern, set_unicode_pattern)
     upattern = property(get_unicode_pattern, set_unicode_pattern)
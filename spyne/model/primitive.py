@@ -29,7 +29,6 @@ See :mod:`spyne.protocol._model` for {to,from}_string implementations.
 from __future__ import absolute_import
 
 import sys
-import re
 import math
 import uuid
 import decimal
@@ -37,6 +36,7 @@ import datetime
 import platform
 import spyne
 
+from spyne._lazy import LazyRegex
 from spyne.const import xml_ns
 from spyne.model import SimpleModel
 from spyne.util import memoize
@@ -105,9 +105,10 @@ def _get_multipolygon_pattern(dim):
     return r'MULTIPOLYGON\s*%s' % _get_one_multipolygon_pattern(dim)
 
 
-_date_re = re.compile(DATE_PATTERN)
-_time_re = re.compile(TIME_PATTERN)
-_duration_re = re.compile(
+# These are compiled on first use.
+_date_re = LazyRegex(DATE_PATTERN)
+_time_re = LazyRegex(TIME_PATTERN)
+_duration_re = LazyRegex(
         r'(?P<sign>-?)'
         r'P'
         r'(?:(?P<years>\d+)Y)?'
@@ -638,9 +639,11 @@ class DateTime(SimpleModel):
 
     __type_name__ = 'dateTime'
 
-    _local_re = re.compile(DATETIME_PATTERN)
-    _utc_re = re.compile(DATETIME_PATTERN + 'Z')
-    _offset_re = re.compile(DATETIME_PATTERN + OFFSET_PATTERN)
+    _local_re = LazyRegex(DATETIME_PATTERN)
+    _utc_re = LazyRegex(DATETIME_PATTERN + 'Z')
+    _offset_re = LazyRegex(DATETIME_PATTERN + OFFSET_PATTERN)
+    _iso_re = LazyRegex(DATETIME_PATTERN +
+                                    '(?:(?P<utc>Z)|' + OFFSET_PATTERN + ')?')
 
     class Attributes(SimpleModel.Attributes):
         """Customizable attributes of the :class:`spyne.model.primitive.DateTime`
@@ -738,7 +741,9 @@ class Date(DateTime):
 
     __type_name__ = 'date'
 
-    _offset_re = re.compile(DATE_PATTERN + '(' + OFFSET_PATTERN + '|Z)')
+    _offset_re = LazyRegex(DATE_PATTERN + '(' + OFFSET_PATTERN + '|Z)')
+    _iso_re = LazyRegex(DATE_PATTERN +
+                                    '(?:(?P<utc>Z)|' + OFFSET_PATTERN + ')?')
 
     class Attributes(DateTime.Attributes):
         """Customizable attributes of the :class:`spyne.model.primitive.Date`
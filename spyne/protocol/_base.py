@@ -31,7 +31,6 @@ from collections import deque
 from datetime import timedelta, time, datetime, date
 from math import modf
 from decimal import Decimal as D, InvalidOperation
-from pytz import FixedOffset
 from mmap import mmap, ACCESS_READ
 from time import strptime, mktime
 
@@ -49,11 +48,13 @@ from spyne.const.http import HTTP_401
 from spyne.const.http import HTTP_404
 from spyne.const.http import HTTP_405
 from spyne.const.http import HTTP_413
+from spyne.const.http import HTTP_415
 from spyne.const.http import HTTP_500
 
 from spyne.error import Fault, InternalError
 from spyne.error import ResourceNotFoundError
 from spyne.error import RequestTooLongError
+from spyne.error import UnsupportedContentEncodingError
 from spyne.error import RequestNotAllowed
 from spyne.error import InvalidCredentialsError
 from spyne.error import ValidationError
@@ -90,6 +91,35 @@ from spyne.util import DefaultAttrDict, memoize_id, six
 from spyne.util.cdict import cdict
 
 
+class InDocumentParser(object):
+    """Builds ``ctx.in_document`` from the chunks of an incoming message as
+    they arrive. Chunks are also appended to ``ctx.in_string``.
+
+    This implementation merely collects the chunks and calls
+    :func:`ProtocolBase.create_in_document` when the message is complete.
+    Protocols that can parse documents incrementally return a subclass from
+    :func:`ProtocolBase.get_in_document_parser`.
+    """
+
+    def __init__(self, prot, ctx, in_string_encoding=None):
+        self.prot = prot
+        self.ctx = ctx
+        self.in_string_encoding = in_string_encoding
+
+        ctx.in_string = []
+
+    def feed(self, data):
+        """Processes the given chunk of the incoming message."""
+
+        self.ctx.in_string.append(data)
+
+    def close(self):
+        """Sets ``ctx.in_document`` once the whole message was fed. Raises the
+        same exceptions as :func:`ProtocolBase.create_in_document`."""
+
+        self.prot.create_in_document(self.ctx, self.in_string_encoding)
+
+
 class ProtocolBase(object):
     """This is the abstract base class for all protocol implementations. Child
     classes can implement only the required subset of the public methods.
@@ -137,6 +167,9 @@ class ProtocolBase(object):
 
     default_binary_encoding = None
 
+    _call_handle_cache = None
+    _call_handle_cache_key = None
+
     def __init__(self, app=None, validator=None, mime_type=None,
                ignore_uncap=False, ignore_wrappers=False, binary_encoding=None):
         self.__app = None
@@ -278,12 +311,38 @@ class ProtocolBase(object):
     def create_in_document(self, ctx, in_string_encoding=None):
         """Uses ``ctx.in_string`` to set ``ctx.in_document``."""
 
+    def get_in_document_parser(self, ctx, in_string_encoding=None):
+        """Returns an :class:`InDocumentParser` instance that sets
+        ``ctx.in_document`` from chunks of data as they are received. This
+        lets transports overlap parsing with receiving the message."""
+
+        return InDocumentParser(self, ctx, in_string_encoding)
+
     def decompose_incoming_envelope(self, ctx, message):
         """Sets the ``ctx.method_request_string``, ``ctx.in_body_doc``,
         ``ctx.in_header_doc`` and ``ctx.service`` properties of the ctx object,
         if applicable.
         """
 
+    def split_batch(self, ctx):
+        """Returns a list of documents, one for each call, when
+        ``ctx.in_document`` contains a batch of calls. Returns None otherwise,
+        which is what the default implementation does.
+
+        The returned documents are passed to
+        :func:`decompose_incoming_envelope` one by one, as ``ctx.in_document``
+        of separate contexts.
+        """
+
+    def join_batch(self, ctx, contexts):
+        """Uses the ``out_document`` attributes of the given contexts, which
+        hold the results of the calls in a batch request, to set
+        ``ctx.out_document``. Protocols that implement :func:`split_batch` need
+        to implement this as well.
+        """
+
+        raise NotImplementedError()
+
     def deserialize(self, ctx, message):
         """Takes a MethodContext instance and a string containing ONE document
         instance in the ``ctx.in_string`` attribute.
@@ -323,8 +382,10 @@ class ProtocolBase(object):
         if len(call_handles) == 0:
             raise ResourceNotFoundError(ctx.method_request_string)
 
-        retval = []
-        for d in call_handles:
+        # The given context becomes the primary context. Only the auxiliary
+        # contexts are copies.
+        retval = [ctx]
+        for d in call_handles[1:]:
             assert d is not None
 
             c = ctx.copy()
@@ -332,6 +393,15 @@ class ProtocolBase(object):
 
             retval.append(c)
 
+        if len(retval) > 1:
+            # copy() makes the shared sub-contexts point to the last copy.
+            for sub in (ctx._transport, ctx._protocol, ctx._event):
+                if sub is not None:
+                    sub.parent = ctx
+
+        assert call_handles[0] is not None
+        ctx.descriptor = call_handles[0]
+
         return retval
 
     def get_call_handles(self, ctx):
@@ -339,13 +409,34 @@ class ProtocolBase(object):
         using any data in the method context. Returns a list of contexts.
         Can return multiple contexts if a method_request_string matches more
         than one function. (This is called the fanout mode.)
+
+        Successful lookups are cached per ``ctx.method_request_string``.
         """
 
         name = ctx.method_request_string
-        if not name.startswith("{"):
-            name = '{%s}%s' % (self.app.interface.get_tns(), name)
 
-        call_handles = self.app.interface.service_method_map.get(name, [])
+        interface = self.app.interface
+        method_map = interface.service_method_map
+
+        # the cache is invalidated when the interface is reset.
+        if self._call_handle_cache_key is not method_map:
+            self._call_handle_cache = {}
+            self._call_handle_cache_key = method_map
+
+        call_handles = self._call_handle_cache.get(name, None)
+        if call_handles is not None:
+            return call_handles
+
+        key = name
+        if not key.startswith("{"):
+            key = '{%s}%s' % (interface.get_tns(), key)
+
+        call_handles = method_map.get(key, [])
+
+        # unknown names are not cached to keep the cache from growing without
+        # bounds.
+        if len(call_handles) > 0:
+            self._call_handle_cache[name] = call_handles
 
         return call_handles
 
@@ -356,6 +447,8 @@ class ProtocolBase(object):
 
         if isinstance(fault, RequestTooLongError):
             return HTTP_413
+        if isinstance(fault, UnsupportedContentEncodingError):
+            return HTTP_415
         if isinstance(fault, ResourceNotFoundError):
             return HTTP_404
         if isinstance(fault, RequestNotAllowed):
@@ -560,20 +653,24 @@ class ProtocolBase(object):
     def time_from_string(self, cls, string):
         """Expects ISO formatted times."""
 
+        if _time_fromisoformat is not None:
+            l = len(string)
+            if (l == 8 or ((l == 12 or l == 15) and string[8] == '.'
+                                                 and string[9:].isdigit())) \
+                                   and string[2] == ':' and string[5] == ':':
+                try:
+                    return _time_fromisoformat(string)
+                except ValueError:
+                    pass
+
         match = _time_re.match(string)
         if match is None:
             raise ValidationError(string, "%%r does not match regex %r " %
                                                                    _time_re.pattern)
 
-        fields = match.groupdict(0)
-        microsec = fields.get('sec_frac')
-        if microsec is None or microsec == 0:
-            microsec = 0
-        else:
-            microsec = int(round(float(microsec) * 1e6))
+        hr, min, sec, sec_frac = match.groups()
 
-        return time(int(fields['hr']), int(fields['min']),
-                                                   int(fields['sec']), microsec)
+        return time(int(hr), int(min), int(sec), _parse_sec_frac(sec_frac))
 
     def datetime_to_string(self, cls, val):
         return _datetime_smap[cls.Attributes.serialize_as](cls, val)
@@ -582,14 +679,31 @@ class ProtocolBase(object):
         """This is used by protocols like SOAP who need ISO8601-formatted dates
         no matter what.
         """
+
+        if _date_fromisoformat is not None and len(string) == 10 \
+                                   and string[4] == '-' and string[7] == '-':
+            try:
+                return _date_fromisoformat(string)
+            except ValueError:
+                pass
+
+        match = cls._iso_re.match(string)
+        if match is not None:
+            year, month, day, utc, tz_hr, _ = match.groups()
+
+            # trailing garbage is only tolerated after a time zone.
+            if utc is not None or tz_hr is not None \
+                                               or match.end() == len(string):
+                try:
+                    return date(int(year), int(month), int(day))
+                except ValueError:
+                    raise ValidationError(string)
+
+        # strptime is lenient about zero padding, so it's kept as a fallback.
         try:
             return date(*(strptime(string, '%Y-%m-%d')[0:3]))
         except ValueError:
-            match = cls._offset_re.match(string)
-            if match:
-                return date(int(match.group('year')), int(match.group('month')), int(match.group('day')))
-            else:
-                raise ValidationError(string)
+            raise ValidationError(string)
 
     def enum_base_from_string(self, cls, value):
         if self.validator is self.SOFT_VALIDATION and not (
@@ -601,35 +715,25 @@ class ProtocolBase(object):
         return cls.from_string(value)
 
     def datetime_from_string_iso(self, cls, string):
-        astz = cls.Attributes.as_timezone
+        retval = None
+        if _datetime_fromisoformat is not None:
+            retval = _datetime_from_isoformat(string)
 
-        match = cls._utc_re.match(string)
-        if match:
-            tz = pytz.utc
-            retval = _parse_datetime_iso_match(match, tz=tz)
-            if astz is not None:
-                retval = retval.astimezone(astz)
-            return retval
+        if retval is None:
+            match = cls._iso_re.match(string)
+            if match is None:
+                raise ValidationError(string)
 
-        if match is None:
-            match = cls._offset_re.match(string)
-            if match:
-                tz_hr, tz_min = [int(match.group(x)) for x in ("tz_hr", "tz_min")]
-                tz = FixedOffset(tz_hr * 60 + tz_min, {})
-                retval = _parse_datetime_iso_match(match, tz=tz)
-                if astz is not None:
-                    retval = retval.astimezone(astz)
-                return retval
+            retval = _parse_datetime_iso_match(match)
 
-        if match is None:
-            match = cls._local_re.match(string)
-            if match:
-                retval = _parse_datetime_iso_match(match)
-                if astz:
-                    retval = retval.replace(tzinfo=astz)
-                return retval
+        astz = cls.Attributes.as_timezone
+        if astz is not None:
+            if retval.tzinfo is None:
+                retval = retval.replace(tzinfo=astz)
+            else:
+                retval = retval.astimezone(astz)
 
-        raise ValidationError(string)
+        return retval
 
     def datetime_from_string(self, cls, string):
         return self._datetime_dsmap[cls.Attributes.serialize_as](cls, string)
@@ -930,42 +1034,132 @@ else:
         return (td.microseconds + (td.seconds + td.days * 24 * 3600) *1e6) / 1e6
 
 
-def _parse_datetime_iso_match(date_match, tz=None):
-    fields = date_match.groupdict()
+try:
+    _datetime_fromisoformat = datetime.fromisoformat
+    _date_fromisoformat = date.fromisoformat
+    _time_fromisoformat = time.fromisoformat
+except AttributeError: # Python < 3.7
+    _datetime_fromisoformat = None
+    _date_fromisoformat = None
+    _time_fromisoformat = None
+
+
+_fixed_offsets = {}
+
+def _get_fixed_offset(tz_hr, tz_min):
+    """Returns a shared tzinfo object for the given offset. ``tz_hr`` is the
+    signed hour part and ``tz_min`` is the minute part of an ISO-8601 offset,
+    e.g. ``'-05'`` and ``'30'``."""
+
+    key = (tz_hr, tz_min)
+    retval = _fixed_offsets.get(key, None)
+    if retval is None:
+        offset = int(tz_hr[1:]) * 60 + int(tz_min)
+        if tz_hr[0] == '-':
+            offset = -offset
+
+        # pytz returns its utc singleton for zero offsets.
+        retval = _fixed_offsets[key] = pytz.FixedOffset(offset)
+
+    return retval
+
+
+def _parse_sec_frac(sec_frac):
+    """Converts the fractional part of seconds (with the leading dot) to
+    microseconds."""
+
+    if sec_frac is None:
+        return 0
+
+    if len(sec_frac) <= 7:
+        return int(sec_frac[1:].ljust(6, '0'))
+
+    # we only get the most significant 6 digits because that's what
+    # datetime can handle.
+    return min(int(round(float(sec_frac) * 1e6)), 999999)
+
+
+def _datetime_from_isoformat(string):
+    """Parses the common ``YYYY-MM-DDTHH:MM:SS[.fff[fff]][Z|+HH:MM]`` forms
+    using ``datetime.fromisoformat``. Returns None for anything else, which
+    is then left to the regex-based parser."""
 
-    year = int(fields.get('year'))
-    month = int(fields.get('month'))
-    day = int(fields.get('day'))
-    hour = int(fields.get('hr'))
-    min = int(fields.get('min'))
-    sec = int(fields.get('sec'))
-    usec = fields.get("sec_frac")
-    if usec is None:
-        usec = 0
+    s = string
+    tz = None
+    l = len(s)
+
+    if s[-1:] == 'Z':
+        s = s[:-1]
+        tz = pytz.utc
+        l -= 1
+
+    elif l > 19 and s[-3] == ':' and s[-6] in '+-':
+        tz_hr, tz_min = s[-6:-3], s[-2:]
+        if not (tz_hr[1:].isdigit() and tz_min.isdigit()):
+            return None
+
+        s = s[:-6]
+        l -= 6
+
+        try:
+            tz = _get_fixed_offset(tz_hr, tz_min)
+        except ValueError:
+            return None
+
+    if not (l == 19 or ((l == 23 or l == 26) and s[19] == '.'
+                                                       and s[20:].isdigit())):
+        return None
+
+    if s[4] != '-' or s[7] != '-' or s[13] != ':' or s[16] != ':' \
+                                                    or not (s[10] in 'T '):
+        return None
+
+    try:
+        retval = _datetime_fromisoformat(s)
+    except ValueError:
+        return None
+
+    if tz is not None:
+        retval = retval.replace(tzinfo=tz)
+
+    return retval
+
+
+def _parse_datetime_iso_match(date_match):
+    year, month, day, hr, min, sec, sec_frac, utc, tz_hr, tz_min = \
+                                                            date_match.groups()
+
+    if utc is not None:
+        tz = pytz.utc
+    elif tz_hr is not None:
+        tz = _get_fixed_offset(tz_hr, tz_min)
     else:
-        # we only get the most significant 6 digits because that's what
-        # datetime can handle.
-        usec = int(round(float(usec) * 1e6))
+        tz = None
 
-    return datetime(year, month, day, hour, min, sec, usec, tz)
+    return datetime(int(year), int(month), int(day), int(hr), int(min),
+                                      int(sec), _parse_sec_frac(sec_frac), tz)
 
 
 def _datetime_to_string(cls, value):
-    if cls.Attributes.as_timezone is not None and value.tzinfo is not None:
-        value = value.astimezone(cls.Attributes.as_timezone)
-    if not cls.Attributes.timezone:
-        value = value.replace(tzinfo=None)
+    attrs = cls.Attributes
 
-    format = cls.Attributes.out_format
+    # Date values go through here as well and don't have tzinfo.
+    if getattr(value, 'tzinfo', None) is not None:
+        if attrs.as_timezone is not None:
+            value = value.astimezone(attrs.as_timezone)
+        if not attrs.timezone:
+            value = value.replace(tzinfo=None)
+
+    format = attrs.out_format
     if format is None:
-        format = cls.Attributes.format
+        format = attrs.format
 
     if format is None:
         ret_str = value.isoformat()
     else:
         ret_str = value.strftime(format)
 
-    string_format = cls.Attributes.string_format
+    string_format = attrs.string_format
     if string_format is None:
         return ret_str
     else:
@@ -32,11 +32,15 @@ from spyne.util import Break, coroutine
 
 from spyne.protocol.cloth.to_parent import ToParentMixin
 from spyne.protocol.cloth.to_cloth import ToClothMixin
-from spyne.util.six import StringIO, string_types
+from spyne.util.six import BytesIO, string_types
 
 
 class XmlCloth(ToParentMixin, ToClothMixin):
     mime_type = 'text/xml'
+
+    type = set(ToClothMixin.type)
+    type.add('xml')
+    type.add('stream')
     HtmlMicroFormat = None
 
     def __init__(self, app=None, mime_type=None,
@@ -97,8 +101,7 @@ class XmlCloth(ToParentMixin, ToClothMixin):
         self.event_manager.fire_event('before_serialize', ctx)
 
         if ctx.out_stream is None:
-            ctx.out_stream = StringIO()
-            print(ctx.out_stream, id(ctx.out_stream))
+            ctx.out_stream = BytesIO()
 
         if ctx.out_error is not None:
             # All errors at this point must be Fault subclasses.
@@ -145,7 +148,7 @@ class XmlCloth(ToParentMixin, ToClothMixin):
     def create_out_string(self, ctx, charset=None):
         """Sets an iterable of string fragments to ctx.out_string"""
 
-        if isinstance(ctx.out_stream, StringIO):
+        if isinstance(ctx.out_stream, BytesIO):
             ctx.out_string = [ctx.out_stream.getvalue()]
 
     @coroutine
@@ -153,8 +156,15 @@ class XmlCloth(ToParentMixin, ToClothMixin):
         if name is None:
             name = cls.get_type_name()
 
+        # streams with a flush threshold buffer the output themselves, see
+        # spyne.server.wsgi.WsgiOutStream
+        if getattr(ctx.out_stream, 'threshold', None) is not None:
+            xmlfile = etree.xmlfile(ctx.out_stream, buffered=False)
+        else:
+            xmlfile = etree.xmlfile(ctx.out_stream)
+
         try:
-            with etree.xmlfile(ctx.out_stream) as xf:
+            with xmlfile as xf:
                 ret = self.subserialize(ctx, cls, inst, xf, name)
                 if isgenerator(ret):  # Poor man's yield from
                     try:
@@ -179,16 +189,13 @@ class XmlCloth(ToParentMixin, ToClothMixin):
             name = cls.get_type_name()
 
         if self._root_cloth is not None:
-            print("to root cloth")
             return self.to_root_cloth(ctx, cls, inst, self._root_cloth,
                                                          parent, name, **kwargs)
 
         if self._cloth is not None:
-            print("to parent cloth")
             return self.to_parent_cloth(ctx, cls, inst, self._cloth, parent,
                                                                  name, **kwargs)
 
-        print("to parent")
         return self.to_parent(ctx, cls, inst, parent, name, **kwargs)
 
     def decompose_incoming_envelope(self, ctx, message):
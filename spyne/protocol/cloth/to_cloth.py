@@ -17,8 +17,6 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-from __future__ import print_function
-
 import logging
 logger = logging.getLogger(__name__)
 
@@ -44,6 +42,51 @@ def _gen_tagname(ns, name):
     return name
 
 
+def _is_prefix(eltstack, ancestors):
+    """Returns True when ``eltstack`` is the beginning of ``ancestors``. Both
+    are paths from the root of the same tree, so comparing their last common
+    elements is enough."""
+
+    n = len(eltstack)
+    return n == 0 or (n <= len(ancestors) and ancestors[n - 1] is eltstack[-1])
+
+
+class _ClothNode(object):
+    """Everything the renderer needs to know about a cloth element, computed
+    once when the cloth is compiled instead of for every render.
+
+    It also keeps a reference to the element, so that the lxml proxy object
+    and thus its ``id()`` stays the same during the protocol's lifetime.
+    """
+
+    __slots__ = ('elt', 'ancestors', 'prevsibls', 'nextsibls', 'attrib',
+                                                          'children', 'mrpc')
+
+    def __init__(self, prot, elt):
+        self.elt = elt
+
+        self.ancestors = tuple(_revancestors(elt))
+        """Ancestors of the element, outermost first."""
+
+        self.prevsibls = tuple(_prevsibls(elt))
+        """Preceding siblings of the element, closest first."""
+
+        self.nextsibls = tuple(elt.itersiblings(preceding=False))
+        """Following siblings of the element."""
+
+        self.attrib = dict([(k, v) for k, v in elt.attrib.items()
+                             if not (k in (prot.attr_name, prot.root_attr_name))])
+        """Attributes of the element without the spyne-specific ones."""
+
+        self.children = tuple([(e.attrib[prot.attr_name], e)
+                                         for e in prot._get_outmost_elts(elt)])
+        """(key, element) pairs for the data slots directly under the
+        element."""
+
+        self.mrpc = tuple(prot._get_elts(elt, "mrpc"))
+        """Method link placeholders under the element."""
+
+
 class ToClothMixin(ProtocolBase):
     def __init__(self, app=None, validator=None, mime_type=None,
                  ignore_uncap=False, ignore_wrappers=False, polymorphic=True):
@@ -68,6 +111,7 @@ class ToClothMixin(ProtocolBase):
         self.root_attr_name = root_attr_name
 
         self._mrpc_cloth = self._root_cloth = None
+        self._cloth_nodes = {}
         self._cloth = cloth
         if isinstance(self._cloth, string_types):
             if cloth_parser is None:
@@ -86,6 +130,29 @@ class ToClothMixin(ProtocolBase):
         if self._cloth is not None:
             self._mrpc_cloth = self._pop_elt(self._cloth, 'mrpc_entry')
 
+        self._compile_cloth()
+
+    def _compile_cloth(self):
+        """Precomputes a :class:`_ClothNode` for every element in the cloth.
+        Must be called again whenever the cloth tree is modified."""
+
+        self._cloth_nodes = {}
+        if self._cloth is None:
+            return
+
+        root = self._cloth.getroottree().getroot()
+        for elt in root.iter():
+            if isinstance(elt.tag, string_types):
+                self._cloth_nodes[id(elt)] = _ClothNode(self, elt)
+
+    def _get_cloth_node(self, elt):
+        retval = self._cloth_nodes.get(id(elt), None)
+        if retval is None or not (retval.elt is elt):
+            # not part of the compiled cloth
+            retval = _ClothNode(self, elt)
+
+        return retval
+
     def _get_elts(self, elt, tag_id=None):
         if tag_id is None:
             return elt.xpath('.//*[@%s]' % self.attr_name)
@@ -113,7 +180,7 @@ class ToClothMixin(ProtocolBase):
 
         elif len(retval) == 1:
             retval = retval[0]
-            retval.iterancestors().next().remove(retval)
+            retval.getparent().remove(retval)
             return retval
 
     def _get_clean_elt(self, elt, what):
@@ -128,9 +195,8 @@ class ToClothMixin(ProtocolBase):
             return retval
 
     def _get_elts_by_id(self, elt, what):
-        print("id=%r" % what, "got", end='')
         retval = elt.xpath('//*[@id="%s"]' % what)
-        print(retval)
+        logger.debug("id=%r got %r", what, retval)
         return retval
 
     @staticmethod
@@ -152,7 +218,15 @@ class ToClothMixin(ProtocolBase):
             logger.warning("missing 'mrpc_template'")
             return
 
-        for elt in self._get_elts(template, "mrpc"):
+        # the cloth is shared by concurrent renders, so the links are kept in
+        # the protocol context and only added to copies of the placeholders
+        # when they are written. see _write_elt.
+        mrpc_links = ctx.protocol.mrpc_links
+
+        node = self._get_cloth_node(template)
+        for elt in node.mrpc:
+            links = mrpc_links[id(elt)] = []
+
             for k, v in self._methods(cls, inst):
                 href = v.in_message.get_type_name()
                 text = v.translate(ctx.locale, v.in_message.get_type_name())
@@ -167,19 +241,36 @@ class ToClothMixin(ProtocolBase):
                 else:
                     anchor.text = text
 
-                elt.append(mrpc_template)
+                links.append(mrpc_template)
+
+    def _write_elt(self, ctx, elt, parent):
+        """Writes the given cloth element along with the method links that
+        were rendered for the placeholders in it."""
+
+        mrpc_links = ctx.protocol.mrpc_links
+        if len(mrpc_links) > 0:
+            node = self._get_cloth_node(elt)
+            if any([id(e) in mrpc_links for e in ((elt,) + node.mrpc)]):
+                retval = deepcopy(elt)
+                for src, dst in list(zip(elt.iter(), retval.iter())):
+                    dst.extend(mrpc_links.get(id(src), ()))
+
+                parent.write(retval)
+                return
+
+        parent.write(elt)
                                            # mutable default ok because readonly
     def _enter_cloth(self, ctx, cloth, parent, attrs={}, skip=False):
         """There is no _exit_cloth because exiting from tags is done
         automatically with subsequent calls to _enter_cloth and finally to
         _close_cloth."""
 
-        print("entering", cloth.tag, cloth.attrib, cloth.nsmap, "skip=%s" % skip)
-
         tags = ctx.protocol.tags
         eltstack = ctx.protocol.eltstack
         ctxstack = ctx.protocol.ctxstack
-        ancestors = _revancestors(cloth)
+
+        node = self._get_cloth_node(cloth)
+        ancestors = node.ancestors
 
         last_elt = None
         if len(eltstack) > 0:
@@ -187,35 +278,30 @@ class ToClothMixin(ProtocolBase):
 
         # move up in tag stack until the ancestors of both
         # source and target are the same
-        while ancestors[:len(eltstack)] != eltstack:
+        while not _is_prefix(eltstack, ancestors):
             elt = eltstack.pop()
             elt_ctx = ctxstack.pop()
 
             last_elt = elt
             if elt_ctx is not None:
                 elt_ctx.__exit__(None, None, None)
-                print("\texit norm", elt.tag, elt.attrib)
 
             # unless we're at the same level as the relevant ancestor of the
             # target node
-            if ancestors[:len(eltstack)] != eltstack:
+            if not _is_prefix(eltstack, ancestors):
                 # write following siblings before closing parent node
-                for sibl in elt.itersiblings(preceding=False):
-                    print("\twrite exit sibl", sibl.tag, sibl.attrib)
-                    parent.write(sibl)
+                for sibl in self._get_cloth_node(elt).nextsibls:
+                    self._write_elt(ctx, sibl, parent)
 
         # write remaining ancestors of the target node.
         for anc in ancestors[len(eltstack):]:
             # write previous siblins of ancestors (if any)
-            prevsibls = _prevsibls(anc)
-            for elt in prevsibls:
+            for elt in self._get_cloth_node(anc).prevsibls:
                 if elt is last_elt:
                     break
                 if id(elt) in tags:
-                    print("\skip  anc prevsibl", elt.tag, elt.attrib)
                     continue
-                print("\twrite anc prevsibl", elt.tag, elt.attrib)
-                parent.write(elt)
+                self._write_elt(ctx, elt, parent)
 
             # enter the ancestor node
             if len(eltstack) == 0:
@@ -223,22 +309,18 @@ class ToClothMixin(ProtocolBase):
             else:
                 anc_ctx = parent.element(anc.tag, anc.attrib)
             anc_ctx.__enter__()
-            print("\tenter norm", anc.tag, anc.attrib)
             eltstack.append(anc)
             ctxstack.append(anc_ctx)
 
         # now that at the same level as the target node,
         # write its previous siblings
         if not last_elt is cloth:
-            prevsibls = _prevsibls(cloth)
-            for elt in prevsibls:
+            for elt in node.prevsibls:
                 if elt is last_elt:
                     break
                 if id(elt) in tags:
-                    print("\tskip  cloth prevsibl", elt.tag, elt.attrib)
                     continue
-                print("\twrite cloth prevsibl", elt.tag, elt.attrib)
-                parent.write(elt)
+                self._write_elt(ctx, elt, parent)
 
         if skip:
             tags.add(id(cloth))
@@ -246,10 +328,11 @@ class ToClothMixin(ProtocolBase):
 
         else:
             # finally, enter the target node.
-            attrib = dict([(k, v) for k, v in cloth.attrib.items()
-                           if not (k in (self.attr_name, self.root_attr_name))])
+            attrib = node.attrib
+            if len(attrs) > 0:
+                attrib = dict(attrib)
+                attrib.update(attrs)
 
-            attrib.update(attrs)
             if len(eltstack) == 0:
                 curtag = parent.element(cloth.tag, attrib, nsmap=cloth.nsmap)
             else:
@@ -259,24 +342,21 @@ class ToClothMixin(ProtocolBase):
         eltstack.append(cloth)
         ctxstack.append(curtag)
 
-        print()
-
     def _close_cloth(self, ctx, parent):
-        for elt, elt_ctx in reversed(zip(ctx.protocol.eltstack,
-                                                        ctx.protocol.ctxstack)):
+        for elt, elt_ctx in reversed(list(zip(ctx.protocol.eltstack,
+                                                  ctx.protocol.ctxstack))):
             if elt_ctx is not None:
                 elt_ctx.__exit__(None, None, None)
-                print("exit ", elt.tag, "close")
 
-            for sibl in elt.itersiblings(preceding=False):
-                print("write", sibl.tag, "close sibl")
-                parent.write(sibl)
+            for sibl in self._get_cloth_node(elt).nextsibls:
+                self._write_elt(ctx, sibl, parent)
 
     def to_parent_cloth(self, ctx, cls, inst, cloth, parent, name,
                         from_arr=False, **kwargs):
         ctx.protocol.eltstack = []
         ctx.protocol.ctxstack = []
         ctx.protocol.tags = set()
+        ctx.protocol.mrpc_links = {}
 
         self.to_cloth(ctx, cls, inst, cloth, parent)
         self._close_cloth(ctx, parent)
@@ -286,6 +366,7 @@ class ToClothMixin(ProtocolBase):
         ctx.protocol.eltstack = []
         ctx.protocol.ctxstack = []
         ctx.protocol.tags = set()
+        ctx.protocol.mrpc_links = {}
 
         self._enter_cloth(ctx, cloth, parent)
 
@@ -326,7 +407,7 @@ class ToClothMixin(ProtocolBase):
         if inst is None:
             ctx.protocol.tags.add(id(cloth))
             if cls.Attributes.min_occurs > 0:
-                parent.write(cloth)
+                self._write_elt(ctx, cloth, parent)
 
         else:
             if not from_arr and cls.Attributes.max_occurs > 1:
@@ -376,11 +457,11 @@ class ToClothMixin(ProtocolBase):
 
         self._enter_cloth(ctx, cloth, parent, attrs=attrs)
 
-        for elt in self._get_elts(cloth, "mrpc"):
+        node = self._get_cloth_node(cloth)
+        for elt in node.mrpc:
             self._actions_to_cloth(ctx, cls, inst, elt)
 
-        for i, elt in enumerate(self._get_outmost_elts(cloth)):
-            k = elt.attrib[self.attr_name]
+        for k, elt in node.children:
             v = fti.get(k, None)
 
             if v is None:
@@ -41,7 +41,14 @@ else:
 
 
 def _complex_to_csv(prot, ctx):
-    cls, = ctx.descriptor.out_message._type_info.values()
+    # The context can be closed before the generator is exhausted, so
+    # everything that's needed from it is looked up here.
+    return _gen_csv(prot, ctx.descriptor.out_message, ctx.out_object,
+                                                                 ctx.out_error)
+
+
+def _gen_csv(prot, out_message, out_object, out_error):
+    cls, = out_message._type_info.values()
 
     queue = StringIO()
 
@@ -52,25 +59,25 @@ def _complex_to_csv(prot, ctx):
 
     keys = sorted(type_info.keys())
 
-    if ctx.out_object is None:
+    if out_object is None:
         writer = csv.writer(queue, dialect=csv.excel)
         writer.writerow(['Error in generating the document'])
-        if ctx.out_error is not None:
-            for r in ctx.out_error.to_string_iterable(ctx.out_error):
+        if out_error is not None:
+            for r in out_error.to_string_iterable(out_error):
                 writer.writerow([r])
 
         yield queue.getvalue()
         queue.truncate(0)
 
-    elif ctx.out_error is None:
+    elif out_error is None:
         writer = csv.DictWriter(queue, dialect=csv.excel, fieldnames=keys)
         writer.writerow(dict(((k,k) for k in keys)))
 
         yield queue.getvalue()
         queue.truncate(0)
 
-        if ctx.out_object[0] is not None:
-            for v in ctx.out_object[0]:
+        if out_object[0] is not None:
+            for v in out_object[0]:
                 d = prot._to_dict_value(serializer, v)
                 for k in d:
                     if isinstance(d[k], unicode):
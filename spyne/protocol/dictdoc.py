@@ -240,6 +240,10 @@ class DictDocument(ProtocolBase):
         self.stringified_types = (DateTime, Date, Time, Uuid, Duration,
                                                                 AnyXml, AnyHtml)
 
+        # decided once here so that the request path doesn't pay for building
+        # log messages that are going to be discarded anyway.
+        self.log_messages = logger.isEnabledFor(logging.DEBUG)
+
     def set_validator(self, validator):
         """Sets the validator for the protocol.
 
@@ -253,6 +257,28 @@ class DictDocument(ProtocolBase):
         else:
             raise ValueError(validator)
 
+    def split_batch(self, ctx):
+        """A non-empty list of dicts is a batch request. Every dict in it is a
+        separate call."""
+
+        doc = ctx.in_document
+        if isinstance(doc, (list, tuple)) and len(doc) > 0 and \
+                                     all([isinstance(d, dict) for d in doc]):
+            return doc
+
+    def join_batch(self, ctx, contexts):
+        """The response to a batch request is a list that contains the
+        response documents of the calls, in the order of the request."""
+
+        retval = []
+        for c in contexts:
+            if c.out_document is None:
+                retval.append(None)
+            else:
+                retval.extend(c.out_document)
+
+        ctx.out_document = [retval]
+
     def decompose_incoming_envelope(self, ctx, message):
         """Sets ``ctx.in_body_doc``, ``ctx.in_header_doc`` and
         ``ctx.method_request_string`` using ``ctx.in_document``.
@@ -271,8 +297,9 @@ class DictDocument(ProtocolBase):
         if len(doc) == 0:
             raise Fault("Client", "Empty request")
 
-        logger.debug('\theader : %r' % (ctx.in_header_doc))
-        logger.debug('\tbody   : %r' % (ctx.in_body_doc))
+        if self.log_messages:
+            logger.debug('\theader : %r', ctx.in_header_doc)
+            logger.debug('\tbody   : %r', ctx.in_body_doc)
 
         if not isinstance(doc, dict) or len(doc) != 1:
             raise ValidationError("Need a dictionary with exactly one key "
@@ -310,6 +337,7 @@ class SimpleDictDocument(DictDocument):
 
         self.hier_delim = hier_delim
         self.strict_arrays = strict_arrays
+        self.log_fields = logger.isEnabledFor(logging.DEBUG)
 
     def simple_dict_to_object(self, doc, cls, validator=None, req_enc=None):
         """Converts a flat dict to a native python object.
@@ -341,7 +369,8 @@ class SimpleDictDocument(DictDocument):
 
             member = simple_type_info.get(k, None)
             if member is None:
-                logger.debug("discarding field %r" % k)
+                if self.log_fields:
+                    logger.debug("discarding field %r", k)
                 continue
 
             # extract native values from the list of strings in the flat dict
@@ -462,12 +491,14 @@ class SimpleDictDocument(DictDocument):
                 else:
                     _v.extend(value)
 
-                logger.debug("\tset array   %r(%r) = %r" %
-                                                    (member.path, pkey, value))
+                if self.log_fields:
+                    logger.debug("\tset array   %r(%r) = %r",
+                                                       member.path, pkey, value)
             else:
                 cinst._safe_set(member.path[-1], value[0], member.type)
-                logger.debug("\tset default %r(%r) = %r" %
-                                                    (member.path, pkey, value))
+                if self.log_fields:
+                    logger.debug("\tset default %r(%r) = %r",
+                                                       member.path, pkey, value)
 
         if validator is self.SOFT_VALIDATION:
             for k, d in frequencies.items():
@@ -748,7 +779,7 @@ class HierDictDocument(DictDocument):
                 subinst = getattr(inst, k, None)
             # to guard against e.g. sqlalchemy throwing NoSuchColumnError
             except Exception as e:
-                logger.error("Error getting %r: %r" %(k,e))
+                logger.error("Error getting %r: %r", k, e)
                 subinst = None
 
             if subinst is None:
@@ -39,3 +39,6 @@ class HtmlBase(XmlCloth):
             if self._cloth.tag != '{%s}html' % NS_HTML:
                 for elt in self._cloth.xpath("//*"):
                     elt.tag = "{%s}%s" % (NS_HTML, elt.tag)
+
+            # the cloth tree was modified
+            self._compile_cloth()
@@ -22,12 +22,16 @@ from __future__ import print_function
 import logging
 logger = logging.getLogger(__name__)
 
+import heapq
+
 from inspect import isgenerator
+from itertools import islice
 
 from lxml.html.builder import E
 
 from spyne import ModelBase, AnyHtml, ByteArray, ComplexModelBase, Array, \
     AnyUri, ImageUri
+from spyne.model import PushBase
 from spyne.model.binary import Attachment
 from spyne.protocol import get_cls_attrs
 from spyne.protocol.html import HtmlBase, NSMAP
@@ -40,7 +44,7 @@ def HtmlTable(app=None, ignore_uncap=False, ignore_wrappers=True,
                      produce_header=True, table_name_attr='class',
                      field_name_attr='class', border=0, fields_as='columns',
                      row_class=None, cell_class=None, header_cell_class=None,
-                     polymorphic=True):
+                     polymorphic=True, page_size=None, max_rows=None):
     """Protocol that returns the response object as a html table.
 
     The simple flavour is like the HtmlMicroFormatprotocol, but returns data
@@ -60,6 +64,8 @@ def HtmlTable(app=None, ignore_uncap=False, ignore_wrappers=True,
     :param row_class: value that goes inside the <tr class="">
     :param cell_class: value that goes inside the <td class="">
     :param header_cell_class: value that goes inside the <th class="">
+    :param page_size: See :class:`HtmlTableBase`.
+    :param max_rows: See :class:`HtmlTableBase`.
 
     "Fields as rows" returns one record per table in a table with two
     columns.
@@ -69,25 +75,57 @@ def HtmlTable(app=None, ignore_uncap=False, ignore_wrappers=True,
     """
 
     if fields_as == 'columns':
-        return HtmlColumnTable(app, ignore_uncap, ignore_wrappers,
-                    produce_header, table_name_attr, field_name_attr, border,
-                                    row_class, cell_class, header_cell_class)
+        return HtmlColumnTable(app=app, ignore_uncap=ignore_uncap,
+                ignore_wrappers=ignore_wrappers, produce_header=produce_header,
+                table_name_attr=table_name_attr, field_name_attr=field_name_attr,
+                border=border, row_class=row_class, cell_class=cell_class,
+                header_cell_class=header_cell_class, polymorphic=polymorphic,
+                                         page_size=page_size, max_rows=max_rows)
     elif fields_as == 'rows':
-        return HtmlRowTable(app, ignore_uncap, ignore_wrappers,
-                    produce_header, table_name_attr, field_name_attr, border,
-                                    row_class, cell_class, header_cell_class)
+        return HtmlRowTable(app=app, ignore_uncap=ignore_uncap,
+                ignore_wrappers=ignore_wrappers, produce_header=produce_header,
+                table_name_attr=table_name_attr, field_name_attr=field_name_attr,
+                border=border, row_class=row_class, cell_class=cell_class,
+                header_cell_class=header_cell_class, polymorphic=polymorphic,
+                                         page_size=page_size, max_rows=max_rows)
 
     else:
         raise ValueError(fields_as)
 
 class HtmlTableBase(HtmlBase):
+    """Base class for the html table protocols.
+
+    Arrays can be rendered a page at a time. The window is set per request
+    via attributes of ``ctx.protocol``, which is typically done by the
+    service method:
+
+        * ``table_page``: The 0-based page number. Used with ``page_size``.
+        * ``table_offset``: The index of the first row, overrides
+          ``table_page``.
+        * ``table_sort``: The name of a member of the array's item class to
+          sort the rows by. Prefix it with a ``-`` for descending order.
+
+    These only apply to the first (outermost) array in the response. After
+    the rows are rendered, ``ctx.protocol.table_has_more`` tells whether there
+    were rows past the window, e.g. for rendering pagination links in
+    :func:`HtmlColumnTable.extend_table`.
+
+    Generators are consumed only up to the end of the window. Sorting needs to
+    see every row, but only keeps the rows up to the end of the window in
+    memory.
+
+    :param page_size: The maximum number of rows of the outermost array.
+    :param max_rows: The maximum number of rows of any array, regardless of
+        pagination.
+    """
+
     def __init__(self, app=None, ignore_uncap=False, ignore_wrappers=True,
                        cloth=None, attr_name='spyne_id', root_attr_name='spyne',
                                                               cloth_parser=None,
                              produce_header=True, table_name_attr='class',
                             field_name_attr='class', border=0, row_class=None,
                                 cell_class=None, header_cell_class=None,
-                                polymorphic=True):
+                                polymorphic=True, page_size=None, max_rows=None):
 
         super(HtmlTableBase, self).__init__(app=app,
                      ignore_uncap=ignore_uncap, ignore_wrappers=ignore_wrappers,
@@ -101,6 +139,8 @@ class HtmlTableBase(HtmlBase):
         self.row_class = row_class
         self.cell_class = cell_class
         self.header_cell_class = header_cell_class
+        self.page_size = page_size
+        self.max_rows = max_rows
 
         if self.cell_class is not None and field_name_attr == 'class':
             raise Exception("Either 'cell_class' should be None or "
@@ -116,11 +156,98 @@ class HtmlTableBase(HtmlBase):
     def null_to_parent(self, ctx, cls, inst, parent, name, **kwargs):
         pass
 
+    def get_window(self, ctx, cls, inst):
+        """Applies the pagination, sorting and row cap settings to the given
+        array value and returns the rows to render."""
+
+        if inst is None or isinstance(inst, PushBase):
+            return inst
+
+        prot_ctx = ctx.protocol
+        limit = self.max_rows
+        offset = 0
+        sort = None
+
+        outermost = not getattr(prot_ctx, 'table_windowed', False)
+        if outermost:
+            prot_ctx.table_windowed = True
+            prot_ctx.table_has_more = False
+
+            page_size = self.page_size
+            if page_size is not None and (limit is None or page_size < limit):
+                limit = page_size
+
+            offset = getattr(prot_ctx, 'table_offset', None)
+            if offset is None:
+                page = getattr(prot_ctx, 'table_page', None)
+                if page is None or page_size is None:
+                    offset = 0
+                else:
+                    offset = page * page_size
+
+            sort = getattr(prot_ctx, 'table_sort', None)
+
+        if sort is not None:
+            inst = self._sort_rows(prot_ctx, cls, inst, sort, offset, limit,
+                                                                     outermost)
+
+        elif limit is not None or offset > 0:
+            inst = self._gen_window(prot_ctx, inst, offset, limit, outermost)
+
+        return inst
+
+    def _sort_rows(self, prot_ctx, cls, inst, sort, offset, limit,
+                                                                    outermost):
+        reverse = sort.startswith('-')
+        if reverse:
+            sort = sort[1:]
+
+        if not (issubclass(cls, ComplexModelBase)
+                                     and sort in cls.get_flat_type_info(cls)):
+            logger.warning("Can't sort %r by %r", cls, sort)
+            return self._gen_window(prot_ctx, inst, offset, limit, outermost)
+
+        # None values go first, also on Python 3.
+        def key(row):
+            v = getattr(row, sort, None)
+            return (v is not None, v)
+
+        if limit is None:
+            return islice(sorted(inst, key=key, reverse=reverse), offset, None)
+
+        # one more row than necessary tells whether there are more pages.
+        if reverse:
+            retval = heapq.nlargest(offset + limit + 1, inst, key=key)
+        else:
+            retval = heapq.nsmallest(offset + limit + 1, inst, key=key)
+
+        if outermost and len(retval) > offset + limit:
+            prot_ctx.table_has_more = True
+
+        return retval[offset:offset + limit]
+
+    def _gen_window(self, prot_ctx, inst, offset, limit, outermost):
+        if limit is None:
+            for row in islice(inst, offset, None):
+                yield row
+            return
+
+        it = iter(inst)
+        for row in islice(it, offset, offset + limit):
+            yield row
+
+        if outermost:
+            for _ in it:
+                prot_ctx.table_has_more = True
+                break
+
 
 class HtmlColumnTable(HtmlTableBase):
     def __init__(self, *args, **kwargs):
         super(HtmlColumnTable, self).__init__(*args, **kwargs)
 
+        self._row_fields = {}
+
         self.serialization_handlers = cdict({
             ModelBase: self.model_base_to_parent,
             AnyUri: self.anyuri_to_parent,
@@ -148,33 +275,44 @@ class HtmlColumnTable(HtmlTableBase):
         else:
             parent.write(self.to_unicode(cls, inst))
 
+    def _get_row_fields(self, cls):
+        """Returns (key, type, td attributes) triplets for the visible fields
+        of the given class. This is computed once per class, not per row."""
+
+        retval = self._row_fields.get(cls, None)
+        if retval is not None:
+            return retval
+
+        retval = []
+        for k, v in cls.get_flat_type_info(cls).items():
+            attr = get_cls_attrs(self, v)
+            if attr.exc:
+                continue
+            if not attr.get('read', True):
+                continue
+
+            sub_name = attr.sub_name
+            if sub_name is None:
+                sub_name = k
+
+            td_attrs = {}
+            if self.field_name_attr is not None:
+                td_attrs[self.field_name_attr] = sub_name
+
+            retval.append((k, v, sub_name, td_attrs))
+
+        retval = self._row_fields[cls] = tuple(retval)
+        return retval
+
     @coroutine
     def _gen_row(self, ctx, cls, inst, parent, name, **kwargs):
-        print("Generate row for", cls)
         with parent.element('tr'):
-            for k, v in cls.get_flat_type_info(cls).items():
-                attr = get_cls_attrs(self, v)
-                if attr.exc:
-                    print("\tExclude field %r type %r" % (k, v), "for", cls)
-                    continue
-                if not attr.get('read', True):
-                    continue
-
-                print("\tGenerate field %r type %r" % (k, v), "for", cls)
-
+            for k, v, sub_name, td_attrs in self._get_row_fields(cls):
                 try:
                     sub_value = getattr(inst, k, None)
                 except: # to guard against e.g. SQLAlchemy throwing NoSuchColumnError
                     sub_value = None
 
-                sub_name = attr.sub_name
-                if sub_name is None:
-                    sub_name = k
-
-                td_attrs = {}
-                if self.field_name_attr is not None:
-                    td_attrs[self.field_name_attr] = sub_name
-
                 with parent.element('td', td_attrs):
                     ret = self.to_parent(ctx, v, sub_value, parent, sub_name,
                                                                        **kwargs)
@@ -190,7 +328,6 @@ class HtmlColumnTable(HtmlTableBase):
                             except StopIteration:
                                 pass
 
-            print("Generate row for %r done." % cls)
             self.extend_data_row(ctx, cls, inst, parent, name, **kwargs)
 
     def _gen_header(self, ctx, cls, name, parent):
@@ -276,6 +413,7 @@ class HtmlColumnTable(HtmlTableBase):
                                                                        **kwargs)
 
     def array_to_parent(self, ctx, cls, inst, parent, name, **kwargs):
+        inst = self.get_window(ctx, cls, inst)
         return self._gen_table(ctx, cls, inst, parent, name,
                          super(HtmlColumnTable, self).array_to_parent, **kwargs)
 
@@ -374,6 +512,8 @@ class HtmlRowTable(HtmlTableBase):
 
     @coroutine
     def array_to_parent(self, ctx, cls, inst, parent, name, **kwargs):
+        inst = self.get_window(ctx, cls, inst)
+
         with parent.element('div', nsmap=NSMAP):
             if issubclass(cls, ComplexModelBase):
                 ret = super(HtmlRowTable, self).array_to_parent(
@@ -125,6 +125,7 @@ class HttpRpc(SimpleDictDocument):
         self.tmp_dir = tmp_dir
         self.tmp_delete_on_close = tmp_delete_on_close
         self.parse_cookie = parse_cookie
+        self.log_messages = logger.isEnabledFor(logging.DEBUG)
 
     def get_tmp_delete_on_close(self):
         return self.__tmp_delete_on_close
@@ -171,8 +172,9 @@ class HttpRpc(SimpleDictDocument):
                         l.append(v.coded_value)
                         ctx.in_header_doc[k] = l
 
-        logger.debug('\theader : %r' % (ctx.in_header_doc))
-        logger.debug('\tbody   : %r' % (ctx.in_body_doc))
+        if self.log_messages:
+            logger.debug('\theader : %r', ctx.in_header_doc)
+            logger.debug('\tbody   : %r', ctx.in_body_doc)
 
     def deserialize(self, ctx, message):
         assert message in (self.REQUEST,)
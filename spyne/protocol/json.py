@@ -207,6 +207,15 @@ class _SpyneJsonRpc1(JsonDocument):
     HEAD = 'head'
     FAULT = 'fault'
 
+    def create_out_string(self, ctx, out_string_encoding='utf8'):
+        """Sets ``ctx.out_string`` using ``ctx.out_document``, which is a
+        single dict (or a list of them for batch requests) in this protocol."""
+
+        ctx.out_string = [json.dumps(ctx.out_document, **self.kwargs)]
+
+    def join_batch(self, ctx, contexts):
+        ctx.out_document = [c.out_document for c in contexts]
+
     def decompose_incoming_envelope(self, ctx, message=JsonDocument.REQUEST):
         indoc = ctx.in_document
         if not isinstance(indoc, dict):
@@ -31,11 +31,14 @@ from __future__ import absolute_import
 import logging
 logger = logging.getLogger(__name__)
 
+from threading import local
+
 from spyne.util import six
 
 import msgpack
 
 from spyne.model.fault import Fault
+from spyne.protocol import InDocumentParser
 from spyne.protocol.dictdoc import HierDictDocument
 from spyne.model.primitive import Double
 from spyne.model.primitive import Boolean
@@ -47,8 +50,71 @@ class MessagePackDecodeError(Fault):
         super(MessagePackDecodeError, self).__init__("Client.MessagePackDecodeError", data)
 
 
+def _feed(unpacker, chunk):
+    try:
+        unpacker.feed(chunk)
+    except msgpack.BufferFull:
+        raise MessagePackDecodeError("Message too large")
+
+
+def _unpack_one(unpacker):
+    """Returns the one object that was fed to the given unpacker."""
+
+    try:
+        retval = unpacker.unpack()
+
+    except msgpack.OutOfData:
+        raise MessagePackDecodeError("Incomplete message")
+
+    except ValueError as e:
+        raise MessagePackDecodeError(''.join(e.args))
+
+    try:
+        unpacker.unpack()
+    except msgpack.OutOfData:
+        return retval
+    except ValueError:
+        pass
+
+    raise MessagePackDecodeError("Extra data after the message")
+
+
+def _unpack(in_string, max_buffer_size=0):
+    """Feeds the given chunks to a streaming unpacker and returns the one
+    object they contain. The chunks can be any object that supports the buffer
+    protocol, e.g. memoryview instances, they are not joined beforehand."""
+
+    unpacker = msgpack.Unpacker(max_buffer_size=max_buffer_size)
+
+    for chunk in in_string:
+        _feed(unpacker, chunk)
+
+    return _unpack_one(unpacker)
+
+
+class _MessagePackInDocumentParser(InDocumentParser):
+    def __init__(self, prot, ctx, in_string_encoding=None):
+        super(_MessagePackInDocumentParser, self).__init__(prot, ctx,
+                                                             in_string_encoding)
+
+        self.unpacker = msgpack.Unpacker(max_buffer_size=prot.max_buffer_size)
+
+    def feed(self, data):
+        super(_MessagePackInDocumentParser, self).feed(data)
+
+        _feed(self.unpacker, data)
+
+    def close(self):
+        self.ctx.in_document = _unpack_one(self.unpacker)
+        self.prot._check_in_document(self.ctx)
+
+
 class MessagePackDocument(HierDictDocument):
-    """An integration class for the msgpack protocol."""
+    """An integration class for the msgpack protocol.
+
+    :param max_buffer_size: The maximum size of the incoming document. Zero
+        means the msgpack default.
+    """
 
     mime_type = 'application/x-msgpack'
 
@@ -64,11 +130,20 @@ class MessagePackDocument(HierDictDocument):
                                         # DictDocument specific
                                         ignore_wrappers=True,
                                         complex_as=dict,
-                                        ordered=False):
+                                        ordered=False,
+                                        # MessagePackDocument specific
+                                        max_buffer_size=0):
 
         super(MessagePackDocument, self).__init__(app, validator, mime_type,
                             ignore_uncap, ignore_wrappers, complex_as, ordered)
 
+        self.max_buffer_size = max_buffer_size
+        self.log_messages = logger.isEnabledFor(logging.DEBUG)
+
+        # Packer instances keep an internal buffer, so they can't be shared
+        # between threads.
+        self._local = local()
+
         self._from_string_handlers[Double] = self._ret
         self._from_string_handlers[Boolean] = self._ret
         self._from_string_handlers[Integer] = self.integer_from_string
@@ -80,6 +155,16 @@ class MessagePackDocument(HierDictDocument):
     def _ret(self, cls, value):
         return value
 
+    @property
+    def packer(self):
+        """A :class:`msgpack.Packer` instance that is reused for every outgoing
+        document of the current thread."""
+
+        retval = getattr(self._local, 'packer', None)
+        if retval is None:
+            retval = self._local.packer = msgpack.Packer(autoreset=True)
+        return retval
+
     def create_in_document(self, ctx, in_string_encoding=None):
         """Sets ``ctx.in_document``,  using ``ctx.in_string``.
 
@@ -88,17 +173,20 @@ class MessagePackDocument(HierDictDocument):
             argument is ignored.
         """
 
-        try:
-            ctx.in_document = msgpack.unpackb(b''.join(ctx.in_string))
-        except ValueError as e:
-            raise MessagePackDecodeError(''.join(e.args))
+        ctx.in_document = _unpack(ctx.in_string, self.max_buffer_size)
+        self._check_in_document(ctx)
 
+    def get_in_document_parser(self, ctx, in_string_encoding=None):
+        return _MessagePackInDocumentParser(self, ctx, in_string_encoding)
+
+    def _check_in_document(self, ctx):
         if not isinstance(ctx.in_document, dict):
             logger.debug("reqobj: %r", ctx.in_document)
             raise MessagePackDecodeError("Request object must be a dictionary")
 
     def create_out_string(self, ctx, out_string_encoding='utf8'):
-        ctx.out_string = (msgpack.packb(o) for o in ctx.out_document)
+        pack = self.packer.pack
+        ctx.out_string = (pack(o) for o in ctx.out_document)
 
     def integer_from_string(self, cls, value):
         if isinstance(value, six.string_types):
@@ -114,7 +202,13 @@ class MessagePackDocument(HierDictDocument):
 
 
 class MessagePackRpc(MessagePackDocument):
-    """An integration class for the msgpack-rpc protocol."""
+    """An integration class for the msgpack-rpc protocol.
+
+    The ``msgid`` of incoming requests is stored in ``ctx.protocol.msgid`` and
+    is echoed back in the response, so that clients can pipeline requests and
+    match responses that arrive out of order. Notification messages are
+    processed as requests but don't produce a response document.
+    """
 
     mime_type = 'application/x-msgpack'
 
@@ -123,7 +217,8 @@ class MessagePackRpc(MessagePackDocument):
     MSGPACK_NOTIFY = 2
 
     def create_out_string(self, ctx, out_string_encoding='utf8'):
-        ctx.out_string = (msgpack.packb(o) for o in ctx.out_document)
+        pack = self.packer.pack
+        ctx.out_string = (pack(o) for o in ctx.out_document)
 
     def create_in_document(self, ctx, in_string_encoding=None):
         """Sets ``ctx.in_document``,  using ``ctx.in_string``.
@@ -133,28 +228,60 @@ class MessagePackRpc(MessagePackDocument):
             argument is ignored.
         """
 
-        # TODO: Use feed api
-        try:
-            ctx.in_document = msgpack.unpackb(b''.join(ctx.in_string))
-        except ValueError as e:
-            raise MessagePackDecodeError(''.join(e.args))
+        ctx.in_document = _unpack(ctx.in_string, self.max_buffer_size)
+        self._check_in_document(ctx)
 
+    def _check_in_document(self, ctx):
         try:
             len(ctx.in_document)
         except TypeError:
             raise MessagePackDecodeError("Input must be a sequence.")
 
-        if not (3 <= len(ctx.in_document) <= 4):
-            raise MessagePackDecodeError("Length of input iterable must be "
-                                                                "either 3 or 4")
+    def split_batch(self, ctx):
+        """A non-empty list of messages is a batch request. A message is itself
+        a list whose first element is the message type, so the two are easy
+        to tell apart."""
+
+        doc = ctx.in_document
+        if len(doc) > 0 and all([isinstance(m, (list, tuple)) for m in doc]):
+            return doc
+
+    def join_batch(self, ctx, contexts):
+        """The response to a batch request is a list of response messages.
+        Notifications don't have a place in it."""
+
+        retval = []
+        for c in contexts:
+            if c.out_document is not None:
+                retval.extend(c.out_document)
+
+        ctx.out_document = [retval]
 
     def decompose_incoming_envelope(self, ctx, message):
         # FIXME: For example: {0: 0, 1: 0, 2: "some_call", 3: [1,2,3]} will also
         # work. Is this a problem?
 
-        # FIXME: Msgid is ignored. Is this a problem?
+        try:
+            len(ctx.in_document)
+        except TypeError:
+            raise MessagePackDecodeError("Message must be a sequence.")
+
+        if not (3 <= len(ctx.in_document) <= 4):
+            raise MessagePackDecodeError("Length of input iterable must be "
+                                                                "either 3 or 4")
+
+        msgtype = ctx.in_document[0]
+        msgid = None
         msgparams = []
-        if len(ctx.in_document) == 3:
+
+        if msgtype == MessagePackRpc.MSGPACK_NOTIFY:
+            # [type, method, params]
+            if len(ctx.in_document) != 3:
+                raise MessagePackDecodeError("Length of notification "
+                                                           "iterable must be 3")
+            msgtype, msgname_or_error, msgparams = ctx.in_document
+
+        elif len(ctx.in_document) == 3:
             msgtype, msgid, msgname_or_error = ctx.in_document
 
         else:
@@ -167,11 +294,14 @@ class MessagePackRpc(MessagePackDocument):
             assert message == MessagePackRpc.RESPONSE
 
         elif msgtype == MessagePackRpc.MSGPACK_NOTIFY:
-            raise NotImplementedError()
+            assert message == MessagePackRpc.REQUEST
 
         else:
             raise MessagePackDecodeError("Unknown message type %r" % msgtype)
 
+        ctx.protocol.msgtype = msgtype
+        ctx.protocol.msgid = msgid
+
         ctx.method_request_string = '{%s}%s' % (self.app.interface.get_tns(),
                                                                         msgname_or_error)
 
@@ -183,8 +313,17 @@ class MessagePackRpc(MessagePackDocument):
         else:
             ctx.in_body_doc = msgparams
 
-        logger.debug('\theader : %r' % (ctx.in_header_doc))
-        logger.debug('\tbody   : %r' % (ctx.in_body_doc))
+        if self.log_messages:
+            logger.debug('\theader : %r', ctx.in_header_doc)
+            logger.debug('\tbody   : %r', ctx.in_body_doc)
+
+    @staticmethod
+    def is_notification(ctx):
+        """Returns True when the incoming message was a notification, which
+        must not be replied to."""
+
+        return getattr(ctx.protocol, 'msgtype', None) == \
+                                                  MessagePackRpc.MSGPACK_NOTIFY
 
     def deserialize(self, ctx, message):
         assert message in (self.REQUEST, self.RESPONSE)
@@ -219,9 +358,20 @@ class MessagePackRpc(MessagePackDocument):
 
         self.event_manager.fire_event('before_serialize', ctx)
 
+        msgid = getattr(ctx.protocol, 'msgid', None)
+        if msgid is None:
+            msgid = 0
+
+        if message is self.RESPONSE and self.is_notification(ctx):
+            # notifications are never responded to, not even when they fail.
+            ctx.out_document = []
+            self.event_manager.fire_event('after_serialize', ctx)
+            return
+
         if ctx.out_error is not None:
             ctx.out_document = [
-                [MessagePackRpc.MSGPACK_RESPONSE, 0, Fault.to_dict(ctx.out_error.__class__, ctx.out_error)]
+                [MessagePackRpc.MSGPACK_RESPONSE, msgid,
+                    Fault.to_dict(ctx.out_error.__class__, ctx.out_error), None]
             ]
             return
 
@@ -258,6 +408,6 @@ class MessagePackRpc(MessagePackDocument):
         else:
             params = self._to_dict_value(out_type, out_instance)
 
-        ctx.out_document = [[msgtype, 0, method_name_or_error, params]]
+        ctx.out_document = [[msgtype, msgid, method_name_or_error, params]]
 
         self.event_manager.fire_event('after_serialize', ctx)
@@ -40,6 +40,9 @@ logger_invalid = logging.getLogger(__name__ + ".invalid")
 
 import cgi
 
+from copy import deepcopy
+from inspect import isgenerator
+
 import spyne.const.xml_ns as ns
 
 from lxml import etree
@@ -52,12 +55,16 @@ from spyne.const.xml_ns import DEFAULT_NS
 from spyne.const.http import HTTP_405
 from spyne.const.http import HTTP_500
 from spyne.error import RequestNotAllowed
+from spyne.model import PushBase
+from spyne.model.complex import ComplexModelBase
 from spyne.model.fault import Fault
 from spyne.model.primitive import Date
 from spyne.model.primitive import Time
 from spyne.model.primitive import DateTime
 from spyne.protocol.xml import XmlDocument
+from spyne.protocol.xml import XmlInDocumentParser
 from spyne.protocol.soap.mime import collapse_swa
+from spyne.util import Break, coroutine
 
 
 def _from_soap(in_envelope_xml, xmlids=None):
@@ -111,6 +118,15 @@ def _parse_xml_string(xml_string, parser, charset=None):
     return root, xmlids
 
 
+class _SoapInDocumentParser(XmlInDocumentParser):
+    def get_in_document(self, root):
+        # this is what etree.XMLID() does.
+        xmlids = dict([(e.get('id'), e) for e in root.iter(etree.Element)
+                                                   if e.get('id') is not None])
+
+        return root, xmlids
+
+
 # see http://www.w3.org/TR/2000/NOTE-SOAP-20000508/
 # section 5.2.1 for an example of how the id and href attributes are used.
 def resolve_hrefs(element, xmlids):
@@ -139,6 +155,21 @@ def resolve_hrefs(element, xmlids):
     return element
 
 
+def _get_namespaces(cls, retval, seen):
+    """Adds the namespaces of the complex types that instances of the given
+    class can contain to the ``retval`` set."""
+
+    if cls in seen or not issubclass(cls, ComplexModelBase):
+        return
+    seen.add(cls)
+
+    retval.add(cls.get_namespace())
+    for v in cls.get_flat_type_info(cls).values():
+        if v.Attributes.sub_ns is not None:
+            retval.add(v.Attributes.sub_ns)
+        _get_namespaces(v, retval, seen)
+
+
 class Soap11(XmlDocument):
     """The base implementation of a subset of the Soap 1.1 standard. The
     document is available here: http://www.w3.org/TR/soap11/
@@ -156,12 +187,20 @@ class Soap11(XmlDocument):
         documents. The transport can override this.
     :param pretty_print: When ``True``, returns the document in a pretty-printed
         format.
+
+    When the transport sets ``ctx.out_stream``, responses are written to it
+    incrementally instead of being built as an element tree first. The
+    namespaces the message classes use are declared on the ``Envelope``
+    element, so the ``cleanup_namespaces`` and ``pretty_print`` options don't
+    apply. As the ``Header`` element is written before the ``Body``, out
+    headers must be set before the serialization starts. Errors are always
+    serialized in one go.
     """
 
     mime_type = 'text/xml; charset=utf-8'
 
     type = set(XmlDocument.type)
-    type.update(('soap', 'soap11'))
+    type.update(('soap', 'soap11', 'stream'))
 
     def __init__(self, *args, **kwargs):
         super(Soap11, self).__init__(*args, **kwargs)
@@ -175,6 +214,8 @@ class Soap11(XmlDocument):
         self._from_string_handlers[Date] = self.date_from_string_iso
         self._from_string_handlers[DateTime] = self.datetime_from_string_iso
 
+        self._envelope_nsmaps = {}
+
     def create_in_document(self, ctx, charset=None):
         if ctx.transport.type == 'wsgi':
             # according to the soap via http standard, soap requests must only
@@ -194,6 +235,50 @@ class Soap11(XmlDocument):
                                             XMLParser(**self.parser_kwargs),
                                                                         charset)
 
+    def get_in_document_parser(self, ctx, in_string_encoding=None):
+        return _SoapInDocumentParser(self, ctx, in_string_encoding)
+
+    def split_batch(self, ctx):
+        """A Body element with more than one child is a batch request. Every
+        child is a separate call, which sees the same Header element."""
+
+        envelope_xml, xmlids = ctx.in_document
+
+        bodies = envelope_xml.xpath('e:Body', namespaces={'e': ns.soap11_env})
+        if len(bodies) == 0 or len(bodies[0]) < 2:
+            return None
+
+        if xmlids:
+            resolve_hrefs(envelope_xml, xmlids)
+
+        headers = envelope_xml.xpath('e:Header',
+                                        namespaces={'e': ns.soap11_env})
+
+        retval = []
+        for child in list(bodies[0]):
+            envelope = etree.Element(envelope_xml.tag, nsmap=envelope_xml.nsmap)
+            if len(headers) > 0:
+                envelope.append(deepcopy(headers[0]))
+
+            body = etree.SubElement(envelope, bodies[0].tag)
+            body.append(child)
+
+            retval.append((envelope, None))
+
+        return retval
+
+    def join_batch(self, ctx, contexts):
+        """The response to a batch request has the results of the calls as
+        children of its Body element, in the order of the request. Only the
+        response headers of the first call are kept."""
+
+        ctx.out_document = contexts[0].out_document
+        ctx.out_body_doc = contexts[0].out_body_doc
+
+        for c in contexts[1:]:
+            for child in list(c.out_body_doc):
+                ctx.out_body_doc.append(child)
+
     def decompose_incoming_envelope(self, ctx, message=XmlDocument.REQUEST):
         envelope_xml, xmlids = ctx.in_document
         header_document, body_document = _from_soap(envelope_xml, xmlids)
@@ -274,6 +359,13 @@ class Soap11(XmlDocument):
 
         self.event_manager.fire_event('before_serialize', ctx)
 
+        if ctx.out_stream is not None and ctx.out_error is None:
+            retval = self.incgen_envelope(ctx, message)
+
+            self.event_manager.fire_event('after_serialize', ctx)
+
+            return retval
+
         # construct the soap response, and serialize it
         nsmap = self.app.interface.nsmap
         ctx.out_document = etree.Element('{%s}Envelope' % ns.soap11_env,
@@ -361,5 +453,143 @@ class Soap11(XmlDocument):
 
         self.event_manager.fire_event('after_serialize', ctx)
 
+    @coroutine
+    def incgen_envelope(self, ctx, message):
+        """Writes the envelope of the outgoing message to ``ctx.out_stream``
+        using an ``etree.xmlfile``."""
+
+        if message is self.REQUEST:
+            header_message_class = ctx.descriptor.in_header
+            body_message_class = ctx.descriptor.in_message
+
+        elif message is self.RESPONSE:
+            header_message_class = ctx.descriptor.out_header
+            body_message_class = ctx.descriptor.out_message
+
+        if ctx.descriptor.body_style is BODY_STYLE_WRAPPED:
+            out_object = body_message_class()
+            for k, v in zip(body_message_class._type_info, ctx.out_object):
+                setattr(out_object, k, v)
+
+            sub_ns = body_message_class.get_namespace()
+            sub_name = None
+
+        else:
+            out_object = ctx.out_object[0]
+
+            sub_ns = body_message_class.Attributes.sub_ns
+            if sub_ns is None:
+                sub_ns = body_message_class.get_namespace()
+            if sub_ns is DEFAULT_NS:
+                sub_ns = self.app.interface.get_tns()
+
+            sub_name = body_message_class.Attributes.sub_name
+            if sub_name is None:
+                sub_name = body_message_class.get_type_name()
+
+        nsmap = self.get_envelope_nsmap(header_message_class,
+                                                            body_message_class)
+
+        encoding = self.encoding
+        if encoding is None:
+            encoding = 'UTF-8'
+
+        # streams with a flush threshold buffer the output themselves, see
+        # spyne.server.wsgi.WsgiOutStream
+        if getattr(ctx.out_stream, 'threshold', None) is not None:
+            xmlfile = etree.xmlfile(ctx.out_stream, encoding=encoding,
+                                                                buffered=False)
+        else:
+            xmlfile = etree.xmlfile(ctx.out_stream, encoding=encoding)
+
+        # only push objects make the serializer wait for more data.
+        pushing = any([isinstance(o, PushBase) for o in ctx.out_object])
+
+        try:
+            with xmlfile as xf:
+                if self.xml_declaration:
+                    xf.write_declaration()
+
+                with xf.element('{%s}Envelope' % ns.soap11_env, nsmap=nsmap):
+                    if ctx.out_header is not None and \
+                                           header_message_class is not None:
+                        if isinstance(ctx.out_header, (list, tuple)):
+                            out_headers = ctx.out_header
+                        else:
+                            out_headers = (ctx.out_header,)
+
+                        with xf.element('{%s}Header' % ns.soap11_env):
+                            for header_class, out_header in zip(
+                                         header_message_class, out_headers):
+                                self.to_parent(ctx, header_class, out_header,
+                                          xf, header_class.get_namespace(),
+                                              header_class.get_type_name())
+
+                    with xf.element('{%s}Body' % ns.soap11_env):
+                        ret = self.to_parent(ctx, body_message_class,
+                                         out_object, xf, sub_ns, sub_name)
+                        if isgenerator(ret) and not pushing:
+                            # without push objects, a pending serializer means
+                            # that one of its coroutines failed. They log and
+                            # swallow their errors, so it's only unwound here.
+                            logger.error("Serialization of %r was cut short.",
+                                                               ctx.method_name)
+                            try:
+                                ret.throw(Break())
+                            except (Break, StopIteration):
+                                pass
+
+                        elif isgenerator(ret):
+                            try:
+                                while True:
+                                    y = (yield) # may throw Break
+                                    ret.send(y)
+
+                            except Break:
+                                try:
+                                    ret.throw(Break())
+                                except StopIteration:
+                                    pass
+
+        except Exception as e:
+            # part of the response may have been sent already, so it's too
+            # late for a fault. The open elements are closed on the way out,
+            # so the document is cut short but stays well-formed.
+            logger.exception(e)
+
+    def get_envelope_nsmap(self, header_message_class, body_message_class):
+        """Returns the namespaces to declare on a streamed ``Envelope``: The
+        envelope and schema instance namespaces, the target namespace and the
+        namespaces of the given message classes and their members. lxml
+        declares any others where they are used."""
+
+        key = (header_message_class, body_message_class)
+        retval = self._envelope_nsmaps.get(key, None)
+        if retval is not None:
+            return retval
+
+        interface = self.app.interface
+        namespaces = set((ns.soap11_env, ns.xsi, interface.get_tns()))
+
+        classes = [body_message_class]
+        if isinstance(header_message_class, (list, tuple)):
+            classes.extend(header_message_class)
+        elif header_message_class is not None:
+            classes.append(header_message_class)
+
+        seen = set()
+        for cls in classes:
+            _get_namespaces(cls, namespaces, seen)
+
+        retval = {}
+        for namespace in namespaces:
+            prefix = interface.prefmap.get(namespace, None)
+            if prefix is not None:
+                retval[prefix] = namespace
+
+        self._envelope_nsmaps[key] = retval
+
+        return retval
+
     def fault_to_http_response_code(self, fault):
         return HTTP_500
@@ -78,6 +78,7 @@ from spyne.model.binary import BINARY_ENCODING_BASE64
 from spyne.model.enum import EnumBase
 
 from spyne.protocol import ProtocolBase
+from spyne.protocol import InDocumentParser
 
 NIL_ATTR = {'{%s}nil' % _ns_xsi: 'true'}
 
@@ -85,6 +86,15 @@ NIL_ATTR = {'{%s}nil' % _ns_xsi: 'true'}
 def _append(parent, child_elt):
     if hasattr(parent, 'append'):
         parent.append(child_elt)
+
+    elif len(child_elt) == 0:
+        # elements written as a whole to an xmlfile don't see the namespace
+        # declarations of their ancestors, so leaves are written this way to
+        # avoid redeclaring their namespace every time.
+        with parent.element(child_elt.tag, child_elt.attrib):
+            if child_elt.text:
+                parent.write(child_elt.text)
+
     else:
         parent.write(child_elt)
 
@@ -123,6 +133,37 @@ class SubXmlBase(ProtocolBase):
         raise NotImplementedError()
 
 
+class XmlInDocumentParser(InDocumentParser):
+    """Feeds incoming chunks to an lxml parser as they arrive."""
+
+    def __init__(self, prot, ctx, in_string_encoding=None):
+        super(XmlInDocumentParser, self).__init__(prot, ctx,
+                                                             in_string_encoding)
+
+        self.parser = XMLParser(**prot.parser_kwargs)
+
+    def feed(self, data):
+        super(XmlInDocumentParser, self).feed(data)
+
+        try:
+            self.parser.feed(data)
+        except XMLSyntaxError as e:
+            raise Fault('Client.XMLSyntaxError', str(e))
+
+    def close(self):
+        try:
+            root = self.parser.close()
+
+        except XMLSyntaxError as e:
+            logger_invalid.error(_bytes_join(self.ctx.in_string))
+            raise Fault('Client.XMLSyntaxError', str(e))
+
+        self.ctx.in_document = self.get_in_document(root)
+
+    def get_in_document(self, root):
+        return root
+
+
 class XmlDocument(SubXmlBase):
     """The Xml input and output protocol, using the information from the Xml
     Schema generated by Spyne types.
@@ -339,7 +380,7 @@ class XmlDocument(SubXmlBase):
     def __validate_lxml(self, payload):
         ret = self.validation_schema.validate(payload)
 
-        logger.debug("Validated ? %r" % ret)
+        logger.debug("Validated ? %r", ret)
         if ret == False:
             error_text = text_type(self.validation_schema.error_log.last_error)
             raise SchemaValidationError(error_text.encode('ascii',
@@ -365,6 +406,9 @@ class XmlDocument(SubXmlBase):
             logger_invalid.error(string)
             raise Fault('Client.XMLSyntaxError', str(e))
 
+    def get_in_document_parser(self, ctx, in_string_encoding=None):
+        return XmlInDocumentParser(self, ctx, in_string_encoding)
+
     def decompose_incoming_envelope(self, ctx, message):
         assert message in (self.REQUEST, self.RESPONSE)
 
@@ -448,7 +492,7 @@ class XmlDocument(SubXmlBase):
         if self.log_messages and message is self.REQUEST:
             line_header = '%sRequest%s' % (LIGHT_GREEN, END_COLOR)
 
-            logger.debug("%s %s" % (line_header, etree.tostring(ctx.out_document,
+            logger.debug("%s %s" % (line_header, etree.tostring(ctx.in_document,
                     xml_declaration=self.xml_declaration, pretty_print=True)))
 
         self.event_manager.fire_event('after_deserialize', ctx)
@@ -508,6 +552,10 @@ class XmlDocument(SubXmlBase):
     def create_out_string(self, ctx, charset=None):
         """Sets an iterable of string fragments to ctx.out_string"""
 
+        # the document was already written to ctx.out_stream.
+        if ctx.out_document is None:
+            return
+
         if charset is None:
             charset = self.encoding
 
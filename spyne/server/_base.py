@@ -23,6 +23,7 @@ logger = logging.getLogger(__name__)
 from inspect import isgenerator
 
 from spyne import EventManager
+from spyne._base import ProtocolContext
 from spyne.auxproc import process_contexts
 from spyne.interface import AllYourInterfaceDocuments
 from spyne.model import Fault
@@ -30,6 +31,7 @@ from spyne.model import PushBase
 from spyne.protocol import ProtocolBase
 from spyne.util import Break
 from spyne.util import coroutine
+from spyne.util.timing import run_phase
 
 
 class ServerBase(object):
@@ -45,6 +47,17 @@ class ServerBase(object):
     """The transport type, which is a URI string to its definition by
     convention."""
 
+    profiler = None
+    """A :class:`spyne.util.profiler.SamplingProfiler` instance that picks
+    the requests to profile. Requests are not profiled when this is ``None``.
+    """
+
+    batch_pool = None
+    """An object with a ``map()`` method, like a
+    :class:`multiprocessing.pool.ThreadPool` instance, that is used to run the
+    calls of a batch request concurrently. When ``None``, the calls are run
+    one after the other."""
+
     def __init__(self, app):
         self.app = app
         self.app.transport = self.transport  # FIXME: this is weird
@@ -61,18 +74,30 @@ class ServerBase(object):
         method_request string in order to generate contexts.
         """
 
+        in_protocol = self.app.in_protocol
+
+        if self.profiler is not None:
+            self.profiler.sample_request(ctx)
+
         try:
             # sets ctx.in_document
-            self.app.in_protocol.create_in_document(ctx, in_string_charset)
+            run_phase(ctx, 'create_in_document',
+                        in_protocol.create_in_document, ctx, in_string_charset)
+
+            # a batch request contains more than one call.
+            documents = in_protocol.split_batch(ctx)
+            if documents is not None:
+                return (self.generate_batch_context(ctx, documents),)
 
             # sets ctx.in_body_doc, ctx.in_header_doc and
             # ctx.method_request_string
-            self.app.in_protocol.decompose_incoming_envelope(ctx,
-                                                           ProtocolBase.REQUEST)
+            run_phase(ctx, 'decompose_incoming_envelope',
+                                    in_protocol.decompose_incoming_envelope,
+                                                     ctx, ProtocolBase.REQUEST)
 
             # returns a list of contexts. multiple contexts can be returned
             # when the requested method also has bound auxiliary methods.
-            retval = self.app.in_protocol.generate_method_contexts(ctx)
+            retval = in_protocol.generate_method_contexts(ctx)
 
         except Fault as e:
             ctx.in_object = None
@@ -83,14 +108,62 @@ class ServerBase(object):
 
         return retval
 
+    def generate_batch_context(self, ctx, documents):
+        """Generates the contexts for every call in a batch request and stores
+        them in ``ctx.protocol.batch`` as a list of context lists, each of
+        which have the primary context as the first element. Returns ``ctx``,
+        which stands for the whole batch in the transport code.
+
+        Errors in individual calls don't fail the batch, they are reported in
+        the response of the failing call.
+        """
+
+        in_protocol = self.app.in_protocol
+
+        ctx.protocol.batch = batch = []
+        for doc in documents:
+            sub_ctx = ctx.copy()
+            sub_ctx.protocol = ProtocolContext(sub_ctx, self)
+            sub_ctx.in_document = doc
+
+            try:
+                run_phase(sub_ctx, 'decompose_incoming_envelope',
+                                    in_protocol.decompose_incoming_envelope,
+                                                 sub_ctx, ProtocolBase.REQUEST)
+
+                contexts = in_protocol.generate_method_contexts(sub_ctx)
+
+            except Fault as e:
+                sub_ctx.in_object = None
+                sub_ctx.in_error = e
+                sub_ctx.out_error = e
+
+                contexts = [sub_ctx]
+
+            batch.append(contexts)
+
+        return ctx
+
     def get_in_object(self, ctx):
         """Uses the ``ctx.in_string`` to set ``ctx.in_body_doc``, which in turn
         is used to set ``ctx.in_object``."""
 
+        batch = getattr(ctx.protocol, 'batch', None)
+        if batch is not None:
+            for contexts in batch:
+                if contexts[0].in_error is None:
+                    self.get_in_object(contexts[0])
+            return
+
+        in_protocol = self.app.in_protocol
+
+        if self.profiler is not None:
+            self.profiler.sample_method(ctx)
+
         try:
             # sets ctx.in_object and ctx.in_header
-            self.app.in_protocol.deserialize(ctx,
-                                           message=self.app.in_protocol.REQUEST)
+            run_phase(ctx, 'deserialize', in_protocol.deserialize, ctx,
+                                                  message=in_protocol.REQUEST)
 
         except Fault as e:
             logger.exception(e)
@@ -103,6 +176,22 @@ class ServerBase(object):
         """Calls the matched user function by passing it the ``ctx.in_object``
         to set ``ctx.out_object``."""
 
+        batch = getattr(ctx.protocol, 'batch', None)
+        if batch is not None:
+            p_ctxs = [contexts[0] for contexts in batch
+                                              if contexts[0].in_error is None]
+
+            # process_request() doesn't raise, errors are stored in the
+            # out_error attribute of every context.
+            if self.batch_pool is None:
+                for p_ctx in p_ctxs:
+                    self.app.process_request(p_ctx)
+            else:
+                list(self.batch_pool.map(self.app.process_request, p_ctxs))
+
+            ctx.out_object = [None]
+            return
+
         if ctx.in_error is None:
             # event firing is done in the spyne.application.Application
             self.app.process_request(ctx)
@@ -118,19 +207,18 @@ class ServerBase(object):
         if ctx.out_string is not None:
             return
 
-        if ctx.out_document is None:
-            ret = ctx.out_protocol.serialize(ctx, message=ProtocolBase.RESPONSE)
-            if isgenerator(ret):
-                oobj, = ctx.out_object
-                if oobj is None:
-                    ret.throw(Break())
+        batch = getattr(ctx.protocol, 'batch', None)
+        if batch is not None:
+            return self.get_batch_out_string(ctx)
 
-                else:
-                    assert isinstance(oobj, PushBase), \
-                                          "%r is not a PushBase instance" % oobj
+        # share the serialized response with concurrent identical calls.
+        flight = ctx.flight
+        if flight is not None:
+            ctx.flight = None
+            return flight.get_out_string(ctx, self.get_out_string_pull)
 
-                    self.run_push(oobj, ctx, [], ret)
-                    oobj.close()
+        if ctx.out_document is None:
+            run_phase(ctx, 'serialize', self._serialize_response, ctx)
 
         if ctx.service_class != None:
             if ctx.out_error is None:
@@ -140,7 +228,11 @@ class ServerBase(object):
                 ctx.service_class.event_manager.fire_event(
                                             'method_exception_document', ctx)
 
-        ctx.out_protocol.create_out_string(ctx)
+        run_phase(ctx, 'create_out_string',
+                                         ctx.out_protocol.create_out_string, ctx)
+
+        if ctx.cache_key is not None:
+            ctx.descriptor.cache.set_string(ctx)
 
         if ctx.service_class != None:
             if ctx.out_error is None:
@@ -154,6 +246,62 @@ class ServerBase(object):
             ctx.out_string = [""]
 
 
+    def _serialize_response(self, ctx):
+        ret = ctx.out_protocol.serialize(ctx, message=ProtocolBase.RESPONSE)
+        if isgenerator(ret):
+            oobj, = ctx.out_object
+            if oobj is None:
+                ret.throw(Break())
+
+            else:
+                assert isinstance(oobj, PushBase), \
+                                          "%r is not a PushBase instance" % oobj
+
+                self.run_push(oobj, ctx, [], ret)
+                oobj.close()
+
+    def get_batch_out_string(self, ctx):
+        """Serializes the results of the calls in a batch request to a single
+        ``ctx.out_string``. The auxiliary methods of every call are run and the
+        contexts of the individual calls are closed afterwards. Calls in a
+        batch can't push their results."""
+
+        p_ctxs = [contexts[0] for contexts in ctx.protocol.batch]
+
+        for p_ctx in p_ctxs:
+            if p_ctx.out_document is None:
+                ret = run_phase(p_ctx, 'serialize',
+                                p_ctx.out_protocol.serialize, p_ctx,
+                                                 message=ProtocolBase.RESPONSE)
+
+                assert not isgenerator(ret), "Calls in batch requests can't " \
+                                             "push their results"
+
+            if p_ctx.service_class != None:
+                if p_ctx.out_error is None:
+                    p_ctx.service_class.event_manager.fire_event(
+                                            'method_return_document', p_ctx)
+                else:
+                    p_ctx.service_class.event_manager.fire_event(
+                                            'method_exception_document', p_ctx)
+
+        ctx.out_protocol.join_batch(ctx, p_ctxs)
+        ctx.out_protocol.create_out_string(ctx)
+
+        if ctx.out_string is None:
+            ctx.out_string = [""]
+
+        for contexts in ctx.protocol.batch:
+            p_ctx, others = contexts[0], contexts[1:]
+
+            try:
+                process_contexts(self, others, p_ctx, error=p_ctx.out_error)
+            except Exception as e:
+                # Report but ignore any exceptions from auxiliary methods.
+                logger.exception(e)
+
+            p_ctx.close()
+
     # for backwards compatibility
     get_out_string = get_out_string_pull
 
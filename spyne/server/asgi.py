@@ -0,0 +1,211 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.server.asgi`` module contains an ASGI-compliant application
+callable that can be run by any ASGI server, like uvicorn, hypercorn or daphne.
+It's the asyncio-native sibling of :class:`spyne.server.wsgi.WsgiApplication`.
+
+Here's how to use it: ::
+
+    application = AsgiApplication(Application(...))
+
+and then, e.g.: ::
+
+    uvicorn module_name:application
+
+Both the single-callable (ASGI 3) and the double-callable (ASGI 2) styles are
+supported. See :mod:`spyne.server.asyncio` for how service methods can use
+asyncio.
+
+This module is EXPERIMENTAL. Your mileage may vary. Patches are welcome.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+
+from spyne.const.http import HTTP_413
+from spyne.server.asyncio import AsyncioHttpBase
+from spyne.server.asyncio import AsyncioHttpRequest
+from spyne.server.asyncio import AsyncioHttpResponse
+from spyne.server.asyncio import _to_bytes
+from spyne.server.asyncio import _to_native
+from spyne.util.aio import Return, chain_future, inline_future
+
+
+class _AsgiResponse(AsyncioHttpResponse):
+    def __init__(self, send, loop):
+        super(_AsgiResponse, self).__init__()
+
+        self._send = send
+        self._loop = loop
+        self._last = None
+
+        self.done = asyncio.Future(loop=loop)
+        """Resolved when all messages were handed to the ASGI server."""
+
+    def _enqueue(self, message):
+        # The send callable returns an awaitable. Messages must be sent in
+        # order, so each send waits for the previous one to complete.
+        self._last = chain_future(self._last, lambda: self._send(message),
+                                                                loop=self._loop)
+
+    def send_headers(self):
+        self._enqueue({
+            'type': 'http.response.start',
+            'status': int(self.status.split(' ', 1)[0]),
+            'headers': [(_to_bytes(k.lower()), _to_bytes(v))
+                                                      for k, v in self.headers],
+        })
+
+    def send_body(self, data):
+        self._enqueue({
+            'type': 'http.response.body',
+            'body': data,
+            'more_body': True,
+        })
+
+    def send_end(self):
+        self._enqueue({
+            'type': 'http.response.body',
+            'body': b'',
+            'more_body': False,
+        })
+
+        def _cb_done(f):
+            if self.done.done():
+                return
+            if f.cancelled():
+                self.done.cancel()
+            elif f.exception() is not None:
+                self.done.set_exception(f.exception())
+            else:
+                self.done.set_result(None)
+
+        self._last.add_done_callback(_cb_done)
+
+
+class AsgiApplication(AsyncioHttpBase):
+    """An ASGI application callable for Spyne applications.
+
+    :param app: The :class:`spyne.application.Application` instance.
+    :param chunked: Don't buffer the outgoing document when True.
+    :param max_content_length: The maximum size of the request body in bytes.
+    :param block_length: Unused, the ASGI server decides how the request body
+        is chunked.
+    :param loop: The event loop to use. Defaults to the result of
+        ``asyncio.get_event_loop()``.
+    """
+
+    def __call__(self, scope, receive=None, send=None):
+        if receive is None: # ASGI 2
+            return lambda receive, send: self.handle(scope, receive, send)
+
+        return self.handle(scope, receive, send)
+
+    def handle(self, scope, receive, send):
+        """Returns an awaitable that handles the given ASGI connection."""
+
+        if scope['type'] == 'lifespan':
+            return self._handle_lifespan(receive, send, loop=self.loop)
+
+        if scope['type'] != 'http':
+            raise ValueError("Unsupported ASGI scope type %r" % scope['type'])
+
+        return self._handle_http(scope, receive, send, loop=self.loop)
+
+    @inline_future
+    def _handle_lifespan(self, receive, send):
+        while True:
+            message = yield receive()
+
+            if message['type'] == 'lifespan.startup':
+                yield send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                yield send({'type': 'lifespan.shutdown.complete'})
+                raise Return()
+
+    @inline_future
+    def _handle_http(self, scope, receive, send):
+        response = _AsgiResponse(send, self.loop)
+
+        request = self.scope_to_request(scope)
+
+        length = 0
+        more_body = True
+        while more_body:
+            message = yield receive()
+            if message['type'] == 'http.disconnect':
+                raise Return()
+
+            chunk = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            length += len(chunk)
+            if length > self.max_content_length:
+                response.prepare(HTTP_413,
+                                        {'Content-Length': str(len(HTTP_413))})
+                response.write(HTTP_413)
+                response.finish()
+                yield response.done
+                raise Return()
+
+            if len(chunk) > 0:
+                request.body.append(chunk)
+
+        try:
+            self.handle_request(request, response)
+
+        except Exception as e:
+            logger.exception(e)
+            response.finish()
+
+        yield response.done
+
+    def scope_to_request(self, scope):
+        """Creates an :class:`AsyncioHttpRequest` from the given ASGI http
+        scope. The request body is left empty."""
+
+        headers = {}
+        for k, v in scope.get('headers', []):
+            headers.setdefault(_to_native(k).lower(), []).append(_to_native(v))
+
+        server_name, server_port = 'localhost', None
+        server = scope.get('server', None)
+        if server is not None:
+            server_name, server_port = server
+
+        remote_addr = None
+        client = scope.get('client', None)
+        if client is not None:
+            remote_addr = client[0]
+
+        path = scope.get('root_path', '') + scope['path']
+
+        return AsyncioHttpRequest(scope['method'], path,
+                        query_string=scope.get('query_string', b''),
+                        headers=headers,
+                        http_version=scope.get('http_version', '1.1'),
+                        scheme=scope.get('scheme', 'http'),
+                        server_name=server_name, server_port=server_port,
+                        remote_addr=remote_addr)
@@ -0,0 +1,966 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.server.asyncio`` module contains a server transport that runs
+inside an asyncio event loop. It comes with its own minimal HTTP/1.1
+implementation, so no other web server is needed. See
+:mod:`spyne.server.asgi` if you'd rather run Spyne behind an ASGI server.
+
+Service methods can be coroutine functions (i.e. ``async def``) or return
+any awaitable. Asynchronous generators returned from service methods with
+``Iterable`` return types are streamed to the client as they produce values,
+using the same :class:`spyne.model.PushBase` machinery that the Twisted
+transport uses.
+
+Plain functions are run inside the event loop thread. So they should not block.
+Wrap blocking code with ``loop.run_in_executor()`` and return the resulting
+future instead.
+
+Here's how to use it: ::
+
+    server = AsyncioHttpServer(application)
+    server.serve_forever('127.0.0.1', 8000)
+
+This module is EXPERIMENTAL. Your mileage may vary. Patches are welcome.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import cgi
+import asyncio
+
+from spyne import BODY_STYLE_BARE, BODY_STYLE_EMPTY, BODY_STYLE_WRAPPED
+from spyne.auxproc import process_contexts
+from spyne.const.ansi_color import LIGHT_GREEN
+from spyne.const.ansi_color import END_COLOR
+from spyne.const.http import HTTP_200, HTTP_400, HTTP_404, HTTP_411, \
+    HTTP_413, HTTP_431, HTTP_500
+from spyne.error import InternalError
+from spyne.model import PushBase, File, ComplexModelBase
+from spyne.model.fault import Fault
+from spyne.protocol.http import HttpRpc
+from spyne.server.http import HttpBase
+from spyne.server.http import HttpMethodContext
+from spyne.server.http import HttpTransportContext
+from spyne.server.wsgi import _parse_qs
+from spyne.server.wsgi import parse_form_data
+from spyne.util.aio import ensure_future, is_awaitable, is_async_iterable, \
+    iterate_async
+from spyne.util.six import BytesIO, text_type, binary_type, PY3
+
+
+MAX_HEADER_LENGTH = 64 * 1024
+"""Maximum length of the request line plus all request headers, in bytes."""
+
+
+def _to_native(s):
+    if PY3 and isinstance(s, binary_type):
+        return s.decode('latin1')
+    if not PY3 and isinstance(s, text_type):
+        return s.encode('latin1')
+    return s
+
+
+def _to_bytes(s):
+    if isinstance(s, text_type):
+        return s.encode('latin1')
+    return s
+
+
+class AsyncioHttpRequest(object):
+    """Transport-neutral representation of an incoming http request.
+
+    :param method: The HTTP verb.
+    :param path: The path part of the url, without the query string.
+    :param query_string: The part of the url after the question mark.
+    :param headers: A dict of lower-case header names to lists of values.
+    :param body: An iterable of byte strings.
+    """
+
+    def __init__(self, method, path, query_string='', headers=None, body=None,
+                     http_version='1.1', scheme='http', server_name='localhost',
+                                             server_port=None, remote_addr=None):
+        self.method = _to_native(method).upper()
+        self.path = _to_native(path)
+        self.query_string = _to_native(query_string)
+        self.headers = headers if headers is not None else {}
+        self.body = body if body is not None else []
+        self.http_version = http_version
+        self.scheme = scheme
+        self.server_name = server_name
+        self.server_port = server_port
+        self.remote_addr = remote_addr
+
+    def get_header(self, name, default=None):
+        retval = self.headers.get(name.lower(), None)
+        if not retval:
+            return default
+        return retval[0]
+
+    @property
+    def content_length(self):
+        retval = self.get_header('content-length')
+        if retval is None:
+            return None
+        return int(retval)
+
+    @property
+    def host(self):
+        retval = self.get_header('host')
+        if retval is None:
+            retval = self.server_name
+            if self.server_port is not None and \
+                    (self.scheme, self.server_port) not in (('http', 80),
+                                                             ('https', 443)):
+                retval = '%s:%d' % (retval, self.server_port)
+        return retval
+
+    def get_url(self):
+        return ''.join([self.scheme, "://", self.host, self.path])
+
+    def get_charset(self):
+        content_type = self.get_header('content-type')
+        if content_type is None:
+            return None
+        # ('text/xml', {'charset': 'utf-8'})
+        return cgi.parse_header(content_type)[1].get('charset', None)
+
+    def is_wsdl_request(self):
+        return self.method == 'GET' and (self.query_string.lower() == 'wsdl'
+                                              or self.path.endswith('.wsdl'))
+
+    def to_wsgi_environ(self):
+        """Returns a minimal wsgi environment that lets reusing wsgi-oriented
+        parsers like werkzeug's form data parser."""
+
+        retval = {
+            'REQUEST_METHOD': self.method,
+            'PATH_INFO': self.path,
+            'QUERY_STRING': self.query_string,
+            'SERVER_NAME': self.server_name,
+            'wsgi.url_scheme': self.scheme,
+            'wsgi.input': BytesIO(b''.join(self.body)),
+        }
+
+        content_type = self.get_header('content-type')
+        if content_type is not None:
+            retval['CONTENT_TYPE'] = content_type
+
+        content_length = self.get_header('content-length')
+        if content_length is None:
+            content_length = str(sum(len(b) for b in self.body))
+        retval['CONTENT_LENGTH'] = content_length
+
+        return retval
+
+
+class AsyncioHttpResponse(object):
+    """Base class for the outgoing side of an http request. It behaves like a
+    file-like object so that protocols can write to it directly when it's set
+    as ``ctx.out_stream``.
+
+    Subclasses need to implement :func:`send_headers`, :func:`send_body` and
+    :func:`send_end`.
+    """
+
+    def __init__(self):
+        self.status = HTTP_200
+        self.headers = []
+        self.headers_sent = False
+        self.finished = False
+        self.length = None
+        self.finish_callbacks = []
+
+    def prepare(self, status, headers):
+        """Sets the status and headers of the outgoing response. Does not do
+        anything once the headers were sent."""
+
+        if self.headers_sent:
+            return
+
+        self.status = status
+        self.headers = []
+        self.length = None
+
+        for k, v in headers.items():
+            if not isinstance(v, (list, tuple)):
+                v = [v]
+            for v2 in v:
+                if k.lower() == 'content-length':
+                    self.length = int(v2)
+                self.headers.append((k, str(v2)))
+
+    def write(self, data):
+        if self.finished:
+            logger.warning("Discarding data written to a finished response.")
+            return
+
+        if not self.headers_sent:
+            self.headers_sent = True
+            self.send_headers()
+
+        if isinstance(data, text_type):
+            data = data.encode('utf8')
+
+        if len(data) > 0:
+            self.send_body(data)
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        if self.finished:
+            return
+
+        if not self.headers_sent:
+            self.headers_sent = True
+            if self.length is None:
+                self.length = 0
+                self.headers.append(('Content-Length', '0'))
+            self.send_headers()
+
+        self.finished = True
+        self.send_end()
+
+        for cb in self.finish_callbacks:
+            cb(self)
+
+    def send_headers(self):
+        raise NotImplementedError()
+
+    def send_body(self, data):
+        raise NotImplementedError()
+
+    def send_end(self):
+        raise NotImplementedError()
+
+
+class AsyncioHttpTransportContext(HttpTransportContext):
+    """The class that is used in the transport attribute of the
+    :class:`AsyncioHttpMethodContext` class."""
+
+    def __init__(self, parent, transport, request, content_type):
+        super(AsyncioHttpTransportContext, self).__init__(parent, transport,
+                                                          request, content_type)
+
+        self.response = None
+        """The :class:`AsyncioHttpResponse` instance for this request."""
+
+    def get_cookie(self, key):
+        cookie_string = self.req.get_header('cookie')
+        if cookie_string is None:
+            return
+
+        from spyne.server.wsgi import SimpleCookie
+        cookie = SimpleCookie()
+        cookie.load(cookie_string)
+
+        retval = cookie.get(key, None)
+        if retval is not None:
+            return retval.value
+
+    def get_request_header(self, name):
+        return self.req.get_header(name.lower())
+
+
+class AsyncioHttpMethodContext(HttpMethodContext):
+    """The asyncio-specific method context. Transport-specific information is
+    stored in the transport attribute using the
+    :class:`AsyncioHttpTransportContext` class.
+    """
+
+    default_transport_context = AsyncioHttpTransportContext
+
+
+class AsyncioHttpBase(HttpBase):
+    """The base class for asyncio-based http transports. It converts
+    :class:`AsyncioHttpRequest` instances to method calls and writes the
+    response to :class:`AsyncioHttpResponse` instances. It doesn't know how to
+    talk to the network.
+
+    :param app: The :class:`spyne.application.Application` instance.
+    :param chunked: Don't buffer the outgoing document when True.
+    :param max_content_length: The maximum size of the request body in bytes.
+    :param block_length: The size of the chunks the request body is read in.
+    :param loop: The event loop to use. Defaults to the result of
+        ``asyncio.get_event_loop()``.
+    """
+
+    def __init__(self, app, chunked=True, max_content_length=2 * 1024 * 1024,
+                                              block_length=8 * 1024, loop=None):
+        super(AsyncioHttpBase, self).__init__(app, chunked=chunked,
+               max_content_length=max_content_length, block_length=block_length)
+
+        self._loop = loop
+        self._wsdl = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            return asyncio.get_event_loop()
+        return self._loop
+
+    def handle_request(self, request, response):
+        """Processes the given request and writes the result to the given
+        response. The response is finished once the request is fully handled,
+        which may happen after this function returns."""
+
+        if request.is_wsdl_request():
+            return self.handle_wsdl_request(request, response)
+        return self.handle_rpc(request, response)
+
+    def handle_wsdl_request(self, request, response):
+        ctx = AsyncioHttpMethodContext(self, request, "text/xml; charset=utf-8")
+
+        if self.doc.wsdl11 is None:
+            response.prepare(HTTP_404, ctx.transport.resp_headers)
+            response.write(HTTP_404)
+            response.finish()
+            ctx.close()
+            return
+
+        if self._wsdl is None:
+            self._wsdl = self.doc.wsdl11.get_interface_document()
+
+        ctx.transport.wsdl = self._wsdl
+
+        try:
+            if self._wsdl is None:
+                self.doc.wsdl11.build_interface_document(request.get_url())
+                ctx.transport.wsdl = self._wsdl = \
+                                        self.doc.wsdl11.get_interface_document()
+
+            assert ctx.transport.wsdl is not None
+
+            self.event_manager.fire_event('wsdl', ctx)
+
+            ctx.transport.resp_headers['Content-Length'] = \
+                                                    str(len(ctx.transport.wsdl))
+            response.prepare(HTTP_200, ctx.transport.resp_headers)
+            response.write(ctx.transport.wsdl)
+
+        except Exception as e:
+            logger.exception(e)
+            ctx.transport.wsdl_error = e
+            self.event_manager.fire_event('wsdl_exception', ctx)
+
+            response.prepare(HTTP_500, {})
+            response.write(HTTP_500)
+
+        finally:
+            response.finish()
+            ctx.close()
+
+    def handle_rpc_error(self, p_ctx, others, error, response):
+        resp_code = p_ctx.transport.resp_code
+        # If user code set its own response code, don't touch it.
+        if resp_code is None:
+            resp_code = p_ctx.out_protocol.fault_to_http_response_code(error)
+
+        # In case user code set its own out_* attributes before failing.
+        p_ctx.out_document = None
+        p_ctx.out_string = None
+        p_ctx.out_stream = None
+
+        self.get_out_string(p_ctx)
+
+        out_string = b''.join([s.encode('utf8') if isinstance(s, text_type)
+                                            else s for s in p_ctx.out_string])
+        p_ctx.transport.resp_headers['Content-Length'] = str(len(out_string))
+
+        response.prepare(resp_code, p_ctx.transport.resp_headers)
+        response.write(out_string)
+        response.finish()
+
+        p_ctx.close()
+
+        try:
+            process_contexts(self, others, p_ctx, error=error)
+        except Exception as e:
+            # Report but ignore any exceptions from auxiliary methods.
+            logger.exception(e)
+
+    def handle_rpc(self, request, response):
+        initial_ctx = AsyncioHttpMethodContext(self, request,
+                                                self.app.out_protocol.mime_type)
+        initial_ctx.transport.response = response
+        initial_ctx.in_string = request.body
+
+        contexts = self.generate_contexts(initial_ctx, request.get_charset())
+        p_ctx, others = contexts[0], contexts[1:]
+
+        if p_ctx.in_error:
+            return self.handle_rpc_error(p_ctx, others, p_ctx.in_error,
+                                                                       response)
+
+        self.get_in_object(p_ctx)
+        if p_ctx.in_error:
+            return self.handle_rpc_error(p_ctx, others, p_ctx.in_error,
+                                                                       response)
+
+        self.get_out_object(p_ctx)
+        if p_ctx.out_error:
+            return self.handle_rpc_error(p_ctx, others, p_ctx.out_error,
+                                                                       response)
+
+        ret = p_ctx.out_object[0]
+        if is_awaitable(ret):
+            future = ensure_future(ret, loop=self.loop)
+            future.add_done_callback(lambda f: _cb_future(f, response, p_ctx,
+                                                                  others, self))
+
+        elif isinstance(ret, PushBase):
+            _init_push(ret, response, p_ctx, others, self)
+
+        elif is_async_iterable(ret):
+            _init_async_iter(ret, response, p_ctx, others, self)
+
+        else:
+            _cb_result(p_ctx.out_object, response, p_ctx, others, self,
+                                                                       cb=False)
+
+    def decompose_incoming_envelope(self, prot, ctx, message):
+        """This function is only called by the HttpRpc protocol to have the
+        :class:`AsyncioHttpRequest` instance parsed into ``ctx.in_body_doc``
+        and ``ctx.in_header_doc``.
+        """
+
+        request = ctx.in_document
+        assert isinstance(request, AsyncioHttpRequest)
+
+        params = {}
+        if self.has_patterns:
+            params = self.match_pattern(ctx, request.method, request.path,
+                                                 request.host.partition(':')[0])
+
+        if ctx.method_request_string is None: # no pattern match
+            ctx.method_request_string = '{%s}%s' % (
+                      prot.app.interface.get_tns(), request.path.split('/')[-1])
+
+        logger.debug("%sMethod name: %r%s", LIGHT_GREEN,
+                                           ctx.method_request_string, END_COLOR)
+
+        # This is consistent with what server.wsgi does.
+        ctx.in_header_doc = dict([(k.replace('-', '_'), list(v))
+                                            for k, v in request.headers.items()])
+        ctx.in_body_doc = _parse_qs(request.query_string)
+
+        for k, v in params.items():
+            if k in ctx.in_body_doc:
+                ctx.in_body_doc[k].extend(v)
+            else:
+                ctx.in_body_doc[k] = list(v)
+
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            stream, form, files = parse_form_data(request.to_wsgi_environ(),
+                                             stream_factory=prot.stream_factory)
+
+            for k, v in form.lists():
+                val = ctx.in_body_doc.get(k, [])
+                val.extend(v)
+                ctx.in_body_doc[k] = val
+
+            for k, v in files.items():
+                val = ctx.in_body_doc.get(k, [])
+
+                mime_type = v.headers.get('Content-Type',
+                                                     'application/octet-stream')
+
+                path = getattr(v.stream, 'name', None)
+                if path is None:
+                    val.append(File.Value(name=v.filename, type=mime_type,
+                                                    data=[v.stream.getvalue()]))
+                else:
+                    v.stream.seek(0)
+                    val.append(File.Value(name=v.filename, type=mime_type,
+                                                    path=path, handle=v.stream))
+
+                ctx.in_body_doc[k] = val
+
+            for k, v in ctx.in_body_doc.items():
+                if v == ['']:
+                    ctx.in_body_doc[k] = [None]
+
+
+def _cb_future(future, response, p_ctx, others, transport):
+    if future.cancelled():
+        return _eb_future(InternalError("Cancelled"), response, p_ctx, others,
+                                                                      transport)
+
+    exc = future.exception()
+    if exc is not None:
+        return _eb_future(exc, response, p_ctx, others, transport)
+
+    ret = future.result()
+    if is_async_iterable(ret):
+        return _init_async_iter(ret, response, p_ctx, others, transport)
+
+    try:
+        _cb_result(ret, response, p_ctx, others, transport)
+    except Exception as e:
+        logger.exception(e)
+        if not response.headers_sent:
+            _eb_future(e, response, p_ctx, others, transport)
+        else:
+            response.finish()
+
+
+def _eb_future(exc, response, p_ctx, others, transport):
+    p_ctx.out_error = exc
+    if not isinstance(exc, Fault):
+        logger.error("Unhandled exception in service method: %r", exc,
+                                                                  exc_info=exc)
+        p_ctx.out_error = InternalError(exc)
+
+    transport.handle_rpc_error(p_ctx, others, p_ctx.out_error, response)
+
+
+def _wrap_return_value(ret, p_ctx):
+    """This is consistent with what server.twisted does to the return values of
+    Deferreds."""
+
+    om = p_ctx.descriptor.out_message
+    if p_ctx.descriptor.body_style in (BODY_STYLE_BARE, BODY_STYLE_EMPTY):
+        return [ret]
+
+    if (not issubclass(om, ComplexModelBase)) or len(om._type_info) <= 1:
+        return [ret]
+
+    return ret
+
+
+def _cb_result(ret, response, p_ctx, others, transport, cb=True):
+    resp_code = p_ctx.transport.resp_code
+    # If user code set its own response code, don't touch it.
+    if resp_code is None:
+        resp_code = HTTP_200
+
+    if cb:
+        p_ctx.out_object = _wrap_return_value(ret, p_ctx)
+    else:
+        p_ctx.out_object = ret
+
+    if cb and isinstance(ret, PushBase):
+        return _init_push(ret, response, p_ctx, others, transport)
+
+    transport.get_out_string(p_ctx)
+
+    if isinstance(p_ctx.out_protocol, HttpRpc) and \
+                                               p_ctx.out_header_doc is not None:
+        p_ctx.transport.resp_headers.update(p_ctx.out_header_doc)
+
+    out_string = p_ctx.out_string
+    if not transport.chunked:
+        out_string = [b''.join(out_string)]
+
+    try:
+        len(out_string) # generator?
+        # nope
+        p_ctx.transport.resp_headers['Content-Length'] = \
+                                      str(sum([len(a) for a in out_string]))
+    except TypeError:
+        pass
+
+    response.prepare(resp_code, p_ctx.transport.resp_headers)
+
+    for chunk in out_string:
+        response.write(chunk)
+
+    response.finish()
+    p_ctx.close()
+
+    try:
+        process_contexts(transport, others, p_ctx)
+    except Exception as e:
+        # Report but ignore any exceptions from auxiliary methods.
+        logger.exception(e)
+
+
+def _init_push(ret, response, p_ctx, others, transport):
+    assert isinstance(ret, PushBase)
+
+    resp_code = p_ctx.transport.resp_code
+    if resp_code is None:
+        resp_code = HTTP_200
+
+    # the length of the outgoing stream is unknown.
+    p_ctx.transport.resp_headers.pop('Content-Length', None)
+    response.prepare(resp_code, p_ctx.transport.resp_headers)
+
+    p_ctx.out_stream = response
+
+    # fire events
+    p_ctx.app.event_manager.fire_event('method_return_push', p_ctx)
+    if p_ctx.service_class is not None:
+        p_ctx.service_class.event_manager.fire_event('method_return_push',
+                                                                         p_ctx)
+
+    gen = transport.get_out_string_push(p_ctx)
+
+    assert gen is not None, "It looks like this protocol is not " \
+                            "async-compliant yet."
+
+    def _cb_push_finish():
+        response.finish()
+        p_ctx.close()
+
+        process_contexts(transport, others, p_ctx)
+
+    retval = ret.init(p_ctx, response, gen, _cb_push_finish, None)
+
+    if is_awaitable(retval):
+        def _cb_push_close(f):
+            if not f.cancelled() and f.exception() is not None:
+                logger.error("Error while pushing data: %r", f.exception())
+            ret.close()
+
+        ensure_future(retval, loop=transport.loop) \
+                                              .add_done_callback(_cb_push_close)
+
+    else:
+        ret.close()
+
+    return retval
+
+
+def _init_async_iter(aiter, response, p_ctx, others, transport):
+    """Streams the values produced by an asynchronous iterator using a
+    :class:`PushBase` instance when the output protocol supports it. Otherwise,
+    the values are collected in a list which is serialized as usual."""
+
+    om = p_ctx.descriptor.out_message
+    if p_ctx.descriptor.body_style is BODY_STYLE_WRAPPED and \
+                                                        len(om._type_info) > 1:
+        e = ValueError("Async iterators can only be returned from functions "
+                       "that return a single Iterable.")
+        return _eb_future(e, response, p_ctx, others, transport)
+
+    # Only protocols that implement incremental generation can consume
+    # PushBase instances.
+    if not hasattr(p_ctx.out_protocol, 'incgen'):
+        values = []
+
+        def _cb_collect(f):
+            if f.cancelled() or f.exception() is not None:
+                return _cb_future(f, response, p_ctx, others, transport)
+            _cb_result(values, response, p_ctx, others, transport)
+
+        iterate_async(aiter, values.append, loop=transport.loop) \
+                                                  .add_done_callback(_cb_collect)
+        return
+
+    def _cb_push(push):
+        return iterate_async(aiter, push.append, loop=transport.loop)
+
+    push = PushBase(callback=_cb_push)
+    p_ctx.out_object = [push]
+
+    return _init_push(push, response, p_ctx, others, transport)
+
+
+class _ChunkedDecoder(object):
+    """Incrementally decodes a request body in chunked transfer encoding."""
+
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self.done = False
+        self._remaining = None
+
+    def feed(self, buf):
+        """Consumes as much as possible from the given bytearray."""
+
+        while not self.done:
+            if self._remaining is None:
+                idx = buf.find(b'\r\n')
+                if idx < 0:
+                    return
+                size = bytes(buf[:idx]).split(b';', 1)[0].strip()
+                self._remaining = int(size, 16)
+                del buf[:idx + 2]
+
+            if self._remaining == 0:
+                # we don't support trailers.
+                if len(buf) < 2:
+                    return
+                del buf[:2]
+                self.done = True
+                return
+
+            if len(buf) < self._remaining + 2:
+                return
+
+            self.chunks.append(bytes(buf[:self._remaining]))
+            self.length += self._remaining
+            del buf[:self._remaining + 2]
+            self._remaining = None
+
+
+class _ProtocolResponse(AsyncioHttpResponse):
+    def __init__(self, protocol, request):
+        super(_ProtocolResponse, self).__init__()
+
+        self.protocol = protocol
+        self.http_version = request.http_version
+
+        connection = (request.get_header('connection') or '').lower()
+        if self.http_version == '1.1':
+            self.keep_alive = connection != 'close'
+        else:
+            self.keep_alive = connection == 'keep-alive'
+
+        self.chunked = False
+
+    def _write(self, data):
+        transport = self.protocol.transport
+        if transport is not None and not transport.is_closing():
+            transport.write(data)
+
+    def send_headers(self):
+        if self.length is None:
+            if self.http_version == '1.1':
+                self.chunked = True
+                self.headers.append(('Transfer-Encoding', 'chunked'))
+            else:
+                self.keep_alive = False
+
+        if not self.keep_alive:
+            self.headers.append(('Connection', 'close'))
+
+        lines = ['HTTP/%s %s' % (self.http_version, self.status)]
+        lines.extend(['%s: %s' % (k, v) for k, v in self.headers])
+        lines.append('\r\n')
+
+        self._write(_to_bytes('\r\n'.join(lines)))
+
+    def send_body(self, data):
+        if self.chunked:
+            self._write(b''.join([_to_bytes('%x\r\n' % len(data)), data,
+                                                                    b'\r\n']))
+        else:
+            self._write(data)
+
+    def send_end(self):
+        if self.chunked:
+            self._write(b'0\r\n\r\n')
+
+        self.protocol.response_finished(self)
+
+
+class AsyncioHttpProtocol(asyncio.Protocol):
+    """An :class:`asyncio.Protocol` implementation that parses HTTP/1.x
+    requests and passes them to an :class:`AsyncioHttpBase` instance.
+    Pipelined requests are processed in order."""
+
+    def __init__(self, http_transport):
+        self.http_transport = http_transport
+        self.transport = None
+
+        self._buffer = bytearray()
+        self._request = None
+        self._decoder = None
+        self._busy = False
+        self._closing = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self._buffer = bytearray()
+
+    def data_received(self, data):
+        self._buffer.extend(data)
+        if not self._busy:
+            self._process()
+
+    def response_finished(self, response):
+        self._busy = False
+
+        if not response.keep_alive:
+            self._closing = True
+            if self.transport is not None:
+                self.transport.close()
+            return
+
+        if len(self._buffer) > 0:
+            self.http_transport.loop.call_soon(self._process)
+
+    def _error(self, status):
+        request = AsyncioHttpRequest('GET', '/', http_version='1.0')
+        response = _ProtocolResponse(self, request)
+        response.prepare(status, {'Content-Length': str(len(status))})
+        self._busy = True
+        response.write(status)
+        response.finish()
+
+    def _process(self):
+        while not (self._busy or self._closing or self.transport is None):
+            if self._request is None:
+                if not self._parse_head():
+                    return
+
+            request = self._request
+            if self._decoder is not None:
+                try:
+                    self._decoder.feed(self._buffer)
+                except ValueError:
+                    return self._error(HTTP_400)
+                if self._decoder.length > self.http_transport.max_content_length:
+                    return self._error(HTTP_413)
+                if not self._decoder.done:
+                    return
+                request.body = self._decoder.chunks
+
+            else:
+                length = request.content_length or 0
+                if len(self._buffer) < length:
+                    return
+
+                request.body = [bytes(self._buffer[:length])]
+                del self._buffer[:length]
+
+            self._request = None
+            self._decoder = None
+            self._busy = True
+
+            response = _ProtocolResponse(self, request)
+            try:
+                self.http_transport.handle_request(request, response)
+
+            except Exception as e:
+                logger.exception(e)
+                if not response.headers_sent:
+                    response.prepare(HTTP_500,
+                                        {'Content-Length': str(len(HTTP_500))})
+                    response.write(HTTP_500)
+                response.finish()
+
+    def _parse_head(self):
+        idx = self._buffer.find(b'\r\n\r\n')
+        if idx < 0:
+            if len(self._buffer) > MAX_HEADER_LENGTH:
+                self._error(HTTP_431)
+            return False
+
+        if idx > MAX_HEADER_LENGTH:
+            self._error(HTTP_431)
+            return False
+
+        head = _to_native(bytes(self._buffer[:idx]))
+        del self._buffer[:idx + 4]
+
+        lines = head.split('\r\n')
+        try:
+            method, uri, version = lines[0].split(' ', 2)
+            assert version.startswith('HTTP/1.')
+
+        except (ValueError, AssertionError):
+            self._error(HTTP_400)
+            return False
+
+        headers = {}
+        for line in lines[1:]:
+            k, _, v = line.partition(':')
+            headers.setdefault(k.strip().lower(), []).append(v.strip())
+
+        path, _, query_string = uri.partition('?')
+
+        sockname = self.transport.get_extra_info('sockname')
+        peername = self.transport.get_extra_info('peername')
+        scheme = 'http'
+        if self.transport.get_extra_info('sslcontext') is not None:
+            scheme = 'https'
+
+        request = AsyncioHttpRequest(method, path, query_string, headers,
+                    http_version=version[5:], scheme=scheme,
+                    server_name=sockname[0] if sockname else 'localhost',
+                    server_port=sockname[1] if sockname else None,
+                    remote_addr=peername[0] if peername else None)
+
+        te = (request.get_header('transfer-encoding') or '').lower()
+        if te == 'chunked':
+            self._decoder = _ChunkedDecoder()
+
+        elif te != '':
+            self._error(HTTP_411)
+            return False
+
+        else:
+            try:
+                length = request.content_length
+            except ValueError:
+                self._error(HTTP_400)
+                return False
+
+            if length is not None and \
+                               length > self.http_transport.max_content_length:
+                self._error(HTTP_413)
+                return False
+
+        if (request.get_header('expect') or '').lower() == '100-continue':
+            self.transport.write(_to_bytes('HTTP/%s 100 Continue\r\n\r\n' %
+                                                         request.http_version))
+
+        self._request = request
+
+        return True
+
+
+class AsyncioHttpServer(AsyncioHttpBase):
+    """An http server that runs inside an asyncio event loop. See the
+    :mod:`spyne.server.asyncio` module documentation for more info.
+
+    :param app: The :class:`spyne.application.Application` instance.
+    :param chunked: Don't buffer the outgoing document when True.
+    :param max_content_length: The maximum size of the request body in bytes.
+    :param block_length: The size of the chunks the request body is read in.
+    :param loop: The event loop to use. Defaults to the result of
+        ``asyncio.get_event_loop()``.
+    """
+
+    def protocol_factory(self):
+        return AsyncioHttpProtocol(self)
+
+    def create_server(self, host='127.0.0.1', port=8000, **kwargs):
+        """Returns what ``loop.create_server()`` returns, which is a coroutine
+        that sets up the listening socket(s). The keyword arguments are passed
+        to ``loop.create_server()``."""
+
+        return self.loop.create_server(self.protocol_factory, host, port,
+                                                                       **kwargs)
+
+    def serve_forever(self, host='127.0.0.1', port=8000, **kwargs):
+        """Starts listening on the given address and runs the event loop until
+        it's stopped."""
+
+        server = self.loop.run_until_complete(
+                                   self.create_server(host, port, **kwargs))
+
+        logger.info("listening on %s:%d", host, port)
+
+        try:
+            self.loop.run_forever()
+
+        finally:
+            server.close()
+            self.loop.run_until_complete(server.wait_closed())
@@ -105,10 +105,17 @@ class StreamingDjangoApplication(DjangoApplication):
 
 
 class DjangoServer(HttpBase):
-    """Server talking in Django request/response objects."""
+    """Server talking in Django request/response objects.
 
-    def __init__(self, app, chunked=False, cache_wsdl=True):
-        super(DjangoServer, self).__init__(app, chunked=chunked)
+    See :class:`spyne.server.http.HttpBase` for the ``compress``,
+    ``compress_level`` and ``compress_min_length`` arguments.
+    """
+
+    def __init__(self, app, chunked=False, cache_wsdl=True, compress=False,
+                                  compress_level=6, compress_min_length=1024):
+        super(DjangoServer, self).__init__(app, chunked=chunked,
+                        compress=compress, compress_level=compress_level,
+                        compress_min_length=compress_min_length)
         self._wsdl = None
         self._cache_wsdl = cache_wsdl
 
@@ -152,6 +159,9 @@ class DjangoServer(HttpBase):
         if p_ctx.descriptor and p_ctx.descriptor.mtom:
             raise NotImplementedError
 
+        self.encode_out_string(p_ctx,
+                                 request.META.get('HTTP_ACCEPT_ENCODING', None))
+
         if self.chunked:
             response = StreamingHttpResponse(p_ctx.out_string)
         else:
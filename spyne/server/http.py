@@ -17,13 +17,183 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
+import zlib
+
 from collections import defaultdict
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 from spyne import TransportContext
 from spyne import MethodContext
+from spyne.error import Fault
+from spyne.error import RequestTooLongError
+from spyne.error import UnsupportedContentEncodingError
 from spyne.protocol.http import HttpPattern
 from spyne.server import ServerBase
 from spyne.const.http import gen_body_redirect, HTTP_301, HTTP_302
+from spyne.util.cache import get_etag
+
+
+class _BrotliCompressor(object):
+    """Adapts :class:`brotli.Compressor` to the interface of zlib's compressor
+    objects."""
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self, mode=zlib.Z_FINISH):
+        if mode == zlib.Z_FINISH:
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+CONTENT_ENCODINGS = {
+    'gzip': lambda level: zlib.compressobj(level, zlib.DEFLATED,
+                                                          16 + zlib.MAX_WBITS),
+    'deflate': lambda level: zlib.compressobj(level),
+}
+"""Maps content-coding names to factories of compressor objects. The
+factories get the compression level and return objects with zlib-style
+``compress(data)`` and ``flush(mode)`` methods. Register new encodings here to
+make them available to :class:`HttpBase` subclasses."""
+
+if brotli is not None:
+    CONTENT_ENCODINGS['br'] = _BrotliCompressor
+
+DEFAULT_CONTENT_ENCODINGS = ('br', 'gzip', 'deflate')
+"""Content encodings that are enabled by passing ``compress=True`` to http
+transports, in the order of preference."""
+
+
+CONTENT_DECODINGS = {
+    'gzip': lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+    'x-gzip': lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+    'deflate': lambda: zlib.decompressobj(),
+}
+"""Maps content-coding names to factories of zlib-style decompressor objects
+that are used to decode request bodies."""
+
+
+def parse_accept_encoding(accept_encoding):
+    """Parses the value of an ``Accept-Encoding`` header to a dict that maps
+    lowercased content-coding names to their quality values."""
+
+    retval = {}
+    if not accept_encoding:
+        return retval
+
+    for elt in accept_encoding.split(','):
+        name, _, params = elt.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        q = 1.0
+        for param in params.split(';'):
+            k, _, v = param.partition('=')
+            if k.strip().lower() == 'q':
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+
+        retval[name] = q
+
+    return retval
+
+
+def negotiate_content_encoding(accept_encoding, encodings):
+    """Returns the member of ``encodings`` that the client prefers according
+    to the given ``Accept-Encoding`` header value, or None when the response
+    should not be encoded. Ties are broken by the order of ``encodings``."""
+
+    accepted = parse_accept_encoding(accept_encoding)
+    if not accepted:
+        return None
+
+    default_q = accepted.get('*', 0.0)
+
+    retval = None
+    retval_q = 0.0
+    for enc in encodings:
+        q = accepted.get(enc, default_q)
+        if q > retval_q:
+            retval, retval_q = enc, q
+
+    return retval
+
+
+def encode_iterable(compressor, data, sync_flush=False):
+    """Compresses the given iterable of byte strings using the given
+    compressor object. Lists and tuples are compressed eagerly and the result
+    is a list, other iterables are compressed lazily chunk by chunk.
+
+    :param compressor: An object with zlib-style ``compress`` and ``flush``
+        methods, as returned by the factories in :data:`CONTENT_ENCODINGS`.
+    :param data: Iterable of byte strings.
+    :param sync_flush: When True, every non-empty chunk is flushed to the
+        output so that the client can start decoding right away. This is
+        useful for streaming responses, at the cost of compression ratio.
+    """
+
+    if isinstance(data, (list, tuple)):
+        return [b''.join([compressor.compress(d) for d in data]) +
+                                                            compressor.flush()]
+
+    return _gen_encoded(compressor, data, sync_flush)
+
+
+def _gen_encoded(compressor, data, sync_flush):
+    for d in data:
+        if not d:
+            continue
+
+        retval = compressor.compress(d)
+        if sync_flush:
+            retval += compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        if retval:
+            yield retval
+
+    yield compressor.flush()
+
+
+def _gen_decoded(decompressor, data, block_length, max_length):
+    length = 0
+
+    for chunk in data:
+        # the input is sliced so that unconsumed_tail, which is a copy of the
+        # remaining input, stays small.
+        for i in range(0, len(chunk), block_length):
+            piece = chunk[i:i + block_length]
+
+            while piece:
+                try:
+                    retval = decompressor.decompress(piece, block_length)
+                except zlib.error as e:
+                    raise Fault('Client.InvalidContentEncoding', str(e))
+
+                piece = decompressor.unconsumed_tail
+
+                length += len(retval)
+                if length > max_length:
+                    raise RequestTooLongError()
+
+                if retval:
+                    yield retval
+
+    retval = decompressor.flush()
+    if len(retval) + length > max_length:
+        raise RequestTooLongError()
+
+    if retval:
+        yield retval
 
 
 class HttpTransportContext(TransportContext):
@@ -51,6 +221,10 @@ class HttpTransportContext(TransportContext):
         self.wsdl_error = None
         """The error when handling WSDL requests."""
 
+        self.compress = None
+        """Set this to False to send the response uncompressed, regardless of
+        what the client accepts."""
+
     def get_mime_type(self):
         return self.resp_headers.get('Content-Type', None)
 
@@ -72,6 +246,12 @@ class HttpTransportContext(TransportContext):
     def get_cookie(self, key):
         raise NotImplementedError()
 
+    def get_request_header(self, name):
+        """Returns the value of the request header with the given
+        case-insensitive name, or ``None`` if it's not present."""
+
+        raise NotImplementedError()
+
     mime_type = property(
         lambda self: self.get_mime_type(),
         lambda self, what: self.set_mime_type(what),
@@ -108,17 +288,62 @@ class HttpMethodContext(MethodContext):
 
 
 class HttpBase(ServerBase):
+    """Base class for http transports.
+
+    Responses are compressed when ``compress`` is set and the client announces
+    support for one of the enabled encodings in its ``Accept-Encoding`` header.
+    ``compress`` is either True, which enables all available encodings in
+    :data:`DEFAULT_CONTENT_ENCODINGS`, or a sequence of encoding names from
+    :data:`CONTENT_ENCODINGS`, in the order of preference.
+
+    Compression can be turned off per method by passing ``_compress=False`` to
+    the ``@rpc`` decorator, which makes sense for e.g. methods that return
+    files that are already compressed, or per request by setting
+    ``ctx.transport.compress = False``. Responses that already have a
+    ``Content-Encoding`` header are never compressed.
+
+    :param compress: True or a sequence of content-coding names.
+    :param compress_level: The compression level, from 1 to 9.
+    :param compress_min_length: Responses whose length is known in advance
+        and is smaller than this value are sent uncompressed.
+    :param metrics: A :class:`spyne.util.metrics.Metrics` instance whose
+        values are returned in the Prometheus text format to ``GET`` requests
+        to ``metrics_path``. Transports that don't support this ignore it.
+    :param metrics_path: The path of the metrics endpoint.
+    """
+
     transport = 'http://schemas.xmlsoap.org/soap/http'
 
     def __init__(self, app, chunked=False,
                 max_content_length=2 * 1024 * 1024,
-                block_length=8 * 1024):
+                block_length=8 * 1024, compress=False, compress_level=6,
+                compress_min_length=1024, metrics=None,
+                metrics_path='/metrics'):
         super(HttpBase, self).__init__(app)
 
         self.chunked = chunked
         self.max_content_length = max_content_length
         self.block_length = block_length
 
+        if compress is True:
+            compress = [enc for enc in DEFAULT_CONTENT_ENCODINGS
+                                                   if enc in CONTENT_ENCODINGS]
+        elif not compress:
+            compress = ()
+
+        for enc in compress:
+            if not enc in CONTENT_ENCODINGS:
+                raise ValueError("Unknown content encoding %r" % enc)
+
+        self.content_encodings = tuple(compress)
+        self.compress_level = compress_level
+        self.compress_min_length = compress_min_length
+
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+
+        self._encoded_documents = {}
+
         self._http_patterns = set()
 
         for k, v in self.app.interface.service_method_map.items():
@@ -191,6 +416,174 @@ class HttpBase(ServerBase):
 
         return params
 
+    def is_metrics_request(self, method, path):
+        """Returns True if the request with the given verb and path is to be
+        answered with the values in ``self.metrics``."""
+
+        return self.metrics is not None and path == self.metrics_path \
+                                                and method.upper() == 'GET'
+
+    def get_metrics_document(self):
+        """Returns the current values in ``self.metrics`` as a utf8-encoded
+        byte string. Its mime type is
+        :data:`spyne.util.metrics.PROMETHEUS_CONTENT_TYPE`."""
+
+        return self.metrics.to_prometheus().encode('utf8')
+
+    def decode_in_string(self, content_encoding, in_string):
+        """Returns an iterable that decompresses the given iterable of request
+        body chunks according to the value of the ``Content-Encoding`` request
+        header. The body is decoded lazily, at most ``block_length`` bytes at a
+        time, and :class:`spyne.error.RequestTooLongError` is raised as soon as
+        the *decoded* body exceeds ``max_content_length``.
+
+        :param content_encoding: The value of the ``Content-Encoding`` request
+            header.
+        :param in_string: Iterable of byte strings.
+        """
+
+        if not content_encoding:
+            return in_string
+
+        # multiple encodings are listed in the order they were applied.
+        encodings = [enc.strip().lower() for enc in content_encoding.split(',')]
+        for enc in reversed(encodings):
+            if enc == 'identity':
+                continue
+
+            factory = CONTENT_DECODINGS.get(enc, None)
+            if factory is None:
+                raise UnsupportedContentEncodingError(
+                                      "Unsupported content encoding %r" % enc)
+
+            in_string = _gen_decoded(factory(), in_string, self.block_length,
+                                                        self.max_content_length)
+
+        return in_string
+
+    def get_content_encoding(self, ctx, accept_encoding):
+        """Returns the content encoding to use for the response of the given
+        context, or None when it should be sent as-is. Also sets the
+        ``Content-Encoding`` and ``Vary`` response headers accordingly.
+
+        :param ctx: A MethodContext instance
+        :param accept_encoding: The value of the ``Accept-Encoding`` request
+            header.
+        """
+
+        if not self.content_encodings:
+            return None
+        if ctx.transport.compress is False:
+            return None
+        if ctx.descriptor is not None and not ctx.descriptor.compress:
+            return None
+
+        headers = ctx.transport.resp_headers
+        if 'Content-Encoding' in headers:
+            return None
+
+        vary = headers.get('Vary', None)
+        if vary is None:
+            headers['Vary'] = 'Accept-Encoding'
+        elif not 'accept-encoding' in vary.lower():
+            headers['Vary'] = vary + ', Accept-Encoding'
+
+        retval = negotiate_content_encoding(accept_encoding,
+                                                        self.content_encodings)
+        if retval is not None:
+            headers['Content-Encoding'] = retval
+
+        return retval
+
+    def set_cache_headers(self, ctx, if_none_match):
+        """Sets the ``Cache-Control``, ``Vary`` and ``ETag`` response headers
+        of a method with a :class:`spyne.util.cache.ResponseCache`. Must be
+        called after ``ctx.out_string`` is set and before it's compressed.
+        Returns True when the ``If-None-Match`` request header matches the
+        ETag of the response, in which case a ``304 Not Modified`` response
+        should be sent instead.
+
+        :param ctx: A MethodContext instance
+        :param if_none_match: The value of the ``If-None-Match`` request
+            header.
+        """
+
+        if ctx.cache_key is None or ctx.descriptor is None:
+            return False
+
+        cache = ctx.descriptor.cache
+        headers = ctx.transport.resp_headers
+
+        if not 'Cache-Control' in headers:
+            headers['Cache-Control'] = cache.get_cache_control()
+
+        if cache.vary:
+            vary = headers.get('Vary', None)
+            if vary is None:
+                headers['Vary'] = ', '.join(cache.vary)
+            else:
+                lower = vary.lower()
+                for name in cache.vary:
+                    if not name.lower() in lower:
+                        vary = '%s, %s' % (vary, name)
+                headers['Vary'] = vary
+
+        etag = get_etag(ctx)
+        if etag is None:
+            return False
+
+        headers['ETag'] = etag
+        if not if_none_match:
+            return False
+
+        # weak comparison, as per rfc 7232 section 3.2
+        tags = [t.strip() for t in if_none_match.split(',')]
+        return '*' in tags or etag in tags or etag[2:] in tags
+
+    def get_compressor(self, encoding):
+        """Returns a new compressor object for the given content encoding."""
+
+        return CONTENT_ENCODINGS[encoding](self.compress_level)
+
+    def encode_out_string(self, ctx, accept_encoding, sync_flush=False):
+        """Compresses ``ctx.out_string`` according to the negotiated content
+        encoding. Lists of strings smaller than ``compress_min_length`` are
+        left alone. Returns the encoding that was applied, if any."""
+
+        out_string = ctx.out_string
+        if isinstance(out_string, (list, tuple)) and \
+                sum([len(s) for s in out_string]) < self.compress_min_length:
+            return None
+
+        retval = self.get_content_encoding(ctx, accept_encoding)
+        if retval is not None:
+            ctx.out_string = encode_iterable(self.get_compressor(retval),
+                                                       out_string, sync_flush)
+
+        return retval
+
+    def encode_document(self, ctx, accept_encoding, document):
+        """Compresses a static document like a WSDL file according to the
+        negotiated content encoding and returns it. The compressed version is
+        cached per encoding, so that it's only computed once for every
+        distinct document."""
+
+        if len(document) < self.compress_min_length:
+            return document
+
+        encoding = self.get_content_encoding(ctx, accept_encoding)
+        if encoding is None:
+            return document
+
+        cached = self._encoded_documents.get(encoding, None)
+        if cached is None or cached[0] is not document:
+            compressor = self.get_compressor(encoding)
+            cached = (document, compressor.compress(document) +
+                                                            compressor.flush())
+            self._encoded_documents[encoding] = cached
+
+        return cached[1]
+
     @property
     def has_patterns(self):
         return len(self._http_patterns) > 0
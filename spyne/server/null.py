@@ -52,11 +52,12 @@ class NullServer(ServerBase):
 
     Note that:
         1) ``**kwargs`` overwrite ``*args``.
-        2) You can do: ::
+        2) Context delimiters are logged at DEBUG level. Whether to log them
+           is decided when the server is instantiated, so do: ::
 
-            logging.getLogger('spyne.server.null').setLevel(logging.CRITICAL)
+            logging.getLogger('spyne.server.null').setLevel(logging.DEBUG)
 
-        to hide context delimiters in logs.
+           before creating the ``NullServer`` instance to see them.
     """
 
     transport = 'noconn://null.spyne'
@@ -66,12 +67,15 @@ class NullServer(ServerBase):
 
         super(NullServer, self).__init__(app)
 
-        self.service = _FunctionProxy(self, self.app, async=False)
-        self.async = _FunctionProxy(self, self.app, async=True)
+        self.service = _FunctionProxy(self, self.app, is_async=False)
+        self.is_async = _FunctionProxy(self, self.app, is_async=True)
+        # "async" is a keyword as of Python 3.7
+        setattr(self, 'async', self.is_async)
         self.factory = Factory(self.app)
         self.ostr = ostr
         self.locale = locale
         self.url = "http://spyne.io/null"
+        self.log_contexts = logger.isEnabledFor(logging.DEBUG)
 
     def appinit(self):
         if self.do_appinit:
@@ -86,22 +90,22 @@ class NullServer(ServerBase):
 
 
 class _FunctionProxy(object):
-    def __init__(self, server, app, async):
+    def __init__(self, server, app, is_async):
         self._app = app
         self._server = server
         self.in_header = None
-        self.async = async
+        self.is_async = is_async
 
     def __getattr__(self, key):
         return _FunctionCall(self._app, self._server, key, self.in_header,
-                  self._server.ostr, self._server.locale, self.async)
+                  self._server.ostr, self._server.locale, self.is_async)
 
     def __getitem__(self, key):
         return self.__getattr__(key)
 
 
 class _FunctionCall(object):
-    def __init__(self, app, server, key, in_header, ostr, locale, async):
+    def __init__(self, app, server, key, in_header, ostr, locale, is_async):
         self.app = app
 
         self._key = key
@@ -109,7 +113,7 @@ class _FunctionCall(object):
         self._in_header = in_header
         self._ostr = ostr
         self._locale = locale
-        self._async = async
+        self._async = is_async
 
     def __call__(self, *args, **kwargs):
         initial_ctx = MethodContext(self)
@@ -121,7 +125,9 @@ class _FunctionCall(object):
         contexts = self.app.in_protocol.generate_method_contexts(initial_ctx)
 
         retval = None
-        logger.warning("%s start request %s" % (_big_header, _big_footer))
+        log_contexts = self._server.log_contexts
+        if log_contexts:
+            logger.debug("%s start request %s", _big_header, _big_footer)
 
         if self._async:
             from twisted.internet.defer import Deferred
@@ -149,17 +155,17 @@ class _FunctionCall(object):
             else:
                 ctx.descriptor.aux.initialize_context(ctx, p_ctx, error=None)
 
-            # do logging.getLogger('spyne.server.null').setLevel(logging.CRITICAL)
-            # to hide the following
-            logger.warning("%s start context %s" % (_small_header,
-                                                                 _small_footer))
-            logger.warning("%r.%r" % (ctx.service_class,
-                                                       ctx.descriptor.function))
+            if log_contexts:
+                logger.debug("%s start context %s", _small_header,
+                                                                 _small_footer)
+                logger.debug("%r.%r", ctx.service_class,
+                                                        ctx.descriptor.function)
             try:
                 self.app.process_request(ctx)
             finally:
-                logger.warning("%s  end context  %s" % (_small_header,
-                                                                 _small_footer))
+                if log_contexts:
+                    logger.debug("%s  end context  %s", _small_header,
+                                                                 _small_footer)
 
             if cnt == 0:
                 if self._async and isinstance(ctx.out_object[0], Deferred):
@@ -172,7 +178,8 @@ class _FunctionCall(object):
         if not self._async:
             p_ctx.close()
 
-        logger.warning("%s  end request  %s" % (_big_header, _big_footer))
+        if log_contexts:
+            logger.debug("%s  end request  %s", _big_header, _big_footer)
 
         return retval
 
@@ -65,7 +65,7 @@ from spyne.error import InternalError
 from spyne.auxproc import process_contexts
 from spyne.const.ansi_color import LIGHT_GREEN
 from spyne.const.ansi_color import END_COLOR
-from spyne.const.http import HTTP_404, HTTP_200
+from spyne.const.http import HTTP_404, HTTP_200, HTTP_304
 from spyne.model import PushBase, File, ComplexModelBase
 from spyne.model.fault import Fault
 from spyne.protocol.http import HttpRpc
@@ -73,6 +73,7 @@ from spyne.server.http import HttpBase
 from spyne.server.http import HttpMethodContext
 from spyne.server.http import HttpTransportContext
 from spyne.server.twisted._base import Producer
+from spyne.util.metrics import PROMETHEUS_CONTENT_TYPE
 from spyne.util.six import text_type, string_types
 from spyne.util.six.moves.urllib.parse import unquote
 
@@ -121,6 +122,24 @@ def _render_file(file, request):
     return NOT_DONE_YET
 
 
+class _EncodedWriter(object):
+    """Compresses the data written to it on its way to the request."""
+
+    def __init__(self, request, compressor):
+        self.request = request
+        self.compressor = compressor
+
+    def write(self, data):
+        data = self.compressor.compress(data)
+        if data:
+            self.request.write(data)
+
+    def end(self):
+        """Returns the remaining compressed data."""
+
+        return self.compressor.flush()
+
+
 def _set_response_headers(request, headers):
     retval = []
 
@@ -157,6 +176,9 @@ class TwistedHttpTransportContext(HttpTransportContext):
     def get_cookie(self, key):
         return self.req.getCookie(key)
 
+    def get_request_header(self, name):
+        return self.req.getHeader(name)
+
 
 class TwistedHttpMethodContext(HttpMethodContext):
     default_transport_context = TwistedHttpTransportContext
@@ -164,9 +186,14 @@ class TwistedHttpMethodContext(HttpMethodContext):
 
 class TwistedHttpTransport(HttpBase):
     def __init__(self, app, chunked=False, max_content_length=2 * 1024 * 1024,
-                                                         block_length=8 * 1024):
+                                                         block_length=8 * 1024,
+                    compress=False, compress_level=6, compress_min_length=1024,
+                                         metrics=None, metrics_path='/metrics'):
         super(TwistedHttpTransport, self).__init__(app, chunked=chunked,
-               max_content_length=max_content_length, block_length=block_length)
+               max_content_length=max_content_length, block_length=block_length,
+                        compress=compress, compress_level=compress_level,
+                        compress_min_length=compress_min_length,
+                        metrics=metrics, metrics_path=metrics_path)
 
     def decompose_incoming_envelope(self, prot, ctx, message):
         """This function is only called by the HttpRpc protocol to have the
@@ -203,8 +230,8 @@ class TwistedHttpTransport(HttpBase):
             ctx.method_request_string = '{%s}%s' % (self.app.interface.get_tns(),
                                                     request.path.split('/')[-1])
 
-        logger.debug("%sMethod name: %r%s" % (LIGHT_GREEN,
-                                          ctx.method_request_string, END_COLOR))
+        logger.debug("%sMethod name: %r%s", LIGHT_GREEN,
+                                           ctx.method_request_string, END_COLOR)
 
         for k, v in params.items():
             val = ctx.in_body_doc.get(k, [])
@@ -288,14 +315,24 @@ def _has_fd(istr):
 class TwistedWebResource(Resource):
     """A server transport that exposes the application as a twisted web
     Resource.
+
+    See :class:`spyne.server.http.HttpBase` for the ``compress``,
+    ``compress_level``, ``compress_min_length``, ``metrics`` and
+    ``metrics_path`` arguments. The metrics path is compared to the full path
+    of the request.
     """
 
     def __init__(self, app, chunked=False, max_content_length=2 * 1024 * 1024,
-                                           block_length=8 * 1024, prepath=None):
+                                           block_length=8 * 1024, prepath=None,
+                    compress=False, compress_level=6, compress_min_length=1024,
+                                         metrics=None, metrics_path='/metrics'):
         Resource.__init__(self)
 
         self.http_transport = TwistedHttpTransport(app, chunked,
-                                            max_content_length, block_length)
+                                            max_content_length, block_length,
+                        compress=compress, compress_level=compress_level,
+                        compress_min_length=compress_min_length,
+                        metrics=metrics, metrics_path=metrics_path)
         self._wsdl = None
         self.prepath = prepath
 
@@ -324,6 +361,11 @@ class TwistedWebResource(Resource):
         return retval
 
     def render(self, request):
+        if self.http_transport.is_metrics_request(request.method,
+                                                                request.path):
+            request.setHeader('Content-Type', PROMETHEUS_CONTENT_TYPE)
+            return self.http_transport.get_metrics_document()
+
         if request.method == 'GET' and (
                 request.uri.endswith('.wsdl') or request.uri.endswith('?wsdl')):
             return self.__handle_wsdl_request(request)
@@ -368,7 +410,19 @@ class TwistedWebResource(Resource):
             request.content.seek(0)
             initial_ctx.in_string = [request.content.read()]
 
-        initial_ctx.transport.file_info = \
+        content_encoding = request.getHeader('content-encoding')
+        if content_encoding:
+            try:
+                initial_ctx.in_string = self.http_transport.decode_in_string(
+                                        content_encoding, initial_ctx.in_string)
+            except Fault as e:
+                initial_ctx.in_error = initial_ctx.out_error = e
+                return self.handle_rpc_error(initial_ctx, (), e, request)
+
+            initial_ctx.transport.file_info = None
+
+        else:
+            initial_ctx.transport.file_info = \
                                         _get_file_name(initial_ctx.in_string[0])
 
         contexts = self.http_transport.generate_contexts(initial_ctx)
@@ -427,7 +481,11 @@ class TwistedWebResource(Resource):
 
             self.http_transport.event_manager.fire_event('wsdl', ctx)
 
-            return ctx.transport.wsdl
+            retval = self.http_transport.encode_document(ctx,
+                     request.getHeader('accept-encoding'), ctx.transport.wsdl)
+            _set_response_headers(request, ctx.transport.resp_headers)
+
+            return retval
 
         except Exception as e:
             ctx.transport.wsdl_error = e
@@ -498,9 +556,11 @@ def _cb_deferred(ret, request, p_ctx, others, resource, cb=True):
 
     _set_response_headers(request, p_ctx.transport.resp_headers)
 
-    om = p_ctx.descriptor.out_message
+    # batch contexts don't have a descriptor.
+    om = None
     single_class = None
     if cb:
+        om = p_ctx.descriptor.out_message
         if p_ctx.descriptor.body_style in (BODY_STYLE_BARE, BODY_STYLE_EMPTY):
             p_ctx.out_object = [ret]
 
@@ -539,7 +599,41 @@ def _cb_deferred(ret, request, p_ctx, others, resource, cb=True):
             request.notifyFinish().addErrback(_eb_request_finished, request, p_ctx)
 
     else:
-        resource.http_transport.get_out_string(p_ctx)
+        http_transport = resource.http_transport
+        accept_encoding = request.getHeader('accept-encoding')
+
+        # protocols that stream write to the request directly, so their output
+        # is compressed on its way to the request. responses from the cache
+        # are already serialized.
+        streamed = p_ctx.out_string is None and \
+                                          'stream' in p_ctx.out_protocol.type
+        if streamed:
+            # the headers are sent before the body is known, so there's no
+            # ETag in this case.
+            http_transport.set_cache_headers(p_ctx, None)
+
+            encoding = http_transport.get_content_encoding(p_ctx,
+                                                                accept_encoding)
+            if encoding is not None:
+                p_ctx.out_stream = _EncodedWriter(request,
+                                       http_transport.get_compressor(encoding))
+
+            _set_response_headers(request, p_ctx.transport.resp_headers)
+
+        http_transport.get_out_string(p_ctx)
+
+        if isinstance(p_ctx.out_stream, _EncodedWriter):
+            p_ctx.out_string = [p_ctx.out_stream.end()]
+
+        elif not streamed and http_transport.set_cache_headers(p_ctx,
+                                             request.getHeader('if-none-match')):
+            request.setResponseCode(int(HTTP_304[:3]))
+            p_ctx.out_string = []
+            _set_response_headers(request, p_ctx.transport.resp_headers)
+
+        else:
+            http_transport.encode_out_string(p_ctx, accept_encoding)
+            _set_response_headers(request, p_ctx.transport.resp_headers)
 
         producer = Producer(p_ctx.out_string, request)
         producer.deferred.addCallback(_cb_request_finished, request, p_ctx)
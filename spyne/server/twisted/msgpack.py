@@ -24,6 +24,8 @@ logger = logging.getLogger(__name__)
 
 import msgpack
 
+from collections import deque
+
 from twisted.internet.defer import Deferred
 from twisted.internet.protocol import Protocol, Factory, connectionDone
 from twisted.python.failure import Failure
@@ -38,22 +40,50 @@ from spyne.server.msgpack import OUT_RESPONSE_SERVER_ERROR, \
 
 
 class TwistedMessagePackProtocolFactory(Factory):
-    def __init__(self, app, base=MessagePackServerBase):
+    def __init__(self, app, base=MessagePackServerBase, max_inflight=None):
         self.app = app
         self.base = base
+        self.max_inflight = max_inflight
         self.event_manager = EventManager(self)
 
     def buildProtocol(self, address):
-        return TwistedMessagePackProtocol(self.app, self.base, factory=self)
+        return TwistedMessagePackProtocol(self.app, self.base, factory=self,
+                                                 max_inflight=self.max_inflight)
 
 
 class TwistedMessagePackProtocol(Protocol):
+    """A msgpack transport that processes incoming requests concurrently.
+
+    Requests whose service methods return Deferreds don't block the requests
+    that come after them, so responses can be written out of order. Use a
+    protocol that carries request ids (like
+    :class:`spyne.protocol.msgpack.MessagePackRpc`) to match them on the
+    client side.
+
+    :param app: The :class:`spyne.application.Application` instance.
+    :param base: The :class:`MessagePackServerBase` subclass to use.
+    :param max_buffer_size: Maximum size of the incoming message buffer.
+    :param factory: The factory that built this protocol, if any.
+    :param max_inflight: Maximum number of requests that are processed
+        concurrently on a single connection. Once this limit is reached,
+        incoming messages are queued and reading from the connection is paused
+        until some of the pending requests complete. ``None`` means no limit.
+    """
+
     def __init__(self, app, base=MessagePackServerBase,
-                                 max_buffer_size=2 * 1024 * 1024, factory=None):
+                                 max_buffer_size=2 * 1024 * 1024, factory=None,
+                                                             max_inflight=None):
         self.factory = factory
         self._buffer = msgpack.Unpacker(max_buffer_size=max_buffer_size)
         self._transport = base(app)
 
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.disconnected = False
+        self._queue = deque()
+        self._paused = False
+        self._processing = False
+
     def connectionMade(self):
         logger.info("%r connection made.", self)
         if self.factory is not None:
@@ -61,6 +91,8 @@ class TwistedMessagePackProtocol(Protocol):
 
     def connectionLost(self, reason=connectionDone):
         logger.info("%r connection lost yo.", self)
+        self.disconnected = True
+        self._queue.clear()
         if self.factory is not None:
             self.factory.event_manager.fire_event("connection_lost", self)
 
@@ -68,17 +100,61 @@ class TwistedMessagePackProtocol(Protocol):
         self._buffer.feed(data)
 
         for msg in self._buffer:
-            try:
-                self.process_incoming_message(msg)
+            self._queue.append(msg)
+
+        self._process_queue()
 
-            except ValidationError as e:
-                import traceback
-                traceback.print_exc()
-                logger.exception(e)
+    def _process_queue(self):
+        # requests that complete synchronously call request_finished() which
+        # calls this function again. The loop below picks those up instead.
+        if self._processing:
+            return
+
+        self._processing = True
+        try:
+            while len(self._queue) > 0:
+                if self.max_inflight is not None and \
+                                            self.inflight >= self.max_inflight:
+                    if not self._paused:
+                        self._paused = True
+                        self.transport.pauseProducing()
+                    return
+
+                msg = self._queue.popleft()
+                self.inflight += 1
+
+                try:
+                    self.process_incoming_message(msg)
+
+                except ValidationError as e:
+                    logger.exception(e)
+
+                    self.inflight -= 1
+                    self.write(msgpack.packb([OUT_RESPONSE_CLIENT_ERROR,
+                                                                    str(e)]))
+
+            if self._paused:
+                self._paused = False
+                self.transport.resumeProducing()
+
+        finally:
+            self._processing = False
+
+    def request_finished(self):
+        """Called once the response to a request was written. Picks up the
+        queued requests, if any."""
+
+        self.inflight -= 1
+        if len(self._queue) > 0 and not self.disconnected:
+            self._process_queue()
+
+    def write(self, data):
+        if self.disconnected:
+            logger.warning("%r discarding response to a closed connection.",
+                                                                           self)
+            return
 
-                p_ctx = MessagePackMethodContext(prot)
-                p_ctx.in_string = [body]
-                self.handle_error(p_ctx, others, e)
+        self.transport.write(data)
 
     def process_incoming_message(self, msg):
         p_ctx, others = self._transport.produce_contexts(msg)
@@ -93,10 +169,14 @@ class TwistedMessagePackProtocol(Protocol):
         else:
             error = OUT_RESPONSE_CLIENT_ERROR
 
-        out_string = msgpack.packb([
-            error, msgpack.packb(p_ctx.out_document[0].values()),
-        ])
-        self.transport.write(out_string)
+        # e.g. msgpack-rpc notifications don't have a response.
+        if p_ctx.out_document:
+            out_document = p_ctx.out_document[0]
+            if isinstance(out_document, dict):
+                out_document = list(out_document.values())
+
+            self.write(msgpack.packb([error, msgpack.packb(out_document)]))
+
         p_ctx.close()
 
         try:
@@ -105,6 +185,8 @@ class TwistedMessagePackProtocol(Protocol):
             # Report but ignore any exceptions from auxiliary methods.
             logger.exception(e)
 
+        self.request_finished()
+
     def process_contexts(self, p_ctx, others):
         if p_ctx.in_error:
             self.handle_error(p_ctx, others, p_ctx.in_error)
@@ -121,7 +203,8 @@ class TwistedMessagePackProtocol(Protocol):
             self.handle_error(p_ctx, others, p_ctx.out_error)
             return
 
-        if len(p_ctx.descriptor.out_message._type_info) > 1:
+        if p_ctx.descriptor is None or \
+                          len(p_ctx.descriptor.out_message._type_info) > 1:
             ret = p_ctx.out_object
         else:
             ret = p_ctx.out_object[0]
@@ -144,31 +227,42 @@ def _eb_deferred(retval, prot, p_ctx, others):
         retval.printTraceback()
         p_ctx.out_error = InternalError(retval.value)
 
+    # Other requests may still be in flight on this connection, so just send
+    # the error response instead of dropping the connection.
     prot.handle_error(p_ctx, others, p_ctx.out_error)
-    prot.transport.write(''.join(p_ctx.out_string))
-    prot.transport.loseConnection()
 
     return Failure(p_ctx.out_error, p_ctx.out_error.__class__, tb)
 
 
 def _cb_deferred(retval, prot, p_ctx, others, nowrap=False):
-    if len(p_ctx.descriptor.out_message._type_info) > 1 or nowrap:
+    if nowrap or len(p_ctx.descriptor.out_message._type_info) > 1:
         p_ctx.out_object = retval
     else:
         p_ctx.out_object = [retval]
 
     try:
         prot._transport.get_out_string(p_ctx)
-        prot._transport.pack(p_ctx)
 
-        out_string = ''.join(p_ctx.out_string)
-        prot.transport.write(out_string)
+        out_string = b''.join(p_ctx.out_string)
+        # e.g. msgpack-rpc notifications don't have a response.
+        if len(out_string) > 0:
+            p_ctx.out_string = [out_string]
+            prot._transport.pack(p_ctx)
+            prot.write(b''.join(p_ctx.out_string))
 
     except Exception as e:
         logger.exception(e)
-        prot.handle_error(p_ctx, others, InternalError(e))
+        p_ctx.out_error = InternalError(e)
+        prot.handle_error(p_ctx, others, p_ctx.out_error)
+        return
 
-    finally:
-        p_ctx.close()
+    p_ctx.close()
+
+    try:
+        process_contexts(prot._transport, others, p_ctx)
+    except Exception as e:
+        # Report but ignore any exceptions from auxiliary methods. The
+        # response was already sent and the request must still be finished.
+        logger.exception(e)
 
-    process_contexts(prot._transport, others, p_ctx)
+    prot.request_finished()
@@ -27,6 +27,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 import cgi
+import zlib
 import threading
 import itertools
 
@@ -39,6 +40,7 @@ except ImportError as import_error:
         raise import_error
 
 from spyne.util.six import string_types, BytesIO, PY3
+from spyne.util.six.moves.queue import Queue, Empty
 if PY3:
     from http.cookies import SimpleCookie
 else:
@@ -56,10 +58,12 @@ from spyne.server.http import HttpMethodContext
 from spyne.server.http import HttpTransportContext
 from spyne.util import reconstruct_url
 from spyne.util.odict import odict
+from spyne.util.metrics import PROMETHEUS_CONTENT_TYPE
 
 from spyne.const.ansi_color import LIGHT_GREEN
 from spyne.const.ansi_color import END_COLOR
 from spyne.const.http import HTTP_200
+from spyne.const.http import HTTP_304
 from spyne.const.http import HTTP_404
 from spyne.const.http import HTTP_500
 
@@ -143,6 +147,12 @@ class WsgiTransportContext(HttpTransportContext):
 
         return cookie.get(key, None).value
 
+    def get_request_header(self, name):
+        name = name.upper().replace('-', '_')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            return self.req_env.get(name, None)
+        return self.req_env.get('HTTP_' + name, None)
+
 
 class WsgiMethodContext(HttpMethodContext):
     """The WSGI-Specific method context. WSGI-Specific information is stored in
@@ -156,6 +166,127 @@ class WsgiMethodContext(HttpMethodContext):
         """Holds the WSGI-specific information"""
 
 
+class WsgiOutStream(object):
+    """A file-like object that is set as ``ctx.out_stream`` when streaming
+    responses. The protocol writes to it from a worker thread while the WSGI
+    server iterates over it in the request thread.
+
+    Small writes are collected and handed to the server in chunks of at least
+    ``threshold`` bytes. When ``max_chunks`` chunks are waiting to be sent,
+    the writer blocks until the server catches up.
+
+    :param threshold: The minimum size of a chunk in bytes.
+    :param max_chunks: The maximum number of chunks waiting to be sent.
+    :param compressor: A zlib-style compressor object. When not None, every
+        chunk is compressed and flushed before it's handed to the server.
+    """
+
+    END = type("End", (object,), {})
+    """Marks the end of the stream in the chunk queue."""
+
+    def __init__(self, threshold=8 * 1024, max_chunks=8, compressor=None):
+        self.threshold = threshold
+        self.queue = Queue(max_chunks)
+        self.compressor = compressor
+
+        self.closed = False
+        """Set when the WSGI server stopped iterating. Subsequent writes raise
+        IOError, which aborts the serialization."""
+
+        self.finished = False
+        """Set when the writer is done with the stream."""
+
+        self.first_chunk = None
+        self.close_callbacks = []
+
+        self._buffer = []
+        self._buffer_len = 0
+
+    def write(self, data):
+        if self.closed:
+            raise IOError("the response stream was closed")
+
+        self._buffer.append(data)
+        self._buffer_len += len(data)
+        if self._buffer_len >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        if self._buffer_len > 0:
+            data = b''.join(self._buffer)
+            self._buffer = []
+            self._buffer_len = 0
+
+            if self.compressor is not None:
+                data = self.compressor.compress(data) + \
+                                       self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+            if self.closed:
+                raise IOError("the response stream was closed")
+            self.queue.put(data)
+
+    def finish(self, error=None):
+        """Called by the writer when it's done. ``error`` is the exception
+        that interrupted the serialization, if any."""
+
+        if self.finished:
+            return
+        self.finished = True
+
+        if error is None:
+            self.flush()
+            if self.compressor is not None:
+                self.queue.put(self.compressor.flush())
+            self.queue.put(self.END)
+        else:
+            self.queue.put(error)
+
+    def next_chunk(self):
+        """Blocks until the next chunk is available and returns it. Returns
+        None at the end of the stream. Re-raises the writer's error if the
+        serialization failed."""
+
+        chunk = self.queue.get()
+        if chunk is self.END:
+            self.queue.put(self.END)  # subsequent calls also get None
+            return None
+
+        if isinstance(chunk, Exception):
+            self.queue.put(chunk)
+            raise chunk
+
+        return chunk
+
+    def __iter__(self):
+        try:
+            if self.first_chunk:
+                yield self.first_chunk
+
+            while True:
+                chunk = self.next_chunk()
+                if chunk is None:
+                    break
+                yield chunk
+
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+
+        # unblock the writer in case it's waiting for the queue to drain.
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                break
+
+        for cb in self.close_callbacks:
+            cb()
+
+
 class WsgiApplication(HttpBase):
     """A `PEP-3333 <http://www.python.org/dev/peps/pep-3333>`_
     compliant callable class.
@@ -198,12 +329,45 @@ class WsgiApplication(HttpBase):
         * ``wsgi_close``
             Called after the whole data has been returned to the client. It's
             called both from success and error cases.
+
+    When ``flush_threshold`` is not None and ``chunked`` is True, responses of
+    protocols that have the ``'stream'`` keyword in their ``type`` set (like
+    :class:`spyne.protocol.cloth.XmlCloth` and the html protocols) are sent to
+    the client while they are being serialized, in chunks of at least
+    ``flush_threshold`` bytes. The serialization runs in a separate thread, so
+    the user code that produces the return values (e.g. generators) should not
+    rely on thread-local state. Errors raised after the first chunk was sent
+    can't be reported to the client and just abort the response.
+
+    By default, every streamed response starts a new thread that lives as long
+    as the response is being sent, so slow clients tie up one thread each on
+    top of the ones of the WSGI server. Set ``stream_pool`` to bound their
+    number.
+
+    See :class:`spyne.server.http.HttpBase` for the ``compress``,
+    ``compress_level``, ``compress_min_length``, ``metrics`` and
+    ``metrics_path`` arguments. Streamed responses are compressed chunk by
+    chunk. The metrics path is compared to the ``PATH_INFO`` of the request.
     """
 
+    stream_pool = None
+    """An object with an ``apply_async()`` method, like a
+    :class:`multiprocessing.pool.ThreadPool` instance, that is used to run the
+    serialization of streamed responses. Requests wait for a free worker
+    before they get their first chunk. When ``None``, every streamed response
+    is serialized in a new thread."""
+
     def __init__(self, app, chunked=True, max_content_length=2 * 1024 * 1024,
-                                                         block_length=8 * 1024):
+                                  block_length=8 * 1024, flush_threshold=None,
+                    compress=False, compress_level=6, compress_min_length=1024,
+                                         metrics=None, metrics_path='/metrics'):
         super(WsgiApplication, self).__init__(app, chunked, max_content_length,
-                                                                   block_length)
+                           block_length, compress=compress,
+                           compress_level=compress_level,
+                           compress_min_length=compress_min_length,
+                           metrics=metrics, metrics_path=metrics_path)
+
+        self.flush_threshold = flush_threshold
 
         self._mtx_build_interface_document = threading.Lock()
 
@@ -222,6 +386,10 @@ class WsgiApplication(HttpBase):
         if url is None:
             url = reconstruct_url(req_env).split('.wsdl')[0]
 
+        if self.is_metrics_request(req_env['REQUEST_METHOD'],
+                                                 req_env.get('PATH_INFO', '')):
+            return self.handle_metrics_request(req_env, start_response)
+
         if self.is_wsdl_request(req_env):
             return self.handle_wsdl_request(req_env, start_response, url)
 
@@ -282,16 +450,26 @@ class WsgiApplication(HttpBase):
 
         self.event_manager.fire_event('wsdl', ctx)
 
-        ctx.transport.resp_headers['Content-Length'] = \
-                                                    str(len(ctx.transport.wsdl))
-        start_response(HTTP_200, _gen_http_headers(ctx.transport.resp_headers))
+        retval = self.encode_document(ctx,
+                      req_env.get('HTTP_ACCEPT_ENCODING'), ctx.transport.wsdl)
 
-        retval = ctx.transport.wsdl
+        ctx.transport.resp_headers['Content-Length'] = str(len(retval))
+        start_response(HTTP_200, _gen_http_headers(ctx.transport.resp_headers))
 
         ctx.close()
 
         return [retval]
 
+    def handle_metrics_request(self, req_env, start_response):
+        retval = self.get_metrics_document()
+
+        start_response(HTTP_200, [
+            ('Content-Type', PROMETHEUS_CONTENT_TYPE),
+            ('Content-Length', str(len(retval))),
+        ])
+
+        return [retval]
+
     def handle_error(self, p_ctx, others, error, start_response):
         """Serialize errors to an iterable of strings and return them.
 
@@ -328,9 +506,14 @@ class WsgiApplication(HttpBase):
                                                 self.app.out_protocol.mime_type)
 
         self.event_manager.fire_event('wsgi_call', initial_ctx)
-        initial_ctx.in_string, in_string_charset = \
+        try:
+            initial_ctx.in_string, in_string_charset = \
                                         self.__reconstruct_wsgi_request(req_env)
 
+        except Fault as e:
+            initial_ctx.in_error = initial_ctx.out_error = e
+            return self.handle_error(initial_ctx, (), e, start_response)
+
         contexts = self.generate_contexts(initial_ctx, in_string_charset)
         p_ctx, others = contexts[0], contexts[1:]
 
@@ -352,6 +535,14 @@ class WsgiApplication(HttpBase):
         if p_ctx.transport.resp_code is None:
             p_ctx.transport.resp_code = HTTP_200
 
+        # responses from the cache are already serialized.
+        if self.chunked and self.flush_threshold is not None \
+                             and 'stream' in p_ctx.out_protocol.type \
+                             and p_ctx.out_string is None \
+                             and not (p_ctx.descriptor and p_ctx.descriptor.mtom):
+            return self.handle_rpc_stream(p_ctx, others, start_response,
+                                      req_env.get('HTTP_ACCEPT_ENCODING', None))
+
         try:
             self.get_out_string(p_ctx)
 
@@ -392,6 +583,8 @@ class WsgiApplication(HttpBase):
         else:
             p_ctx.out_string = [''.join(p_ctx.out_string)]
 
+        accept_encoding = req_env.get('HTTP_ACCEPT_ENCODING', None)
+
         # if the out_string is a generator function, this hack makes the user
         # code run until first yield, which lets it set response headers and
         # whatnot before calling start_response. Is there a better way?
@@ -399,7 +592,16 @@ class WsgiApplication(HttpBase):
             len(p_ctx.out_string)  # generator?
 
             # nope
-            p_ctx.transport.resp_headers['Content-Length'] = \
+            if self.set_cache_headers(p_ctx,
+                                       req_env.get('HTTP_IF_NONE_MATCH', None)):
+                p_ctx.transport.resp_code = HTTP_304
+                p_ctx.out_string = []
+                p_ctx.transport.resp_headers.pop('Content-Length', None)
+
+            else:
+                self.encode_out_string(p_ctx, accept_encoding)
+
+                p_ctx.transport.resp_headers['Content-Length'] = \
                                     str(sum([len(a) for a in p_ctx.out_string]))
 
             start_response(p_ctx.transport.resp_code,
@@ -414,11 +616,13 @@ class WsgiApplication(HttpBase):
             except StopIteration:
                 first_chunk = ''
 
+            p_ctx.out_string = itertools.chain([first_chunk], retval_iter)
+            self.encode_out_string(p_ctx, accept_encoding)
+
             start_response(p_ctx.transport.resp_code,
                                 _gen_http_headers(p_ctx.transport.resp_headers))
 
-            retval = itertools.chain([first_chunk], retval_iter,
-                                                        self.__finalize(p_ctx))
+            retval = itertools.chain(p_ctx.out_string, self.__finalize(p_ctx))
 
         try:
             process_contexts(self, others, p_ctx, error=None)
@@ -428,6 +632,89 @@ class WsgiApplication(HttpBase):
 
         return retval
 
+    def handle_rpc_stream(self, p_ctx, others, start_response,
+                                                          accept_encoding=None):
+        """Serializes the response to a :class:`WsgiOutStream` in a separate
+        thread and returns the stream as the WSGI response body.
+
+        The response headers are sent along with the first chunk, so headers
+        set by user code before the first flush are respected and errors
+        raised before that point still produce a proper error response.
+        """
+
+        # the headers are sent before the body is known, so there's no ETag in
+        # this case.
+        self.set_cache_headers(p_ctx, None)
+
+        compressor = None
+        encoding = self.get_content_encoding(p_ctx, accept_encoding)
+        if encoding is not None:
+            compressor = self.get_compressor(encoding)
+
+        stream = WsgiOutStream(self.flush_threshold, compressor=compressor)
+        p_ctx.out_stream = stream
+
+        if self.stream_pool is None:
+            thread = threading.Thread(target=self._serialize_to_stream,
+                                                         args=(p_ctx, stream))
+            thread.daemon = True
+            thread.start()
+
+        else:
+            self.stream_pool.apply_async(self._serialize_to_stream,
+                                                               (p_ctx, stream))
+
+        try:
+            stream.first_chunk = stream.next_chunk()
+
+        except Exception as e:
+            logger.exception(e)
+            p_ctx.out_stream = None
+            p_ctx.out_string = None
+            p_ctx.out_document = None
+            p_ctx.transport.resp_code = None
+            if encoding is not None:
+                del p_ctx.transport.resp_headers['Content-Encoding']
+            p_ctx.out_error = Fault('Server', get_fault_string_from_exception(e))
+            return self.handle_error(p_ctx, others, p_ctx.out_error,
+                                                                 start_response)
+
+        # the length of the outgoing stream is unknown.
+        p_ctx.transport.resp_headers.pop('Content-Length', None)
+
+        self.event_manager.fire_event('wsgi_return', p_ctx)
+
+        start_response(p_ctx.transport.resp_code,
+                                _gen_http_headers(p_ctx.transport.resp_headers))
+
+        stream.close_callbacks.append(lambda: self.__finalize(p_ctx))
+
+        try:
+            process_contexts(self, others, p_ctx, error=None)
+        except Exception as e:
+            # Report but ignore any exceptions from auxiliary methods.
+            logger.exception(e)
+
+        return stream
+
+    def _serialize_to_stream(self, p_ctx, stream):
+        try:
+            self.get_out_string(p_ctx)
+
+            # in case the protocol produced strings instead of writing to the
+            # stream.
+            for s in p_ctx.out_string:
+                if s:
+                    stream.write(s)
+
+            # this flushes the stream, which fails when the client is gone.
+            stream.finish()
+
+        except Exception as e:
+            if not stream.closed:
+                logger.exception(e)
+            stream.finish(e)
+
     def __finalize(self, p_ctx):
         p_ctx.close()
         self.event_manager.fire_event('wsgi_close', p_ctx)
@@ -446,7 +733,11 @@ class WsgiApplication(HttpBase):
             content_type = cgi.parse_header(content_type)
             charset = content_type[1].get('charset', None)
 
-        return self.__wsgi_input_to_iterable(http_env), charset
+        in_string = self.decode_in_string(
+                                    http_env.get('HTTP_CONTENT_ENCODING', None),
+                                    self.__wsgi_input_to_iterable(http_env))
+
+        return in_string, charset
 
     def __wsgi_input_to_iterable(self, http_env):
         istream = http_env.get('wsgi.input')
@@ -518,8 +809,8 @@ class WsgiApplication(HttpBase):
                                     prot.app.interface.get_tns(),
                                     wsgi_env['PATH_INFO'].split('/')[-1])
 
-        logger.debug("%sMethod name: %r%s" % (LIGHT_GREEN,
-                                          ctx.method_request_string, END_COLOR))
+        logger.debug("%sMethod name: %r%s", LIGHT_GREEN,
+                                           ctx.method_request_string, END_COLOR)
 
         ctx.in_header_doc = _get_http_headers(wsgi_env)
         ctx.in_body_doc = _parse_qs(wsgi_env['QUERY_STRING'])
@@ -16,18 +16,40 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The ``spyne.server.zeromq`` module contains a server implementation that
-uses ZeroMQ (zmq.REP) as transport.
+"""The ``spyne.server.zeromq`` module contains server implementations that
+use ZeroMQ as transport.
+
+:class:`ZeroMQServer` is a simple zmq.REP loop. :class:`ZeroMQRouterServer`
+uses a zmq.ROUTER socket and dispatches requests to a pool of worker threads
+or processes. Replies are sent as soon as they are ready, so they can be out of
+order.
 """
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import tempfile
 import threading
+import multiprocessing
+
+from collections import deque
+from itertools import count
 
 import zmq
 
 from spyne.auxproc import process_contexts
 from spyne._base import MethodContext
+from spyne.error import InternalError
 from spyne.server import ServerBase
 
 
+WORKER_THREAD = 'thread'
+WORKER_PROCESS = 'process'
+
+_READY = b'\x01'
+
+
 class ZmqMethodContext(MethodContext):
     def __init__(self, app):
         super(ZmqMethodContext, self).__init__(app)
@@ -61,40 +83,326 @@ class ZeroMQServer(ServerBase):
     def __handle_wsdl_request(self):
         return self.app.get_interface_document(self.url)
 
-    def serve_forever(self):
-        """Runs the ZeroMQ server."""
+    def process_message(self, message):
+        """Processes the given request and returns the primary context, the
+        auxiliary contexts and the error, if any. ``p_ctx.out_string`` is
+        ready to be sent when this function returns."""
 
-        while True:
-            error = None
+        error = None
 
-            initial_ctx = ZmqMethodContext(self)
-            initial_ctx.in_string = [self.zmq_socket.recv()]
+        initial_ctx = ZmqMethodContext(self)
+        initial_ctx.in_string = [message]
+
+        contexts = self.generate_contexts(initial_ctx)
+        p_ctx, others = contexts[0], contexts[1:]
+        if p_ctx.in_error:
+            p_ctx.out_object = p_ctx.in_error
+            error = p_ctx.in_error
+
+        else:
+            self.get_in_object(p_ctx)
 
-            contexts = self.generate_contexts(initial_ctx)
-            p_ctx, others = contexts[0], contexts[1:]
             if p_ctx.in_error:
                 p_ctx.out_object = p_ctx.in_error
                 error = p_ctx.in_error
+            else:
+                self.get_out_object(p_ctx)
+                if p_ctx.out_error:
+                    p_ctx.out_object = p_ctx.out_error
+                    error = p_ctx.out_error
+
+        self.get_out_string(p_ctx)
+
+        return p_ctx, others, error
+
+    def get_error_string(self, error):
+        """Returns the serialized form of the given error, to be sent when
+        processing a request failed outside of the user code."""
+
+        ctx = ZmqMethodContext(self)
+        ctx.out_error = error
+
+        try:
+            self.get_out_string(ctx)
+            return b''.join(ctx.out_string)
+
+        except Exception as e:
+            logger.exception(e)
+            return b''
+
+        finally:
+            ctx.close()
+
+    def finalize(self, p_ctx, others, error):
+        """Runs the auxiliary methods and closes the primary context. Call this
+        after the response is sent so that the client doesn't wait for
+        them."""
+
+        try:
+            process_contexts(self, others, p_ctx, error=error)
+        except Exception as e:
+            # Report but ignore any exceptions from auxiliary methods.
+            logger.exception(e)
+
+        p_ctx.close()
+
+    def serve_forever(self):
+        """Runs the ZeroMQ server."""
+
+        while True:
+            message = self.zmq_socket.recv()
+
+            try:
+                p_ctx, others, error = self.process_message(message)
+                out_string = b''.join(p_ctx.out_string)
+
+            except Exception as e:
+                logger.exception(e)
+                p_ctx = None
+                out_string = self.get_error_string(InternalError(e))
+
+            self.zmq_socket.send(out_string)
+
+            if p_ctx is not None:
+                self.finalize(p_ctx, others, error)
+
+
+class ZeroMQWorker(ZeroMQServer):
+    """A worker for :class:`ZeroMQRouterServer`. It connects to the backend
+    of the router server using a zmq.DEALER socket and announces that it's
+    ready for another request after each reply."""
+
+    def __init__(self, app, backend_url, ctx=None):
+        if ctx is None:
+            ctx = zmq.Context()
+
+        socket = ctx.socket(zmq.DEALER)
+        socket.connect(backend_url)
+
+        super(ZeroMQWorker, self).__init__(app, backend_url, ctx=ctx,
+                                                                  socket=socket)
+
+    def serve_forever(self):
+        """Runs the worker loop."""
+
+        self.zmq_socket.send(_READY)
+
+        while True:
+            try:
+                request_id, message = self.zmq_socket.recv_multipart()
+
+            except zmq.ContextTerminated:
+                break
+
+            # an exception must not kill the worker, as the router would
+            # wait for its reply forever.
+            try:
+                p_ctx, others, error = self.process_message(message)
+                out_string = b''.join(p_ctx.out_string)
+
+            except Exception as e:
+                logger.exception(e)
+                p_ctx = None
+                out_string = self.get_error_string(InternalError(e))
+
+            self.zmq_socket.send_multipart([request_id, out_string])
+
+            if p_ctx is not None:
+                self.finalize(p_ctx, others, error)
+
+
+def _run_worker_process(app, backend_url):
+    # Zmq contexts must not be shared across a fork.
+    ZeroMQWorker(app, backend_url).serve_forever()
+
+
+class ZeroMQRouterServer(object):
+    """A ZeroMQ server transport that accepts requests from a zmq.ROUTER
+    socket and dispatches them to a pool of workers. The workers can be threads
+    or processes -- use processes to scale across cpu cores.
 
+    Every frame but the last one of an incoming message is treated as the
+    routing envelope and is sent back unchanged with the reply. So both
+    zmq.REQ and zmq.DEALER clients are supported. Requests are only passed to
+    idle workers; the others wait in a queue. Replies are sent in the order
+    they are produced.
+
+    :param app: The :class:`spyne.application.Application` instance.
+    :param app_url: The url to bind the ROUTER socket to.
+    :param pool_size: The number of workers.
+    :param worker_type: Either ``WORKER_THREAD`` or ``WORKER_PROCESS``.
+    :param backend_url: The url workers connect to. Defaults to an inproc url
+        for threads and to an ipc url in the temporary directory for
+        processes.
+    :param ctx: The zmq context. A new one is created when ``None``.
+    :param socket: An already bound zmq.ROUTER socket to use instead of
+        creating one.
+    """
+
+    transport = ZeroMQServer.transport
+
+    def __init__(self, app, app_url, pool_size=1, worker_type=WORKER_THREAD,
+                            backend_url=None, wsdl_url=None, ctx=None, socket=None):
+        if ctx and socket and ctx is not socket.context:
+            raise ValueError("ctx should be the same as socket.context")
+
+        if not worker_type in (WORKER_THREAD, WORKER_PROCESS):
+            raise ValueError("worker_type must be one of %r" %
+                                               ((WORKER_THREAD, WORKER_PROCESS),))
+
+        self.app = app
+        self.app_url = app_url
+        self.wsdl_url = wsdl_url
+        self.pool_size = pool_size
+        self.worker_type = worker_type
+
+        if ctx:
+            self.ctx = ctx
+        elif socket:
+            self.ctx = socket.context
+        else:
+            self.ctx = zmq.Context()
+
+        if socket:
+            self.frontend = socket
+        else:
+            self.frontend = self.ctx.socket(zmq.ROUTER)
+            self.frontend.bind(app_url)
+
+        if backend_url is None:
+            if worker_type == WORKER_THREAD:
+                backend_url = 'inproc://spyne.%s.%s.%d' % (app.tns, app.name,
+                                                                       id(self))
+            else:
+                backend_url = 'ipc://%s' % os.path.join(tempfile.gettempdir(),
+                                    'spyne-zmq-%d-%d' % (os.getpid(), id(self)))
+        self.backend_url = backend_url
+
+        self.backend = self.ctx.socket(zmq.ROUTER)
+        self.backend.bind(backend_url)
+
+        self.workers = []
+
+        self._ready = deque()
+        self._queue = deque()
+        self._inflight = {}
+        self._request_ids = count()
+        self._running = False
+
+    @property
+    def queue_depth(self):
+        """The number of requests that are waiting for an idle worker."""
+        return len(self._queue)
+
+    @property
+    def inflight(self):
+        """The number of requests that are being processed by workers."""
+        return len(self._inflight)
+
+    @property
+    def idle_workers(self):
+        """The number of workers that are waiting for a request."""
+        return len(self._ready)
+
+    def start_workers(self):
+        """Starts the worker pool. Called by :func:`serve_forever`."""
+
+        for i in range(self.pool_size - len(self.workers)):
+            if self.worker_type == WORKER_THREAD:
+                worker = ZeroMQWorker(self.app, self.backend_url, ctx=self.ctx)
+                job = threading.Thread(target=worker.serve_forever)
+            else:
+                job = multiprocessing.Process(target=_run_worker_process,
+                                              args=(self.app, self.backend_url))
+
+            job.daemon = True
+            job.start()
+
+            self.workers.append(job)
+
+    def _dispatch(self):
+        while len(self._queue) > 0 and len(self._ready) > 0:
+            request_id, envelope, message = self._queue.popleft()
+            worker_id = self._ready.popleft()
+
+            self._inflight[request_id] = envelope
+            self.backend.send_multipart([worker_id, request_id, message])
+
+    def _on_frontend(self):
+        frames = self.frontend.recv_multipart()
+        if len(frames) < 2:
+            logger.warning("Discarding malformed message: %r", frames)
+            return
+
+        request_id = str(next(self._request_ids)).encode('ascii')
+        self._queue.append((request_id, frames[:-1], frames[-1]))
+
+    def _on_backend(self):
+        frames = self.backend.recv_multipart()
+        worker_id = frames[0]
+
+        if len(frames) == 3:
+            request_id, reply = frames[1:]
+
+            envelope = self._inflight.pop(request_id, None)
+            if envelope is None:
+                logger.error("Discarding reply to unknown request %r",
+                                                                    request_id)
             else:
-                self.get_in_object(p_ctx)
+                self.frontend.send_multipart(envelope + [reply])
+
+        elif frames[1:] != [_READY]:
+            logger.error("Unexpected message from worker %r: %r", worker_id,
+                                                                        frames)
+            return
+
+        self._ready.append(worker_id)
+
+    def poll(self, timeout=None):
+        """Processes the pending messages on both sockets, waiting for at most
+        ``timeout`` milliseconds for them to arrive."""
 
-                if p_ctx.in_error:
-                    p_ctx.out_object = p_ctx.in_error
-                    error = p_ctx.in_error
-                else:
-                    self.get_out_object(p_ctx)
-                    if p_ctx.out_error:
-                        p_ctx.out_object = p_ctx.out_error
-                        error = p_ctx.out_error
+        poller = zmq.Poller()
+        poller.register(self.frontend, zmq.POLLIN)
+        poller.register(self.backend, zmq.POLLIN)
 
-            self.get_out_string(p_ctx)
+        events = dict(poller.poll(timeout))
 
-            process_contexts(self, others, error)
+        if events.get(self.backend) == zmq.POLLIN:
+            self._on_backend()
 
-            self.zmq_socket.send(b''.join(p_ctx.out_string))
+        if events.get(self.frontend) == zmq.POLLIN:
+            self._on_frontend()
 
-            p_ctx.close()
+        self._dispatch()
+
+    def serve_forever(self):
+        """Starts the workers and runs the ZeroMQ server until :func:`stop` is
+        called."""
+
+        self.start_workers()
+
+        self._running = True
+        while self._running:
+            self.poll(100)
+
+    def stop(self):
+        """Makes :func:`serve_forever` return. Can be called from any thread.
+        """
+
+        self._running = False
+
+    def close(self):
+        """Closes the sockets and terminates the worker processes, if any."""
+
+        self.stop()
+
+        for job in self.workers:
+            if isinstance(job, multiprocessing.Process):
+                job.terminate()
+
+        self.frontend.close()
+        self.backend.close()
 
 
 class ZeroMQThreadPoolServer(object):
@@ -147,7 +455,10 @@ class ZeroMQThreadPoolServer(object):
         for job in self.background_jobs:
             job.start()
 
-        zmq.device(zmq.QUEUE, self.frontend, self.backend)
+        if hasattr(zmq, 'proxy'):
+            zmq.proxy(self.frontend, self.backend)
+        else:
+            zmq.device(zmq.QUEUE, self.frontend, self.backend)
 
         # We never get here...
         self.frontend.close()
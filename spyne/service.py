@@ -26,7 +26,6 @@ logger = logging.getLogger(__name__)
 
 from spyne.util.six import add_metaclass, string_types
 from spyne import EventManager
-from spyne.util.oset import oset
 
 
 class ServiceBaseMeta(type):
@@ -39,8 +38,11 @@ class ServiceBaseMeta(type):
 
         self.__has_aux_methods = self.__aux__ is not None
         self.public_methods = {}
-        self.event_manager = EventManager(self,
-                                      self.__get_base_event_handlers(cls_bases))
+        self.event_manager = EventManager(self)
+        for base in cls_bases:
+            evmgr = getattr(base, 'event_manager', None)
+            if evmgr is not None:
+                self.event_manager.update(evmgr)
 
         for k, v in cls_dict.items():
             if hasattr(v, '_is_rpc'):
@@ -66,22 +68,6 @@ class ServiceBaseMeta(type):
                 else:
                     self.__has_aux_methods = True
 
-    def __get_base_event_handlers(self, cls_bases):
-        handlers = {}
-
-        for base in cls_bases:
-            evmgr = getattr(base, 'event_manager', None)
-            if evmgr is None:
-                continue
-
-            for k, v in evmgr.handlers.items():
-                handler=handlers.get(k, oset())
-                for h in v:
-                    handler.add(h)
-                handlers[k]=handler
-
-        return handlers
-
     def is_auxiliary(self):
         return self.__has_aux_methods
 
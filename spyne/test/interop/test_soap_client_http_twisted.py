@@ -17,6 +17,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
+from twisted.internet.defer import DeferredList
 from twisted.trial import unittest
 from spyne.test.interop._test_soap_client_base import run_server
 
@@ -30,6 +31,28 @@ class TestSpyneHttpClient(unittest.TestCase):
         self.ns = "spyne.test.interop.server._service"
         self.client = TwistedHttpClient('http://localhost:9754/', soap11_application)
 
+    def tearDown(self):
+        return self.client.close()
+
+    def test_max_concurrent(self):
+        client = TwistedHttpClient('http://localhost:9754/', soap11_application,
+                                                               max_concurrent=2)
+
+        ds = [client.service.echo_string(u'%d' % i) for i in range(5)]
+
+        assert client.semaphore.tokens == 0
+        assert len(client.semaphore.waiting) == 3
+
+        def cb(ret):
+            assert ret == [(True, u'%d' % i) for i in range(5)], ret
+
+        def cb_close(ret):
+            return client.close().addCallback(lambda _: ret)
+
+        # wait for all calls to finish even when some of them fail.
+        return DeferredList(ds, consumeErrors=True).addCallback(cb) \
+                                                            .addBoth(cb_close)
+
     def test_echo_boolean(self):
         def eb(ret):
             raise ret
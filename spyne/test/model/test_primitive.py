@@ -29,6 +29,7 @@ from lxml import etree
 
 from spyne.util import total_seconds
 from spyne.const import xml_ns as ns
+from spyne.error import ValidationError
 from spyne.model import Null, AnyDict, Uuid
 from spyne.model.complex import Array
 from spyne.model.complex import ComplexModel
@@ -229,6 +230,36 @@ class TestPrimitive(unittest.TestCase):
         self.assertEquals(dt.month, 5)
         self.assertEquals(dt.day, 15)
 
+    def test_datetime_iso_offsets(self):
+        prot = ProtocolBase()
+
+        dt = prot.from_string(DateTime, '2007-05-15T13:40:44.5-05:30')
+        assert dt.microsecond == 500000
+        assert dt.utcoffset() == -timedelta(hours=5, minutes=30)
+
+        dt2 = prot.from_string(DateTime, '2007-05-15 13:40:44-05:30')
+        assert dt2.tzinfo is dt.tzinfo
+
+        dt = prot.from_string(DateTime, '2007-05-15T13:40:44+00:00')
+        assert dt.tzinfo is pytz.utc
+
+        dt = prot.from_string(DateTime, '2007-05-15T13:40:44.12345678Z')
+        assert dt.microsecond == 123457
+
+        dt = prot.from_string(DateTime, '2007-05-15T13:40:44')
+        assert dt.tzinfo is None
+
+        self.assertRaises(ValidationError, prot.from_string, DateTime,
+                                                           '2007-05-15T13:40')
+
+    def test_time_frac(self):
+        prot = ProtocolBase()
+
+        assert prot.from_string(Time, '01:02:03.25') == \
+                                                     datetime.time(1, 2, 3, 250000)
+        assert prot.from_string(Time, '01:02:03.000001') == \
+                                                          datetime.time(1, 2, 3, 1)
+
     def test_integer(self):
         i = 12
         integer = Integer()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""Measures the time it takes to import Spyne in a fresh interpreter.
+
+Usage: ::
+
+    python -m spyne.test.perf.import_time [-n 20] [--json] [--max-ms 50] \\
+                                                       ['from spyne import *']
+
+Every sample is taken in a new subprocess so that nothing is cached in
+``sys.modules``. The exit status is 1 when ``--max-ms`` is given and the median
+import time exceeds it, so this can be used to catch regressions in CI.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import subprocess
+
+from optparse import OptionParser
+
+
+DEFAULT_STATEMENT = 'import spyne'
+
+_SCRIPT = """
+import sys, time
+t0 = time.time()
+exec(sys.argv[1])
+t1 = time.time()
+print(repr((t1 - t0, len(sys.modules), sorted(sys.modules))))
+"""
+
+
+def _get_env():
+    env = dict(os.environ)
+
+    # make sure the subprocess imports this copy of spyne.
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+                                                  os.path.abspath(__file__)))))
+    path = env.get('PYTHONPATH', None)
+    env['PYTHONPATH'] = root if not path else os.pathsep.join((root, path))
+
+    return env
+
+
+def sample(statement=DEFAULT_STATEMENT, executable=None):
+    """Runs ``statement`` in a new interpreter.
+
+    :return: A ``(seconds, modules)`` tuple where ``modules`` is the list of
+        names in ``sys.modules`` once the statement has run.
+    """
+
+    if executable is None:
+        executable = sys.executable
+
+    proc = subprocess.Popen([executable, '-c', _SCRIPT, statement],
+                                         stdout=subprocess.PIPE, env=_get_env())
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError("%r failed with exit status %d" %
+                                                  (statement, proc.returncode))
+
+    seconds, _, modules = eval(out.decode('ascii'))
+
+    return seconds, modules
+
+
+def measure(statement=DEFAULT_STATEMENT, repeat=20, executable=None):
+    """Takes ``repeat`` samples of ``statement``.
+
+    :return: A dict with timing statistics in milliseconds, and the modules
+        that the statement loads.
+    """
+
+    times = []
+    for _ in range(repeat):
+        seconds, modules = sample(statement, executable)
+        times.append(seconds * 1000.0)
+
+    times.sort()
+
+    return {
+        'statement': statement,
+        'repeat': repeat,
+        'min_ms': times[0],
+        'median_ms': times[len(times) // 2],
+        'max_ms': times[-1],
+        'num_modules': len(modules),
+        'spyne_modules': [m for m in modules if m.split('.')[0] == 'spyne'],
+    }
+
+
+def main(argv=None):
+    parser = OptionParser(usage="%prog [options] [statement]")
+    parser.add_option('-n', '--repeat', type='int', default=20,
+                      help="Number of samples to take. Defaults to 20.")
+    parser.add_option('--json', action='store_true', default=False,
+                      help="Print the results as json.")
+    parser.add_option('--max-ms', type='float', default=None,
+                      help="Fail if the median import time exceeds this.")
+
+    options, args = parser.parse_args(argv)
+    statement = ' '.join(args) or DEFAULT_STATEMENT
+
+    result = measure(statement, options.repeat)
+
+    if options.json:
+        print(json.dumps(result, indent=2, sort_keys=True))
+
+    else:
+        print("%(statement)r: min %(min_ms).1fms, median %(median_ms).1fms, "
+              "max %(max_ms).1fms, %(num_modules)d modules (%(n_spyne)d from "
+              "spyne)" % dict(result, n_spyne=len(result['spyne_modules'])))
+
+    if options.max_ms is not None and result['median_ms'] > options.max_ms:
+        print("Median import time %.1fms exceeds %.1fms" %
+                         (result['median_ms'], options.max_ms), file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,707 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""End-to-end benchmarks for protocol pairs and transports.
+
+Every benchmark case echoes a payload of a given shape through a transport
+with a given pair of input and output protocols. Throughput, latency
+percentiles and peak memory are measured for each case. Nothing goes over the
+network: the ``null`` transport calls the service through
+:class:`spyne.server.null.NullServer` and the ``wsgi`` transport calls an
+in-process :class:`spyne.server.wsgi.WsgiApplication` instance.
+
+Usage: ::
+
+    python -m spyne.test.perf.protocols [-n 200] [--json] [-o results.json] \\
+            [--transport wsgi] [--pair json:json] [--shape flat] \\
+            [--baseline old_results.json [--tolerance 0.2]]
+
+Cases that a protocol pair can't handle, or whose optional dependencies are
+missing, are reported as skipped. When a baseline file is given, the exit
+status is 1 if the median latency of any case got worse by more than the
+tolerance.
+"""
+
+from __future__ import print_function
+
+import gc
+import sys
+import json
+import math
+import logging
+import platform
+
+from datetime import datetime
+from decimal import Decimal as D
+from optparse import OptionParser
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import spyne
+
+from spyne import Application, ServiceBase, rpc
+from spyne.model import ComplexModel, Unicode, Integer, Double, Boolean, \
+    DateTime, Decimal, ByteArray, Array
+from spyne.client import RemoteProcedureBase
+from spyne.protocol.dictdoc import HierDictDocument
+from spyne.server.null import NullServer
+from spyne.server.wsgi import WsgiApplication
+from spyne.util.odict import odict
+from spyne.util.six import BytesIO
+from spyne.util.six.moves.urllib.parse import urlencode
+
+
+TNS = 'spyne.test.perf'
+
+
+#
+# Payload shapes
+#
+
+class Flat(ComplexModel):
+    __namespace__ = TNS
+
+    id = Integer
+    name = Unicode
+    description = Unicode
+    score = Double
+    price = Decimal
+    active = Boolean
+    created = DateTime
+
+
+def _produce_nested(depth):
+    # Every level is a distinct class. Dict-based protocols don't handle empty
+    # self-referencing children.
+    retval = None
+    for i in reversed(range(depth)):
+        members = [('value', Integer), ('name', Unicode)]
+        if retval is not None:
+            members.append(('child', retval))
+        retval = ComplexModel.produce(TNS, 'Level%02d' % i, odict(members))
+
+    return retval
+
+
+NESTED_DEPTH = 16
+
+Nested = _produce_nested(NESTED_DEPTH)
+
+
+Wide = ComplexModel.produce(TNS, 'Wide',
+                       odict([('f%03d' % i, Integer) for i in range(200)]))
+
+
+class Blob(ComplexModel):
+    __namespace__ = TNS
+
+    name = Unicode
+    data = ByteArray
+
+
+def _get_flat(i=0):
+    return Flat(id=i, name=u'name %d' % i, score=i * 1.5, active=bool(i % 2),
+                description=u'lorem ipsum dolor sit amet ' * 4,
+                price=D('%d.99' % i), created=datetime(2015, 1, 2, 3, 4, 5))
+
+
+def _get_nested():
+    classes = []
+    cls = Nested
+    while cls is not None:
+        classes.append(cls)
+        cls = cls._type_info.get('child', None)
+
+    retval = None
+    for i, cls in reversed(list(enumerate(classes))):
+        retval = cls(value=i, name=u'level %d' % i, child=retval)
+    return retval
+
+
+def _get_wide():
+    return Wide(**dict(('f%03d' % i, i) for i in range(200)))
+
+
+def _get_array(n=1000):
+    return [_get_flat(i) for i in range(n)]
+
+
+def _get_binary(size=64 * 1024):
+    return Blob(name=u'blob', data=[bytes(bytearray(range(256))) *
+                                                                (size // 256)])
+
+
+# name -> (type, factory)
+SHAPES = odict([
+    ('flat', (Flat, _get_flat)),
+    ('nested', (Nested, _get_nested)),
+    ('wide', (Wide, _get_wide)),
+    ('array', (Array(Flat), _get_array)),
+    ('binary', (Blob, _get_binary)),
+])
+
+
+class BenchmarkService(ServiceBase):
+    @rpc(Flat, _returns=Flat)
+    def echo_flat(ctx, p):
+        return p
+
+    @rpc(Nested, _returns=Nested)
+    def echo_nested(ctx, p):
+        return p
+
+    @rpc(Wide, _returns=Wide)
+    def echo_wide(ctx, p):
+        return p
+
+    @rpc(Array(Flat), _returns=Array(Flat))
+    def echo_array(ctx, p):
+        return p
+
+    @rpc(Blob, _returns=Blob)
+    def echo_binary(ctx, p):
+        return p
+
+
+#
+# Protocols
+#
+
+def _soap11():
+    from spyne.protocol.soap import Soap11
+    return Soap11()
+
+
+def _xml():
+    from spyne.protocol.xml import XmlDocument
+    return XmlDocument()
+
+
+def _json():
+    from spyne.protocol.json import JsonDocument
+    return JsonDocument()
+
+
+def _msgpack():
+    from spyne.protocol.msgpack import MessagePackDocument
+    return MessagePackDocument()
+
+
+def _http():
+    from spyne.protocol.http import HttpRpc
+    return HttpRpc()
+
+
+def _yaml():
+    from spyne.protocol.yaml import YamlDocument
+    return YamlDocument()
+
+
+def _csv():
+    from spyne.protocol.csv import Csv
+    return Csv()
+
+
+def _html_table():
+    from spyne.protocol.html.table import HtmlColumnTable
+    return HtmlColumnTable()
+
+
+PROTOCOLS = odict([
+    ('soap11', _soap11),
+    ('xml', _xml),
+    ('json', _json),
+    ('msgpack', _msgpack),
+    ('http', _http),
+    ('yaml', _yaml),
+    ('csv', _csv),
+    ('html_table', _html_table),
+])
+
+# Protocols that can only be used to produce responses.
+OUTPUT_ONLY = set(['csv', 'html_table'])
+
+DEFAULT_PAIRS = [
+    ('soap11', 'soap11'),
+    ('xml', 'xml'),
+    ('json', 'json'),
+    ('msgpack', 'msgpack'),
+    ('yaml', 'yaml'),
+    ('http', 'json'),
+    ('json', 'csv'),
+    ('json', 'html_table'),
+]
+
+# Shapes that can't be produced by the given protocols.
+UNSUPPORTED_SHAPES = {
+    # Csv only serializes sequences of flat objects.
+    'csv': set(['flat', 'nested', 'wide', 'binary']),
+    'html_table': set(['binary']),
+}
+
+TRANSPORTS = ('null', 'wsgi')
+
+
+class SkipCase(Exception):
+    """Raised when a case can't be run in the current environment."""
+
+
+#
+# Drivers
+#
+
+def _consume(out_string):
+    """Returns the total length of the given string or iterable of strings."""
+
+    if out_string is None:
+        return 0
+
+    if isinstance(out_string, (bytes, type(u''))):
+        return len(out_string)
+
+    return sum([len(s) for s in out_string])
+
+
+def _check_shape(protocol, shape):
+    if shape in UNSUPPORTED_SHAPES.get(protocol, ()):
+        raise SkipCase("%s can't serialize the %r shape" % (protocol, shape))
+
+
+class NullDriver(object):
+    """Calls the service through NullServer. The in protocol is not used, the
+    out protocol serializes the return value."""
+
+    def __init__(self, in_protocol, out_protocol, shape):
+        _check_shape(out_protocol, shape)
+
+        app = Application([BenchmarkService], TNS, in_protocol=_http(),
+                                         out_protocol=PROTOCOLS[out_protocol]())
+        server = NullServer(app, ostr=True)
+
+        self.method = getattr(server.service, 'echo_%s' % shape)
+        self.payload = SHAPES[shape][1]()
+        self.request_length = 0
+
+    def __call__(self):
+        return _consume(self.method(self.payload))
+
+
+class WsgiDriver(object):
+    """Calls an in-process WsgiApplication with a request serialized by the
+    in protocol."""
+
+    def __init__(self, in_protocol, out_protocol, shape):
+        if in_protocol in OUTPUT_ONLY:
+            raise SkipCase("%s can't parse requests" % in_protocol)
+        _check_shape(out_protocol, shape)
+
+        app = Application([BenchmarkService], TNS,
+                                         in_protocol=PROTOCOLS[in_protocol](),
+                                         out_protocol=PROTOCOLS[out_protocol]())
+        self.server = WsgiApplication(app)
+
+        method_name = 'echo_%s' % shape
+        payload = SHAPES[shape][1]()
+
+        if in_protocol == 'http':
+            self.environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': '/' + method_name,
+                'QUERY_STRING': _get_query_string(app, method_name, payload),
+            }
+            self.body = b''
+
+        else:
+            self.body = _get_request_body(in_protocol, method_name, payload)
+            self.environ = {
+                'REQUEST_METHOD': 'POST',
+                'PATH_INFO': '/',
+                'QUERY_STRING': '',
+                'CONTENT_LENGTH': str(len(self.body)),
+                'CONTENT_TYPE': 'text/xml; charset=utf-8',
+            }
+
+        self.environ.update({
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http',
+        })
+
+        self.request_length = len(self.body) + \
+                                              len(self.environ['QUERY_STRING'])
+
+    def __call__(self):
+        environ = dict(self.environ)
+        environ['wsgi.input'] = BytesIO(self.body)
+
+        status = []
+        def start_response(code, headers):
+            status.append(code)
+
+        retval = _consume(self.server(environ, start_response))
+
+        if not status[0].startswith('200'):
+            raise Exception("Request failed with %r" % status[0])
+
+        return retval
+
+
+def _get_request_body(in_protocol, method_name, payload):
+    app = Application([BenchmarkService], TNS,
+                                     in_protocol=PROTOCOLS[in_protocol](),
+                                     out_protocol=PROTOCOLS[in_protocol]())
+
+    prot = app.out_protocol
+
+    rp = RemoteProcedureBase('', app, method_name)
+    ctx = rp.contexts[0]
+    rp.get_out_object(ctx, (payload,), {})
+
+    prot.serialize(ctx, prot.REQUEST)
+    if isinstance(prot, HierDictDocument):
+        # Dict documents don't add the method name to outgoing requests.
+        ctx.out_document = [{method_name: doc} for doc in ctx.out_document]
+    prot.create_out_string(ctx)
+
+    retval = []
+    for s in ctx.out_string:
+        if not isinstance(s, bytes):
+            s = s.encode('utf8')
+        retval.append(s)
+
+    return b''.join(retval)
+
+
+def _get_query_string(app, method_name, payload):
+    prot = app.in_protocol
+    descriptor = app.interface.service_method_map['{%s}%s' %
+                                                    (TNS, method_name)][0]
+    in_message = descriptor.in_message
+
+    key, = in_message._type_info.keys()
+    def _to_unicode(prot, value, cls):
+        if issubclass(cls, ByteArray):
+            return prot.to_unicode(cls, value, prot.binary_encoding)
+        return prot.to_unicode(cls, value)
+
+    doc = prot.object_to_simple_dict(in_message, in_message(**{key: payload}),
+                                                   subvalue_eater=_to_unicode)
+
+    items = []
+    for k, v in doc.items():
+        if isinstance(v, list):
+            for vv in v:
+                items.append((k, vv.encode('utf8')))
+        elif v is not None:
+            items.append((k, v.encode('utf8')))
+
+    return urlencode(items)
+
+
+DRIVERS = {
+    'null': NullDriver,
+    'wsgi': WsgiDriver,
+}
+
+
+#
+# Measurement
+#
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+
+    if not sorted_values:
+        return None
+
+    idx = int(math.ceil(p / 100.0 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(idx, len(sorted_values) - 1))]
+
+
+def _get_peak_memory(driver, iterations):
+    if tracemalloc is None:
+        return None
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            driver()
+        return tracemalloc.get_traced_memory()[1] // 1024
+
+    finally:
+        tracemalloc.stop()
+
+
+def get_max_rss():
+    """Returns the peak resident set size of the whole process in KiB, or
+    None when it can't be determined."""
+
+    if resource is None:
+        return None
+
+    retval = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        retval //= 1024  # bytes on osx, kilobytes elsewhere
+
+    return retval
+
+
+def run_case(transport, in_protocol, out_protocol, shape, iterations=200,
+                                              warmup=10, memory_iterations=10):
+    """Runs a single benchmark case.
+
+    :return: A dict with the results. When the case could not be run, the
+        ``error`` key contains the reason and no measurements are present.
+    """
+
+    retval = {
+        'transport': transport,
+        'in_protocol': in_protocol if transport != 'null' else None,
+        'out_protocol': out_protocol,
+        'shape': shape,
+    }
+
+    try:
+        driver = DRIVERS[transport](in_protocol, out_protocol, shape)
+        for _ in range(warmup):
+            response_length = driver()
+
+    except SkipCase as e:
+        retval['error'] = str(e)
+        return retval
+
+    except ImportError as e:
+        retval['error'] = "missing dependency: %s" % e
+        return retval
+
+    except Exception as e:
+        retval['error'] = ("%s: %s" % (e.__class__.__name__, e))[:200]
+        return retval
+
+    timings = []
+    gc.collect()
+
+    start = default_timer()
+    for _ in range(iterations):
+        t0 = default_timer()
+        driver()
+        timings.append(default_timer() - t0)
+    total = default_timer() - start
+
+    timings = [t * 1000.0 for t in timings]
+    timings.sort()
+
+    retval.update({
+        'iterations': iterations,
+        'request_bytes': driver.request_length,
+        'response_bytes': response_length,
+        'total_s': total,
+        'throughput_rps': iterations / total if total > 0 else None,
+        'latency_ms': {
+            'min': timings[0],
+            'mean': sum(timings) / len(timings),
+            'p50': percentile(timings, 50),
+            'p90': percentile(timings, 90),
+            'p99': percentile(timings, 99),
+            'max': timings[-1],
+        },
+        'peak_kib': _get_peak_memory(driver, memory_iterations),
+    })
+
+    return retval
+
+
+def get_cases(transports=TRANSPORTS, pairs=DEFAULT_PAIRS, shapes=None):
+    """Yields ``(transport, in_protocol, out_protocol, shape)`` tuples.
+
+    NullServer doesn't use an in protocol, so it's only run once for every
+    out protocol."""
+
+    if shapes is None:
+        shapes = list(SHAPES.keys())
+
+    for transport in transports:
+        seen = set()
+        for in_protocol, out_protocol in pairs:
+            if transport == 'null':
+                if out_protocol in seen:
+                    continue
+                seen.add(out_protocol)
+
+            for shape in shapes:
+                yield transport, in_protocol, out_protocol, shape
+
+
+def get_case_key(result):
+    return '%(transport)s/%(in_protocol)s/%(out_protocol)s/%(shape)s' % result
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of ``(key, old_p50, new_p50)`` tuples for cases whose
+    median latency got worse by more than ``tolerance``, a fraction."""
+
+    old = {}
+    for r in baseline['results']:
+        if not 'error' in r:
+            old[get_case_key(r)] = r['latency_ms']['p50']
+
+    retval = []
+    for r in results:
+        key = get_case_key(r)
+        if 'error' in r or not key in old:
+            continue
+
+        new_p50 = r['latency_ms']['p50']
+        if new_p50 > old[key] * (1.0 + tolerance):
+            retval.append((key, old[key], new_p50))
+
+    return retval
+
+
+def get_metadata():
+    return {
+        'spyne_version': spyne.__version__,
+        'python_version': platform.python_version(),
+        'python_implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'memory_metric': 'tracemalloc_peak' if tracemalloc is not None
+                                                                else None,
+    }
+
+
+def _format_result(r):
+    key = get_case_key(r)
+    if 'error' in r:
+        return "%-40s skipped: %s" % (key, r['error'])
+
+    l = r['latency_ms']
+    return "%-40s %9.1f req/s  p50 %7.3fms  p90 %7.3fms  p99 %7.3fms  " \
+           "%s" % (key, r['throughput_rps'], l['p50'], l['p90'], l['p99'],
+           '' if r['peak_kib'] is None else '%d KiB' % r['peak_kib'])
+
+
+def main(argv=None):
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-n', '--iterations', type='int', default=200,
+                      help="Number of timed calls per case. Defaults to 200.")
+    parser.add_option('--warmup', type='int', default=10,
+                      help="Number of untimed calls per case. Defaults to 10.")
+    parser.add_option('--memory-iterations', type='int', default=10,
+                      help="Number of calls made while tracing memory "
+                           "allocations. Defaults to 10.")
+    parser.add_option('-t', '--transport', action='append', default=[],
+                      help="One of %s. Can be repeated. Defaults to all." %
+                                                        ', '.join(TRANSPORTS))
+    parser.add_option('-p', '--pair', action='append', default=[],
+                      help="An in:out protocol pair like 'json:json'. Can be "
+                           "repeated. Protocols are: %s." %
+                                                   ', '.join(PROTOCOLS.keys()))
+    parser.add_option('--all-pairs', action='store_true', default=False,
+                      help="Run every combination of protocols.")
+    parser.add_option('-s', '--shape', action='append', default=[],
+                      help="One of %s. Can be repeated. Defaults to all." %
+                                                    ', '.join(SHAPES.keys()))
+    parser.add_option('--json', action='store_true', default=False,
+                      help="Print the results as json.")
+    parser.add_option('-o', '--output', default=None,
+                      help="Write the results as json to this file.")
+    parser.add_option('--baseline', default=None,
+                      help="A json file from a previous run to compare "
+                           "against.")
+    parser.add_option('--tolerance', type='float', default=0.2,
+                      help="Allowed median latency increase relative to the "
+                           "baseline. Defaults to 0.2.")
+
+    options, args = parser.parse_args(argv)
+
+    # Debug logging would dwarf everything else that's measured. This needs to
+    # be done before instantiating the protocols as they decide whether to log
+    # at init. Errors are reported with the results of each case.
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('spyne').setLevel(logging.CRITICAL)
+
+    if options.all_pairs:
+        pairs = [(i, o) for i in PROTOCOLS for o in PROTOCOLS
+                                                      if not i in OUTPUT_ONLY]
+    elif options.pair:
+        pairs = [tuple(p.split(':', 1)) for p in options.pair]
+    else:
+        pairs = DEFAULT_PAIRS
+
+    for pair in pairs:
+        for p in pair:
+            if not p in PROTOCOLS:
+                parser.error("unknown protocol %r" % p)
+
+    cases = get_cases(options.transport or TRANSPORTS, pairs,
+                                                         options.shape or None)
+
+    results = []
+    for case in cases:
+        result = run_case(*case, iterations=options.iterations,
+                                 warmup=options.warmup,
+                                 memory_iterations=options.memory_iterations)
+        results.append(result)
+
+        if not options.json:
+            print(_format_result(result))
+            sys.stdout.flush()
+
+    doc = {
+        'metadata': get_metadata(),
+        'max_rss_kib': get_max_rss(),
+        'results': results,
+    }
+
+    if options.json:
+        print(json.dumps(doc, indent=2, sort_keys=True))
+
+    if options.output is not None:
+        with open(options.output, 'w') as f:
+            json.dump(doc, f, indent=2, sort_keys=True)
+
+    if options.baseline is not None:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, options.tolerance)
+        for key, old, new in regressions:
+            print("%s: median latency went from %.3fms to %.3fms" %
+                                                (key, old, new), file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import json
+import unittest
+
+from spyne.test.perf.protocols import run_case, get_cases, compare, \
+    percentile, get_case_key, DEFAULT_PAIRS, SHAPES
+
+
+class TestProtocolBenchmarks(unittest.TestCase):
+    def _run(self, *case):
+        return run_case(*case, iterations=3, warmup=1, memory_iterations=1)
+
+    def test_wsgi(self):
+        for pair in (('soap11', 'soap11'), ('json', 'json'), ('http', 'json')):
+            result = self._run('wsgi', pair[0], pair[1], 'flat')
+
+            assert not 'error' in result, result['error']
+            assert result['iterations'] == 3
+            assert result['request_bytes'] > 0
+            assert result['response_bytes'] > 0
+            assert result['throughput_rps'] > 0
+
+            latency = result['latency_ms']
+            assert latency['min'] <= latency['p50'] <= latency['p99'] \
+                                                               <= latency['max']
+
+            # must be serializable
+            json.dumps(result)
+
+    def test_null(self):
+        for shape in SHAPES:
+            result = self._run('null', None, 'xml', shape)
+            assert not 'error' in result, result['error']
+            assert result['in_protocol'] is None
+
+    def test_skip(self):
+        result = self._run('wsgi', 'csv', 'json', 'flat')
+        assert 'error' in result
+        assert not 'latency_ms' in result
+
+        result = self._run('null', None, 'csv', 'flat')
+        assert 'error' in result
+
+        result = self._run('null', None, 'csv', 'array')
+        assert not 'error' in result, result['error']
+
+    def test_cases(self):
+        cases = list(get_cases(pairs=DEFAULT_PAIRS, shapes=['flat']))
+
+        # null doesn't use the in protocol so every out protocol is run once.
+        null_cases = [c for c in cases if c[0] == 'null']
+        wsgi_cases = [c for c in cases if c[0] == 'wsgi']
+        assert len(null_cases) == len(set([o for i, o in DEFAULT_PAIRS]))
+        assert len(wsgi_cases) == len(DEFAULT_PAIRS)
+
+    def test_compare(self):
+        def result(p50):
+            return {'transport': 'wsgi', 'in_protocol': 'json',
+                    'out_protocol': 'json', 'shape': 'flat',
+                    'latency_ms': {'p50': p50}}
+
+        baseline = {'results': [result(1.0)]}
+
+        assert compare([result(1.1)], baseline, 0.2) == []
+        assert compare([result(1.3)], baseline, 0.2) == \
+                                   [(get_case_key(result(1.3)), 1.0, 1.3)]
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([], 50) is None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,6 +26,7 @@ from lxml import etree
 from lxml.builder import E
 
 from spyne import ComplexModel, XmlAttribute, Unicode, Array, Integer
+from spyne import mrpc
 from spyne.protocol.cloth import XmlCloth
 from spyne.test import FakeContext
 from spyne.util.six import BytesIO
@@ -173,6 +174,73 @@ class TestXmlCloth(unittest.TestCase):
         assert elt[2][1].text == '5'
         assert elt[2][2].tag == 'g3'
 
+    def test_render_twice(self):
+        class SomeObject(ComplexModel):
+            s = Unicode
+            i = Integer
+
+        cloth = E.a(
+            E.b1(),
+            E.b2(E.c1(spyne_id="s"), E.c2()),
+            E.e(E.g1(), E.g2(spyne_id="i"), E.g3()),
+        )
+
+        prot = XmlCloth(cloth=cloth)
+        assert len(prot._cloth_nodes) == 9
+
+        outputs = []
+        for v in (SomeObject(s='s', i=5), SomeObject(s='t', i=6)):
+            stream = BytesIO()
+            with etree.xmlfile(stream) as parent:
+                prot.subserialize(FakeContext(), SomeObject, v, parent)
+            outputs.append(stream.getvalue())
+
+        assert outputs[0] == b'<a><b1/><b2><c1>s</c1><c2/></b2>' \
+                                            b'<e><g1/><g2>5</g2><g3/></e></a>'
+        assert outputs[1] == outputs[0].replace(b'>s<', b'>t<') \
+                                                  .replace(b'>5<', b'>6<')
+
+    def test_mrpc_links(self):
+        class SomeObject(ComplexModel):
+            s = Unicode(min_occurs=1)
+            t = Unicode
+
+            @mrpc()
+            def put(self, ctx):
+                pass
+
+            @mrpc(_when=lambda self: self.t is not None)
+            def delete(self, ctx):
+                pass
+
+        cloth = etree.fromstring(
+            '<a><b spyne_id="s"><c spyne_id="mrpc"><d spyne_id="mrpc">'
+                '<e/>'
+            '</d></c></b>'
+            '<f spyne_id="mrpc_entry"><g spyne_id="mrpc_link"/></f></a>')
+
+        prot = XmlCloth(cloth=cloth)
+        cloth_str = etree.tostring(prot._cloth)
+
+        outputs = []
+        for v in (SomeObject(t='t'), SomeObject()):
+            ctx = FakeContext()
+            ctx.locale = 'en_US'
+            stream = BytesIO()
+            with etree.xmlfile(stream) as parent:
+                prot.subserialize(ctx, SomeObject, v, parent)
+            outputs.append(etree.fromstring(stream.getvalue()))
+
+        # the links are rendered per instance
+        assert [g.get('href') for g in outputs[0].xpath('//d/f/g')] == \
+                                    ['SomeObject.put', 'SomeObject.delete']
+        assert [g.get('href') for g in outputs[1].xpath('//d/f/g')] == \
+                                                          ['SomeObject.put']
+        assert len(outputs[1].xpath('//d/e')) == 1
+
+        # and the shared cloth is not modified
+        assert etree.tostring(prot._cloth) == cloth_str
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -25,6 +25,7 @@ import unittest
 from lxml import etree, html
 
 from spyne.application import Application
+from spyne.decorator import rpc
 from spyne.decorator import srpc
 from spyne.model.primitive import Integer
 from spyne.model.primitive import String
@@ -163,6 +164,69 @@ class TestHtmlColumnTable(unittest.TestCase):
         assert elt.xpath('//td[@class="c"]')[0][0].text == _text
         assert elt.xpath('//td[@class="c"]')[0][0].attrib['href'] == _link
 
+    def _get_windowed(self, **kwargs):
+        consumed = []
+        test = self
+
+        class SomeService(ServiceBase):
+            @rpc(Integer, Integer, String, _returns=Array(CM))
+            def some_call(ctx, page, offset, sort):
+                test.prot_ctx = ctx.protocol
+                ctx.protocol.table_page = page
+                ctx.protocol.table_offset = offset
+                ctx.protocol.table_sort = sort
+
+                def gen():
+                    for i in (3, 1, 4, 1, 5, 9, 2, 6):
+                        consumed.append(i)
+                        yield CM(i=i, s='s%d' % i)
+
+                return gen()
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                 out_protocol=HtmlColumnTable(field_name_attr='class', **kwargs))
+        server = WsgiApplication(app)
+
+        def call(**kwargs):
+            del consumed[:]
+            elt = html.fromstring(call_wsgi_app_kwargs(server, **kwargs))
+            return [int(td.text) for td in elt.xpath('//td[@class="i"]')]
+
+        return call, consumed
+
+    def test_max_rows(self):
+        call, consumed = self._get_windowed(max_rows=3)
+
+        assert call() == [3, 1, 4]
+        # the generator is not consumed past the last row
+        assert len(consumed) <= 4
+
+    def test_page(self):
+        call, consumed = self._get_windowed(page_size=3)
+
+        assert call(page='1') == [1, 5, 9]
+        assert self.prot_ctx.table_has_more
+        assert call(page='2') == [2, 6]
+        assert not self.prot_ctx.table_has_more
+        assert call(offset='1') == [1, 4, 1]
+
+    def test_sort(self):
+        call, consumed = self._get_windowed(page_size=3)
+
+        assert call(sort='i') == [1, 1, 2]
+        assert self.prot_ctx.table_has_more
+        assert call(sort='-i', page='1') == [4, 3, 2]
+        assert self.prot_ctx.table_has_more
+        assert len(consumed) == 8
+
+        assert call(sort='i', page='2') == [6, 9]
+        assert not self.prot_ctx.table_has_more
+        assert call(sort='i', offset='5') == [5, 6, 9]
+        assert not self.prot_ctx.table_has_more
+
+        # unknown fields are ignored
+        assert call(sort='x') == [3, 1, 4]
+
 
 class TestHtmlRowTable(unittest.TestCase):
     def test_anyuri_string(self):
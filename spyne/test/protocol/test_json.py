@@ -29,6 +29,7 @@ from spyne import Application
 from spyne import rpc,srpc
 from spyne import ServiceBase
 from spyne.model import Integer
+from spyne.model import Unicode
 from spyne.model import ComplexModel
 from spyne.protocol.json import JsonP
 from spyne.protocol.json import JsonDocument
@@ -136,6 +137,88 @@ class TestJsonDocument(unittest.TestCase):
         assert ctx.in_error.faultcode == 'Client.JsonDecodeError'
 
 
+class TestJsonBatch(unittest.TestCase):
+    def _run(self, in_string, server_type=ServerBase):
+        class SomeService(ServiceBase):
+            @srpc(Integer, Integer, _returns=Integer)
+            def div(dividend, divisor):
+                return dividend // divisor
+
+            @srpc(Unicode, _returns=Unicode)
+            def echo(s):
+                return s
+
+        app = Application([SomeService], 'tns',
+                                in_protocol=JsonDocument(validator='soft'),
+                                out_protocol=JsonDocument())
+
+        server = server_type(app)
+
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [in_string]
+        ctx, = server.generate_contexts(initial_ctx)
+        assert ctx.in_error is None
+
+        server.get_in_object(ctx)
+        server.get_out_object(ctx)
+        server.get_out_string(ctx)
+
+        return json.loads(''.join(ctx.out_string))
+
+    def test_batch(self):
+        ret = self._run('[{"echo": ["a"]}, {"div": [7, 2]}, {"echo": ["b"]}]')
+        assert ret == ["a", 3, "b"]
+
+    def test_batch_error(self):
+        ret = self._run('[{"div": [4, 0]}, {"nope": []}, {"echo": ["c"]}]')
+
+        assert ret[0]['faultcode'] == 'Server'
+        assert ret[1]['faultcode'] == 'Client.ResourceNotFound'
+        assert ret[2] == "c"
+
+    def test_batch_pool(self):
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(2)
+
+        class SomeServer(ServerBase):
+            batch_pool = pool
+
+        try:
+            ret = self._run(json.dumps([{"echo": [str(i)]}
+                                              for i in range(10)]), SomeServer)
+        finally:
+            pool.close()
+
+        assert ret == [str(i) for i in range(10)]
+
+    def test_spyne_json_rpc1_batch(self):
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Integer)
+            def yay(i):
+                return i
+
+        app = Application([SomeService], 'tns',
+                                in_protocol=_SpyneJsonRpc1(),
+                                out_protocol=_SpyneJsonRpc1())
+        server = ServerBase(app)
+
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [json.dumps([
+            {"ver": 1, "body": {"yay": {"i": 5}}},
+            {"ver": 1, "body": {"yay": {"i": 6}}},
+        ])]
+        ctx, = server.generate_contexts(initial_ctx)
+        server.get_in_object(ctx)
+        server.get_out_object(ctx)
+        server.get_out_string(ctx)
+
+        assert json.loads(''.join(ctx.out_string)) == [
+            {"ver": 1, "body": 5},
+            {"ver": 1, "body": 6},
+        ]
+
+
 class TestJsonP(unittest.TestCase):
     def test_callback_name(self):
         callback_name = 'some_callback'
@@ -26,15 +26,18 @@ from spyne.util.six import BytesIO
 import msgpack
 
 from spyne import MethodContext
+from spyne._base import FakeContext
 from spyne.application import Application
 from spyne.decorator import rpc
 from spyne.decorator import srpc
 from spyne.service import ServiceBase
 from spyne.model.complex import Array
 from spyne.model.primitive import String
+from spyne.model.binary import ByteArray
 from spyne.model.complex import ComplexModel
 from spyne.model.primitive import Unicode
 from spyne.protocol.msgpack import MessagePackDocument
+from spyne.protocol.msgpack import MessagePackDecodeError
 from spyne.protocol.msgpack import MessagePackRpc
 from spyne.server import ServerBase
 from spyne.server.wsgi import WsgiApplication
@@ -63,6 +66,95 @@ class TestMessagePackRpc(unittest.TestCase):
         ctx, = server.generate_contexts(initial_ctx)
         assert ctx.in_error.faultcode == 'Client.MessagePackDecodeError'
 
+    def test_chunked_input(self):
+        class SomeService(ServiceBase):
+            @srpc(ByteArray, _returns=ByteArray)
+            def yay(data):
+                return data
+
+        app = Application([SomeService], 'tns',
+                                in_protocol=MessagePackDocument(),
+                                out_protocol=MessagePackDocument())
+
+        server = ServerBase(app)
+
+        in_string = msgpack.packb({'yay': [b'\x00\x01\x02']})
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [memoryview(in_string[:3]),
+                                 memoryview(in_string[3:])]
+        ctx, = server.generate_contexts(initial_ctx)
+        assert ctx.in_error is None
+
+        server.get_in_object(ctx)
+        assert ctx.in_object.data == [b'\x00\x01\x02']
+
+    def test_incomplete_input(self):
+        class SomeService(ServiceBase):
+            @srpc()
+            def yay():
+                pass
+
+        app = Application([SomeService], 'tns',
+                                in_protocol=MessagePackDocument(),
+                                out_protocol=MessagePackDocument())
+
+        server = ServerBase(app)
+
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [msgpack.packb({'yay': []})[:-1]]
+        ctx, = server.generate_contexts(initial_ctx)
+        assert ctx.in_error.faultcode == 'Client.MessagePackDecodeError'
+
+    def test_in_document_parser(self):
+        prot = MessagePackDocument()
+        ctx = FakeContext()
+
+        parser = prot.get_in_document_parser(ctx)
+
+        data = msgpack.packb({'yay': [b'\x00\x01\x02']})
+        for i in range(len(data)):
+            parser.feed(data[i:i + 1])
+        parser.close()
+
+        assert ctx.in_document == {'yay': [b'\x00\x01\x02']}
+
+        parser = prot.get_in_document_parser(ctx)
+        parser.feed(data[:-1])
+        self.assertRaises(MessagePackDecodeError, parser.close)
+
+    def test_rpc_batch(self):
+        class SomeService(ServiceBase):
+            @srpc(Unicode, _returns=Unicode)
+            def echo(s):
+                return s
+
+        app = Application([SomeService], 'tns',
+                                in_protocol=MessagePackRpc(),
+                                out_protocol=MessagePackRpc())
+
+        server = ServerBase(app)
+
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [msgpack.packb([
+            [0, 1, "echo", ["a"]],
+            [2, "echo", ["b"]],
+            [0, 3, "echo", ["c"]],
+        ])]
+        ctx, = server.generate_contexts(initial_ctx)
+        assert ctx.in_error is None
+
+        server.get_in_object(ctx)
+        server.get_out_object(ctx)
+        server.get_out_string(ctx)
+
+        ret = msgpack.unpackb(b''.join(ctx.out_string))
+
+        # the notification doesn't get a response
+        assert ret == [
+            [1, 1, None, {'echoResult': 'a'}],
+            [1, 3, None, {'echoResult': 'c'}],
+        ]
+
     def test_rpc(self):
         data = {"a":"b", "c": "d"}
 
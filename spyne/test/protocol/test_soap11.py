@@ -27,10 +27,13 @@ import unittest
 from lxml import etree
 import pytz
 
+import spyne.const.xml_ns as ns
+
 from spyne import MethodContext
 from spyne.application import Application
 from spyne.decorator import rpc
 from spyne.interface.wsdl import Wsdl11
+from spyne.error import ValidationError
 from spyne.model.complex import Array
 from spyne.model.complex import ComplexModel
 from spyne.model.primitive import Unicode
@@ -42,6 +45,7 @@ from spyne.model.fault import Fault
 from spyne.protocol.soap import Soap11
 from spyne.service import ServiceBase
 from spyne.server import ServerBase
+from spyne.util.six import BytesIO
 
 from spyne.protocol.soap import _from_soap
 from spyne.protocol.soap import _parse_xml_string
@@ -310,6 +314,11 @@ class TestSoap11(unittest.TestCase):
             assert d.month == 4
             assert d.day == 5
 
+        self.assertRaises(ValidationError, Soap11().from_string, Date,
+                                                             '2013-04-05junk')
+        self.assertRaises(ValidationError, Soap11().from_string, Date,
+                                                                  '2013-02-30')
+
     def test_to_parent_nested(self):
         m = ComplexModel.produce(
             namespace=None,
@@ -364,6 +373,102 @@ class TestSoap11(unittest.TestCase):
         ret = Soap11().from_element(None, Fault, element[0][0])
         assert ret.faultcode == "soap:Client"
 
+    def test_batch(self):
+        class SomeService(ServiceBase):
+            @rpc(Integer, _returns=Integer)
+            def some_call(ctx, i):
+                return i * 2
+
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                out_protocol=Soap11())
+        server = ServerBase(app)
+
+        initial_ctx = MethodContext(server)
+        initial_ctx.in_string = [b"""
+        <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+                       xmlns:tns="tns">
+          <soap:Body>
+            <tns:some_call><tns:i>1</tns:i></tns:some_call>
+            <tns:nope/>
+            <tns:some_call><tns:i>3</tns:i></tns:some_call>
+          </soap:Body>
+        </soap:Envelope>"""]
+
+        ctx, = server.generate_contexts(initial_ctx)
+        assert ctx.in_error is None
+
+        server.get_in_object(ctx)
+        server.get_out_object(ctx)
+        server.get_out_string(ctx)
+
+        elt = etree.fromstring(b''.join(ctx.out_string))
+        body = elt.find('{%s}Body' % ns.soap11_env)
+        assert len(body) == 3
+
+        assert body[0].tag == '{tns}some_callResponse'
+        assert body[0][0].text == '2'
+        assert body[1].tag == '{%s}Fault' % ns.soap11_env
+        assert body[1].find('faultcode').text == 'soap11env:Client.ResourceNotFound'
+        assert body[2].tag == '{tns}some_callResponse'
+        assert body[2][0].text == '6'
+
+    def test_stream(self):
+        class SomeHeader(ComplexModel):
+            __namespace__ = 'hdr'
+            s = Unicode
+
+        class SomeClass(ComplexModel):
+            __namespace__ = 'other'
+            i = Integer
+            s = Array(Unicode)
+
+        class SomeService(ServiceBase):
+            @rpc(Integer, _returns=Array(SomeClass), _out_header=SomeHeader)
+            def some_call(ctx, n):
+                ctx.out_header = SomeHeader(s=u'h')
+                return [SomeClass(i=i, s=[u'\xe7'] * i) for i in range(n)]
+
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                out_protocol=Soap11())
+        server = ServerBase(app)
+
+        def call(out_stream):
+            initial_ctx = MethodContext(server)
+            initial_ctx.in_string = [b"""
+            <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+                           xmlns:tns="tns">
+              <soap:Body><tns:some_call><tns:n>3</tns:n></tns:some_call></soap:Body>
+            </soap:Envelope>"""]
+
+            ctx, = server.generate_contexts(initial_ctx)
+            server.get_in_object(ctx)
+            server.get_out_object(ctx)
+            ctx.out_stream = out_stream
+            server.get_out_string(ctx)
+
+            return ctx
+
+        ctx = call(BytesIO())
+        assert ctx.out_document is None
+        assert ctx.out_string == [""]
+
+        streamed = ctx.out_stream.getvalue()
+        expected = b''.join(call(None).out_string)
+
+        # namespaces are only declared on the Envelope element.
+        assert streamed.count(b' xmlns:') == \
+                             len(etree.fromstring(streamed).nsmap)
+
+        # and only the ones that the message classes use.
+        assert set(etree.fromstring(streamed).nsmap.values()) == \
+                      set((ns.soap11_env, ns.xsi, 'tns', 'hdr', 'other'))
+
+        def canonical(data):
+            return [(e.tag, e.text, sorted(e.attrib.items()))
+                                       for e in etree.fromstring(data).iter()]
+
+        assert canonical(streamed) == canonical(expected)
+
 
 # TestSoapHeader supporting classes.
 # SOAP Header Elements defined by WS-Addressing.
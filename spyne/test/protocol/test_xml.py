@@ -697,6 +697,34 @@ class TestIncremental(unittest.TestCase):
         print(eltstr)
         assert b'<detail><this>that</this></detail>' in eltstr
 
+    def test_in_document_parser(self):
+        prot = XmlDocument()
+        ctx = FakeContext()
+
+        parser = prot.get_in_document_parser(ctx)
+
+        data = b'<a xmlns="tns"><b>x</b><b>y</b></a>'
+        for i in range(0, len(data), 5):
+            parser.feed(data[i:i + 5])
+        parser.close()
+
+        assert ctx.in_document.tag == '{tns}a'
+        assert [e.text for e in ctx.in_document] == ['x', 'y']
+        assert b''.join(ctx.in_string) == data
+
+    def test_in_document_parser_invalid(self):
+        prot = XmlDocument()
+        ctx = FakeContext()
+
+        parser = prot.get_in_document_parser(ctx)
+        try:
+            parser.feed(b'<a><b></a>')
+            parser.close()
+        except Fault as e:
+            assert e.faultcode == 'Client.XMLSyntaxError'
+        else:
+            raise Exception("must fail")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import unittest
+
+import spyne
+import spyne.model
+
+from spyne._lazy import LazyRegex
+from spyne.test.perf.import_time import sample
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_spyne(self):
+        _, modules = sample('import spyne')
+        modules = set(modules)
+
+        for name in ('lxml', 'pytz', 'spyne._base', 'spyne.model.primitive',
+                     'spyne.application', 'spyne.server', 'spyne.client'):
+            assert not name in modules, name
+
+    def test_import_model(self):
+        _, modules = sample('from spyne.model import Integer')
+        modules = set(modules)
+
+        assert 'spyne.model.primitive' in modules
+        assert not 'spyne.server' in modules
+
+    def test_attrs(self):
+        from spyne import Unicode, NullServer, LOCAL_TZ
+        from spyne.model.primitive import Unicode as _Unicode
+        from spyne.server.null import NullServer as _NullServer
+
+        assert Unicode is _Unicode is spyne.Unicode is spyne.model.Unicode
+        assert NullServer is _NullServer
+        assert LOCAL_TZ.zone == 'UTC'
+        assert spyne.model.primitive.Unicode is Unicode
+
+    def test_missing(self):
+        self.assertRaises(AttributeError, getattr, spyne, 'NoSuchName')
+        self.assertRaises(AttributeError, getattr, spyne.model, 'NoSuchName')
+
+    def test_all(self):
+        assert 'Application' in spyne.__all__
+        assert 'Integer' in spyne.__all__
+        assert set(spyne.model.__all__) <= set(dir(spyne.model))
+
+        namespace = {}
+        exec('from spyne import *', namespace)
+        assert namespace['ComplexModel'] is spyne.model.ComplexModel
+
+
+class TestLazyRegex(unittest.TestCase):
+    def test_lazy_regex(self):
+        r = LazyRegex('a+b')
+
+        assert not '_compiled' in r.__dict__
+        assert r.match('aab').span() == (0, 3)
+        assert '_compiled' in r.__dict__
+        assert r.pattern == 'a+b'
+
+    def test_pattern(self):
+        from spyne.model.primitive import Point
+
+        cls = Point(2)
+        assert not '_compiled' in cls.Attributes._pattern_re.__dict__
+        assert cls.validate_string(cls, 'POINT(1 2)')
+        assert not cls.validate_string(cls, 'POINT(1)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
+import logging
 import unittest
 
 from lxml import etree
@@ -101,5 +102,43 @@ class TestNullServer(unittest.TestCase):
         ostr_server.service.send_message("zobaaa", s="hobaa")
         assert set([("hobaa", None)]) == queue
 
+    def test_context_logging(self):
+        class MessageService(ServiceBase):
+            @srpc(String)
+            def send_message(s):
+                pass
+
+        application = Application([MessageService], 'some_tns',
+                          in_protocol=XmlDocument(), out_protocol=XmlDocument())
+
+        records = []
+        class Handler(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+
+        null_logger = logging.getLogger('spyne.server.null')
+        handler = Handler()
+        old_level = null_logger.level
+        null_logger.addHandler(handler)
+
+        try:
+            null_logger.setLevel(logging.INFO)
+            server = NullServer(application)
+            assert not server.log_contexts
+            server.service.send_message("zabaaa")
+            assert records == []
+
+            null_logger.setLevel(logging.DEBUG)
+            server = NullServer(application)
+            assert server.log_contexts
+            server.service.send_message("zabaaa")
+            assert len(records) == 5
+            assert set([r.levelno for r in records]) == set([logging.DEBUG])
+
+        finally:
+            null_logger.removeHandler(handler)
+            null_logger.setLevel(old_level)
+
+
 if __name__ == '__main__':
     unittest.main()
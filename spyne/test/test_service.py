@@ -245,6 +245,154 @@ class TestMultipleMethods(unittest.TestCase):
         assert len(elt.xpath(query, namespaces=nsmap)) == 0
 
 
+class TestMethodContext(unittest.TestCase):
+    def _get_app(self):
+        class SomeService(ServiceBase):
+            @srpc(String, _returns=String)
+            def echo(s):
+                return s
+
+        return Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                         out_protocol=Soap11())
+
+    def test_primary_context_not_copied(self):
+        from spyne import MethodContext
+
+        app = self._get_app()
+        ctx = MethodContext(NullServer(app))
+        ctx.method_request_string = 'echo'
+
+        contexts = app.in_protocol.generate_method_contexts(ctx)
+        assert contexts == [ctx]
+        assert ctx.descriptor.name == 'echo'
+
+    def test_call_handle_cache(self):
+        from spyne import MethodContext
+
+        app = self._get_app()
+        ctx = MethodContext(NullServer(app))
+        ctx.method_request_string = 'echo'
+
+        handles = app.in_protocol.get_call_handles(ctx)
+        assert app.in_protocol.get_call_handles(ctx) is handles
+
+        ctx.method_request_string = 'nonexistent'
+        assert app.in_protocol.get_call_handles(ctx) == []
+        assert 'nonexistent' not in app.in_protocol._call_handle_cache
+
+    def test_lazy_sub_contexts(self):
+        from spyne import MethodContext
+
+        ctx = MethodContext(NullServer(self._get_app()))
+        assert ctx._transport is None
+        assert ctx.transport.parent is ctx
+        assert ctx._protocol is None
+
+        ctx2 = ctx.copy()
+        assert ctx2.transport is ctx.transport
+        assert ctx2.transport.parent is ctx2
+
+    def test_frozen(self):
+        from spyne import MethodContext
+
+        ctx = MethodContext(NullServer(self._get_app()))
+        assert ctx.frozen
+
+        ctx.udc = 1
+        self.assertRaises(ValueError, setattr, ctx, 'some_attr', 1)
+
+
+class TestEventManager(unittest.TestCase):
+    def test_order(self):
+        from spyne import EventManager
+
+        calls = []
+        def a(ctx): calls.append('a')
+        def b(ctx): calls.append('b')
+        def c(ctx): calls.append('c')
+
+        em = EventManager(None)
+        em.add_listener('ev', a)
+        em.add_listener('ev', b)
+        em.add_listener('ev', c, priority=10)
+        em.add_listener('ev', a)
+
+        em.fire_event('ev', None)
+        assert calls == ['c', 'a', 'b']
+
+        del calls[:]
+        em.del_listener('ev', c)
+        em.fire_event('ev', None)
+        em.fire_event('other', None)
+        assert calls == ['a', 'b']
+
+        em.del_listener('ev')
+        assert not 'ev' in em.handlers
+        em.fire_event('ev', None)
+        assert calls == ['a', 'b']
+
+    def test_async(self):
+        import threading
+        from spyne import EventManager
+
+        done = threading.Event()
+        calls = []
+        def handler(ctx):
+            calls.append((ctx, threading.current_thread()))
+            done.set()
+
+        em = EventManager(None)
+        em.add_listener('ev', handler, is_async=True)
+        em.fire_event('ev', 42)
+
+        assert done.wait(2)
+        (ctx, thread), = calls
+        assert ctx == 42
+        assert thread is not threading.current_thread()
+
+    def test_executor(self):
+        from spyne import EventManager
+
+        class Executor(object):
+            def __init__(self):
+                self.calls = []
+
+            def submit(self, func, *args):
+                self.calls.append((func, args))
+
+        def handler(ctx):
+            pass
+
+        em = EventManager(None)
+        em.executor = Executor()
+        em.add_listener('ev', handler, is_async=True)
+        em.fire_event('ev', 42)
+
+        assert em.executor.calls == [(handler, (42,))]
+
+    def test_service_inheritance(self):
+        calls = []
+        def a(ctx): calls.append('a')
+        def b(ctx): calls.append('b')
+
+        class BaseService(ServiceBase):
+            pass
+
+        BaseService.event_manager.add_listener('method_call', a)
+        BaseService.event_manager.add_listener('method_call', b, priority=1)
+
+        class SomeService(BaseService):
+            @srpc(String, _returns=String)
+            def echo(s):
+                return s
+
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                         out_protocol=Soap11())
+        server = NullServer(app)
+        assert server.service.echo('x') == 'x'
+        assert calls == ['b', 'a']
+
+
 class TestNativeTypes(unittest.TestCase):
     def test_native_types(self):
         for t in NATIVE_MAP:
@@ -38,6 +38,22 @@ from spyne.util.xml import get_xml_as_object
 from spyne.util.xml import get_schema_documents
 from spyne.util.xml import get_validation_schema
 
+from spyne.util.timing import Histogram
+from spyne.util.timing import PhaseTimings
+from spyne.util.timing import get_timing_record
+from spyne.util.profiler import SamplingProfiler
+from spyne.util.cache import LruBackend
+from spyne.util.cache import FileBackend
+from spyne.util.cache import CachedResponse
+from spyne.util.cache import ResponseCache
+from spyne.util.cache import normalize
+from spyne.util.coalesce import SingleFlight
+
+try:
+    from twisted.internet.defer import Deferred
+except ImportError:
+    Deferred = None
+
 
 class TestXml(unittest.TestCase):
     def test_serialize(self):
@@ -352,5 +368,422 @@ class TestFifo(unittest.TestCase):
         assert iter(unpacker).next() == v3
 
 
+class TestPhaseTimings(unittest.TestCase):
+    def _get_app(self):
+        from spyne.protocol.xml import XmlDocument
+        from spyne.protocol.http import HttpRpc
+
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Unicode)
+            def some_call(n):
+                if n < 0:
+                    raise ValueError(n)
+                return u'x' * n
+
+        return Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+
+    def _call(self, app, query_string):
+        from wsgiref.util import setup_testing_defaults
+        from spyne.server.wsgi import WsgiApplication
+
+        env = {'QUERY_STRING': query_string, 'PATH_INFO': '/some_call',
+                                                      'REQUEST_METHOD': 'GET'}
+        setup_testing_defaults(env)
+
+        return b''.join(WsgiApplication(app)(env, lambda *args: None))
+
+    def test_histogram(self):
+        h = Histogram(buckets=(1, 2, 3))
+        for v in (0.5, 1.5, 1.5, 2.5, 10):
+            h.observe(v)
+
+        assert h.counts == [1, 2, 1, 1]
+        assert h.count == 5
+        assert h.min == 0.5
+        assert h.max == 10
+        assert h.quantile(.5) == 2
+        assert h.quantile(1) == 10
+        assert Histogram().quantile(.5) is None
+
+    def test_disabled(self):
+        app = self._get_app()
+        records = []
+        app.event_manager.add_listener('method_context_closed',
+                                                lambda ctx: records.append(ctx))
+        self._call(app, 'n=3')
+
+        ctx, = records
+        assert ctx.timings is None
+        assert get_timing_record(ctx) is None
+
+    def test_phases(self):
+        app = self._get_app()
+        timings = PhaseTimings(app, keep_records=10)
+
+        self._call(app, 'n=3')
+        self._call(app, 'n=4')
+
+        record = timings.records[-1]
+        assert record['method'] == '{tns}some_call'
+        assert record['total'] >= sum(record['phases'].values())
+        assert list(record['phases'].keys()) == ['create_in_document',
+                      'decompose_incoming_envelope', 'deserialize', 'call',
+                                           'serialize', 'create_out_string']
+
+        stats = timings.get_stats()['{tns}some_call']
+        assert set(stats) == set(record['phases']) | set(['total'])
+        assert stats['deserialize']['count'] == 2
+        assert stats['total']['count'] == 2
+
+    def test_error(self):
+        app = self._get_app()
+        timings = PhaseTimings(app, keep_records=1)
+
+        self._call(app, 'n=-1')
+        self._call(app, 'n=x')
+
+        # the request with the invalid argument doesn't get to call the user
+        # function
+        phases = timings.records[-1]['phases']
+        assert 'deserialize' in phases
+        assert not 'call' in phases
+
+        stats = timings.get_stats()['{tns}some_call']
+        assert stats['call']['count'] == 1
+        assert stats['total']['count'] == 2
+
+    def test_callback(self):
+        app = self._get_app()
+        records = []
+        PhaseTimings(app, callback=records.append)
+
+        self._call(app, 'n=1')
+
+        record, = records
+        assert record['end'] is not None
+        assert record['phases']['call'] > 0
+
+
+def _busy_loop(duration):
+    import time
+
+    start = time.time()
+    while time.time() - start < duration:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        from spyne.protocol.xml import XmlDocument
+        from spyne.protocol.http import HttpRpc
+        from spyne.server.wsgi import WsgiApplication
+
+        class SomeService(ServiceBase):
+            @srpc(_returns=Unicode)
+            def slow_call():
+                _busy_loop(0.05)
+                return u'x'
+
+            @srpc(_returns=Unicode)
+            def other_call():
+                _busy_loop(0.05)
+                return u'y'
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        self.server = WsgiApplication(app)
+
+    def tearDown(self):
+        if self.server.profiler is not None:
+            self.server.profiler.stop()
+
+    def _call(self, name):
+        from wsgiref.util import setup_testing_defaults
+
+        env = {'QUERY_STRING': '', 'PATH_INFO': '/' + name,
+                                                      'REQUEST_METHOD': 'GET'}
+        setup_testing_defaults(env)
+
+        return b''.join(self.server(env, lambda *args: None))
+
+    def test_every(self):
+        profiler = SamplingProfiler(every=2)
+        profiler.attach(self.server)
+
+        for i in range(4):
+            self._call('slow_call')
+
+        stacks = profiler.stacks['{tns}slow_call']
+        assert sum(stacks.values()) > 10
+        assert any(['_busy_loop' in s for s in stacks])
+
+        # only the instrumented phases are sampled
+        assert all([':run_phase;' in s for s in stacks])
+
+    def test_methods(self):
+        profiler = SamplingProfiler(methods=['other_call'])
+        profiler.attach(self.server)
+
+        self._call('slow_call')
+        self._call('other_call')
+
+        assert list(profiler.stacks) == ['{tns}other_call']
+
+    def test_dump(self):
+        import shutil
+        import tempfile
+
+        profiler = SamplingProfiler(every=1)
+        profiler.attach(self.server)
+        self._call('slow_call')
+
+        directory = tempfile.mkdtemp()
+        try:
+            file_name, = profiler.dump(directory)
+            assert file_name.endswith('slow_call.collapsed')
+
+            for line in open(file_name):
+                stack, count = line.rsplit(' ', 1)
+                assert int(count) > 0
+                assert stack.count(';') > 0
+
+        finally:
+            shutil.rmtree(directory)
+
+    def test_not_picked(self):
+        self._call('slow_call')
+
+        profiler = SamplingProfiler(every=1000)
+        profiler.attach(self.server)
+        self._call('slow_call')
+
+        assert profiler.stacks == {}
+        assert profiler._thread is None
+
+
+class CachedClass(ComplexModel):
+    # module-level, so that it can be pickled
+    s = Unicode
+    i = Integer
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru(self):
+        backend = LruBackend(max_entries=2)
+        backend.set('a', 1, 60)
+        backend.set('b', 2, 60)
+        assert backend.get('a') == 1
+
+        # 'b' is the least recently used one now.
+        backend.set('c', 3, 60)
+        assert len(backend) == 2
+        assert backend.get('b') is None
+        assert backend.get('a') == 1
+        assert backend.get('c') == 3
+
+    def test_lru_ttl(self):
+        backend = LruBackend()
+        backend.set('a', 1, -1)
+        assert backend.get('a') is None
+        assert len(backend) == 0
+
+    def test_file(self):
+        import os
+        import shutil
+        import tempfile
+
+        directory = tempfile.mkdtemp()
+        try:
+            backend = FileBackend(directory)
+            entry = CachedResponse([CachedClass(s=u'a', i=1)], None, 0)
+            backend.set('a', entry, 60)
+            backend.set('b', entry, -1)
+
+            # another process would see the same entries.
+            backend = FileBackend(directory)
+            value = backend.get('a')
+            assert value.out_object[0].s == u'a'
+            assert value.out_object[0].i == 1
+
+            assert len(os.listdir(directory)) == 2
+            backend.purge()
+            assert len(os.listdir(directory)) == 1
+            assert backend.get('b') is None
+
+            backend.delete('a')
+            assert backend.get('a') is None
+
+        finally:
+            shutil.rmtree(directory)
+
+    def _get_context(self):
+        ctx = _Context([1])
+        ctx.out_error = None
+        return ctx
+
+    def test_copy(self):
+        cache = ResponseCache(cache_strings=False)
+        value = CachedClass(s=u'a', i=1)
+
+        ctx = self._get_context()
+        assert not cache.get_response(ctx)
+        ctx.out_object = [value]
+        cache.set_response(ctx)
+
+        # e.g. the user code keeps a reference to its return value.
+        value.s = u'b'
+
+        ctx = self._get_context()
+        assert cache.get_response(ctx)
+        assert ctx.out_object[0].s == u'a'
+
+        # e.g. an event listener modifies the response.
+        ctx.out_object[0].s = u'c'
+
+        ctx = self._get_context()
+        assert cache.get_response(ctx)
+        assert ctx.out_object[0].s == u'a'
+
+    def test_no_copy(self):
+        cache = ResponseCache(cache_strings=False, copy_values=False)
+        value = CachedClass(s=u'a', i=1)
+
+        ctx = self._get_context()
+        cache.get_response(ctx)
+        ctx.out_object = [value]
+        cache.set_response(ctx)
+
+        ctx = self._get_context()
+        assert cache.get_response(ctx)
+        assert ctx.out_object[0] is value
+
+    def test_normalize(self):
+        class SomeClass(ComplexModel):
+            s = Unicode
+            i = Array(Integer)
+
+        assert normalize([SomeClass(s=u'a', i=[1, 2])]) == \
+                                      normalize((SomeClass(i=(1, 2), s=u'a'),))
+        assert normalize([SomeClass(s=u'a', i=[1, 2])]) != \
+                                         normalize([SomeClass(s=u'a', i=[2])])
+        assert normalize({'b': 1, 'a': [2]}) == normalize({'a': (2,), 'b': 1})
+        hash(normalize([SomeClass(s=u'a', i=[1, 2]), {'a': set([1])}]))
+
+
+class _Descriptor(object):
+    key = '{tns}some_call'
+
+
+class _Context(object):
+    def __init__(self, in_object):
+        self.descriptor = _Descriptor()
+        self.in_object = in_object
+        self.in_header = None
+        self.transport = None
+        self.out_header = None
+        self.flight = None
+        self.method_name = 'some_call'
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads(self):
+        import threading
+        import time
+
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def _func(ctx):
+            calls.append(ctx.in_object)
+            release.wait(5)
+            if ctx.in_object == [0]:
+                raise ValueError(ctx.in_object)
+            return object()
+
+        results = []
+        def _run(n):
+            try:
+                results.append((n, single_flight.call(_Context([n]), _func)))
+            except ValueError as e:
+                results.append((n, e))
+
+        threads = [threading.Thread(target=_run, args=(i % 2,))
+                                                            for i in range(6)]
+        for t in threads:
+            t.start()
+        while len(calls) < 2:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert sorted(calls) == [[0], [1]]
+        assert len(single_flight) == 0
+        assert len(set([id(r) for n, r in results if n == 0])) == 1
+        assert len(set([id(r) for n, r in results if n == 1])) == 1
+        assert isinstance(results[[n for n, r in results].index(0)][1],
+                                                                   ValueError)
+
+    def test_generator(self):
+        single_flight = SingleFlight()
+
+        def _func(ctx):
+            return (i for i in range(3))
+
+        ctx = _Context([1])
+        list(single_flight.call(ctx, _func))
+        assert ctx.flight is None
+        assert len(single_flight) == 0
+
+    @unittest.skipIf(Deferred is None, "twisted is not available")
+    def test_deferred(self):
+        single_flight = SingleFlight()
+        calls = []
+        d = Deferred()
+
+        def _func(ctx):
+            calls.append(ctx.in_object)
+            return d
+
+        d1 = single_flight.call(_Context([1]), _func)
+        d2 = single_flight.call(_Context([1]), _func)
+        assert d1 is d
+        assert d2 is not d
+        assert len(single_flight) == 1
+
+        results = []
+        d1.addCallback(results.append)
+        d2.addCallback(results.append)
+        d.callback(42)
+
+        assert calls == [[1]]
+        assert results == [42, 42]
+        assert len(single_flight) == 0
+
+        # not coalesced anymore
+        single_flight.call(_Context([1]), _func)
+        assert calls == [[1], [1]]
+
+    @unittest.skipIf(Deferred is None, "twisted is not available")
+    def test_in_header(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        def _func(ctx):
+            calls.append(ctx.in_header)
+            return Deferred()
+
+        for user in (u'alice', u'bob', u'alice'):
+            ctx = _Context([1])
+            ctx.in_header = [user]
+            single_flight.call(ctx, _func)
+
+        assert calls == [[u'alice'], [u'bob']]
+        assert len(single_flight) == 2
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,304 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import sys
+import unittest
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from spyne import Application, ServiceBase, rpc
+from spyne.model import Unicode, Integer, Iterable
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.xml import XmlDocument
+
+
+class _Counter(object):
+    """An asynchronous iterator that doesn't need the Python 3.6 syntax."""
+
+    def __init__(self, n):
+        self.i = 0
+        self.n = n
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self.i == self.n:
+            raise StopAsyncIteration()
+        self.i += 1
+        return asyncio.sleep(0, result=self.i)
+
+
+# the async/await syntax can't be parsed by older Pythons.
+_say_hello_async = None
+if sys.version_info >= (3, 5):
+    exec("""
+async def _say_hello_async(name):
+    await asyncio.sleep(0)
+    return u'Hello, %s' % name
+""")
+
+
+class SomeService(ServiceBase):
+    @rpc(Unicode, _returns=Unicode)
+    def say_hello(ctx, name):
+        return u'Hello, %s' % name
+
+    @rpc(Unicode, _returns=Unicode)
+    def say_hello_later(ctx, name):
+        return asyncio.sleep(0, result=u'Hello, %s' % name)
+
+    @rpc(Integer, _returns=Iterable(Integer))
+    def count(ctx, n):
+        return _Counter(n)
+
+    @rpc(Integer, _returns=Iterable(Integer))
+    def count_sync(ctx, n):
+        for i in range(n):
+            yield i + 1
+
+    @rpc(Unicode, _returns=Unicode)
+    def say_hello_async(ctx, name):
+        return _say_hello_async(name)
+
+    @rpc(_returns=Unicode)
+    def fail_later(ctx):
+        f = asyncio.Future()
+        f.set_exception(Exception("boo"))
+        return f
+
+
+def _get_app(out_protocol):
+    return Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                     out_protocol=out_protocol)
+
+
+@unittest.skipIf(asyncio is None, "asyncio is not available")
+class TestAsgiApplication(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def _call(self, app, path, query_string=b'', body=b''):
+        from spyne.server.asgi import AsgiApplication
+
+        server = AsgiApplication(app, loop=self.loop)
+        scope = {
+            'type': 'http',
+            'method': 'POST' if body else 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'localhost')],
+        }
+
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        def receive():
+            return asyncio.sleep(0, result=messages.pop(0))
+
+        def send(message):
+            sent.append(message)
+            return asyncio.sleep(0)
+
+        self.loop.run_until_complete(server(scope, receive, send))
+
+        assert sent[0]['type'] == 'http.response.start'
+        assert sent[-1]['more_body'] is False
+
+        return sent[0]['status'], dict(sent[0]['headers']), \
+                                       b''.join([m['body'] for m in sent[1:]])
+
+    def test_sync(self):
+        status, _, body = self._call(_get_app(JsonDocument()),
+                                        '/say_hello', query_string=b'name=x')
+        assert status == 200
+        assert body == b'"Hello, x"'
+
+    def test_awaitable(self):
+        status, _, body = self._call(_get_app(JsonDocument()),
+                                  '/say_hello_later', query_string=b'name=x')
+        assert status == 200
+        assert body == b'"Hello, x"'
+
+    @unittest.skipIf(_say_hello_async is None, "async def is not available")
+    def test_coroutine(self):
+        status, _, body = self._call(_get_app(JsonDocument()),
+                                  '/say_hello_async', query_string=b'name=x')
+        assert status == 200
+        assert body == b'"Hello, x"'
+
+    def test_generator(self):
+        # asyncio.iscoroutine() is True for plain generators before Python
+        # 3.12, yet they must be serialized as regular iterables.
+        status, _, body = self._call(_get_app(JsonDocument()), '/count_sync',
+                                                         query_string=b'n=3')
+        assert status == 200
+        assert body == b'[1, 2, 3]'
+
+    def test_async_iterable_collected(self):
+        status, _, body = self._call(_get_app(JsonDocument()), '/count',
+                                                         query_string=b'n=3')
+        assert status == 200
+        assert body == b'[1, 2, 3]'
+
+    def test_async_iterable_pushed(self):
+        from lxml import etree
+
+        status, headers, body = self._call(_get_app(XmlDocument()), '/count',
+                                                         query_string=b'n=3')
+        assert status == 200
+        assert b'content-length' not in headers
+
+        elt = etree.fromstring(body)
+        assert [int(e.text) for e in elt.xpath('//tns:integer',
+                                    namespaces={'tns': 'tns'})] == [1, 2, 3]
+
+    def test_failed_future(self):
+        status, _, body = self._call(_get_app(JsonDocument()), '/fail_later')
+        assert status == 500
+
+    def test_asgi2(self):
+        from spyne.server.asgi import AsgiApplication
+
+        server = AsgiApplication(_get_app(JsonDocument()), loop=self.loop)
+        instance = server({'type': 'http', 'method': 'GET', 'path': '/'})
+        assert callable(instance)
+
+    def test_max_content_length(self):
+        from spyne.server.asgi import AsgiApplication
+
+        server = AsgiApplication(_get_app(JsonDocument()), loop=self.loop,
+                                                          max_content_length=4)
+        scope = {'type': 'http', 'method': 'POST', 'path': '/say_hello'}
+        sent = []
+
+        def receive():
+            return asyncio.sleep(0, result={'type': 'http.request',
+                                                         'body': b'name=xxxx'})
+
+        def send(message):
+            sent.append(message)
+            return asyncio.sleep(0)
+
+        self.loop.run_until_complete(server(scope, receive, send))
+
+        assert sent[0]['status'] == 413
+
+
+class _FakeTransport(object):
+    def __init__(self):
+        self.data = []
+        self.closed = False
+
+    def write(self, data):
+        self.data.append(data)
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def get_extra_info(self, name):
+        return {'sockname': ('127.0.0.1', 8000),
+                'peername': ('127.0.0.1', 12345)}.get(name, None)
+
+    def value(self):
+        return b''.join(self.data)
+
+
+@unittest.skipIf(asyncio is None, "asyncio is not available")
+class TestAsyncioHttpServer(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def _get_protocol(self, app=None):
+        from spyne.server.asyncio import AsyncioHttpServer
+
+        if app is None:
+            app = _get_app(JsonDocument())
+
+        server = AsyncioHttpServer(app, loop=self.loop)
+        prot = server.protocol_factory()
+        prot.connection_made(_FakeTransport())
+
+        return prot
+
+    def _run(self):
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+    def test_keep_alive(self):
+        prot = self._get_protocol()
+        prot.data_received(b'GET /say_hello?name=a HTTP/1.1\r\n'
+                           b'Host: localhost\r\n\r\n'
+                           b'GET /say_hello_later?name=b HTTP/1.1\r\n'
+                           b'Host: localhost\r\n\r\n')
+        self._run()
+
+        value = prot.transport.value()
+        assert value.count(b'HTTP/1.1 200 OK\r\n') == 2
+        assert value.index(b'"Hello, a"') < value.index(b'"Hello, b"')
+        assert not prot.transport.closed
+
+    def test_chunked_request(self):
+        app = Application([SomeService], 'tns', in_protocol=XmlDocument(),
+                                                  out_protocol=JsonDocument())
+        prot = self._get_protocol(app)
+        prot.data_received(b'POST / HTTP/1.1\r\n'
+                           b'Host: localhost\r\n'
+                           b'Connection: close\r\n'
+                           b'Transfer-Encoding: chunked\r\n\r\n'
+                           b'19\r\n<say_hello xmlns="tns"><n\r\n')
+        prot.data_received(b'18\r\name>c</name></say_hello>\r\n'
+                           b'0\r\n\r\n')
+        self._run()
+
+        value = prot.transport.value()
+        assert value.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert b'Transfer-Encoding: chunked\r\n' in value
+        assert value.endswith(b'\r\n"Hello, c"\r\n0\r\n\r\n')
+        assert prot.transport.closed
+
+    def test_too_large(self):
+        prot = self._get_protocol()
+        prot.data_received(b'POST /say_hello HTTP/1.1\r\n'
+                           b'Host: localhost\r\n'
+                           b'Content-Length: 999999999\r\n\r\n')
+        self._run()
+
+        assert prot.transport.value().startswith(b'HTTP/1.0 413')
+        assert prot.transport.closed
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import unittest
+import threading
+
+from spyne import Application, ServiceBase, rpc
+from spyne.client.http import HttpClient
+from spyne.client.http import HttpConnectionPool
+from spyne.client.http import PoolTimeoutError
+from spyne.model import Unicode
+from spyne.protocol.soap import Soap11
+from spyne.server.wsgi import WsgiApplication
+from spyne.util.six import BytesIO
+from spyne.util.six.moves import BaseHTTPServer
+
+
+class SomeService(ServiceBase):
+    @rpc(Unicode, _returns=Unicode)
+    def echo(ctx, s):
+        return s
+
+
+def _get_app():
+    return Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.server.requests += 1
+        length = int(self.headers['Content-Length'])
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/',
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '0',
+            'CONTENT_LENGTH': str(length),
+            'CONTENT_TYPE': 'text/xml',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(self.rfile.read(length)),
+        }
+
+        status = []
+        def start_response(s, headers):
+            status.append(s)
+
+        body = b''.join(self.server.wsgi_app(environ, start_response))
+
+        self.send_response(int(status[0][:3]))
+        if self.server.truncate:
+            # the response ends before the promised length.
+            self.send_header('Content-Length', str(len(body) + 10))
+        else:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        # simulate a server that closes idle keep-alive connections without
+        # telling the client.
+        if self.server.truncate or self.server.close_idle:
+            self.close_connection = 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.truncate = False
+        self.server.close_idle = False
+        self.server.wsgi_app = WsgiApplication(_get_app())
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        client = HttpClient(self.url, _get_app(), timeout=5)
+
+        for i in range(3):
+            assert client.service.echo(u'hey %d' % i) == u'hey %d' % i
+
+        client.close()
+
+        assert self.server.connections == 1
+
+    def test_retry_idle_close(self):
+        self.server.close_idle = True
+        client = HttpClient(self.url, _get_app(), timeout=5)
+
+        for i in range(3):
+            assert client.service.echo(u'hey %d' % i) == u'hey %d' % i
+
+        client.close()
+
+        assert self.server.connections == 3
+        assert self.server.requests == 3
+
+    def test_no_retry_after_response(self):
+        from spyne.util.six.moves import http_client
+
+        client = HttpClient(self.url, _get_app(), timeout=5)
+        assert client.service.echo(u'hey') == u'hey'
+
+        # the server has already processed the request by the time the
+        # response is cut short, so it must not be sent again.
+        self.server.truncate = True
+        self.assertRaises(http_client.IncompleteRead, client.service.echo,
+                                                                      u'hey')
+
+        client.close()
+
+        assert self.server.requests == 2
+
+    def test_procedure_cache(self):
+        client = HttpClient(self.url, _get_app())
+
+        assert client.service.echo is client.service.echo
+
+    def test_pool_timeout(self):
+        pool = HttpConnectionPool(pool_size=1, timeout=0.1)
+        pool.get('http', 'localhost')
+
+        self.assertRaises(PoolTimeoutError, pool.get, 'http', 'localhost')
+
+        pool.release('http', 'localhost', None)
+        conn, reused = pool.get('http', 'localhost')
+        assert not reused
+
+
+if __name__ == '__main__':
+    unittest.main()
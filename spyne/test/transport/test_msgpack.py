@@ -22,6 +22,8 @@ import msgpack
 from spyne import Application, ServiceBase, rpc
 from spyne.model import Unicode
 from spyne.protocol.msgpack import MessagePackDocument
+from spyne.protocol.msgpack import MessagePackRpc
+from spyne.server.msgpack import OUT_RESPONSE_NO_ERROR
 
 from twisted.trial import  unittest
 
@@ -90,3 +92,159 @@ class TestMessagePackServer(unittest.TestCase):
 
         return p_ctx[0].out_object[0].addCallback(_ccb)
 
+
+
+class TestMessagePackRpcServer(unittest.TestCase):
+     def gen_prot(self, app, **kwargs):
+        from spyne.server.twisted.msgpack import TwistedMessagePackProtocol
+        from twisted.test.proto_helpers import StringTransportWithDisconnection
+
+        prot = TwistedMessagePackProtocol(app, **kwargs)
+        transport = StringTransportWithDisconnection()
+        prot.makeConnection(transport)
+        transport.protocol = prot
+
+        return prot
+
+     def gen_app(self, deferreds):
+        from twisted.internet.defer import Deferred
+
+        class SomeService(ServiceBase):
+            @rpc(Unicode, _returns=Unicode)
+            def yay(ctx, u):
+                return u
+
+            @rpc(Unicode, _returns=Unicode)
+            def yay_later(ctx, u):
+                d = Deferred()
+                deferreds.append((d, u))
+                return d
+
+        return Application([SomeService], 'tns',
+                                in_protocol=MessagePackRpc(),
+                                out_protocol=MessagePackRpc())
+
+     def get_responses(self, prot):
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(prot.transport.value())
+
+        retval = []
+        for resp in unpacker:
+            retval.append(msgpack.unpackb(resp[OUT_RESPONSE_NO_ERROR]))
+        return retval
+
+     def test_msgid(self):
+        app = self.gen_app([])
+        prot = self.gen_prot(app)
+
+        request = msgpack.packb([MessagePackRpc.MSGPACK_REQUEST, 42, 'yay',
+                                                                      ['a']])
+        prot.dataReceived(msgpack.packb([1, request]))
+
+        resp, = self.get_responses(prot)
+        self.assertEquals(resp[:3], [MessagePackRpc.MSGPACK_RESPONSE, 42, None])
+
+     def test_out_of_order(self):
+        deferreds = []
+        app = self.gen_app(deferreds)
+        prot = self.gen_prot(app)
+
+        data = []
+        for i, name in enumerate(('yay_later', 'yay_later', 'yay')):
+            request = msgpack.packb([MessagePackRpc.MSGPACK_REQUEST, i, name,
+                                                                     [str(i)]])
+            data.append(msgpack.packb([1, request]))
+        prot.dataReceived(b''.join(data))
+
+        self.assertEquals(prot.inflight, 2)
+
+        deferreds[1][0].callback(deferreds[1][1])
+        deferreds[0][0].callback(deferreds[0][1])
+
+        self.assertEquals(prot.inflight, 0)
+        self.assertEquals([r[1] for r in self.get_responses(prot)], [2, 1, 0])
+
+     def test_notify(self):
+        app = self.gen_app([])
+        prot = self.gen_prot(app)
+
+        request = msgpack.packb([MessagePackRpc.MSGPACK_NOTIFY, 'yay', ['a']])
+        prot.dataReceived(msgpack.packb([1, request]))
+
+        self.assertEquals(prot.transport.value(), b'')
+        self.assertEquals(prot.inflight, 0)
+
+     def test_max_inflight(self):
+        deferreds = []
+        app = self.gen_app(deferreds)
+        prot = self.gen_prot(app, max_inflight=1)
+
+        data = []
+        for i in range(3):
+            request = msgpack.packb([MessagePackRpc.MSGPACK_REQUEST, i,
+                                                        'yay_later', [str(i)]])
+            data.append(msgpack.packb([1, request]))
+        prot.dataReceived(b''.join(data))
+
+        self.assertEquals(len(deferreds), 1)
+        self.assertEquals(prot.transport.producerState, 'paused')
+
+        deferreds[0][0].callback('0')
+        self.assertEquals(len(deferreds), 2)
+
+        deferreds[1][0].callback('1')
+        self.assertEquals(len(deferreds), 3)
+        self.assertEquals(prot.transport.producerState, 'producing')
+
+        deferreds[2][0].callback('2')
+        self.assertEquals([r[1] for r in self.get_responses(prot)], [0, 1, 2])
+
+     def test_aux_error(self):
+        from twisted.internet.defer import Deferred
+        from spyne.auxproc import AuxProcBase
+
+        class BrokenAuxProc(AuxProcBase):
+            def process_context(self, server, ctx):
+                raise ValueError("aux failure")
+
+        deferreds = []
+        class SomeService(ServiceBase):
+            @rpc(Unicode, _returns=Unicode)
+            def yay(ctx, u):
+                return u
+
+            @rpc(Unicode, _returns=Unicode)
+            def yay_later(ctx, u):
+                d = Deferred()
+                deferreds.append((d, u))
+                return d
+
+        class AuxService(ServiceBase):
+            @rpc(Unicode, _aux=BrokenAuxProc())
+            def yay(ctx, u):
+                pass
+
+            @rpc(Unicode, _aux=BrokenAuxProc())
+            def yay_later(ctx, u):
+                pass
+
+        app = Application([SomeService, AuxService], 'tns',
+                                in_protocol=MessagePackRpc(),
+                                out_protocol=MessagePackRpc())
+        prot = self.gen_prot(app, max_inflight=1)
+
+        data = []
+        for i, name in enumerate(('yay', 'yay_later', 'yay')):
+            request = msgpack.packb([MessagePackRpc.MSGPACK_REQUEST, i, name,
+                                                                     [str(i)]])
+            data.append(msgpack.packb([1, request]))
+        prot.dataReceived(b''.join(data))
+
+        # the failing auxiliary method of the first call doesn't stall the
+        # connection.
+        self.assertEquals(len(deferreds), 1)
+
+        # and the one of the second call doesn't cause an error response.
+        deferreds[0][0].callback(deferreds[0][1])
+        self.assertEquals(prot.inflight, 0)
+        self.assertEquals([r[1] for r in self.get_responses(prot)], [0, 1, 2])
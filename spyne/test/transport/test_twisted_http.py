@@ -0,0 +1,155 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import unittest
+
+from spyne import Application, ServiceBase, rpc
+from spyne.model import Array, Integer, Unicode
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.soap import Soap11
+from spyne.util.cache import ResponseCache
+
+try:
+    from twisted.internet.defer import succeed
+    from twisted.web.server import Request, NOT_DONE_YET
+    from twisted.web.test.requesthelper import DummyChannel
+except ImportError:
+    Request = None
+
+
+class SomeService(ServiceBase):
+    @rpc(Integer, _returns=Unicode)
+    def some_call(ctx, n):
+        return u'x' * n
+
+    @rpc(Integer, _returns=Unicode)
+    def deferred_call(ctx, n):
+        return succeed(u'y' * n)
+
+    @rpc(Integer, _returns=Unicode, _cache=ResponseCache())
+    def cached_call(ctx, n):
+        ctx.udc.append(n)
+        return u'z' * n
+
+
+class SomeSoapService(ServiceBase):
+    @rpc(_returns=Array(Integer))
+    def bad_call(ctx):
+        return 'abc'
+
+
+def _call(resource, name, headers=None, content=None, **args):
+    from spyne.util.six import BytesIO
+
+    channel = DummyChannel()
+    request = Request(channel, False)
+    request.method = b'GET'
+    if content is not None:
+        request.method = b'POST'
+    request.uri = request.path = b'/' + name
+    request.prepath = []
+    request.postpath = [name]
+    request.args = dict([(k.encode('ascii'), [v.encode('ascii')])
+                                                    for k, v in args.items()])
+    request.content = BytesIO(content or b'')
+    if headers is not None:
+        for k, v in headers.items():
+            request.requestHeaders.setRawHeaders(k, [v])
+
+    assert resource.render(request) == NOT_DONE_YET
+
+    # the response is sent by a pull producer, which is driven by the
+    # reactor in real life.
+    producers = channel.transport.producers
+    if producers:
+        producer, streaming = producers[0]
+        while producer.deferred is not None:
+            producer.resumeProducing()
+
+    written = channel.transport.written.getvalue()
+    return request, written.split(b'\r\n\r\n', 1)[1]
+
+
+@unittest.skipIf(Request is None, "twisted is not available")
+class TestTwistedWebResource(unittest.TestCase):
+    def setUp(self):
+        from spyne.server.twisted import TwistedWebResource
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                 out_protocol=JsonDocument())
+        self.resource = TwistedWebResource(app)
+
+        self.calls = calls = []
+        def _on_method_call(ctx):
+            ctx.udc = calls
+        app.event_manager.add_listener('method_call', _on_method_call)
+
+    def test_sync_return(self):
+        request, body = _call(self.resource, b'some_call', n='3')
+        assert request.code == 200
+        assert body == b'"xxx"'
+
+    def test_deferred_return(self):
+        request, body = _call(self.resource, b'deferred_call', n='2')
+        assert request.code == 200
+        assert body == b'"yy"'
+
+    def test_cache(self):
+        # json is serialized lazily, yet the response gets an etag.
+        request, body = _call(self.resource, b'cached_call', n='2')
+        assert request.code == 200
+        assert body == b'"zz"'
+        etag, = request.responseHeaders.getRawHeaders('etag')
+
+        request, body = _call(self.resource, b'cached_call', n='2')
+        assert body == b'"zz"'
+        assert request.responseHeaders.getRawHeaders('etag') == [etag]
+
+        request, body = _call(self.resource, b'cached_call',
+                                     headers={'if-none-match': etag}, n='2')
+        assert request.code == 304
+        assert body == b''
+        assert self.calls == [2]
+
+
+@unittest.skipIf(Request is None, "twisted is not available")
+class TestTwistedWebResourceSoap(unittest.TestCase):
+    def test_serialization_error(self):
+        from lxml import etree
+        from spyne.server.twisted import TwistedWebResource
+
+        app = Application([SomeSoapService], 'tns', in_protocol=Soap11(),
+                                                       out_protocol=Soap11())
+        resource = TwistedWebResource(app)
+
+        # the response is streamed, so the error cuts it short.
+        request, body = _call(resource, b'', content=b'''
+            <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+                           xmlns:tns="tns">
+              <soap:Body><tns:bad_call/></soap:Body>
+            </soap:Envelope>''')
+
+        assert request.code == 200
+        elt = etree.fromstring(body)
+        assert elt.find('.//{tns}bad_callResult') is not None
+
+
+if __name__ == '__main__':
+    unittest.main()
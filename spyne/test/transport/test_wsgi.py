@@ -0,0 +1,673 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import time
+import zlib
+import unittest
+import threading
+
+from lxml import etree
+from wsgiref.util import setup_testing_defaults
+
+from spyne import Application, ServiceBase, rpc
+from spyne.model import Unicode, Integer, Iterable, ComplexModel
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.cloth import XmlCloth
+from spyne.protocol.xml import XmlDocument
+from spyne.protocol.soap import Soap11
+from spyne.server.http import negotiate_content_encoding
+from spyne.server.wsgi import WsgiApplication
+from spyne.server.wsgi import WsgiOutStream
+from spyne.util.six import BytesIO
+from spyne.util.metrics import Metrics
+from spyne.util.cache import ResponseCache
+
+
+class SomeService(ServiceBase):
+    event = None
+    finished = None
+
+    @rpc(Integer, Integer, _returns=Iterable(Unicode))
+    def some_call(ctx, n, fail_at):
+        for i in range(n):
+            if i == fail_at:
+                raise Exception("boo")
+
+            if i == n // 2 and SomeService.event is not None:
+                assert SomeService.event.wait(2)
+
+            yield u'%05d' % i
+
+        SomeService.finished = True
+
+
+class OtherService(ServiceBase):
+    @rpc(Integer, _returns=Unicode)
+    def other_call(ctx, n):
+        return u'x' * n
+
+    @rpc(Integer, _returns=Unicode, _compress=False)
+    def uncompressed_call(ctx, n):
+        return u'x' * n
+
+
+def _call(server, query_string, path='/some_call', accept_encoding=None):
+    env = {
+        'QUERY_STRING': query_string,
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+    }
+    if accept_encoding is not None:
+        env['HTTP_ACCEPT_ENCODING'] = accept_encoding
+    setup_testing_defaults(env)
+
+    status = []
+    def start_response(code, headers):
+        status.append((code, dict(headers)))
+
+    retval = server(env, start_response)
+
+    return status, retval
+
+
+class TestWsgiStreaming(unittest.TestCase):
+    def setUp(self):
+        SomeService.event = None
+        SomeService.finished = None
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                       out_protocol=XmlCloth())
+        self.server = WsgiApplication(app, flush_threshold=256)
+
+    def test_first_chunk_early(self):
+        SomeService.event = threading.Event()
+
+        status, retval = _call(self.server, 'n=200')
+        assert isinstance(retval, WsgiOutStream)
+
+        (code, headers), = status
+        assert code == '200 OK'
+        assert not 'Content-Length' in headers
+
+        body = iter(retval)
+        first_chunk = next(body)
+
+        # the rest of the document is not generated yet.
+        assert 256 <= len(first_chunk) < 1024
+        assert SomeService.finished is None
+
+        SomeService.event.set()
+
+        elt = etree.fromstring(first_chunk + b''.join(body))
+        assert len(elt[0]) == 200
+        assert SomeService.finished
+
+    def test_error_before_first_chunk(self):
+        status, retval = _call(self.server, 'n=200&fail_at=1')
+
+        (code, headers), = status
+        assert code.startswith('500')
+        assert int(headers['Content-Length']) == len(b''.join(retval))
+
+    def test_close(self):
+        SomeService.event = threading.Event()
+
+        status, retval = _call(self.server, 'n=200000')
+        next(iter(retval))
+        retval.close()
+
+        SomeService.event.set()
+        time.sleep(0.2)
+
+        # the writer gives up once the stream is closed.
+        assert retval.finished
+        assert SomeService.finished is None
+
+    def test_soap(self):
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                         out_protocol=Soap11())
+        server = WsgiApplication(app, flush_threshold=256)
+
+        status, retval = _call(server, 'n=200')
+        assert isinstance(retval, WsgiOutStream)
+
+        chunks = list(retval)
+        assert len(chunks) > 2
+
+        elt = etree.fromstring(b''.join(chunks))
+        assert len(elt.xpath('//tns:string', namespaces={'tns': 'tns'})) == 200
+
+    def test_no_threshold(self):
+        self.server.flush_threshold = None
+
+        status, retval = _call(self.server, 'n=10')
+        (code, headers), = status
+
+        assert not isinstance(retval, WsgiOutStream)
+        assert int(headers['Content-Length']) == len(b''.join(retval))
+
+    def test_close_before_finish(self):
+        class SomeServer(WsgiApplication):
+            def get_out_string(self, ctx):
+                ctx.out_stream.write(b'x')
+                # the client goes away before the last flush
+                ctx.out_stream.close()
+                ctx.out_string = []
+
+        class SomeContext(object):
+            pass
+
+        stream = WsgiOutStream(256)
+        ctx = SomeContext()
+        ctx.out_stream = stream
+
+        server = SomeServer(self.server.app, flush_threshold=256)
+        server._serialize_to_stream(ctx, stream)
+
+        assert stream.finished
+
+    def test_stream_pool(self):
+        from multiprocessing.pool import ThreadPool
+
+        self.server.stream_pool = pool = ThreadPool(1)
+        try:
+            # with a single worker, each response has to be consumed before
+            # the next one can start.
+            elts = []
+            for n in (100, 200):
+                headers, retval = _call(self.server, 'n=%d' % n)
+                elts.append(etree.fromstring(b''.join(retval)))
+        finally:
+            pool.close()
+
+        assert [len(elt[0]) for elt in elts] == [100, 200]
+
+
+class TestWsgiCompression(unittest.TestCase):
+    def setUp(self):
+        app = Application([SomeService, OtherService], 'tns',
+                           in_protocol=HttpRpc(), out_protocol=XmlDocument())
+        self.server = WsgiApplication(app, compress=['gzip', 'deflate'])
+
+    def test_negotiate(self):
+        encs = ('gzip', 'deflate')
+
+        assert negotiate_content_encoding(None, encs) is None
+        assert negotiate_content_encoding('identity', encs) is None
+        assert negotiate_content_encoding('gzip, deflate', encs) == 'gzip'
+        assert negotiate_content_encoding('deflate, gzip', encs) == 'gzip'
+        assert negotiate_content_encoding('gzip;q=0.5, deflate', encs) \
+                                                                   == 'deflate'
+        assert negotiate_content_encoding('*', encs) == 'gzip'
+        assert negotiate_content_encoding('*, gzip;q=0', encs) == 'deflate'
+        assert negotiate_content_encoding('GZIP;Q=0.1', encs) == 'gzip'
+
+    def test_gzip(self):
+        status, retval = _call(self.server, 'n=5000', '/other_call', 'gzip')
+        (code, headers), = status
+        body = b''.join(retval)
+
+        assert headers['Content-Encoding'] == 'gzip'
+        assert headers['Vary'] == 'Accept-Encoding'
+        assert int(headers['Content-Length']) == len(body)
+        assert len(body) < 1000
+
+        elt = etree.fromstring(zlib.decompress(body, 16 + zlib.MAX_WBITS))
+        assert len(elt[0].text) == 5000
+
+    def test_deflate(self):
+        status, retval = _call(self.server, 'n=5000', '/other_call',
+                                                      'gzip;q=0.5, deflate')
+        (code, headers), = status
+
+        assert headers['Content-Encoding'] == 'deflate'
+        elt = etree.fromstring(zlib.decompress(b''.join(retval)))
+        assert len(elt[0].text) == 5000
+
+    def test_not_accepted(self):
+        status, retval = _call(self.server, 'n=5000', '/other_call')
+        (code, headers), = status
+
+        assert not 'Content-Encoding' in headers
+        assert headers['Vary'] == 'Accept-Encoding'
+        etree.fromstring(b''.join(retval))
+
+    def test_min_length(self):
+        status, retval = _call(self.server, 'n=10', '/other_call', 'gzip')
+        (code, headers), = status
+
+        assert not 'Content-Encoding' in headers
+        etree.fromstring(b''.join(retval))
+
+    def test_opt_out(self):
+        status, retval = _call(self.server, 'n=5000', '/uncompressed_call',
+                                                                        'gzip')
+        (code, headers), = status
+
+        assert not 'Content-Encoding' in headers
+        etree.fromstring(b''.join(retval))
+
+    def test_stream(self):
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                       out_protocol=XmlCloth())
+        server = WsgiApplication(app, flush_threshold=256, compress=['gzip'])
+
+        status, retval = _call(server, 'n=200', accept_encoding='gzip')
+        (code, headers), = status
+        assert headers['Content-Encoding'] == 'gzip'
+
+        # every chunk but the gzip trailer can be decoded as soon as it
+        # arrives.
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = [decompressor.decompress(chunk) for chunk in retval]
+        assert len(data) > 2
+        assert all(data[:-1])
+
+        elt = etree.fromstring(b''.join(data))
+        assert len(elt[0]) == 200
+
+    def test_wsdl_cached(self):
+        app = Application([OtherService], 'tns', in_protocol=Soap11(),
+                                                         out_protocol=Soap11())
+        server = WsgiApplication(app, compress=True)
+
+        def get_wsdl():
+            env = {'QUERY_STRING': 'wsdl', 'REQUEST_METHOD': 'GET',
+                                               'HTTP_ACCEPT_ENCODING': 'gzip'}
+            setup_testing_defaults(env)
+
+            status = []
+            retval, = server(env, lambda *args: status.append(args))
+            return dict(status[0][1]), retval
+
+        headers, first = get_wsdl()
+        headers, second = get_wsdl()
+
+        assert headers['Content-Encoding'] == 'gzip'
+        assert first is second
+        etree.fromstring(zlib.decompress(first, 16 + zlib.MAX_WBITS))
+
+
+class TestWsgiRequestDecompression(unittest.TestCase):
+    def setUp(self):
+        app = Application([OtherService], 'tns', in_protocol=XmlDocument(),
+                                                    out_protocol=XmlDocument())
+        self.server = WsgiApplication(app, max_content_length=64 * 1024,
+                                                          block_length=1024)
+
+    def _post(self, body, content_encoding):
+        env = {
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_TYPE': 'text/xml',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_CONTENT_ENCODING': content_encoding,
+            'wsgi.input': BytesIO(body),
+        }
+        setup_testing_defaults(env)
+
+        status = []
+        retval = b''.join(self.server(env, lambda *args: status.append(args)))
+
+        return status[0][0], retval
+
+    def _get_body(self, padding=0):
+        return (b'<other_call xmlns="tns">' + b' ' * padding +
+                                              b'<n>3</n></other_call>')
+
+    def test_gzip(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        body = compressor.compress(self._get_body()) + compressor.flush()
+
+        code, retval = self._post(body, 'gzip')
+        assert code.startswith('200')
+        assert b'xxx' in retval
+
+    def test_deflate(self):
+        code, retval = self._post(zlib.compress(self._get_body()), 'Deflate')
+        assert code.startswith('200')
+        assert b'xxx' in retval
+
+    def test_max_content_length_decoded(self):
+        # ~50k compressed to ~100 bytes
+        body = zlib.compress(self._get_body(padding=100 * 1024))
+        assert len(body) < 1024
+
+        code, retval = self._post(body, 'deflate')
+        assert code.startswith('413')
+
+    def test_unsupported(self):
+        code, retval = self._post(self._get_body(), 'compress')
+        assert code.startswith('415')
+
+    def test_invalid(self):
+        code, retval = self._post(self._get_body(), 'gzip')
+        assert code.startswith('400')
+
+
+class TestWsgiMetrics(unittest.TestCase):
+    def setUp(self):
+        app = Application([OtherService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        self.metrics = Metrics(app)
+        self.server = WsgiApplication(app, metrics=self.metrics,
+                                                  metrics_path='/_metrics')
+
+    def _get_metrics(self):
+        status, retval = _call(self.server, '', '/_metrics')
+        (code, headers), = status
+
+        assert code == '200 OK'
+        assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        return b''.join(retval).decode('utf8')
+
+    def test_metrics(self):
+        b''.join(_call(self.server, 'n=3', '/other_call')[1])
+        b''.join(_call(self.server, 'n=4', '/other_call')[1])
+        b''.join(_call(self.server, 'n=x', '/other_call')[1])
+        b''.join(_call(self.server, '', '/no_such_call')[1])
+
+        values = self.metrics.get_values()
+        assert values['requests'] == {'{tns}other_call': 3}
+        assert values['errors'] == {
+            ('{tns}other_call', 'Client.ValidationError'): 1,
+            ('', 'Client.ResourceNotFound'): 1,
+        }
+        assert values['latency']['{tns}other_call'][0] == 3
+        assert values['in_flight'] == {}
+        assert values['out_bytes']['WsgiApplication'] > 0
+
+        text = self._get_metrics()
+        assert 'spyne_requests_total{method="{tns}other_call"} 3\n' in text
+        assert 'spyne_request_duration_seconds_bucket' \
+                         '{method="{tns}other_call",le="+Inf"} 3\n' in text
+        assert 'spyne_request_duration_seconds_count' \
+                                  '{method="{tns}other_call"} 3\n' in text
+        assert 'spyne_errors_total{method="",' \
+                                 'code="Client.ResourceNotFound"} 1\n' in text
+
+    def test_in_flight(self):
+        metrics = self.metrics
+        seen = []
+
+        class InFlightService(ServiceBase):
+            @rpc(_returns=Unicode)
+            def in_flight_call(ctx):
+                seen.append(metrics.get_values()['in_flight'])
+                seen.append(metrics.to_prometheus())
+                return u'x'
+
+        app = Application([InFlightService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        metrics.attach(app)
+        b''.join(_call(WsgiApplication(app), '', '/in_flight_call')[1])
+
+        assert seen[0] == {'WsgiApplication': 1}
+        assert 'spyne_in_flight_requests{transport="WsgiApplication"} 1\n' \
+                                                                    in seen[1]
+        assert metrics.get_values()['in_flight'] == {}
+
+    def test_threads(self):
+        def _run():
+            for i in range(50):
+                b''.join(_call(self.server, 'n=1', '/other_call')[1])
+
+        threads = [threading.Thread(target=_run) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        values = self.metrics.get_values()
+        assert values['requests'] == {'{tns}other_call': 200}
+        assert values['latency']['{tns}other_call'][0] == 200
+
+    def test_disabled(self):
+        app = Application([OtherService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        server = WsgiApplication(app)
+
+        status, retval = _call(server, '', '/metrics')
+        (code, headers), = status
+        assert code.startswith('404')
+
+
+class TestWsgiResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = calls = []
+
+        class CachedService(ServiceBase):
+            @rpc(Integer, _returns=Unicode,
+                         _cache=ResponseCache(ttl=60, vary=['Accept-Language']))
+            def cached_call(ctx, n):
+                calls.append(n)
+                return u'x' * n
+
+            @rpc(Integer, _returns=Iterable(Integer), _cache=ResponseCache())
+            def cached_gen(ctx, n):
+                calls.append(n)
+                for i in range(n):
+                    yield i
+
+        app = Application([CachedService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        self.server = WsgiApplication(app)
+
+    def _call(self, query_string, path='/cached_call', **headers):
+        env = {
+            'QUERY_STRING': query_string,
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+        }
+        env.update(headers)
+        setup_testing_defaults(env)
+
+        status = []
+        def start_response(code, headers):
+            status.append((code, dict(headers)))
+
+        body = b''.join(self.server(env, start_response))
+        (code, headers), = status
+
+        return code, headers, body
+
+    def test_hit(self):
+        code, headers, body = self._call('n=3')
+        assert code == '200 OK'
+        assert b'>xxx<' in body
+        assert headers['Cache-Control'] == 'private, max-age=60'
+        assert headers['Vary'] == 'Accept-Language'
+        assert headers['ETag'].startswith('W/"')
+
+        code2, headers2, body2 = self._call('n=3')
+        assert code2 == '200 OK'
+        assert body2 == body
+        assert headers2['ETag'] == headers['ETag']
+        assert self.calls == [3]
+
+        self._call('n=4')
+        assert self.calls == [3, 4]
+
+    def test_vary(self):
+        self._call('n=3', HTTP_ACCEPT_LANGUAGE='en')
+        self._call('n=3', HTTP_ACCEPT_LANGUAGE='tr')
+        self._call('n=3', HTTP_ACCEPT_LANGUAGE='en')
+        assert self.calls == [3, 3]
+
+    def test_not_modified(self):
+        code, headers, body = self._call('n=3')
+
+        code, headers2, body = self._call('n=3',
+                                     HTTP_IF_NONE_MATCH=headers['ETag'])
+        assert code.startswith('304')
+        assert body == b''
+        assert not 'Content-Length' in headers2
+        assert headers2['ETag'] == headers['ETag']
+
+        code, _, body = self._call('n=3', HTTP_IF_NONE_MATCH='W/"nope"')
+        assert code == '200 OK'
+        assert b'>xxx<' in body
+
+    def test_generator_not_cached(self):
+        self._call('n=3', '/cached_gen')
+        code, headers, body = self._call('n=3', '/cached_gen')
+        assert code == '200 OK'
+        assert not 'ETag' in headers
+        assert self.calls == [3, 3]
+
+    def test_error_not_cached(self):
+        code, _, _ = self._call('n=x')
+        assert code.startswith('4')
+        code, _, _ = self._call('n=x')
+        assert code.startswith('4')
+
+        code, _, body = self._call('n=2')
+        assert code == '200 OK'
+        assert self.calls == [2]
+
+    def test_in_header(self):
+        calls = []
+
+        class Auth(ComplexModel):
+            __namespace__ = 'tns'
+            user = Unicode
+
+        class HeaderService(ServiceBase):
+            __in_header__ = Auth
+
+            @rpc(Unicode, _returns=Unicode, _cache=ResponseCache())
+            def whoami(ctx, s):
+                calls.append(ctx.in_header.user)
+                return u'%s:%s' % (ctx.in_header.user, s)
+
+        app = Application([HeaderService], 'tns', in_protocol=Soap11(),
+                                                      out_protocol=Soap11())
+        server = WsgiApplication(app)
+
+        def _call(user):
+            body = (
+                u'<soap:Envelope '
+                u'xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" '
+                u'xmlns:tns="tns">'
+                u'<soap:Header><tns:Auth><tns:user>%s</tns:user></tns:Auth>'
+                u'</soap:Header>'
+                u'<soap:Body><tns:whoami><tns:s>a</tns:s></tns:whoami>'
+                u'</soap:Body></soap:Envelope>' % user).encode('utf8')
+
+            env = {
+                'REQUEST_METHOD': 'POST',
+                'CONTENT_TYPE': 'text/xml; charset=utf-8',
+                'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': BytesIO(body),
+            }
+            setup_testing_defaults(env)
+
+            status = []
+            def start_response(code, headers):
+                status.append(code)
+
+            retval = b''.join(server(env, start_response))
+            assert status == ['200 OK']
+            return retval
+
+        assert b'>alice:a<' in _call('alice')
+        assert b'>bob:a<' in _call('bob')
+        assert b'>alice:a<' in _call('alice')
+        assert calls == ['alice', 'bob']
+
+    def test_stream(self):
+        app = Application([self.server.app.services[0]], 'tns',
+                                 in_protocol=HttpRpc(), out_protocol=Soap11())
+        self.server = WsgiApplication(app, flush_threshold=64)
+
+        code, headers, body = self._call('n=3')
+        assert code == '200 OK'
+        assert b'>xxx<' in body
+        assert headers['Cache-Control'] == 'private, max-age=60'
+        assert headers['Vary'] == 'Accept-Language'
+        assert not 'ETag' in headers
+
+        # hits that were serialized by a server that doesn't stream are not
+        # streamed either.
+        streaming_server = self.server
+        self.server = WsgiApplication(app)
+        self._call('n=4')
+
+        self.server = streaming_server
+        code, headers, body = self._call('n=4')
+        assert code == '200 OK'
+        assert b'>xxxx<' in body
+        assert headers['ETag'].startswith('W/"')
+
+        code, _, body = self._call('n=4', HTTP_IF_NONE_MATCH=headers['ETag'])
+        assert code.startswith('304')
+        assert body == b''
+        assert self.calls == [3, 4]
+
+
+class TestWsgiCoalescing(unittest.TestCase):
+    def test_coalesce(self):
+        calls = []
+        strings = []
+        release = threading.Event()
+
+        class CoalescedService(ServiceBase):
+            @rpc(Integer, _returns=Unicode, _coalesce=True)
+            def coalesced_call(ctx, n):
+                calls.append(n)
+                release.wait(5)
+                return u'x' * n
+
+        CoalescedService.event_manager.add_listener('method_return_string',
+                                                  lambda ctx: strings.append(1))
+
+        app = Application([CoalescedService], 'tns', in_protocol=HttpRpc(),
+                                                    out_protocol=XmlDocument())
+        server = WsgiApplication(app)
+
+        bodies = []
+        def _run():
+            status, retval = _call(server, 'n=3', '/coalesced_call')
+            bodies.append(b''.join(retval))
+
+        threads = [threading.Thread(target=_run) for i in range(4)]
+        for t in threads:
+            t.start()
+
+        # let the other threads join the running call.
+        while not calls:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        release.set()
+
+        for t in threads:
+            t.join()
+
+        assert calls == [3]
+        assert len(strings) == 1
+        assert len(bodies) == 4
+        assert len(set(bodies)) == 1
+        assert b'>xxx<' in bodies[0]
+
+        # the call is made again once the previous one is done.
+        b''.join(_call(server, 'n=3', '/coalesced_call')[1])
+        assert calls == [3, 3]
+
+
+if __name__ == '__main__':
+    unittest.main()
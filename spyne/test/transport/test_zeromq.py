@@ -0,0 +1,173 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import json
+import time
+import unittest
+import threading
+
+import zmq
+
+from spyne import Application, ServiceBase, rpc
+from spyne.model import Unicode, Float
+from spyne.client.zeromq import ZeroMQClient
+from spyne.client.zeromq import ZeroMQTimeoutError
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.soap import Soap11
+from spyne.server.zeromq import ZeroMQRouterServer
+
+
+class SomeService(ServiceBase):
+    @rpc(Unicode, Float, _returns=Unicode)
+    def echo(ctx, s, delay):
+        if delay:
+            time.sleep(delay)
+        return s
+
+
+class BrokenService(ServiceBase):
+    @rpc(_returns=Unicode)
+    def broken(ctx):
+        return u'x'
+
+
+def _on_method_return_string(ctx):
+    raise ValueError("broken")
+
+BrokenService.event_manager.add_listener('method_return_string',
+                                                      _on_method_return_string)
+
+
+class TestZeroMQRouterServer(unittest.TestCase):
+    def setUp(self):
+        app = Application([SomeService, BrokenService], 'tns',
+                in_protocol=JsonDocument(), out_protocol=JsonDocument())
+
+        self.ctx = zmq.Context()
+        self.server = ZeroMQRouterServer(app, 'inproc://test_router',
+                                                     pool_size=2, ctx=self.ctx)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join()
+
+    def _request(self, s, delay=0):
+        return json.dumps({'echo': {'s': s, 'delay': delay}}).encode('utf8')
+
+    def test_req(self):
+        socket = self.ctx.socket(zmq.REQ)
+        socket.connect('inproc://test_router')
+
+        socket.send(self._request('hello'))
+        self.assertEqual(json.loads(socket.recv().decode('utf8')), 'hello')
+
+        socket.close()
+
+    def test_out_of_order(self):
+        socket = self.ctx.socket(zmq.DEALER)
+        socket.connect('inproc://test_router')
+
+        socket.send_multipart([b'1', b'', self._request('slow', 0.5)])
+        time.sleep(0.05)
+        socket.send_multipart([b'2', b'', self._request('fast')])
+
+        time.sleep(0.1)
+        assert self.server.inflight == 1
+        assert self.server.queue_depth == 0
+
+        request_id, _, reply = socket.recv_multipart()
+        self.assertEqual(request_id, b'2')
+        self.assertEqual(json.loads(reply.decode('utf8')), 'fast')
+
+        request_id, _, reply = socket.recv_multipart()
+        self.assertEqual(request_id, b'1')
+        self.assertEqual(json.loads(reply.decode('utf8')), 'slow')
+
+        socket.close()
+
+    def test_internal_error(self):
+        socket = self.ctx.socket(zmq.REQ)
+        socket.connect('inproc://test_router')
+
+        # more failing requests than workers
+        for i in range(3):
+            socket.send(json.dumps({'broken': {}}).encode('utf8'))
+            assert socket.poll(2000)
+            reply = json.loads(socket.recv().decode('utf8'))
+            self.assertEqual(reply['faultcode'], 'Server')
+
+        socket.send(self._request('hello'))
+        assert socket.poll(2000)
+        self.assertEqual(json.loads(socket.recv().decode('utf8')), 'hello')
+
+        socket.close()
+
+
+class TestZeroMQClient(unittest.TestCase):
+    def setUp(self):
+        self.app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                         out_protocol=Soap11())
+
+        self.ctx = zmq.Context()
+        self.server = ZeroMQRouterServer(self.app, 'inproc://test_client',
+                                                     pool_size=4, ctx=self.ctx)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join()
+
+    def test_concurrent(self):
+        client = ZeroMQClient('inproc://test_client', self.app, ctx=self.ctx)
+
+        results = {}
+        def _call(i):
+            results[i] = client.service.echo(u'%d' % i, 0.2)
+
+        threads = [threading.Thread(target=_call, args=(i,)) for i in range(4)]
+
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # the calls were in flight at the same time
+        assert time.time() - start < 0.6
+        assert results == dict((i, u'%d' % i) for i in range(4))
+
+        client.close()
+
+    def test_timeout_retry(self):
+        client = ZeroMQClient('inproc://test_client', self.app, ctx=self.ctx,
+                                                       timeout=0.1, retries=1)
+
+        self.assertRaises(ZeroMQTimeoutError, client.service.echo, u'x', 0.5)
+        assert client.service.echo(u'y', 0) == u'y'
+
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
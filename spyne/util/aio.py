@@ -0,0 +1,219 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.aio`` module contains helpers for running Spyne code
+inside an asyncio event loop.
+
+Spyne still supports Python versions that don't know about the ``async`` and
+``await`` keywords, so the code here drives awaitables using plain generators
+and future callbacks, in the spirit of Twisted's ``inlineCallbacks``.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+
+from functools import wraps
+from inspect import isgenerator
+
+
+try:
+    _ensure_future = asyncio.ensure_future
+except AttributeError: # Python 3.4.3 and older
+    _ensure_future = getattr(asyncio, 'async')
+
+try:
+    from inspect import isawaitable as _isawaitable
+except ImportError: # Python 3.4 and older
+    def _isawaitable(obj):
+        return False
+
+
+class Return(Exception):
+    """Raise this from a generator decorated with :func:`inline_future` to
+    resolve the resulting future with the given value. It's the equivalent of
+    ``return value`` in a regular coroutine."""
+
+    def __init__(self, value=None):
+        super(Return, self).__init__(value)
+        self.value = value
+
+
+def is_awaitable(obj):
+    """Returns True when ``obj`` is a coroutine object, a future, or anything
+    else that can be awaited. Plain generators, like the ones returned by
+    methods that yield their results, are not awaitable."""
+
+    # asyncio.iscoroutine() is True for any generator before Python 3.12. Only
+    # the ones that are decorated with types.coroutine can be awaited.
+    if isgenerator(obj):
+        return _isawaitable(obj)
+
+    return isinstance(obj, asyncio.Future) or asyncio.iscoroutine(obj) or \
+                                                      hasattr(obj, '__await__')
+
+
+def is_async_iterable(obj):
+    """Returns True when ``obj`` is an asynchronous iterator, e.g. an object
+    returned by an ``async def`` function that has ``yield`` statements in
+    it."""
+
+    return hasattr(obj, '__anext__')
+
+
+def ensure_future(obj, loop=None):
+    """Wraps the given awaitable in a future. Futures are returned as-is."""
+
+    if isinstance(obj, asyncio.Future):
+        return obj
+
+    return _ensure_future(obj, loop=loop)
+
+
+def inline_future(func):
+    """Decorator that turns a generator function into a function that returns
+    an :class:`asyncio.Future`. The generator yields awaitables and gets their
+    results back, or the exception they raised thrown into it. Raise
+    :class:`Return` to resolve the future with a value."""
+
+    assert callable(func)
+
+    @wraps(func)
+    def _wrapper(*args, **kwargs):
+        loop = kwargs.pop('loop', None)
+        if loop is None:
+            loop = asyncio.get_event_loop()
+
+        retval = asyncio.Future(loop=loop)
+
+        try:
+            gen = func(*args, **kwargs)
+
+        except Return as r:
+            retval.set_result(r.value)
+            return retval
+
+        except Exception as e:
+            retval.set_exception(e)
+            return retval
+
+        if not isgenerator(gen):
+            retval.set_result(gen)
+            return retval
+
+        _step(gen, retval, loop, None, None)
+
+        return retval
+
+    return _wrapper
+
+
+def _step(gen, retval, loop, value, exc):
+    while True:
+        try:
+            if exc is None:
+                awaitable = gen.send(value)
+            else:
+                awaitable = gen.throw(exc)
+
+        except (StopIteration, Return) as r:
+            if not retval.done():
+                retval.set_result(getattr(r, 'value', None))
+            return
+
+        except Exception as e:
+            if not retval.done():
+                retval.set_exception(e)
+            return
+
+        if not is_awaitable(awaitable):
+            # allow yielding plain values, they are sent back as-is.
+            value, exc = awaitable, None
+            continue
+
+        future = ensure_future(awaitable, loop=loop)
+        if future.done():
+            value, exc = _get_result(future)
+            continue
+
+        def _cb_step(f):
+            v, e = _get_result(f)
+            _step(gen, retval, loop, v, e)
+
+        future.add_done_callback(_cb_step)
+        return
+
+
+def _get_result(future):
+    if future.cancelled():
+        return None, asyncio.CancelledError()
+
+    exc = future.exception()
+    if exc is not None:
+        return None, exc
+
+    return future.result(), None
+
+
+def iterate_async(aiter, callback, loop=None):
+    """Consumes the given asynchronous iterator by calling ``callback`` for
+    every item it produces. Returns a future that is resolved when the
+    iterator is exhausted."""
+
+    @inline_future
+    def _iterate():
+        while True:
+            try:
+                item = yield aiter.__anext__()
+            except StopAsyncIteration:
+                break
+
+            callback(item)
+
+    return _iterate(loop=loop)
+
+
+def chain_future(prev, func, loop=None):
+    """Calls the ``func`` after the ``prev`` future is done and returns a future
+    that is resolved with the return value of ``func`` once it is done, after
+    awaiting it if necessary. This is used for preserving the order of
+    asynchronous operations."""
+
+    @inline_future
+    def _chain():
+        if prev is not None:
+            yield prev
+
+        ret = func()
+        if is_awaitable(ret):
+            ret = yield ret
+
+        raise Return(ret)
+
+    return _chain(loop=loop)
+
+
+try:
+    StopAsyncIteration = StopAsyncIteration
+except NameError: # Python < 3.5
+    class StopAsyncIteration(Exception):
+        pass
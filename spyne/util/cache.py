@@ -0,0 +1,484 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.cache`` module contains the response cache for idempotent
+methods. It's enabled per method by passing a :class:`ResponseCache` instance
+as the ``_cache`` argument of the ``@rpc`` and ``@srpc`` decorators: ::
+
+    class LookupService(ServiceBase):
+        @rpc(Unicode, _returns=Country,
+                _cache=ResponseCache(ttl=300, vary=['Accept-Language']))
+        def get_country(ctx, code):
+            return load_country(code)
+
+Responses are cached by method, the normalized input arguments and input
+headers (like SOAP headers) and the values of the request headers listed in
+``vary``. On a cache hit, the user
+function is not called. The serialized response is cached as well, once per
+output protocol, so that a hit skips serialization too.
+
+The ``method_call`` and ``method_return_object`` events still fire on cache
+hits, so access control done in event handlers keeps working.
+
+Http transports add ``Cache-Control``, ``Vary`` and ``ETag`` headers to the
+responses of cached methods and answer matching ``If-None-Match`` requests
+with ``304 Not Modified``. Streamed responses don't get an ``ETag``, as their
+headers are sent before the body is known.
+
+Responses that contain generators, :class:`spyne.model.PushBase` instances or
+anything else that's not a plain value are not cached. Neither are errors.
+
+Return values are copied when they're stored and every hit gets its own copy,
+so changes made to them by user code, event listeners or protocols don't leak
+into the cache. Pass ``copy_values=False`` to skip the copies for methods whose
+return values are never modified once they're returned.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import errno
+import hashlib
+import tempfile
+import threading
+
+from copy import deepcopy
+from inspect import isgenerator
+from time import time
+
+from spyne.util.odict import odict
+from spyne.util.six import PY3, binary_type, text_type
+from spyne.util.six.moves import cPickle as pickle
+
+
+class LruBackend(object):
+    """An in-process cache backend that evicts the least recently used entry
+    when it's full.
+
+    :param max_entries: The maximum number of entries to keep.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = odict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, None)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            del self._data[key]
+            if expires < time():
+                return None
+
+            # move to the end as it's the most recently used entry now.
+            self._data[key] = entry
+
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+
+            self._data[key] = (time() + ttl, value)
+
+            while len(self._data) > self.max_entries:
+                del self._data[next(iter(self._data))]
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data = odict()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FileBackend(object):
+    """A cache backend that stores every entry in a file in the given
+    directory, so that it's shared by all processes that use the same
+    directory. Putting the directory on a memory-backed file system like
+    ``/dev/shm`` makes it a shared memory cache.
+
+    The values must be picklable. Expired entries are deleted when they are
+    read or when :meth:`purge` is called.
+
+    :param directory: The directory to store the entries in. It's created if
+        it doesn't exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                # another worker could have created it in the meantime.
+                if e.errno != errno.EEXIST:
+                    raise
+
+    def _get_path(self, key):
+        if isinstance(key, text_type):
+            key = key.encode('utf8')
+
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def get(self, key):
+        path = self._get_path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                expires, value = pickle.load(f)
+
+        except (IOError, OSError):
+            return None
+
+        except Exception as e:
+            logger.exception(e)
+            return None
+
+        if expires < time():
+            self._unlink(path)
+            return None
+
+        return value
+
+    def set(self, key, value, ttl):
+        try:
+            data = pickle.dumps((time() + ttl, value), pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.error("Response not cached: %r", e)
+            return
+
+        # write to a temporary file first, so that readers never see a
+        # partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp_path, self._get_path(key))
+
+        except Exception:
+            self._unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        self._unlink(self._get_path(key))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            self._unlink(os.path.join(self.directory, name))
+
+    def purge(self):
+        """Deletes the expired entries."""
+
+        now = time()
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp'):
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    expires, _ = pickle.load(f)
+            except Exception:
+                continue
+
+            if expires < now:
+                self._unlink(path)
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class CachedResponse(object):
+    """A cache entry. Holds the return value of the user function along with
+    its serialized forms per output protocol."""
+
+    def __init__(self, out_object, out_header, expires):
+        self.out_object = out_object
+        self.out_header = out_header
+        self.expires = expires
+        self.strings = {}
+
+
+def normalize(value):
+    """Converts the given native value to a hashable structure made of tuples
+    and scalars that compares equal for equal values."""
+
+    from spyne.model.complex import ComplexModelBase
+
+    if isinstance(value, ComplexModelBase):
+        cls = value.__class__
+        return (cls.get_namespace(), cls.get_type_name(),
+            tuple([(k, normalize(getattr(value, k, None)))
+                                     for k in cls.get_flat_type_info(cls)]))
+
+    if isinstance(value, (list, tuple)):
+        return tuple([normalize(v) for v in value])
+
+    if isinstance(value, dict):
+        return tuple(sorted([(k, normalize(v)) for k, v in value.items()]))
+
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted([normalize(v) for v in value]))
+
+    return value
+
+
+def _is_cacheable(out_object):
+    if out_object is None:
+        return True
+
+    from spyne.model import PushBase
+
+    for v in out_object:
+        if isgenerator(v) or isinstance(v, PushBase):
+            return False
+
+        # deferreds, futures, coroutines and the like
+        if hasattr(v, 'addCallback') or hasattr(v, 'add_done_callback') or \
+                                                      hasattr(v, '__await__'):
+            return False
+
+    return True
+
+
+def get_out_string(ctx):
+    """Returns ``ctx.out_string`` as a single byte string, or ``None`` if it's
+    empty. Protocols that write the response directly to ``ctx.out_stream``
+    leave an empty ``ctx.out_string`` behind.
+
+    Lazily serialized responses are consumed and ``ctx.out_string`` is
+    replaced by a list with the returned string. So this must only be called
+    for responses that are plain values, not streams of pushed values.
+    """
+
+    out_string = ctx.out_string
+    if out_string is None:
+        return None
+
+    data = []
+    for s in out_string:
+        if isinstance(s, text_type):
+            s = s.encode('utf8')
+        data.append(s)
+
+    retval = binary_type().join(data)
+    if not isinstance(out_string, (list, tuple)):
+        ctx.out_string = [retval]
+
+    if len(retval) == 0:
+        return None
+
+    return retval
+
+
+def get_etag(ctx):
+    """Returns a weak ETag for the serialized response in the given context,
+    or ``None`` if :func:`get_out_string` returns ``None``. The tag is weak
+    because compression changes the bytes but not the meaning of the
+    response."""
+
+    out_string = get_out_string(ctx)
+    if out_string is None:
+        return None
+
+    return 'W/"%s"' % hashlib.sha1(out_string).hexdigest()
+
+
+def get_request_header(ctx, name):
+    """Returns the value of the request header with the given name, or
+    ``None`` if it's not present or the transport has no headers."""
+
+    getter = getattr(ctx.transport, 'get_request_header', None)
+    if getter is None:
+        return None
+
+    try:
+        return getter(name)
+    except NotImplementedError:
+        return None
+
+
+def get_request_key(ctx, vary=()):
+    """Returns a key that's equal for requests to the same method with equal
+    input, equal input headers and equal values of the request headers with
+    the names in ``vary``. Must be called before the user function, which may
+    alter ``ctx.in_object``."""
+
+    vary_values = ()
+    if vary:
+        vary_values = tuple([get_request_header(ctx, name) for name in vary])
+
+    # input headers are part of the key as they often carry credentials.
+    retval = repr((ctx.descriptor.key, normalize(ctx.in_object),
+                                       normalize(ctx.in_header), vary_values))
+    if PY3:
+        retval = retval.encode('utf8')
+
+    return hashlib.sha1(retval).hexdigest()
+
+
+class ResponseCache(object):
+    """The response cache policy of a method. See the module documentation
+    for an overview.
+
+    :param ttl: The number of seconds a response is cached for.
+    :param max_entries: The size of the default :class:`LruBackend`.
+        Ignored when ``backend`` is given.
+    :param vary: The names of the request headers whose values are part of
+        the cache key. They are also sent in the ``Vary`` response header.
+    :param backend: The object that stores the responses, like an
+        :class:`LruBackend` or :class:`FileBackend` instance. It can be
+        shared between methods.
+    :param cache_strings: When True, serialized responses are cached as
+        well.
+    :param public: When True, ``Cache-Control`` allows shared caches like
+        proxies to store responses. Otherwise they are marked ``private``.
+    :param copy_values: When True, return values are deep-copied when they're
+        stored and on every hit. When False, every hit gets the same instances,
+        which must then be treated as immutable. The :class:`FileBackend`
+        returns new instances on every hit regardless.
+    """
+
+    def __init__(self, ttl=60, max_entries=1024, vary=(), backend=None,
+                           cache_strings=True, public=False, copy_values=True):
+        self.ttl = ttl
+        self.vary = tuple(vary)
+        self.cache_strings = cache_strings
+        self.public = public
+        self.copy_values = copy_values
+
+        if backend is None:
+            backend = LruBackend(max_entries)
+        self.backend = backend
+
+    def get_key(self, ctx):
+        """Returns the cache key of the request in the given context."""
+
+        return get_request_key(ctx, self.vary)
+
+    @staticmethod
+    def get_protocol_key(ctx):
+        """Returns the key that identifies the output protocol of the given
+        context among the serialized responses of a cache entry."""
+
+        prot = ctx.out_protocol
+        return '%s.%s:%s' % (prot.__class__.__module__,
+                                prot.__class__.__name__, prot.mime_type)
+
+    def get_response(self, ctx):
+        """Looks up the response to the request in the given context. On a
+        hit, sets ``ctx.out_object`` and ``ctx.out_header`` and also
+        ``ctx.out_string`` when the response was already serialized with the
+        output protocol of the context, and returns True. Sets
+        ``ctx.cache_key`` either way."""
+
+        ctx.cache_key = key = self.get_key(ctx)
+
+        entry = self.backend.get(key)
+        if entry is None:
+            return False
+
+        ctx.out_object = entry.out_object
+        ctx.out_header = entry.out_header
+        if self.copy_values:
+            ctx.out_object = deepcopy(ctx.out_object)
+            ctx.out_header = deepcopy(ctx.out_header)
+
+        # some protocols turn headers into transport headers while
+        # serializing, so the serialization can't be skipped.
+        if self.cache_strings and entry.out_header is None:
+            out_string = entry.strings.get(self.get_protocol_key(ctx), None)
+            if out_string is not None:
+                ctx.out_string = [out_string]
+
+        return True
+
+    def set_response(self, ctx):
+        """Stores the return value of the user function in the given
+        context, if it can be cached."""
+
+        if ctx.out_error is not None or ctx.cache_key is None:
+            return
+
+        if not _is_cacheable(ctx.out_object):
+            ctx.cache_key = None
+            return
+
+        out_object, out_header = ctx.out_object, ctx.out_header
+        if self.copy_values:
+            try:
+                out_object = deepcopy(out_object)
+                out_header = deepcopy(out_header)
+
+            except Exception as e:
+                logger.error("Response not cached: %r", e)
+                ctx.cache_key = None
+                return
+
+        entry = CachedResponse(out_object, out_header, time() + self.ttl)
+        self.backend.set(ctx.cache_key, entry, self.ttl)
+
+    def set_string(self, ctx):
+        """Adds the serialized response in the given context to its cache
+        entry."""
+
+        if not self.cache_strings or ctx.out_error is not None \
+               or ctx.out_header is not None or ctx.cache_key is None:
+            return
+
+        out_string = get_out_string(ctx)
+        if out_string is None:
+            return
+
+        entry = self.backend.get(ctx.cache_key)
+        if entry is None:
+            return
+
+        # the entry must not outlive the original ttl.
+        ttl = entry.expires - time()
+        if ttl <= 0:
+            return
+
+        entry.strings[self.get_protocol_key(ctx)] = out_string
+        self.backend.set(ctx.cache_key, entry, ttl)
+
+    def get_cache_control(self):
+        """Returns the value of the ``Cache-Control`` response header."""
+
+        if self.public:
+            return 'public, max-age=%d' % self.ttl
+        return 'private, max-age=%d' % self.ttl
@@ -0,0 +1,247 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.coalesce`` module contains the request coalescing
+("single-flight") logic. It's enabled per method by passing ``_coalesce=True``
+or a :class:`SingleFlight` instance to the ``@rpc`` and ``@srpc``
+decorators: ::
+
+    class ReportService(ServiceBase):
+        @rpc(Date, _returns=Report, _coalesce=True)
+        def get_report(ctx, day):
+            return build_expensive_report(day)
+
+Concurrent calls to such a method with equal arguments share a single
+execution of the user function: The first call runs it, the calls that
+arrive while it's running wait for it and get the same return value, or the
+same exception. Calls that share an output protocol also share the
+serialized response.
+
+This works with threaded servers like the WSGI one, and with Twisted when
+the user function returns a ``Deferred``: Calls that arrive before the
+``Deferred`` fires get their own ``Deferred`` that fires with the same
+result.
+
+As every caller gets the response of the first one, this is only safe for
+methods whose response depends solely on their arguments (and the request
+headers listed in ``vary``). Return values that can only be consumed once,
+like generators, are not shared. The calls that waited for them run the user
+function themselves.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import threading
+
+from inspect import isgenerator
+
+from spyne.util.cache import ResponseCache
+from spyne.util.cache import get_out_string
+from spyne.util.cache import get_request_key
+
+
+def _is_shareable(retval):
+    from spyne.model import PushBase
+
+    return not (isgenerator(retval) or isinstance(retval, PushBase))
+
+
+class Flight(object):
+    """An execution of the user function that's shared by concurrent calls.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        """Set once the user function returns or raises."""
+
+        self.shareable = True
+        self.result = None
+        self.error = None
+        self.out_header = None
+
+        self.deferred = None
+        """The ``Deferred`` the user function returned, if any."""
+
+        self.waiters = []
+        """The ``Deferred`` instances of the calls waiting for
+        ``self.deferred`` to fire. Set to ``None`` once it fires."""
+
+        self.strings = {}
+        """A dict of protocol keys to the serialized responses."""
+
+        self._lock = threading.Lock()
+        self._string_locks = {}
+
+    def get_out_string(self, ctx, func):
+        """Sets ``ctx.out_string`` to the response that was serialized for
+        another call with the same output protocol. Otherwise calls
+        ``func(ctx)`` to serialize it and makes it available to the other
+        calls. Calls with the same output protocol serialize one at a time,
+        so the response is only serialized once."""
+
+        if ctx.out_error is not None or ctx.out_header is not None:
+            # some protocols turn headers into transport headers while
+            # serializing, so the serialization can't be skipped.
+            return func(ctx)
+
+        if ctx.out_stream is not None and 'stream' in ctx.out_protocol.type:
+            # the response is written directly to the transport.
+            return func(ctx)
+
+        key = ResponseCache.get_protocol_key(ctx)
+        with self._lock:
+            lock = self._string_locks.get(key, None)
+            if lock is None:
+                lock = self._string_locks[key] = threading.Lock()
+
+        with lock:
+            out_string = self.strings.get(key, None)
+            if out_string is not None:
+                ctx.out_string = [out_string]
+                return
+
+            func(ctx)
+
+            if ctx.out_error is None:
+                out_string = get_out_string(ctx)
+                if out_string is not None:
+                    self.strings[key] = out_string
+
+
+class SingleFlight(object):
+    """The request coalescing policy of a method. See the module
+    documentation for an overview.
+
+    :param vary: The names of the request headers whose values must be equal
+        for two calls to be coalesced.
+    :param timeout: The maximum number of seconds a call waits for the
+        running one. When it's exceeded, the call runs the user function
+        itself. ``None`` means no limit.
+    """
+
+    def __init__(self, vary=(), timeout=None):
+        self.vary = tuple(vary)
+        self.timeout = timeout
+
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of executions in progress."""
+
+        return len(self._flights)
+
+    def call(self, ctx, func):
+        """Returns the return value of ``func(ctx)``, running it only if
+        there's no running execution for an equal call."""
+
+        key = get_request_key(ctx, self.vary)
+
+        with self._lock:
+            flight = self._flights.get(key, None)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        ctx.flight = flight
+
+        if leader:
+            return self._lead(key, flight, ctx, func)
+        return self._follow(flight, ctx, func)
+
+    def _land(self, key, flight):
+        with self._lock:
+            if self._flights.get(key, None) is flight:
+                del self._flights[key]
+
+    def _lead(self, key, flight, ctx, func):
+        try:
+            retval = func(ctx)
+
+        except Exception as e:
+            flight.error = e
+            self._land(key, flight)
+            flight.done.set()
+            raise
+
+        if not _is_shareable(retval):
+            flight.shareable = False
+            ctx.flight = None
+            self._land(key, flight)
+
+        elif hasattr(retval, 'addBoth'):
+            # the flight lands when the deferred fires.
+            flight.deferred = retval
+            retval.addBoth(self._on_result, key, flight)
+
+        else:
+            flight.result = retval
+            flight.out_header = ctx.out_header
+            self._land(key, flight)
+
+        flight.done.set()
+
+        return retval
+
+    def _on_result(self, result, key, flight):
+        self._land(key, flight)
+
+        with self._lock:
+            flight.result = result
+            waiters, flight.waiters = flight.waiters, None
+
+        # callback() takes failures as well and runs the errbacks for them.
+        for d in waiters:
+            d.callback(result)
+
+        return result
+
+    def _follow(self, flight, ctx, func):
+        flight.done.wait(self.timeout)
+
+        if not flight.done.is_set():
+            logger.warning("Timed out waiting for a coalesced call to %r, "
+                                           "calling it again.", ctx.method_name)
+            ctx.flight = None
+            return func(ctx)
+
+        if not flight.shareable:
+            ctx.flight = None
+            return func(ctx)
+
+        if flight.error is not None:
+            raise flight.error
+
+        if flight.deferred is not None:
+            retval = flight.deferred.__class__()
+
+            with self._lock:
+                if flight.waiters is not None:
+                    flight.waiters.append(retval)
+                    return retval
+
+            retval.callback(flight.result)
+            return retval
+
+        ctx.out_header = flight.out_header
+
+        return flight.result
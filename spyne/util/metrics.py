@@ -0,0 +1,378 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.metrics`` module contains a metrics collector that keeps
+request counters, error counters and latency histograms per method, in-flight
+request gauges per transport and byte counters, and exports them in the
+Prometheus text format. ::
+
+    metrics = Metrics(app)
+    wsgi_app = WsgiApplication(app, metrics=metrics)
+
+Now ``GET /metrics`` returns the current values. See the ``metrics_path``
+argument of the http transports to change the path of the endpoint.
+
+The collector is fed by the ``method_context_created`` and
+``method_context_closed`` events of the application. Every thread updates its
+own set of counters so that the request path never waits for a lock, the
+per-thread values are only added up when the metrics are exported.
+"""
+
+from __future__ import absolute_import
+
+import threading
+
+from spyne.util.timing import DEFAULT_BUCKETS
+from spyne.util.timing import Histogram
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+"""The mime type of the Prometheus text exposition format."""
+
+
+def _escape(s):
+    return s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(f):
+    if f == float('inf'):
+        return '+Inf'
+    return repr(float(f))
+
+
+def _get_length(data):
+    if data is None:
+        return None
+
+    if isinstance(data, (list, tuple)):
+        try:
+            return sum([len(d) for d in data])
+        except TypeError:
+            return None
+
+    return None
+
+
+def _get_content_length(ctx):
+    """Returns the length of the request body as it was received, or ``None``
+    if it's not known."""
+
+    transport = ctx._transport
+    if transport is None:
+        return None
+
+    req = getattr(transport, 'req', None)
+    if req is None:
+        return None
+
+    if isinstance(req, dict):  # wsgi
+        retval = req.get('CONTENT_LENGTH', None)
+    else:  # twisted
+        getter = getattr(req, 'getHeader', None)
+        if getter is None:
+            return None
+        retval = getter('content-length')
+
+    if not retval:
+        return None
+
+    try:
+        return int(retval)
+    except ValueError:
+        return None
+
+
+def _get_response_length(ctx):
+    """Returns the length of the response body as it was sent, or ``None`` if
+    it's not known."""
+
+    transport = ctx._transport
+    if transport is not None:
+        resp_headers = getattr(transport, 'resp_headers', None)
+        if resp_headers:
+            retval = resp_headers.get('Content-Length', None)
+            if retval is not None:
+                try:
+                    return int(retval)
+                except ValueError:
+                    pass
+
+    return _get_length(ctx.out_string)
+
+
+class _Shard(object):
+    """The counters of a single thread."""
+
+    __slots__ = ('requests', 'errors', 'latency', 'in_bytes', 'out_bytes')
+
+    def __init__(self):
+        self.requests = {}
+        self.errors = {}
+        self.latency = {}
+        self.in_bytes = {}
+        self.out_bytes = {}
+
+
+class Metrics(object):
+    """Collects request metrics of an application.
+
+    The following metrics are exported, with ``prefix`` prepended to their
+    names:
+
+        * ``requests_total``: Counter of finished requests per method.
+        * ``errors_total``: Counter of failed requests per method and fault
+          code. Requests that could not be mapped to a method are counted with
+          an empty method label.
+        * ``request_duration_seconds``: Histogram of the time from the creation
+          to the closing of method contexts, per method.
+        * ``in_flight_requests``: Gauge of the method contexts that are not
+          closed yet, per transport.
+        * ``received_bytes_total`` and ``sent_bytes_total``: Counters of
+          request and response body sizes per transport, where they are
+          known.
+
+    :param app: The :class:`spyne.application.Application` to collect metrics
+        from. Can be ``None``, in which case :meth:`attach` must be called
+        later.
+    :param buckets: The bucket boundaries of the latency histograms, in
+        seconds.
+    :param prefix: The prefix of the names of exported metrics.
+    """
+
+    def __init__(self, app=None, buckets=DEFAULT_BUCKETS, prefix='spyne_'):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+        # id(ctx) -> transport name. Dict item assignment and pop() are atomic
+        # so no lock is needed here.
+        self._in_flight = {}
+
+        if app is not None:
+            self.attach(app)
+
+    def attach(self, app):
+        """Starts collecting metrics from the given application."""
+
+        app.event_manager.add_listener('method_context_created',
+                                                             self._on_created)
+        app.event_manager.add_listener('method_context_closed',
+                                                              self._on_closed)
+
+    def _get_shard(self):
+        retval = getattr(self._local, 'shard', None)
+        if retval is None:
+            retval = self._local.shard = _Shard()
+
+            # this happens once per thread.
+            with self._shards_lock:
+                self._shards.append(retval)
+
+        return retval
+
+    @staticmethod
+    def get_transport_name(ctx):
+        """Returns the value of the ``transport`` label for the given context.
+        Override this to group transports differently."""
+
+        return ctx._server.__class__.__name__
+
+    def _on_created(self, ctx):
+        self._in_flight[id(ctx)] = self.get_transport_name(ctx)
+
+    def _on_closed(self, ctx):
+        transport = self._in_flight.pop(id(ctx), None)
+
+        # auxiliary contexts are copies of the primary context.
+        if ctx.aux is not None:
+            return
+
+        shard = self._get_shard()
+
+        # only the contexts that were created by the transport are counted
+        # here, the copies for the calls in a batch request aren't.
+        if transport is not None:
+            length = _get_content_length(ctx)
+            if length is not None:
+                in_bytes = shard.in_bytes
+                in_bytes[transport] = in_bytes.get(transport, 0) + length
+
+            length = _get_response_length(ctx)
+            if length is not None:
+                out_bytes = shard.out_bytes
+                out_bytes[transport] = out_bytes.get(transport, 0) + length
+
+        descriptor = ctx.descriptor
+        error = ctx.out_error
+        if error is None:
+            error = ctx.in_error
+
+        if descriptor is not None:
+            key = descriptor.key
+
+            requests = shard.requests
+            requests[key] = requests.get(key, 0) + 1
+
+            histogram = shard.latency.get(key, None)
+            if histogram is None:
+                histogram = shard.latency[key] = Histogram(self.buckets)
+            histogram.observe(ctx.call_end - ctx.call_start)
+
+        elif error is None:
+            # wsdl requests, batch envelopes and the like.
+            return
+
+        else:
+            key = ''
+
+        if error is not None:
+            code = getattr(error, 'faultcode', None)
+            if code is None:
+                code = error.__class__.__name__
+
+            errors = shard.errors
+            k = (key, code)
+            errors[k] = errors.get(k, 0) + 1
+
+    def _merge(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        requests = {}
+        errors = {}
+        latency = {}
+        in_bytes = {}
+        out_bytes = {}
+
+        for shard in shards:
+            # dict.copy() is atomic, so it's safe against concurrent updates
+            # by the thread that owns the shard.
+            for src, dst in ((shard.requests, requests),
+                             (shard.errors, errors),
+                             (shard.in_bytes, in_bytes),
+                             (shard.out_bytes, out_bytes)):
+                for k, v in src.copy().items():
+                    dst[k] = dst.get(k, 0) + v
+
+            for k, h in shard.latency.copy().items():
+                merged = latency.get(k, None)
+                if merged is None:
+                    merged = latency[k] = Histogram(self.buckets)
+
+                counts = list(h.counts)
+                for i, n in enumerate(counts):
+                    merged.counts[i] += n
+                merged.count += sum(counts)
+                merged.sum += h.sum
+
+        in_flight = {}
+        for transport in list(self._in_flight.values()):
+            in_flight[transport] = in_flight.get(transport, 0) + 1
+
+        return requests, errors, latency, in_flight, in_bytes, out_bytes
+
+    def get_values(self):
+        """Returns a dict with the current values of all metrics, which is
+        mostly useful for testing."""
+
+        requests, errors, latency, in_flight, in_bytes, out_bytes = \
+                                                                  self._merge()
+
+        return {
+            'requests': requests,
+            'errors': errors,
+            'latency': dict([(k, (h.count, h.sum)) for k, h in latency.items()]),
+            'in_flight': in_flight,
+            'in_bytes': in_bytes,
+            'out_bytes': out_bytes,
+        }
+
+    def to_prometheus(self):
+        """Returns the current values of the metrics in the Prometheus text
+        exposition format, as a unicode string."""
+
+        requests, errors, latency, in_flight, in_bytes, out_bytes = \
+                                                                  self._merge()
+        p = self.prefix
+        retval = []
+
+        def header(name, kind, text):
+            retval.append(u'# HELP %s%s %s' % (p, name, text))
+            retval.append(u'# TYPE %s%s %s' % (p, name, kind))
+
+        header('requests_total', 'counter', 'Number of finished requests.')
+        for k in sorted(requests):
+            retval.append(u'%srequests_total{method="%s"} %d' %
+                                                (p, _escape(k), requests[k]))
+
+        header('errors_total', 'counter', 'Number of failed requests.')
+        for k, code in sorted(errors):
+            retval.append(u'%serrors_total{method="%s",code="%s"} %d' %
+                       (p, _escape(k), _escape(code), errors[(k, code)]))
+
+        header('request_duration_seconds', 'histogram',
+                                      'Time spent processing requests.')
+        for k in sorted(latency):
+            h = latency[k]
+            method = _escape(k)
+
+            cumulative = 0
+            for le, n in zip(h.buckets + (float('inf'),), h.counts):
+                cumulative += n
+                retval.append(u'%srequest_duration_seconds_bucket'
+                              u'{method="%s",le="%s"} %d' %
+                                    (p, method, _format_float(le), cumulative))
+
+            retval.append(u'%srequest_duration_seconds_sum{method="%s"} %s' %
+                                             (p, method, _format_float(h.sum)))
+            retval.append(u'%srequest_duration_seconds_count{method="%s"} %d' %
+                                                         (p, method, h.count))
+
+        header('in_flight_requests', 'gauge',
+                                        'Number of requests being processed.')
+        for k in sorted(in_flight):
+            retval.append(u'%sin_flight_requests{transport="%s"} %d' %
+                                               (p, _escape(k), in_flight[k]))
+
+        header('received_bytes_total', 'counter',
+                                        'Size of received request bodies.')
+        for k in sorted(in_bytes):
+            retval.append(u'%sreceived_bytes_total{transport="%s"} %d' %
+                                                (p, _escape(k), in_bytes[k]))
+
+        header('sent_bytes_total', 'counter', 'Size of sent response bodies.')
+        for k in sorted(out_bytes):
+            retval.append(u'%ssent_bytes_total{transport="%s"} %d' %
+                                               (p, _escape(k), out_bytes[k]))
+
+        retval.append(u'')
+
+        return u'\n'.join(retval)
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.requests.clear()
+                shard.errors.clear()
+                shard.latency.clear()
+                shard.in_bytes.clear()
+                shard.out_bytes.clear()
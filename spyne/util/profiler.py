@@ -0,0 +1,263 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.profiler`` module contains a sampling profiler that
+profiles a subset of the requests a server processes, which makes it cheap
+enough to run under production traffic. ::
+
+    profiler = SamplingProfiler(every=100, methods=['get_report'])
+    profiler.attach(wsgi_app)
+    profiler.install_signal_handler('/tmp/profiles')
+
+    # kill -USR2 <pid> now writes a collapsed-stack file per method to
+    # /tmp/profiles, which can be fed to flamegraph.pl or speedscope.
+
+A background thread periodically samples the stacks of the threads that are
+processing a picked request. Only the processing phases that
+:class:`spyne.server.ServerBase` instruments are sampled (see
+:data:`spyne.util.timing.PHASES`), so the stacks show where the time goes in
+parsing, deserialization, the user code and serialization without the noise
+of the surrounding server code. Serialization that's deferred to the time the
+response is sent out, like when returning generators, is not covered.
+"""
+
+from __future__ import absolute_import
+
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import sys
+import threading
+
+from time import sleep
+
+from spyne.util.six.moves import _thread
+
+
+class SamplingProfiler(object):
+    """Samples the call stacks of picked requests and aggregates them per
+    method.
+
+    Requests are picked either because they are the ``every``-th request
+    the server receives, or because they are calls to one of the methods in
+    ``methods``. The method of a request is only known once its envelope
+    is decomposed, so requests picked by their method are profiled from
+    deserialization on.
+
+    :param every: Profile one in this many requests. ``None`` disables
+        picking requests by their order.
+    :param methods: Profile the calls to the methods with these names. Both
+        public names and ``'{namespace}name'`` keys are accepted.
+    :param interval: The time between two samples, in seconds.
+    :param max_depth: The maximum number of frames kept from every stack,
+        counted from the innermost one.
+    """
+
+    def __init__(self, every=None, methods=(), interval=0.001, max_depth=128):
+        self.every = every
+        self.methods = frozenset(methods)
+        self.interval = interval
+        self.max_depth = max_depth
+
+        self.stacks = {}
+        """A dict of method keys to dicts of collapsed stacks to the number of
+        times they were sampled."""
+
+        self._count = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def attach(self, server):
+        """Starts picking the requests of the given
+        :class:`spyne.server.ServerBase` instance to profile. For
+        :class:`spyne.server.twisted.TwistedWebResource`, pass its
+        ``http_transport`` attribute."""
+
+        server.profiler = self
+
+    def sample_request(self, ctx):
+        """Called by the server for every incoming request."""
+
+        every = self.every
+        if not every:
+            return
+
+        # this is not thread-safe but losing an increment now and then only
+        # makes the sampling rate a tiny bit off.
+        self._count = count = self._count + 1
+        if count % every == 0:
+            self._pick(ctx)
+
+    def sample_method(self, ctx):
+        """Called by the server once the method of the request is known."""
+
+        if ctx.profiler is not None or not self.methods:
+            return
+
+        descriptor = ctx.descriptor
+        if descriptor is None:
+            return
+
+        if descriptor.name in self.methods or descriptor.key in self.methods:
+            self._pick(ctx)
+
+    def _pick(self, ctx):
+        ctx.profiler = self
+
+        # processing phases are only instrumented when this is not None.
+        if ctx.timings is None:
+            ctx.timings = {}
+
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run,
+                                                      name='SamplingProfiler')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stops the sampler thread. It's started again when the next request
+        is picked."""
+
+        with self._lock:
+            thread = self._thread
+            self._stopped = True
+            self._thread = None
+
+        if thread is not None:
+            thread.join()
+
+    def enter(self, ctx):
+        """Called when a thread starts processing a phase of a picked
+        request."""
+
+        self._active[_thread.get_ident()] = ctx
+
+    def exit(self, ctx):
+        """Called when a thread is done processing a phase of a picked
+        request."""
+
+        self._active.pop(_thread.get_ident(), None)
+
+    def _run(self):
+        while not self._stopped:
+            sleep(self.interval)
+
+            if self._active:
+                try:
+                    self.take_sample()
+                except Exception as e:
+                    logger.exception(e)
+
+    def take_sample(self):
+        """Samples the stacks of the threads that are processing a phase of a
+        picked request."""
+
+        active = list(self._active.items())
+        if not active:
+            return
+
+        frames = sys._current_frames()
+
+        for ident, ctx in active:
+            frame = frames.get(ident, None)
+            if frame is None:
+                continue
+
+            descriptor = ctx.descriptor
+            if descriptor is None:
+                key = ''
+            else:
+                key = descriptor.key
+
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append('%s:%s' % (code.co_filename, code.co_name))
+                frame = frame.f_back
+
+            stack.reverse()
+            stack = ';'.join(stack)
+
+            stacks = self.stacks.get(key, None)
+            if stacks is None:
+                stacks = self.stacks[key] = {}
+            stacks[stack] = stacks.get(stack, 0) + 1
+
+    def get_collapsed(self, key):
+        """Returns the stacks sampled from the calls to the method with the
+        given key in the collapsed format of the ``stackcollapse`` scripts of
+        FlameGraph: One stack per line, frames separated by semicolons and
+        followed by the number of samples."""
+
+        stacks = dict(self.stacks.get(key, {}))
+
+        return ''.join(['%s %d\n' % (stack, stacks[stack])
+                                                     for stack in sorted(stacks)])
+
+    def dump(self, directory):
+        """Writes the collapsed stacks of every method to a file named after
+        the method in the given directory. Returns the list of file names."""
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        retval = []
+        for key in sorted(self.stacks):
+            name = key.rpartition('}')[2] or '_unknown'
+            file_name = os.path.join(directory, '%s.collapsed' % name)
+
+            with open(file_name, 'w') as f:
+                f.write(self.get_collapsed(key))
+
+            retval.append(file_name)
+
+        return retval
+
+    def install_signal_handler(self, directory, signum=None):
+        """Makes the given signal dump the collapsed stacks to the given
+        directory. The default signal is ``SIGUSR2``. Must be called from the
+        main thread."""
+
+        import signal
+
+        if signum is None:
+            signum = signal.SIGUSR2
+
+        def _handler(signum, frame):
+            try:
+                for file_name in self.dump(directory):
+                    logger.info("Wrote %r", file_name)
+            except Exception as e:
+                logger.exception(e)
+
+        signal.signal(signum, _handler)
+
+    def reset(self):
+        self.stacks.clear()
@@ -0,0 +1,301 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.timing`` module contains utilities to find out where the
+time spent processing a request goes.
+
+Once a :class:`PhaseTimings` instance is attached to an application, every
+method context records the duration of each processing phase in its
+``timings`` attribute, which is a dict of phase names to seconds: ::
+
+    timings = PhaseTimings(app)
+
+    # ... serve some requests ...
+
+    for key, phases in timings.get_stats().items():
+        print(key, phases['deserialize']['mean'])
+
+The phases are measured by :class:`spyne.server.ServerBase` and
+:class:`spyne.application.Application` so every transport gets them for free.
+When no :class:`PhaseTimings` instance is attached, the only overhead is an
+``is None`` check per phase.
+"""
+
+from __future__ import absolute_import
+
+from bisect import bisect_left
+from collections import deque
+from threading import Lock
+from time import time
+
+from spyne.util.odict import odict
+
+
+PHASES = (
+    'create_in_document',
+    'decompose_incoming_envelope',
+    'deserialize',
+    'call',
+    'serialize',
+    'create_out_string',
+)
+"""The names of the phases that are timed, in the order they run. ``call`` is
+the execution of the user function."""
+
+DEFAULT_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05,
+                                                       .1, .25, .5, 1, 2.5, 5)
+"""The default upper bounds of the histogram buckets, in seconds."""
+
+
+def run_phase(ctx, phase, func, *args, **kwargs):
+    """Calls ``func(*args, **kwargs)`` as the processing phase named ``phase``
+    of the given context and returns its return value. When ``ctx.timings`` is
+    not ``None``, the duration of the call is added to it and the phase is
+    also reported to the profiler in ``ctx.profiler``, if any.
+    """
+
+    if ctx.timings is None:
+        return func(*args, **kwargs)
+
+    profiler = ctx.profiler
+    if profiler is not None:
+        profiler.enter(ctx)
+
+    t = time()
+    try:
+        return func(*args, **kwargs)
+
+    finally:
+        timings = ctx.timings
+        timings[phase] = timings.get(phase, 0.0) + time() - t
+
+        if profiler is not None:
+            profiler.exit(ctx)
+
+
+class Histogram(object):
+    """A histogram with fixed bucket boundaries.
+
+    :param buckets: A sorted sequence of upper bucket bounds. Values larger
+        than the last bound are counted in an implicit overflow bucket.
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def quantile(self, q):
+        """Returns an upper bound for the ``q``-quantile, where ``0 < q <= 1``,
+        which is the upper bound of the bucket the quantile falls in. Returns
+        ``None`` when the histogram is empty."""
+
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                if i < len(self.buckets):
+                    return min(self.buckets[i], self.max)
+                return self.max
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.quantile(.5),
+            'p90': self.quantile(.9),
+            'p99': self.quantile(.99),
+            'buckets': list(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+def get_timing_record(ctx):
+    """Returns the timing record of the given method context as a dict with
+    the following keys:
+
+        * ``method``: The key of the method descriptor, or ``None`` when the
+          request could not be mapped to a method.
+        * ``start``: ``ctx.call_start``
+        * ``end``: ``ctx.call_end``, which is ``None`` until the context is
+          closed.
+        * ``total``: The time between the two, or ``None``.
+        * ``phases``: An ordered dict of the durations of the phases that
+          were run, in seconds.
+
+    Returns ``None`` when the context didn't record its timings.
+    """
+
+    timings = ctx.timings
+    if timings is None:
+        return None
+
+    phases = odict()
+    for k in PHASES:
+        if k in timings:
+            phases[k] = timings[k]
+    for k in sorted(timings):
+        if not k in phases:
+            phases[k] = timings[k]
+
+    descriptor = ctx.descriptor
+    total = None
+    if ctx.call_end is not None:
+        total = ctx.call_end - ctx.call_start
+
+    return {
+        'method': None if descriptor is None else descriptor.key,
+        'start': ctx.call_start,
+        'end': ctx.call_end,
+        'total': total,
+        'phases': phases,
+    }
+
+
+class PhaseTimings(object):
+    """Aggregates the phase timings of the requests an application processes
+    in a :class:`Histogram` per method descriptor and phase. The time from the
+    creation of a context to its closing is aggregated under the ``total``
+    key.
+
+    :param app: The :class:`spyne.application.Application` to attach to.
+        Can be ``None``, in which case :meth:`attach` must be called later.
+    :param buckets: The bucket boundaries of the histograms, in seconds.
+    :param keep_records: The number of most recent per-request timing
+        records, as returned by :func:`get_timing_record`, to keep in the
+        ``records`` attribute.
+    :param callback: A callable that's called with the timing record of
+        every request as soon as its context is closed.
+    """
+
+    def __init__(self, app=None, buckets=DEFAULT_BUCKETS, keep_records=0,
+                                                                callback=None):
+        self.buckets = tuple(buckets)
+        self.callback = callback
+
+        self.histograms = {}
+        """A dict of :class:`spyne.MethodDescriptor` instances to dicts of
+        phase names to :class:`Histogram` instances."""
+
+        self.records = deque(maxlen=keep_records)
+        """The most recent timing records."""
+
+        self._lock = Lock()
+
+        if app is not None:
+            self.attach(app)
+
+    def attach(self, app):
+        """Enables timing the requests of the given application."""
+
+        app.phase_timings = self
+        app.event_manager.add_listener('method_context_closed',
+                                                             self._on_closed)
+
+    def _on_closed(self, ctx):
+        # Auxiliary contexts are copies of the primary one so only the latter
+        # is counted.
+        if ctx.aux is not None or ctx.timings is None:
+            return
+
+        self.add(ctx)
+
+    def add(self, ctx):
+        """Adds the timings of the given closed method context to the
+        histograms."""
+
+        descriptor = ctx.descriptor
+        timings = ctx.timings
+        if descriptor is None or timings is None:
+            return
+
+        record = None
+        if self.records.maxlen or self.callback is not None:
+            record = get_timing_record(ctx)
+
+        with self._lock:
+            histograms = self.histograms.get(descriptor, None)
+            if histograms is None:
+                histograms = self.histograms[descriptor] = {}
+
+            for k, v in timings.items():
+                histogram = histograms.get(k, None)
+                if histogram is None:
+                    histogram = histograms[k] = Histogram(self.buckets)
+                histogram.observe(v)
+
+            if ctx.call_end is not None:
+                histogram = histograms.get('total', None)
+                if histogram is None:
+                    histogram = histograms['total'] = Histogram(self.buckets)
+                histogram.observe(ctx.call_end - ctx.call_start)
+
+            if record is not None and self.records.maxlen:
+                self.records.append(record)
+
+        if self.callback is not None:
+            self.callback(record)
+
+    def get_stats(self):
+        """Returns a dict of method keys to dicts of phase names to the
+        summaries of their histograms, as returned by
+        :meth:`Histogram.to_dict`."""
+
+        retval = {}
+        with self._lock:
+            for descriptor, histograms in self.histograms.items():
+                stats = retval.setdefault(descriptor.key, {})
+                for k, histogram in histograms.items():
+                    stats[k] = histogram.to_dict()
+
+        return retval
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.records.clear()